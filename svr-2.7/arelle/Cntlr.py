@@ -617,6 +617,16 @@ class LogHandlerWithXml(logging.Handler):
                                     entityEncode(msg), 
                                     refs))
     
+    def recordToJson(self, logRec):
+        message = { u"text": self.format(logRec) }
+        if logRec.args:
+            for n, v in logRec.args.items():
+                message[n] = v
+        return {u"code": logRec.messageCode,
+                u"level": logRec.levelname.lower(),
+                u"refs": logRec.refs,
+                u"message": message}
+    
 class LogToXmlHandler(LogHandlerWithXml):
     u"""
     .. class:: LogToXmlHandler(filename)
@@ -685,17 +695,7 @@ class LogToBufferHandler(LogHandlerWithXml):
         
         :returns: str -- json representation of messages in the log buffer
         """
-        entries = []
-        for logRec in self.logRecordBuffer:
-            message = { u"text": self.format(logRec) }
-            if logRec.args:
-                for n, v in logRec.args.items():
-                    message[n] = v
-            entry = {u"code": logRec.messageCode,
-                     u"level": logRec.levelname.lower(),
-                     u"refs": logRec.refs,
-                     u"message": message}
-            entries.append(entry)
+        entries = [self.recordToJson(logRec) for logRec in self.logRecordBuffer]
         self.logRecordBuffer = []
         return json.dumps( {u"log": entries} )
     
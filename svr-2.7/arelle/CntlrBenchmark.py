@@ -0,0 +1,235 @@
+u'''
+Use this module to benchmark Arelle over a fixed corpus of filings, such as to detect performance
+regressions before deploying.
+
+Each filing of the corpus is loaded and validated by CntlrCmdLine, with the command line options of
+its corpus entry (selecting disclosure system, dimensions, calculations, formula, rendering, or storing
+to a database by plug-in), in a separate process, so that each run's peak memory is its own.  The
+profile statistics of each run (the time of each phase, as by ModelXbrl.profileStat, such as load,
+validateLinks, validateDimensions, validateCalculations, validateEFM and formula phases) and its peak
+memory (as by Cntlr.memoryUsed) are saved to a JSON results file, and compared to those of a baseline
+results file, reporting phases slower, or memory larger, than the baseline by more than a threshold.
+
+The corpus file is JSON, with command line options for all filings, and the filings:
+
+    {"options": ["--calcDecimals"],
+     "filings": [{"name": "sec-10k", "file": "/corpus/sec/abc-20121231.xml", "options": ["--efm"]},
+                 {"name": "eba-corep", "file": "/corpus/eba/corep.xbrl", "options": ["--formula", "run"], "repeat": 3}]}
+
+$ python -m arelle.CntlrBenchmark --corpus corpus.json --results results.json --baseline baseline.json
+
+The exit status is 1 if any regressions were found (or a filing failed), for use in build scripts.
+'''
+import os, sys, io, time, json, logging, platform, multiprocessing
+from collections import OrderedDict
+from optparse import OptionParser
+from arelle import Cntlr
+
+RESULTS_FORMAT = 1
+
+class ProfileStatsHandler(logging.Handler):
+    u"""Captures the profile statistics (logged by ModelXbrl.logProfileStats) of a run, and counts its errors
+    (messages of INCONSISTENCY or higher level, the default error capture level of ModelXbrl)."""
+    def __init__(self):
+        super(ProfileStatsHandler, self).__init__()
+        self.profileStats = None
+        self.errors = 0
+
+    def emit(self, logRecord):
+        if getattr(logRecord, u"messageCode", None) == u"info:profileStats" and isinstance(logRecord.args, dict):
+            self.profileStats = logRecord.args.get(u"profileStats")
+        elif logRecord.levelno >= logging.WARNING + 3: # INCONSISTENCY
+            self.errors += 1
+
+def benchmarkRun(conn, args):
+    # benchmark process: runs one filing by CntlrCmdLine, sends its phase times, peak memory and errors count
+    logger = logging.getLogger(u"arelle")
+    for inheritedHandler in logger.handlers[:]: # of the benchmark controller, if forked
+        logger.removeHandler(inheritedHandler)
+    handler = ProfileStatsHandler()
+    logger.addHandler(handler)
+    exception = None
+    try:
+        from arelle.CntlrCmdLine import parseAndRun
+        parseAndRun(args + [u"--collectProfileStats", u"--logFile", os.devnull])
+    except Exception, err:
+        exception = u"{0}: {1}".format(err.__class__.__name__, err)
+    stats = handler.profileStats or {}
+    conn.send({u"times": dict((name, stat[1]) for name, stat in stats.items()),
+               u"peakMemory": max([stat[2] for stat in stats.values()] or [0]), # KB
+               u"errors": handler.errors,
+               u"exception": exception if exception or stats else u"no profile statistics (filing not loaded)"})
+    conn.close()
+
+class CntlrBenchmark(Cntlr.Cntlr):
+    u"""
+    .. class:: CntlrBenchmark()
+
+    Controller to run the filings of a benchmark corpus and compare their results to a baseline.
+    """
+    def __init__(self):
+        super(CntlrBenchmark, self).__init__(hasGui=False)
+        self.startLogging(logFileName=u"logToPrint", logFormat=u"[%(messageCode)s] %(message)s")
+
+    def runFiling(self, args, timeout=None):
+        u"""Runs a filing in a benchmark process.
+
+        :param args: Command line arguments of the run (with -f filing)
+        :param timeout: Seconds before the run is terminated, or None
+        :returns: dict -- times by phase, peakMemory (KB), errors (count of messages), and exception (or None)
+        """
+        conn, processConn = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=benchmarkRun, args=(processConn, args))
+        process.start()
+        processConn.close()
+        try:
+            if conn.poll(timeout):
+                return conn.recv()
+            failure = _(u"exceeded {0} seconds").format(timeout)
+        except (EOFError, IOError):
+            failure = _(u"benchmark process failed")
+        finally:
+            if timeout and process.is_alive():
+                process.terminate()
+            process.join()
+            conn.close()
+        return {u"times": {}, u"peakMemory": 0, u"errors": 0, u"exception": failure}
+
+    def runCorpus(self, corpusFile, repeat=1, timeout=None):
+        u"""Runs the filings of a corpus, each filing repeated (for its best times) as specified by the filing or repeat.
+
+        :returns: OrderedDict -- results, with environment and results of each filing by name
+        """
+        with io.open(corpusFile, u"rt", encoding=u"utf-8") as fh:
+            corpus = json.load(fh)
+        corpusDir = os.path.dirname(os.path.abspath(corpusFile))
+        from arelle.Version import version
+        results = OrderedDict(((u"format", RESULTS_FORMAT),
+                               (u"created", time.strftime(u"%Y-%m-%dT%H:%M:%S")),
+                               (u"arelleVersion", version),
+                               (u"python", platform.python_version()),
+                               (u"platform", platform.platform()),
+                               (u"corpus", os.path.abspath(corpusFile)),
+                               (u"filings", OrderedDict())))
+        for filing in corpus.get(u"filings", ()):
+            name = filing.get(u"name") or filing[u"file"]
+            args = [u"-f", os.path.join(corpusDir, filing[u"file"]), u"-v"] + corpus.get(u"options", []) + filing.get(u"options", [])
+            filingResults = None
+            for i in _RANGE(filing.get(u"repeat", repeat)):
+                self.showStatus(_(u"benchmarking {0}, run {1}").format(name, i + 1))
+                runResults = self.runFiling(args, timeout)
+                if runResults[u"exception"]:
+                    filingResults = runResults
+                    break
+                if filingResults is None:
+                    filingResults = runResults
+                else: # best times and least peak memory of the runs
+                    for phase, phaseTime in runResults[u"times"].items():
+                        filingResults[u"times"][phase] = min(phaseTime, filingResults[u"times"].get(phase, phaseTime))
+                    filingResults[u"peakMemory"] = min(runResults[u"peakMemory"], filingResults[u"peakMemory"])
+            filingResults[u"runs"] = i + 1
+            filingResults[u"times"] = OrderedDict(sorted(filingResults[u"times"].items()))
+            results[u"filings"][name] = filingResults = OrderedDict(
+                (key, filingResults[key]) for key in (u"runs", u"exception", u"errors", u"peakMemory", u"times"))
+            if filingResults[u"exception"]:
+                self.addToLog(_(u"%(filing)s failed: %(exception)s"),
+                              messageCode=u"benchmark:failed", messageArgs={u"filing": name, u"exception": filingResults[u"exception"]},
+                              level=logging.ERROR)
+            else:
+                self.addToLog(_(u"%(filing)s total %(time)s secs, peak memory %(memory)sK, %(errors)s errors"),
+                              messageCode=u"benchmark:filing",
+                              messageArgs={u"filing": name, u"time": u"{0:.3f}".format(filingResults[u"times"].get(u"total", 0)),
+                                           u"memory": filingResults[u"peakMemory"], u"errors": filingResults[u"errors"]})
+        return results
+
+    def compare(self, results, baseline, timeThreshold=1.2, memoryThreshold=1.2, minTime=0.1):
+        u"""Compares results to baseline results, logging regressions.
+
+        :param timeThreshold: Ratio of phase time to baseline time above which a phase is regressed
+        :param memoryThreshold: Ratio of peak memory to baseline peak memory above which a filing is regressed
+        :param minTime: Phases taking less than minTime seconds in the baseline are not compared (as timing noise)
+        :returns: int -- number of regressions (including filings which failed or whose errors count changed)
+        """
+        regressions = 0
+        for name, filingResults in results[u"filings"].items():
+            baselineResults = baseline.get(u"filings", {}).get(name)
+            if filingResults[u"exception"]:
+                regressions += 1
+                continue
+            if baselineResults is None or baselineResults.get(u"exception"):
+                self.addToLog(_(u"%(filing)s has no baseline results"),
+                              messageCode=u"benchmark:noBaseline", messageArgs={u"filing": name})
+                continue
+            for phase, baselineTime in baselineResults[u"times"].items():
+                phaseTime = filingResults[u"times"].get(phase)
+                if phaseTime is not None and baselineTime >= minTime and phaseTime > baselineTime * timeThreshold:
+                    regressions += 1
+                    self.addToLog(_(u"%(filing)s %(phase)s %(time)s secs, baseline %(baselineTime)s secs (%(ratio)s)"),
+                                  messageCode=u"benchmark:timeRegression",
+                                  messageArgs={u"filing": name, u"phase": phase, u"time": u"{0:.3f}".format(phaseTime),
+                                               u"baselineTime": u"{0:.3f}".format(baselineTime),
+                                               u"ratio": u"{0:.2f}x".format(phaseTime / baselineTime)},
+                                  level=logging.WARNING)
+            baselineMemory = baselineResults[u"peakMemory"]
+            if baselineMemory and filingResults[u"peakMemory"] > baselineMemory * memoryThreshold:
+                regressions += 1
+                self.addToLog(_(u"%(filing)s peak memory %(memory)sK, baseline %(baselineMemory)sK"),
+                              messageCode=u"benchmark:memoryRegression",
+                              messageArgs={u"filing": name, u"memory": filingResults[u"peakMemory"], u"baselineMemory": baselineMemory},
+                              level=logging.WARNING)
+            if filingResults[u"errors"] != baselineResults[u"errors"]:
+                regressions += 1
+                self.addToLog(_(u"%(filing)s %(errors)s errors, baseline %(baselineErrors)s errors (results are not comparable)"),
+                              messageCode=u"benchmark:errorsChanged",
+                              messageArgs={u"filing": name, u"errors": filingResults[u"errors"], u"baselineErrors": baselineResults[u"errors"]},
+                              level=logging.WARNING)
+        self.addToLog(_(u"%(regressions)s regressions from baseline"),
+                      messageCode=u"benchmark:compared", messageArgs={u"regressions": regressions})
+        return regressions
+
+    def showStatus(self, message, clearAfter=None):
+        if message:
+            self.addToLog(message, messageCode=u"benchmark:status")
+
+def main(args=None):
+    u"""Runs the benchmark corpus and compares results to a baseline, as specified by command line arguments.
+
+    :returns: int -- exit status, 1 if any regressions were found, otherwise 0
+    """
+    parser = OptionParser(u"usage: %prog --corpus FILE [options]")
+    parser.add_option(u"--corpus", action=u"store", dest=u"corpus",
+                      help=u"Corpus file (JSON) of filings and their command line options.")
+    parser.add_option(u"--results", action=u"store", dest=u"results",
+                      help=u"Save the results to FILE (JSON), such as to be a baseline of a later benchmark.")
+    parser.add_option(u"--baseline", action=u"store", dest=u"baseline",
+                      help=u"Compare the results to baseline results FILE (JSON).")
+    parser.add_option(u"--repeat", type=u"int", action=u"store", dest=u"repeat", default=1,
+                      help=u"Number of runs of each filing, for its best times (default 1, a corpus filing may specify its own repeat).")
+    parser.add_option(u"--timeout", type=u"float", action=u"store", dest=u"timeout",
+                      help=u"Seconds a run of a filing may take before it is terminated and failed.")
+    parser.add_option(u"--timeThreshold", type=u"float", action=u"store", dest=u"timeThreshold", default=1.2,
+                      help=u"Ratio of a phase's time to its baseline time above which the phase is a regression (default 1.2).")
+    parser.add_option(u"--memoryThreshold", type=u"float", action=u"store", dest=u"memoryThreshold", default=1.2,
+                      help=u"Ratio of a filing's peak memory to its baseline above which the filing is a regression (default 1.2).")
+    parser.add_option(u"--minTime", type=u"float", action=u"store", dest=u"minTime", default=0.1,
+                      help=u"Seconds below which a phase's baseline time is not compared, as timing noise (default 0.1).")
+    (options, leftoverArgs) = parser.parse_args(args)
+    if not options.corpus:
+        parser.error(u"--corpus is required")
+    cntlr = CntlrBenchmark()
+    results = cntlr.runCorpus(options.corpus, options.repeat, options.timeout)
+    if options.results:
+        with io.open(options.results, u"wb") as fh:
+            fh.write(json.dumps(results, indent=2).encode(u"utf-8"))
+    regressions = 0
+    if options.baseline:
+        with io.open(options.baseline, u"rt", encoding=u"utf-8") as fh:
+            baseline = json.load(fh)
+        regressions = cntlr.compare(results, baseline, options.timeThreshold, options.memoryThreshold, options.minTime)
+    else:
+        regressions = sum(1 for filingResults in results[u"filings"].values() if filingResults[u"exception"])
+    cntlr.close()
+    return 1 if regressions else 0
+
+if __name__ == u"__main__":
+    sys.exit(main())
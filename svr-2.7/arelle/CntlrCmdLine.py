@@ -128,6 +128,14 @@ def parseAndRun(args):
     parser.add_option(u"--utrurl", action=u"store", dest=u"utrUrl", help=SUPPRESS_HELP)
     parser.add_option(u"--infoset", action=u"store_true", dest=u"infosetValidate",
                       help=_(u"Select validation with respect testcase infosets."))
+    parser.add_option(u"--rssWorkers", type=u"int", action=u"store", dest=u"rssWorkers",
+                      help=_(u"Specify number of worker processes to load and validate the filings of an RSS feed concurrently.  "
+                             u"A worker process which fails is replaced, without affecting the other filings.  "
+                             u"Requires an operating system with fork."))
+    parser.add_option(u"--rssworkers", type=u"int", action=u"store", dest=u"rssWorkers", help=SUPPRESS_HELP)
+    parser.add_option(u"--rssItemTimeout", type=u"float", action=u"store", dest=u"rssItemTimeout",
+                      help=_(u"Specify seconds an RSS feed filing may be validated by a worker process before the worker is terminated and replaced."))
+    parser.add_option(u"--rssitemtimeout", type=u"float", action=u"store", dest=u"rssItemTimeout", help=SUPPRESS_HELP)
     parser.add_option(u"--labelLang", action=u"store", dest=u"labelLang",
                       help=_(u"Language for labels in following file options (override system settings)"))
     parser.add_option(u"--labellang", action=u"store", dest=u"labelLang", help=SUPPRESS_HELP)
@@ -168,8 +176,17 @@ def parseAndRun(args):
                       help=_(u"Write test report of validation (of test cases) into FILE"))
     parser.add_option(u"--testreport", u"--csvtestreport", action=u"store", dest=u"testReport", help=SUPPRESS_HELP)
     parser.add_option(u"--testReportCols", action=u"store", dest=u"testReportCols",
-                      help=_(u"Columns for test report file"))
+                      help=_(u"Columns for test report file (Index, Testcase, ID, Name, Reference, ReadMeFirst, Status, Expected, Actual, "
+                             u"and Duration for seconds to validate each variation)"))
     parser.add_option(u"--testreportcols", action=u"store", dest=u"testReportCols", help=SUPPRESS_HELP)
+    parser.add_option(u"--testcaseWorkers", type=u"int", action=u"store", dest=u"testcaseWorkers",
+                      help=_(u"Specify number of worker processes to validate the testcases of a testcases index concurrently.  "
+                             u"Results and log entries of each testcase are reported in testcase order, as when validated sequentially.  "
+                             u"Requires an operating system with fork."))
+    parser.add_option(u"--testcaseworkers", type=u"int", action=u"store", dest=u"testcaseWorkers", help=SUPPRESS_HELP)
+    parser.add_option(u"--testcaseTimeout", type=u"float", action=u"store", dest=u"testcaseTimeout",
+                      help=_(u"Specify seconds a testcase may be validated by a worker process before the worker is terminated and replaced."))
+    parser.add_option(u"--testcasetimeout", type=u"float", action=u"store", dest=u"testcaseTimeout", help=SUPPRESS_HELP)
     parser.add_option(u"--rssReport", action=u"store", dest=u"rssReport",
                       help=_(u"Write RSS report into FILE"))
     parser.add_option(u"--rssreport", action=u"store", dest=u"rssReport", help=SUPPRESS_HELP)
@@ -182,6 +199,25 @@ def parseAndRun(args):
     parser.add_option(u"--skipLoading", action=u"store", dest=u"skipLoading",
                       help=_(u"Skip loading discovered or schemaLocated files matching pattern (unix-style file name patterns separated by '|'), useful when not all linkbases are needed."))
     parser.add_option(u"--skiploading", action=u"store", dest=u"skipLoading", help=SUPPRESS_HELP)
+    parser.add_option(u"--saveDTSImage", action=u"store", dest=u"saveDTSImage",
+                      help=_(u"Save the DTS of the instance schemaRefs and linkbaseRefs, as discovered and validated, to a DTS image file, "
+                             u"for loading by --loadDTSImage in later runs."))
+    parser.add_option(u"--savedtsimage", action=u"store", dest=u"saveDTSImage", help=SUPPRESS_HELP)
+    parser.add_option(u"--loadDTSImage", action=u"store", dest=u"loadDTSImage",
+                      help=_(u"Load the DTS of an instance from a DTS image file (saved by --saveDTSImage) instead of by discovery, "
+                             u"if the instance has the same schemaRefs and linkbaseRefs.  "
+                             u"The DTS is discovered if any of its files has been modified since the image was saved."))
+    parser.add_option(u"--loaddtsimage", action=u"store", dest=u"loadDTSImage", help=SUPPRESS_HELP)
+    parser.add_option(u"--parseThreads", type=u"int", action=u"store", dest=u"parseThreads",
+                      help=_(u"Specify number of threads to parse the documents of an inline XBRL document set concurrently, "
+                             u"ahead of their discovery in document order."))
+    parser.add_option(u"--parsethreads", type=u"int", action=u"store", dest=u"parseThreads", help=SUPPRESS_HELP)
+    parser.add_option(u"--factStore", action=u"store_true", dest=u"factStore",
+                      help=_(u"After validation and views, replace the facts, contexts and units of an instance by a compact fact store, "
+                             u"releasing their XML elements, for plug-ins which process the facts of large instances (such as xbrlDB).  "
+                             u"Footnote relationships and non-dimensional segment and scenario contents are not available to the plug-ins.  "
+                             u"Reduces the memory held by the instance after validation, not the peak memory of loading and validation."))
+    parser.add_option(u"--factstore", action=u"store_true", dest=u"factStore", help=SUPPRESS_HELP)
     parser.add_option(u"--logFile", action=u"store", dest=u"logFile",
                       help=_(u"Write log messages into file, otherwise they go to standard output.  " 
                              u"If file ends in .xml it is xml-formatted, otherwise it is text. "))
@@ -257,6 +293,26 @@ def parseAndRun(args):
     parser.add_option(u"--formulavarfiltersresult", action=u"store_true", dest=u"formulaVarFiltersResult", help=SUPPRESS_HELP)
     parser.add_option(u"--formulaRunIDs", action=u"store", dest=u"formulaRunIDs", help=_(u"Specify formula/assertion IDs to run, separated by a '|' character."))
     parser.add_option(u"--formularunids", action=u"store", dest=u"formulaRunIDs", help=SUPPRESS_HELP)
+    parser.add_option(u"--formulaInterpretXPath", action=u"store_true", dest=u"formulaInterpretXPath", 
+                      help=_(u"Evaluate formula XPath expressions by the step interpreter instead of compiled expression code "
+                             u"(such as to compare results of the two evaluation methods)."))
+    parser.add_option(u"--formulainterpretxpath", action=u"store_true", dest=u"formulaInterpretXPath", help=SUPPRESS_HELP)
+    parser.add_option(u"--formulaNoParsedExprCache", action=u"store_true", dest=u"formulaNoParsedExprCache", 
+                      help=_(u"Parse all formula XPath expressions, not reusing expressions parsed in this or prior runs "
+                             u"(which are cached in the user application directory)."))
+    parser.add_option(u"--formulanoparsedexprcache", action=u"store_true", dest=u"formulaNoParsedExprCache", help=SUPPRESS_HELP)
+    parser.add_option(u"--formulaWorkers", type=u"int", action=u"store", dest=u"formulaWorkers", 
+                      help=_(u"Specify number of worker processes to evaluate value and existence assertions which are independent "
+                             u"of other variable sets (not chained by variables-scope relationships, nor consuming formula output instances). "
+                             u"Formulas and dependent assertions are evaluated sequentially.  Requires an operating system with fork."))
+    parser.add_option(u"--formulaworkers", type=u"int", action=u"store", dest=u"formulaWorkers", help=SUPPRESS_HELP)
+    parser.add_option(u"--formulaProfile", action=u"store", dest=u"formulaProfile", 
+                      help=_(u"Specify a file to save a profile of formula evaluation, with time in filtering, binding and evaluating, "
+                             u"counts of performed, skipped and precondition-blocked evaluations, facts passing each filter, "
+                             u"and XPath function calls, for each variable set.  "
+                             u"If file name ends in .csv, a CSV file is saved, otherwise a JSON file.  "
+                             u"Variable sets are evaluated sequentially when profiling."))
+    parser.add_option(u"--formulaprofile", action=u"store", dest=u"formulaProfile", help=SUPPRESS_HELP)
     parser.add_option(u"--uiLang", action=u"store", dest=u"uiLang",
                       help=_(u"Language for user interface (override system settings, such as program messages).  Does not save setting."))
     parser.add_option(u"--uilang", action=u"store", dest=u"uiLang", help=SUPPRESS_HELP)
@@ -278,6 +334,10 @@ def parseAndRun(args):
     parser.add_option(u"--internetLogDownloads", action=u"store_true", dest=u"internetLogDownloads", 
                       help=_(u"Log info message for downloads to web cache."))
     parser.add_option(u"--internetlogdownloads", action=u"store_true", dest=u"internetLogDownloads", help=SUPPRESS_HELP)
+    parser.add_option(u"--internetPrefetch", type=u"int", dest=u"internetPrefetch", 
+                      help=_(u"Specify number of threads downloading remote DTS documents to the web cache concurrently, "
+                             u"as references to them are found, ahead of their discovery (0, the default, for no prefetching)."))
+    parser.add_option(u"--internetprefetch", type=u"int", action=u"store", dest=u"internetPrefetch", help=SUPPRESS_HELP)
     parser.add_option(u"--xdgConfigHome", action=u"store", dest=u"xdgConfigHome", 
                       help=_(u"Specify non-standard location for configuration and cache files (overrides environment parameter XDG_CONFIG_HOME)."))
     parser.add_option(u"--plugins", action=u"store", dest=u"plugins",
@@ -314,6 +374,36 @@ def parseAndRun(args):
                           help=_(u"start web server on host:port[:server] for REST and web access, e.g., --webserver locahost:8080, "
                                  u"or specify nondefault a server name, such as cherrypy, --webserver locahost:8080:cherrypy. "
                                  u"(It is possible to specify options to be defaults for the web server, such as disclosureSystem and validations, but not including file names.) "))
+        parser.add_option(u"--webserverWorkers", type=u"int", action=u"store", dest=u"webserverWorkers",
+                          help=_(u"Specify number of worker processes, each with its own controller, to process REST requests, "
+                                 u"instead of processing one request at a time in the web server process.  "
+                                 u"(Not applicable to cgi, wsgi or nondefault servers.)"))
+        parser.add_option(u"--webserverworkers", type=u"int", action=u"store", dest=u"webserverWorkers", help=SUPPRESS_HELP)
+        parser.add_option(u"--webserverQueue", type=u"int", action=u"store", dest=u"webserverQueue",
+                          help=_(u"Specify number of REST requests which may wait for a worker process, beyond those being processed, "
+                                 u"before further requests are refused as busy (default is the number of workers)."))
+        parser.add_option(u"--webserverqueue", type=u"int", action=u"store", dest=u"webserverQueue", help=SUPPRESS_HELP)
+        parser.add_option(u"--webserverJobQueue", type=u"int", action=u"store", dest=u"webserverJobQueue",
+                          help=_(u"Specify number of asynchronous jobs (/rest/jobs) which may wait to be processed, "
+                                 u"before further jobs are refused as busy (default is 10)."))
+        parser.add_option(u"--webserverjobqueue", type=u"int", action=u"store", dest=u"webserverJobQueue", help=SUPPRESS_HELP)
+        parser.add_option(u"--webserverTimeout", type=u"float", action=u"store", dest=u"webserverTimeout",
+                          help=_(u"Specify seconds a REST request may run in a worker process before the worker is terminated and replaced."))
+        parser.add_option(u"--webservertimeout", type=u"float", action=u"store", dest=u"webserverTimeout", help=SUPPRESS_HELP)
+        parser.add_option(u"--webserverWorkerJobs", type=u"int", action=u"store", dest=u"webserverWorkerJobs",
+                          help=_(u"Specify number of REST requests processed by a worker process before it is replaced by a new worker process "
+                                 u"(limiting memory growth of long running workers)."))
+        parser.add_option(u"--webserverworkerjobs", type=u"int", action=u"store", dest=u"webserverWorkerJobs", help=SUPPRESS_HELP)
+        parser.add_option(u"--webserverDTSCache", type=u"int", action=u"store", dest=u"webserverDTSCache",
+                          help=_(u"Specify number of loaded DTSes for the web server (or each worker process) to keep, "
+                                 u"so that instances with the same schemaRefs and linkbaseRefs reuse the loaded DTS documents, while their files are unchanged.  "
+                                 u"(Not applicable with disclosure system validation, or instances in archives.)  "
+                                 u"Cache statistics are provided by /rest/dtsCache."))
+        parser.add_option(u"--webserverdtscache", type=u"int", action=u"store", dest=u"webserverDTSCache", help=SUPPRESS_HELP)
+        parser.add_option(u"--webserverDTSCacheObjects", type=u"int", action=u"store", dest=u"webserverDTSCacheObjects",
+                          help=_(u"Specify maximum total number of model objects (elements and documents) of kept DTSes, "
+                                 u"limiting memory use of the DTS cache."))
+        parser.add_option(u"--webserverdtscacheobjects", type=u"int", action=u"store", dest=u"webserverDTSCacheObjects", help=SUPPRESS_HELP)
     pluginOptionsIndex = len(parser.option_list)
 
     # install any dynamic plugins so their command line options can be parsed if present
@@ -660,6 +750,16 @@ class CntlrCmdLine(Cntlr.Cntlr):
             self.modelManager.validateUtr = True
         if options.infosetValidate:
             self.modelManager.validateInfoset = True
+        if options.rssWorkers:
+            self.modelManager.rssWorkers = options.rssWorkers
+        if options.rssItemTimeout:
+            self.modelManager.rssItemTimeout = options.rssItemTimeout
+        if options.testcaseWorkers:
+            self.modelManager.testcaseWorkers = options.testcaseWorkers
+        if options.testcaseTimeout:
+            self.modelManager.testcaseTimeout = options.testcaseTimeout
+        if options.parseThreads:
+            self.modelManager.parseThreads = options.parseThreads
         if options.abortOnMajorError:
             self.modelManager.abortOnMajorError = True
         if options.collectProfileStats:
@@ -674,6 +774,8 @@ class CntlrCmdLine(Cntlr.Cntlr):
             self.webCache.timeout = (options.internetTimeout or None)  # use None if zero specified to disable timeout
         if options.internetLogDownloads:
             self.webCache.logDownloads = True
+        if options.internetPrefetch is not None:
+            self.webCache.prefetchThreads = options.internetPrefetch
         fo = FormulaOptions()
         if options.parameters:
             parameterSeparator = (options.parameterSeparator or u',')
@@ -726,12 +828,31 @@ class CntlrCmdLine(Cntlr.Cntlr):
             fo.traceVariableFiltersResult = True
         if options.formulaRunIDs:
             fo.runIDs = options.formulaRunIDs   
+        if options.formulaInterpretXPath:
+            fo.interpretXPath = True
+        if options.formulaNoParsedExprCache:
+            fo.cacheParsedProgs = False
+        if options.formulaWorkers:
+            fo.evaluationWorkers = options.formulaWorkers
+        if options.formulaProfile:
+            fo.profileFile = options.formulaProfile
         self.modelManager.formulaOptions = fo
         timeNow = XmlUtil.dateunionValue(datetime.datetime.now())
         firstStartedAt = startedAt = time.time()
         modelDiffReport = None
+        g = None # result of CntlrCmdLine.Xbrl.Run plug-ins, if any
         success = True
         modelXbrl = None
+        dtsImageCache = dtsImageEntry = None
+        if options.saveDTSImage or options.loadDTSImage: # DTS images are loaded into, and saved from, the DTS cache
+            if self.modelManager.dtsCache is None:
+                from arelle.DtsCache import DtsCache
+                self.modelManager.dtsCache = dtsImageCache = DtsCache(self.modelManager, maxEntries=1)
+            if options.loadDTSImage:
+                from arelle import DtsImage
+                dtsImageEntry = DtsImage.load(self.modelManager.dtsCache, options.loadDTSImage)
+            if options.saveDTSImage:
+                self.modelManager.dtsCache.saveImageFile = options.saveDTSImage
         try:
             if filesource:
                 modelXbrl = self.modelManager.load(filesource, _(u"views loading"))
@@ -742,6 +863,13 @@ class CntlrCmdLine(Cntlr.Cntlr):
                         err,
                         traceback.format_tb(sys.exc_info()[2])))
             success = False    # loading errors, don't attempt to utilize loaded DTS
+        if options.saveDTSImage and self.modelManager.dtsCache.saveImageFile:
+            self.modelManager.dtsCache.saveImageFile = None
+            self.addToLog(_(u"DTS image not saved, the entry file is not an instance with a DTS which can be cached"),
+                          messageCode=u"arelle:dtsImageNotSaved", file=options.saveDTSImage, level=logging.ERROR)
+        if dtsImageEntry is not None and not dtsImageEntry.attachments:
+            self.addToLog(_(u"DTS image not used, the entry file does not have the schemaRefs and linkbaseRefs of the image"),
+                          messageCode=u"arelle:dtsImageNotUsed", file=options.loadDTSImage, level=logging.INFO)
         if modelXbrl and modelXbrl.modelDocument:
             loadTime = time.time() - startedAt
             modelXbrl.profileStat(_(u"load"), loadTime)
@@ -866,6 +994,16 @@ class CntlrCmdLine(Cntlr.Cntlr):
                     ViewFileRoleTypes.viewRoleTypes(modelXbrl, options.roleTypesFile, u"Role Types", isArcrole=False, lang=options.labelLang)
                 if options.arcroleTypesFile:
                     ViewFileRoleTypes.viewRoleTypes(modelXbrl, options.arcroleTypesFile, u"Arcrole Types", isArcrole=True, lang=options.labelLang)
+                if options.factStore:
+                    from arelle.FactStore import storeFacts
+                    startedAt = time.time()
+                    if storeFacts(modelXbrl) is not None:
+                        storeTime = time.time() - startedAt
+                        modelXbrl.profileStat(_(u"factStore"), storeTime)
+                        self.addToLog(format_string(self.modelManager.locale, 
+                                                    _(u"facts stored in %.2f secs"), 
+                                                    storeTime),
+                                                    messageCode=u"info", file=self.entrypointFile)
                 for pluginXbrlMethod in pluginClassMethods(u"CntlrCmdLine.Xbrl.Run"):
                     g = pluginXbrlMethod(self, options, modelXbrl)
 
@@ -892,6 +1030,9 @@ class CntlrCmdLine(Cntlr.Cntlr):
                     self.modelManager.close(modelDiffReport)
                 elif modelXbrl:
                     self.modelManager.close(modelXbrl)
+        if dtsImageCache is not None and not options.keepOpen:
+            dtsImageCache.clear()
+            self.modelManager.dtsCache = None
         self.username = self.password = None #dereference password
 
         if options.statusPipe and getattr(self, u"statusPipe", None) is not None:
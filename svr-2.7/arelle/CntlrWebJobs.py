@@ -0,0 +1,223 @@
+u'''
+Use this module for the web server to process REST requests asynchronously as jobs, so that
+the HTTP connection of a request is not held open for the whole of loading and validating a
+large filing.  A submitted job is queued for job runner threads, which process it by the global
+controller of CntlrWebMain or by the worker processes of CntlrWebWorkers.
+
+A job reports its status and progress (status messages and completed profiled activities) for
+polling, and its log entries as they are produced, for streaming.  Finished jobs keep their
+result until they are expired, after a retention time or when too many jobs are kept.  Jobs submitted
+while too many jobs are waiting to be processed (each with its posted zip file) are refused as busy.
+'''
+import threading, time, uuid
+from collections import OrderedDict
+from arelle.Cntlr import LogHandlerWithXml
+try:
+    from queue import Queue
+except ImportError:
+    from Queue import Queue
+
+QUEUED = u"queued"
+RUNNING = u"running"
+COMPLETED = u"completed"
+FAILED = u"failed"
+
+def isoTime(t):
+    if t is None:
+        return None
+    return time.strftime(u"%Y-%m-%dT%H:%M:%S", time.localtime(t))
+
+class JobQueueFull(Exception):
+    u"""Too many jobs are waiting to be processed."""
+    pass
+
+class JobLogHandler(LogHandlerWithXml):
+    u"""Log handler passing each log entry, as a json-able dict, to logEntry as it is produced."""
+    def __init__(self, logEntry, formatter=None):
+        super(JobLogHandler, self).__init__()
+        self.logEntry = logEntry
+        if formatter is not None:
+            self.setFormatter(formatter)
+
+    def emit(self, logRecord):
+        self.logEntry(self.recordToJson(logRecord))
+
+class Job(object):
+    u"""Request to be processed asynchronously, with options as for CntlrCmdLine.run.
+
+    :param media: Media of result (as for the synchronous request)
+    :param viewFile: FileNamedStringIO of requested view, or None for validation messages result
+    :param sourceZip: Bytes of *post*ed zip file, if any
+    """
+    def __init__(self, options, media, viewFile=None, sourceZip=None):
+        self.id = uuid.uuid4().hex
+        self.options = options
+        self.media = media
+        self.viewFile = viewFile
+        self.sourceZip = sourceZip
+        self.status = QUEUED
+        self.progress = None # most recent status message or profiled activity
+        self.activities = [] # completed profiled activities
+        self.entries = [] # log entries (as by LogHandlerWithXml.recordToJson)
+        self.successful = None
+        self.result = None
+        self.contentType = None
+        self.timeSubmitted = time.time()
+        self.timeStarted = None
+        self.timeFinished = None
+        self.condition = threading.Condition()
+
+    @property
+    def isFinished(self):
+        return self.status in (COMPLETED, FAILED)
+
+    def start(self):
+        with self.condition:
+            self.status = RUNNING
+            self.timeStarted = time.time()
+
+    def showStatus(self, message, clearAfter=None):
+        # replaces controller showStatus while the job is processed
+        if message:
+            with self.condition:
+                self.progress = message
+
+    def logEntry(self, entry):
+        with self.condition:
+            self.entries.append(entry)
+            if entry.get(u"code") == u"info:profileActivity":
+                self.progress = entry[u"message"][u"text"].strip()
+                self.activities.append(self.progress)
+            self.condition.notify_all()
+
+    def finish(self, successful, result, contentType):
+        with self.condition:
+            self.successful = successful
+            self.result = result
+            self.contentType = contentType
+            self.status = COMPLETED
+            self.timeFinished = time.time()
+            self.sourceZip = None
+            self.condition.notify_all()
+
+    def fail(self, message):
+        with self.condition:
+            self.successful = False
+            self.result = message
+            self.contentType = u'text/plain; charset=UTF-8'
+            self.status = FAILED
+            self.timeFinished = time.time()
+            self.sourceZip = None
+            self.condition.notify_all()
+
+    def properties(self):
+        u"""Status of the job, for polling requests.
+
+        :returns: dict -- id, status, progress, activities, number of log entries, successful, and times
+        """
+        with self.condition:
+            now = time.time()
+            return OrderedDict(((u"id", self.id),
+                                (u"status", self.status),
+                                (u"progress", self.progress),
+                                (u"activities", list(self.activities)),
+                                (u"entries", len(self.entries)),
+                                (u"successful", self.successful),
+                                (u"submitted", isoTime(self.timeSubmitted)),
+                                (u"started", isoTime(self.timeStarted)),
+                                (u"finished", isoTime(self.timeFinished)),
+                                (u"elapsed", round((self.timeFinished or now) - self.timeStarted, 3)
+                                             if self.timeStarted else None)))
+
+    def logEntries(self, start=0, waitInterval=1.0):
+        u"""Generates the log entries from start, waiting for further entries as they are produced, until the job is finished."""
+        i = start
+        while True:
+            with self.condition:
+                while i >= len(self.entries) and not self.isFinished:
+                    self.condition.wait(waitInterval)
+                entries = self.entries[i:]
+                isFinished = self.isFinished
+            for entry in entries:
+                yield entry
+            i += len(entries)
+            if isFinished:
+                break
+
+class JobQueue(object):
+    u"""Queue of jobs processed by job runner threads.
+
+    :param runJob: Function to process a job, which calls job.finish or job.fail
+    :param numRunners: Number of jobs processed concurrently
+    :param maxQueued: Number of jobs which may wait to be processed, further jobs are refused (None for no limit)
+    :param maxJobs: Number of finished jobs kept, older finished jobs are expired
+    :param retention: Seconds a finished job is kept
+    """
+    def __init__(self, runJob, numRunners=1, maxQueued=10, maxJobs=100, retention=3600):
+        self.runJob = runJob
+        self.maxQueued = maxQueued
+        self.maxJobs = maxJobs
+        self.retention = retention
+        self.jobs = OrderedDict() # by id, in order submitted
+        self.lock = threading.Lock()
+        self.queue = Queue()
+        self.runners = []
+        for i in _RANGE(numRunners):
+            runner = threading.Thread(target=self.runner)
+            runner.daemon = True
+            runner.start()
+            self.runners.append(runner)
+
+    def submit(self, job):
+        u"""Queues job for processing.
+
+        :raises JobQueueFull: if maxQueued jobs are waiting to be processed
+        """
+        with self.lock:
+            self.expire()
+            if (self.maxQueued is not None and
+                sum(1 for otherJob in self.jobs.values() if otherJob.status == QUEUED) >= self.maxQueued):
+                raise JobQueueFull()
+            self.jobs[job.id] = job
+        self.queue.put(job)
+        return job
+
+    def get(self, jobId):
+        with self.lock:
+            return self.jobs.get(jobId)
+
+    def queuedPosition(self, job):
+        # number of jobs queued ahead of job
+        with self.lock:
+            position = 0
+            for otherJob in self.jobs.values():
+                if otherJob is job:
+                    return position
+                if otherJob.status == QUEUED:
+                    position += 1
+        return None
+
+    def runner(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                break
+            job.start()
+            try:
+                self.runJob(job)
+            except Exception, err:
+                job.fail(_(u"Job processing exception: {0}").format(err))
+            if not job.isFinished:
+                job.fail(_(u"Job processing did not complete"))
+
+    def expire(self):
+        # called with lock held
+        expiry = time.time() - self.retention
+        finished = [job for job in self.jobs.values() if job.isFinished]
+        for i, job in enumerate(finished):
+            if job.timeFinished < expiry or len(finished) - i > self.maxJobs:
+                del self.jobs[job.id]
+
+    def close(self):
+        for runner in self.runners:
+            self.queue.put(None)
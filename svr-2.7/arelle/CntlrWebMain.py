@@ -6,12 +6,15 @@ Use this module to start Arelle in web server mode
 @author: Mark V Systems Limited
 (c) Copyright 2010 Mark V Systems Limited, All rights reserved.
 '''
-from arelle.webserver.bottle import Bottle, request, response, static_file
-import os, sys, time, threading, uuid
+from arelle.webserver.bottle import Bottle, ServerAdapter, request, response, static_file
+import os, sys, io, time, threading, uuid, json
 from arelle import Version
 from arelle.FileSource import FileNamedStringIO
 from io import open
 _os_pid = os.getpid()
+workerPool = None # CntlrWebWorkers.WorkerPool when requests are processed by worker processes
+jobQueue = None # CntlrWebJobs.JobQueue of asynchronous requests
+cntlrLock = threading.Lock() # serializes requests processed by the global cntlr when server is threaded
 
 def startWebserver(_cntlr, options):
     u"""Called once from main program in CmtlrCmdLine to initiate web server on specified local port.
@@ -20,8 +23,13 @@ def startWebserver(_cntlr, options):
     :param options: OptionParser options from parse_args of main argv arguments (the argument *webserver* provides hostname and port), port being used to startup the webserver on localhost.
     :type options: optparse.Values
     """
-    global imagesDir, cntlr, optionsPrototype
+    global imagesDir, cntlr, optionsPrototype, workerPool, jobQueue
     cntlr = _cntlr
+    if getattr(options, u"webserverDTSCache", None):
+        from arelle.DtsCache import DtsCache
+        cntlr.modelManager.dtsCache = DtsCache(cntlr.modelManager, 
+                                               maxEntries=options.webserverDTSCache, 
+                                               maxObjects=options.webserverDTSCacheObjects)
     imagesDir = cntlr.imagesDir
     optionValuesTypes = _STR_NUM_TYPES + (type(None),)
     optionsPrototype = dict((option,value if isinstance(value,_STR_NUM_TYPES) else None)
@@ -61,9 +69,14 @@ def startWebserver(_cntlr, options):
     app.route(u'/rest/xbrl/view', GETorPOST, validation)
     app.route(u'/rest/xbrl/open', GETorPOST, validation)
     app.route(u'/rest/xbrl/close', GETorPOST, validation)
+    app.route(u'/rest/jobs', POST, submitJob)
+    app.route(u'/rest/jobs/<jobId>', GET, jobStatus)
+    app.route(u'/rest/jobs/<jobId>/log', GET, jobLog)
+    app.route(u'/rest/jobs/<jobId>/result', GET, jobResult)
     app.route(u'/images/<imgFile>', GET, image)
     app.route(u'/rest/xbrl/diff', GET, diff)
     app.route(u'/rest/configure', GET, configure)
+    app.route(u'/rest/dtsCache', GET, dtsCache)
     app.route(u'/rest/stopWebServer', GET, stopWebServer)
     app.route(u'/quickbooks/server.asmx', POST, quickbooksServer)
     app.route(u'/rest/quickbooks/<qbReport>/xbrl-gl/<file:path>', GET, quickbooksGLrequest)
@@ -79,17 +92,56 @@ def startWebserver(_cntlr, options):
     if server == u"cgi":
         # catch a non-REST interface by cgi Interface (may be a cgi app exe module, etc)
         app.route(u'<cgiAppPath:path>', GETorPOST, cgiInterface)
+    from arelle.CntlrWebJobs import JobQueue
+    maxQueuedJobs = getattr(options, u"webserverJobQueue", None)
+    if maxQueuedJobs is None:
+        maxQueuedJobs = 10
     if server == u"wsgi":
+        jobQueue = JobQueue(runJob, maxQueued=maxQueuedJobs)
         return app
-    elif server == u"cgi":
+    elif server == u"cgi": # no jobs, process ends after the request
         if sys.stdin is None:
             sys.stdin = open(os.devnull, u'r')
         app.run(server=server)
         sys.exit(0)
-    elif server:
-        app.run(host=host, port=port or 80, server=server)
+    if getattr(options, u"webserverWorkers", None) and server in (u"", u"wsgiref"):
+        # requests are handled on server threads and processed by the pool of worker processes
+        from arelle.CntlrWebWorkers import WorkerPool
+        workerPool = WorkerPool(options.webserverWorkers, 
+                                maxQueued=options.webserverQueue, 
+                                timeout=options.webserverTimeout, 
+                                maxJobs=options.webserverWorkerJobs,
+                                dtsCacheLimits=(options.webserverDTSCache, options.webserverDTSCacheObjects))
+        jobQueue = JobQueue(runJob, numRunners=options.webserverWorkers, maxQueued=maxQueuedJobs)
     else:
-        app.run(host=host, port=port or 80)
+        jobQueue = JobQueue(runJob, maxQueued=maxQueuedJobs)
+    try:
+        if server in (u"", u"wsgiref"):
+            # threaded so job polls and log streams are served while other requests are processed
+            app.run(host=host, port=port or 80, server=ThreadingWSGIRefServer)
+        else:
+            app.run(host=host, port=port or 80, server=server)
+    finally:
+        jobQueue.close()
+        jobQueue = None
+        if workerPool is not None:
+            workerPool.close()
+            workerPool = None
+        
+class ThreadingWSGIRefServer(ServerAdapter):
+    u"""wsgiref server handling each request on its own thread (every request handler using the global cntlr, 
+    or state of it such as its DTS cache and QuickBooks requests, holds cntlrLock while doing so)"""
+    def run(self, handler):
+        from wsgiref.simple_server import make_server, WSGIServer, WSGIRequestHandler
+        from SocketServer import ThreadingMixIn
+        class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+            daemon_threads = True
+        if self.quiet:
+            class QuietHandler(WSGIRequestHandler):
+                def log_request(*args, **kw): pass
+            self.options[u'handler_class'] = QuietHandler
+        srv = make_server(self.host, self.port, handler, server_class=ThreadingWSGIServer, **self.options)
+        srv.serve_forever()
         
 def cgiInterface(cgiAppPath):
     # route request according to content
@@ -194,20 +246,38 @@ def validation(file=None):
     
     :returns: html, xhtml, xml, json, text -- Return per media type argument and request arguments
     """
+    errors, options, media, viewFile, sourceZipStream = requestOptions(file)
+    if errors:
+        return errorReport(errors, media)
+    return runOptionsAndGetResult(options, media, viewFile, sourceZipStream)
+
+zipMimeTypes = (u'application/zip', u'application/x-zip', u'application/x-zip-compressed', u'multipart/x-zip')
+
+def requestOptions(file=None, isJob=False):
+    u"""Sets up CntlrCmdLine options for a validation or view request (or job, which is a view request if a view is 
+    specified, otherwise a validation request) from the request path and get or post arguments.
+    
+    :returns: tuple -- (errors, options, media, viewFile, sourceZipStream)
+    """
     errors = []
     flavor = request.query.flavor or u'standard'
     media = request.query.media or u'html'
     requestPathParts = request.urlparts[2].split(u'/')
-    isValidation = u'validation' == requestPathParts[-1] or u'validation' == requestPathParts[-2]
     view = request.query.view
     viewArcrole = request.query.viewArcrole
-    if request.method == u'POST':
+    if isJob:
+        isValidation = not view and not viewArcrole
+    else:
+        isValidation = u'validation' == requestPathParts[-1] or u'validation' == requestPathParts[-2]
+    mimeType = request.get_header(u"Content-Type")
+    if request.method == u'POST' and (not isJob or mimeType in zipMimeTypes):
         sourceZipStream = request.body
-        mimeType = request.get_header(u"Content-Type")
-        if mimeType not in (u'application/zip', u'application/x-zip', u'application/x-zip-compressed', u'multipart/x-zip'):
+        if mimeType not in zipMimeTypes:
             errors.append(_(u"POST must provide a zip file, Content-Type '{0}' not recognized as a zip file.").format(mimeType))
     else:
         sourceZipStream = None
+    if isJob and not sourceZipStream and not request.query.file:
+        errors.append(_(u"Job must specify a file parameter or post a zip file."))
     if not view and not viewArcrole:
         if requestPathParts[-1] in supportedViews:
             view = requestPathParts[-1]
@@ -228,7 +298,7 @@ def validation(file=None):
         errors.append(_(u"View '{0}' is not supported").format(view))
     if errors:
         errors.insert(0, _(u"URL: ") + (file or request.query.file or u'(no file)'))
-        return errorReport(errors, media)
+        return (errors, None, media, None, None)
     options = Options() # need named parameters to simulate options
     isFormulaOnly = False
     for key, value in request.query.items():
@@ -268,37 +338,179 @@ def validation(file=None):
         viewFile = FileNamedStringIO(media)
         setattr(options, u"viewArcrole", viewArcrole)
         setattr(options, u"viewFile", viewFile)
-    return runOptionsAndGetResult(options, media, viewFile, sourceZipStream)
+    return (errors, options, media, viewFile, sourceZipStream)
     
-def runOptionsAndGetResult(options, media, viewFile, sourceZipStream=None):
+def runOptionsAndGetResult(options, media, viewFile, sourceZipStream=None, useWorkerPool=True):
     u"""Execute request according to options, for result in media, with *post*ed file in sourceZipStream, if any.
+    When the web server has a worker pool the request is executed by a worker process.
     
     :returns: html, xml, csv, text -- Return per media type argument and request arguments
     """
-    successful = cntlr.run(options, sourceZipStream)
-    if media == u"xml":
-        response.content_type = u'text/xml; charset=UTF-8'
-    elif media == u"csv":
-        response.content_type = u'text/csv; charset=UTF-8'
-    elif media == u"json":
-        response.content_type = u'application/json; charset=UTF-8'
-    elif media == u"text":
-        response.content_type = u'text/plain; charset=UTF-8'
+    try:
+        successful, result = runOptions(options, media, viewFile, sourceZipStream, useWorkerPool)
+    except Exception, err:
+        if workerPool is None or not useWorkerPool:
+            raise
+        return workerPoolErrorReport(err, media) # worker pool could not process request
+    response.content_type = mediaContentType(media)
+    return result
+
+def runOptions(options, media, viewFile, sourceZipStream=None, useWorkerPool=True, job=None):
+    u"""Execute request according to options, by a worker process if the web server has a worker pool, otherwise 
+    by the global cntlr.  For a job (CntlrWebJobs.Job), status messages and log entries are provided to the job 
+    as they are produced.  Exceptions of the worker pool (busy, timeout, or failed) are raised.
+    
+    :returns: tuple -- (successful, result) where result is the view or messages in media
+    """
+    if workerPool is not None and useWorkerPool:
+        # jobs wait for a worker, they are not refused as busy
+        successful, messagesResult = workerPool.run(options, sourceZipStream, media, progress=job, wait=job is not None)
     else:
-        response.content_type = u'text/html; charset=UTF-8'
+        with cntlrLock:
+            if job is not None:
+                from arelle.CntlrWebJobs import JobLogHandler
+                jobLogHandler = JobLogHandler(job.logEntry, cntlr.logHandler.formatter)
+                cntlr.logger.addHandler(jobLogHandler)
+                cntlr.showStatus = job.showStatus
+            try:
+                successful = cntlr.run(options, sourceZipStream)[0] # of (success, modelXbrl, g)
+            finally:
+                if job is not None:
+                    cntlr.logger.removeHandler(jobLogHandler)
+                    del cntlr.showStatus
+            if not (successful and viewFile):
+                messagesResult = logResult(cntlr.logHandler, media)
     if successful and viewFile:
         # defeat re-encoding
         result = viewFile.getvalue().replace(u"&nbsp;",u"\u00A0").replace(u"&shy;",u"\u00AD").replace(u"&amp;",u"&")
         viewFile.close()
-    elif media == u"xml":
-        result = cntlr.logHandler.getXml()
+    else:
+        result = messagesResult
+    return (successful, result)
+
+def mediaContentType(media):
+    if media == u"xml":
+        return u'text/xml; charset=UTF-8'
+    elif media == u"csv":
+        return u'text/csv; charset=UTF-8'
     elif media == u"json":
-        result = cntlr.logHandler.getJson()
+        return u'application/json; charset=UTF-8'
     elif media == u"text":
-        result = cntlr.logHandler.getText()
+        return u'text/plain; charset=UTF-8'
     else:
-        result = htmlBody(tableRows(cntlr.logHandler.getLines(), header=_(u"Messages")))
-    return result
+        return u'text/html; charset=UTF-8'
+
+def submitJob():
+    u"""Submit an asynchronous validation or view job, by *post* to */rest/jobs*, with the parameters of 
+    */rest/xbrl/validation* or */rest/xbrl/view* (a view job if view or viewArcrole is specified), and either a
+    file parameter or a *post*ed zip file.
+    
+    :returns: json -- Job status, including its id, for */rest/jobs/<jobId>*, */rest/jobs/<jobId>/log* and */rest/jobs/<jobId>/result*,
+    or http status 503 (busy) if the job queue is full
+    """
+    from arelle.CntlrWebJobs import Job, JobQueueFull
+    errors, options, media, viewFile, sourceZipStream = requestOptions(isJob=True)
+    if jobQueue is None:
+        errors.append(_(u"Jobs are not supported by this web server."))
+    if errors:
+        response.status = 400
+        return errorReport(errors, media)
+    try:
+        job = jobQueue.submit(Job(options, media, viewFile, 
+                                  sourceZipStream.read() if sourceZipStream is not None else None))
+    except JobQueueFull:
+        response.status = 503
+        return errorReport([_(u"Server busy, the job queue is full, please retry later.")], media)
+    response.status = 202
+    return jobStatus(job.id)
+
+def runJob(job):
+    # called on a job runner thread of jobQueue
+    try:
+        successful, result = runOptions(job.options, job.media, job.viewFile, 
+                                        io.BytesIO(job.sourceZip) if job.sourceZip is not None else None, 
+                                        job=job)
+    except Exception, err:
+        if workerPool is not None:
+            job.fail(workerPoolErrorMessage(err)[1]) # worker pool could not process job
+        else:
+            job.fail(_(u"Job processing exception: {0}").format(err))
+    else:
+        job.finish(successful, result, mediaContentType(job.media))
+
+def jobStatus(jobId):
+    u"""Status of a job for *get* requests to */rest/jobs/<jobId>*.
+    
+    :returns: json -- id, status (queued, running, completed or failed), queued (position in queue), progress (most recent 
+    status message or profiled activity), activities (completed profiled activities), entries (number of log entries),
+    successful, submitted, started, finished and elapsed.
+    """
+    job = jobQueue.get(jobId) if jobQueue is not None else None
+    if job is None:
+        response.status = 404
+        return errorReport([_(u"Job {0} not found.").format(jobId)], u"text")
+    status = job.properties()
+    status[u"queued"] = jobQueue.queuedPosition(job) if status[u"status"] == u"queued" else None
+    response.content_type = u'application/json; charset=UTF-8'
+    return json.dumps(status)
+
+def jobLog(jobId):
+    u"""Log entries of a job, for *get* requests to */rest/jobs/<jobId>/log*, streamed as they are produced until the
+    job is finished.  Parameter *start* skips prior entries (such as already received), parameter *media* is 
+    *text* (default) for message lines, or *json* for a JSON object per line (code, level, refs and message).
+    
+    :returns: text -- Streamed log entry lines
+    """
+    job = jobQueue.get(jobId) if jobQueue is not None else None
+    if job is None:
+        response.status = 404
+        return errorReport([_(u"Job {0} not found.").format(jobId)], u"text")
+    try:
+        start = int(request.query.start or 0)
+    except ValueError:
+        start = 0
+    media = request.query.media or u'text'
+    def streamEntries():
+        for entry in job.logEntries(start):
+            if media == u"json":
+                line = json.dumps(entry)
+            else:
+                line = entry[u"message"][u"text"].rstrip()
+            yield (line + u"\n").encode(u"utf-8")
+    response.content_type = u'application/json; charset=UTF-8' if media == u"json" else u'text/plain; charset=UTF-8'
+    return streamEntries()
+
+def jobResult(jobId):
+    u"""Result of a finished job for *get* requests to */rest/jobs/<jobId>/result*, which is the view or the messages,
+    per the media of the job, as the result of the synchronous request.  Http status 202 if the job is not finished.
+    
+    :returns: html, xml, csv, json, text -- Result per media of the job, or the job status if not finished
+    """
+    job = jobQueue.get(jobId) if jobQueue is not None else None
+    if job is None:
+        response.status = 404
+        return errorReport([_(u"Job {0} not found.").format(jobId)], u"text")
+    if not job.isFinished:
+        response.status = 202
+        return jobStatus(jobId)
+    if job.status == u"failed":
+        response.status = 500
+    response.content_type = job.contentType
+    return job.result
+
+def logResult(logHandler, media):
+    u"""Messages of the log buffer for result in media (clearing the log buffer).
+    
+    :returns: html, xml, json, text -- Messages per media type argument
+    """
+    if media == u"xml":
+        return logHandler.getXml()
+    elif media == u"json":
+        return logHandler.getJson()
+    elif media == u"text":
+        return logHandler.getText()
+    else:
+        return htmlBody(tableRows(logHandler.getLines(), header=_(u"Messages")))
 
 def diff():
     u"""Execute versioning diff request for *get* request to */rest/xbrl/diff*.
@@ -312,7 +524,15 @@ def diff():
     setattr(options, u"diffFile", request.query.toDTS)
     fh = FileNamedStringIO(request.query.report)
     setattr(options, u"versReportFile", fh)
-    cntlr.run(options)
+    if workerPool is not None:
+        try:
+            workerPool.run(options)
+        except Exception, err:
+            fh.close()
+            return workerPoolErrorReport(err)
+    else:
+        with cntlrLock:
+            cntlr.run(options)
     reportContents = fh.getvalue()
     fh.close()
     response.content_type = u'text/xml; charset=UTF-8'
@@ -334,9 +554,29 @@ def configure():
         setattr(options, u"packages", request.query.packages)
     if u'environment' in request.query:
         setattr(options, u"showEnvironment", True)
-    cntlr.run(options)
+    with cntlrLock:
+        cntlr.run(options)
+        lines = cntlr.logHandler.getLines()
+    if workerPool is not None:
+        workerPool.recycle() # workers start with the changed configuration
     response.content_type = u'text/html; charset=UTF-8'
-    return htmlBody(tableRows(cntlr.logHandler.getLines(), header=_(u"Configuration Request")))
+    return htmlBody(tableRows(lines, header=_(u"Configuration Request")))
+
+def dtsCache():
+    u"""Statistics of the DTS cache, for *get* requests to */rest/dtsCache*, totalled over worker processes if any.
+    
+    :returns: json -- hits, misses, hitRate, bypassed, invalidations, evictions, entries and objects of the DTS cache
+    """
+    if workerPool is not None:
+        stats = workerPool.dtsCacheStats()
+    else:
+        with cntlrLock: # cache may be changing by a request on another server thread
+            if cntlr.modelManager.dtsCache is not None:
+                stats = cntlr.modelManager.dtsCache.stats()
+            else:
+                stats = {}
+    response.content_type = u'application/json; charset=UTF-8'
+    return json.dumps(stats)
 
 def stopWebServer():
     u"""Stop the web server by *get* requests to */rest/stopWebServer*.
@@ -362,7 +602,8 @@ def quickbooksServer():
     """
     from arelle import CntlrQuickBooks
     response.content_type = u'text/xml; charset=UTF-8'
-    return CntlrQuickBooks.server(cntlr, request.body, request.urlparts)
+    with cntlrLock: # uses the global cntlr and QuickBooks request state
+        return CntlrQuickBooks.server(cntlr, request.body, request.urlparts)
 
 
 def quickbooksGLrequest(qbReport=None, file=None):
@@ -389,7 +630,8 @@ def quickbooksGLrequest(qbReport=None, file=None):
         errors.append(_(u"ToDate '{0}' missing or not valid").format(toDate))
     if errors:
         return errorReport(errors, media)
-    ticket = qbRequest(qbReport, fromDate, toDate, file)
+    with cntlrLock: # QuickBooks request state is shared with quickbooksServer
+        ticket = qbRequest(qbReport, fromDate, toDate, file)
     result = htmlBody(tableRows([_(u"Request queued for QuickBooks...")], header=_(u"Quickbooks Request")), script=u'''
 <script type="text/javascript">
 <!-- 
@@ -409,13 +651,19 @@ def quickbooksGLresponse():
     ticket = request.query.ticket
     media = request.query.media
     viewRequested = request.query.view
-    status = CntlrQuickBooks.qbRequestStatus.get(ticket)
+    instanceUuid = None
+    with cntlrLock: # QuickBooks request state is shared with quickbooksServer
+        status = CntlrQuickBooks.qbRequestStatus.get(ticket)
+        if status and status.startswith(u"ConnectionErrorMessage: "):
+            CntlrQuickBooks.qbRequestStatus.pop(ticket, None)
+        elif status == u"Done" and ticket in CntlrQuickBooks.xbrlInstances:
+            CntlrQuickBooks.qbRequestStatus.pop(ticket)
+            instanceUuid = CntlrQuickBooks.xbrlInstances.pop(ticket)
     if not status:
         return htmlBody(tableRows([_(u"QuickBooks ticket not found, request canceled.")], header=_(u"Quickbooks Request")))
     if status.startswith(u"ConnectionErrorMessage: "):
-        CntlrQuickBooks.qbRequestStatus.pop(ticket, None)
         return errorReport([status[24:]], media)
-    if status != u"Done" or ticket not in CntlrQuickBooks.xbrlInstances:
+    if status != u"Done" or instanceUuid is None:
         return htmlBody(tableRows([_(u"{0}, Waiting 20 seconds...").format(status)], 
                                   header=_(u"Quickbooks Request")), 
                                   script=u'''
@@ -426,15 +674,11 @@ function autoRefresh(){{clearInterval(timer);self.location.reload(true);}}
 //--> 
 </script>
 ''')
-    CntlrQuickBooks.qbRequestStatus.pop(ticket)
-    
-    instanceUuid = CntlrQuickBooks.xbrlInstances[ticket]
-    CntlrQuickBooks.xbrlInstances.pop(ticket)
     options = Options()
     setattr(options, u"entrypointFile", instanceUuid)
     viewFile = FileNamedStringIO(media)
     setattr(options, u"factsFile", viewFile)
-    return runOptionsAndGetResult(options, media, viewFile)
+    return runOptionsAndGetResult(options, media, viewFile, useWorkerPool=False) # instance is in this process
 
 def quickbooksWebPage():
     return htmlBody(_(u'''<table width="700p">
@@ -586,6 +830,15 @@ or label linkbases.  Multiple file names are separated by a '|' character.</td><
 <tr><td style="text-indent: 1em;">factListCols</td><td>A list of column names for facts list.  Multiple names are separated by a space or comma characters.
 Example:  <code>factListCols=Label,unitRef,Dec,Value,EntityScheme,EntityIdentifier,Period,Dimensions</code></td></tr> 
 
+<tr><th colspan="2">Asynchronous jobs</th></tr>
+<tr><td>/rest/jobs</td><td>Submit (by <code>POST</code>) a validation, or view if a view is specified, to be processed as a job, with parameters as above 
+and a file parameter or a posted zip file.  Returns JSON status of the job, including its id, or status 503 if the job queue is full.</td></tr>
+<tr><td style="text-align=right;">Example:</td><td><code>curl -X POST "http://localhost:8080/rest/jobs?file=c:/a/b/c.xbrl&amp;media=json"</code></td></tr>
+<tr><td>/rest/jobs/{id}</td><td>JSON status of the job (queued, running, completed or failed), its progress, and number of log entries.</td></tr>
+<tr><td>/rest/jobs/{id}/log</td><td>Log entries of the job, streamed as they are produced until the job is finished.  Parameter <code>start</code> skips 
+prior entries, parameter <code>media</code> may be <code>text</code> (default) or <code>json</code> (an entry object per line).</td></tr>
+<tr><td>/rest/jobs/{id}/result</td><td>Result of the finished job (view or messages per the job's media).</td></tr>
+
 <tr><th colspan="2">Excel interface</th></tr>
 <tr><td>GUI operation:</td><td>Select data tab.<br/>Click Get External Data From Web.<br/>
 New Web Query dialog, enter rest URI to Address (example, for instance with indicated fact columns: 
@@ -782,6 +1035,25 @@ def errorReport(errors, media=u"html"):
         response.content_type = u'text/html; charset=UTF-8'
         return htmlBody(tableRows(errors, header=_(u"Messages")))
     
+def workerPoolErrorReport(err, media=u"html"):
+    u"""Reports a request which could not be processed by the worker pool, with http status 503 (busy) or 504 (timeout).
+    
+    :param err: Exception from CntlrWebWorkers.WorkerPool.run.
+    :returns: html - <table> html string.
+    """
+    response.status, message = workerPoolErrorMessage(err)
+    return errorReport([message], media)
+
+def workerPoolErrorMessage(err):
+    # http status and message for an exception of the worker pool
+    from arelle.CntlrWebWorkers import WorkerPoolBusy, WorkerTimeout
+    if isinstance(err, WorkerPoolBusy):
+        return (503, _(u"Server busy, all workers are processing requests and the request queue is full, please retry later."))
+    elif isinstance(err, WorkerTimeout):
+        return (504, _(u"Request exceeded the time limit of {0} seconds and was terminated.").format(workerPool.timeout))
+    else:
+        return (500, _(u"Request processing failed: {0}").format(err.__class__.__name__))
+    
 def multipartResponse(parts):
     # call with ( (filename, contentType, content), ...)
     boundary=u'----multipart-boundary-%s----' % (uuid.uuid1(),)
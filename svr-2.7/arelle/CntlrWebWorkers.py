@@ -0,0 +1,226 @@
+u'''
+Use this module for the web server to dispatch REST requests to a pool of worker processes,
+each with its own CntlrCmdLine, instead of to the single global controller of CntlrWebMain.
+
+Requests wait for an idle worker in a bounded queue (a request arriving when the queue is full
+is refused as busy), a worker exceeding the request timeout is terminated and replaced, and
+workers are replaced after a number of requests to limit memory growth of long running workers.
+'''
+import io, time, threading, logging, multiprocessing
+from collections import defaultdict, OrderedDict
+from arelle.FileSource import FileNamedStringIO
+from arelle.CntlrWebJobs import JobLogHandler
+try:
+    from queue import Queue
+except ImportError:
+    from Queue import Queue
+
+class WorkerPoolBusy(Exception):
+    u"""All workers are busy and the request queue is full."""
+    pass
+
+class WorkerTimeout(Exception):
+    u"""The worker did not complete the request within the request timeout."""
+    pass
+
+class WorkerFailed(Exception):
+    u"""The worker process ended without completing the request."""
+    pass
+
+class JobOptions(object):
+    u"""Options, reconstituted in the worker process, to emulate options needed by CntlrCmdLine.run"""
+    def __init__(self, optionValues):
+        self.__dict__.update(optionValues)
+
+def workerMain(conn, dtsCacheLimits):
+    # worker process: own controller, logging to buffer, runs requests until sent None or parent ends
+    from arelle.CntlrCmdLine import CntlrCmdLine
+    from arelle.CntlrWebMain import logResult
+    cntlr = CntlrCmdLine()
+    cntlr.startLogging(logFileName=u'logToBuffer')
+    maxDtses, maxDtsObjects = dtsCacheLimits
+    if maxDtses:
+        from arelle.DtsCache import DtsCache
+        cntlr.modelManager.dtsCache = DtsCache(cntlr.modelManager, maxEntries=maxDtses, maxObjects=maxDtsObjects)
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, IOError):
+            break
+        if job is None:
+            break
+        optionValues, viewFileNames, sourceZip, media, streamProgress = job
+        options = JobOptions(optionValues)
+        viewFiles = {}
+        for option, fileName in viewFileNames.items():
+            viewFiles[option] = FileNamedStringIO(fileName)
+            setattr(options, option, viewFiles[option])
+        if streamProgress: # status messages and log entries are sent as produced
+            progressLogHandler = JobLogHandler(lambda entry: conn.send((u"log", entry)), cntlr.logHandler.formatter)
+            cntlr.logger.addHandler(progressLogHandler)
+            cntlr.showStatus = lambda message, clearAfter=None: conn.send((u"status", message))
+        try:
+            successful = cntlr.run(options, io.BytesIO(sourceZip) if sourceZip is not None else None)[0] # of (success, modelXbrl, g)
+        except Exception, err:
+            cntlr.addToLog(_(u"Web server worker exception: {0}").format(err),
+                           messageCode=u"arelle:webserverWorkerException", level=logging.ERROR)
+            successful = False
+        if streamProgress:
+            cntlr.logger.removeHandler(progressLogHandler)
+            del cntlr.showStatus
+        viewFileValues = dict((option, viewFile.getvalue()) for option, viewFile in viewFiles.items())
+        for viewFile in viewFiles.values():
+            viewFile.close()
+        conn.send((u"result", (successful, viewFileValues, logResult(cntlr.logHandler, media),
+                               cntlr.modelManager.dtsCache.stats() if cntlr.modelManager.dtsCache is not None else None)))
+    conn.close()
+    cntlr.close()
+
+class Worker(object):
+    def __init__(self, generation, dtsCacheLimits):
+        self.generation = generation
+        self.jobs = 0
+        self.dtsCacheStats = None
+        self.conn, workerConn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=workerMain, args=(workerConn, dtsCacheLimits))
+        self.process.daemon = True
+        self.process.start()
+        workerConn.close()
+
+    def run(self, job, timeout, progress=None):
+        self.jobs += 1
+        try:
+            self.conn.send(job)
+            timeEnds = time.time() + timeout if timeout else None
+            while True:
+                if timeEnds is not None and not self.conn.poll(max(timeEnds - time.time(), 0)):
+                    raise WorkerTimeout()
+                messageType, value = self.conn.recv()
+                if messageType == u"result":
+                    return value
+                elif messageType == u"log":
+                    progress.logEntry(value)
+                elif messageType == u"status":
+                    progress.showStatus(value)
+        except (EOFError, IOError):
+            raise WorkerFailed()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+            self.conn.close()
+        except (EOFError, IOError):
+            pass
+        self.process.join(1.0)
+        if self.process.is_alive():
+            self.process.terminate()
+
+    def terminate(self):
+        self.process.terminate()
+        self.process.join(1.0)
+        self.conn.close()
+
+class WorkerPool(object):
+    u"""Pool of pre-started worker processes for web server requests.
+
+    :param numWorkers: Number of worker processes
+    :param maxQueued: Number of requests which may wait for a worker, beyond those being processed
+    :param timeout: Seconds a request may run before its worker is terminated (0 or None for no timeout)
+    :param maxJobs: Requests processed by a worker before it is replaced (0 or None to not replace)
+    :param dtsCacheLimits: Number of DTSes and total model objects for each worker's DtsCache (None for no DTS cache)
+    """
+    def __init__(self, numWorkers, maxQueued=None, timeout=None, maxJobs=None, dtsCacheLimits=None):
+        self.timeout = timeout
+        self.maxJobs = maxJobs
+        self.dtsCacheLimits = dtsCacheLimits or (None, None)
+        self.replacedDtsCacheStats = defaultdict(int) # totals of replaced workers
+        self.generation = 0
+        self.requestSlots = threading.BoundedSemaphore(numWorkers + (numWorkers if maxQueued is None else maxQueued))
+        self.idleWorkers = Queue()
+        self.workers = []
+        for i in _RANGE(numWorkers):
+            self.idleWorkers.put(self.newWorker())
+
+    def newWorker(self):
+        worker = Worker(self.generation, self.dtsCacheLimits)
+        self.workers.append(worker)
+        return worker
+
+    def replaceWorker(self, worker, terminate=False):
+        self.workers.remove(worker)
+        if worker.dtsCacheStats:
+            for stat in (u"hits", u"misses", u"bypassed", u"invalidations", u"evictions"):
+                self.replacedDtsCacheStats[stat] += worker.dtsCacheStats[stat]
+        if terminate:
+            worker.terminate()
+        else:
+            worker.stop()
+        return self.newWorker()
+
+    def run(self, options, sourceZipStream=None, media=u"html", progress=None, wait=False):
+        u"""Runs CntlrCmdLine.run with options in a worker process.  Option values which are FileNamedStringIO
+        (such as view files) are written with the output produced by the worker.  If progress is provided (such
+        as a CntlrWebJobs.Job), its showStatus and logEntry receive status messages and log entries as produced.
+        If wait, such as for a job which has already been queued, the request waits for a free request slot
+        instead of being refused as busy when the request queue is full.
+
+        :returns: tuple -- (successful, messages per media, from CntlrWebMain.logResult)
+        """
+        if not self.requestSlots.acquire(wait):
+            raise WorkerPoolBusy()
+        try:
+            optionValues = {}
+            viewFiles = {}
+            for option, value in options.__dict__.items():
+                if isinstance(value, FileNamedStringIO):
+                    viewFiles[option] = value
+                else:
+                    optionValues[option] = value
+            job = (optionValues,
+                   dict((option, viewFile.fileName) for option, viewFile in viewFiles.items()),
+                   sourceZipStream.read() if sourceZipStream is not None else None,
+                   media,
+                   progress is not None)
+            worker = self.idleWorkers.get()
+            try:
+                successful, viewFileValues, messagesResult, worker.dtsCacheStats = worker.run(job, self.timeout, progress)
+            except (WorkerTimeout, WorkerFailed):
+                worker = self.replaceWorker(worker, terminate=True)
+                raise
+            finally:
+                if (self.maxJobs and worker.jobs >= self.maxJobs) or worker.generation != self.generation:
+                    worker = self.replaceWorker(worker)
+                self.idleWorkers.put(worker)
+            for option, viewFile in viewFiles.items():
+                viewFile.write(viewFileValues[option])
+            return (successful, messagesResult)
+        finally:
+            self.requestSlots.release()
+
+    def dtsCacheStats(self):
+        u"""DTS cache statistics totalled over the workers (as of their most recently completed requests).
+
+        :returns: dict -- as from DtsCache.stats
+        """
+        stats = OrderedDict((stat, self.replacedDtsCacheStats[stat] if stat not in (u"entries", u"objects") else 0)
+                            for stat in (u"hits", u"misses", u"hitRate", u"bypassed", u"invalidations", u"evictions", u"entries", u"objects"))
+        for worker in list(self.workers):
+            if worker.dtsCacheStats:
+                for stat, value in worker.dtsCacheStats.items():
+                    if stat != u"hitRate":
+                        stats[stat] += value
+        requests = stats[u"hits"] + stats[u"misses"]
+        stats[u"hitRate"] = round(float(stats[u"hits"]) / requests, 4) if requests else 0.0
+        return stats
+
+    def recycle(self):
+        u"""Replace workers as they complete their current requests, such as after a configuration change."""
+        self.generation += 1
+
+    def close(self):
+        while not self.idleWorkers.empty():
+            self.idleWorkers.get().stop()
+        for worker in self.workers:
+            if worker.process.is_alive():
+                worker.terminate()
+        del self.workers[:]
@@ -0,0 +1,331 @@
+u'''
+Use this module to keep the taxonomy documents (DTS) of recently loaded instances, so that a
+following instance with the same schemaRefs, for example in a long-running web server, attaches
+the loaded taxonomy documents instead of parsing and discovering them again.
+
+DTSes are held in least-recently-used order, keyed by the instance schemaRefs and linkbaseRefs, and are
+reused only while the modification times of all their document files are unchanged.  A DTS is
+attached to one instance at a time (a concurrent instance with the same schemaRefs loads its DTS
+normally), and is detached when the instance ModelXbrl is closed.  Detaching restores the formula and table
+rendering resources to their state before their XPath expressions were compiled, so that each instance compiles
+them and reports their errors as when the DTS is discovered.
+'''
+import os, threading
+from collections import OrderedDict
+from arelle import ModelValue
+
+# ModelXbrl attributes set by DTS discovery, copied into an instance ModelXbrl attaching a cached DTS
+DTS_DICT_ATTRIBUTES = (u"qnameConcepts", u"qnameAttributes", u"qnameAttributeGroups", u"qnameGroupDefinitions",
+                       u"qnameTypes", u"qnameParameters", u"qnameDimensionDefaults",
+                       u"modelCustomFunctionSignatures", u"urlUnloadableDocs")
+DTS_LIST_DICT_ATTRIBUTES = (u"namespaceDocs", u"arcroleTypes", u"roleTypes", u"nameConcepts", u"baseSets")
+DTS_SET_ATTRIBUTES = (u"modelVariableSets", u"modelCustomFunctionImplementations", u"modelRenderingTables",
+                      u"langs", u"labelroles")
+DTS_FLAG_ATTRIBUTES = (u"hasXDT", u"hasFormulae", u"hasRenderingTables", u"hasTableRendering", u"hasTableIndexing")
+
+def dtsEntryXml(key):
+    u"""Url and contents of the empty instance document with the schemaRefs and linkbaseRefs of a DTS key, 
+    which is the entry of the DTS ModelXbrl.
+
+    :returns: tuple -- (url, initialXml)
+    """
+    from xml.sax.saxutils import quoteattr
+    refsXml = []
+    for localName, url, role, arcrole in key:
+        refsXml.append(u'<link:{0} xlink:type="simple" xlink:href={1}{2}{3}/>'.format(
+                        localName, quoteattr(url.replace(u"\\",u"/")),
+                        u' xlink:role={0}'.format(quoteattr(role)) if role else u"",
+                        u' xlink:arcrole={0}'.format(quoteattr(arcrole)) if arcrole else u""))
+    return (u"{0}/dtsCache-{1}.xml".format(os.path.dirname(key[0][1]), len(key)),
+            u'<xbrl xmlns="http://www.xbrl.org/2003/instance"'
+            u' xmlns:link="http://www.xbrl.org/2003/linkbase"'
+            u' xmlns:xlink="http://www.w3.org/1999/xlink">{0}</xbrl>'.format(u"".join(refsXml)))
+
+class DtsLoadLogger(object):
+    # records messages of DTS loading, to be logged again for each instance the DTS is attached to
+    def __init__(self, logger):
+        self.logger = logger
+        self.messages = []
+
+    def __getattr__(self, name):
+        return getattr(self.logger, name)
+
+    def log(self, level, *args, **kwargs):
+        self.messages.append((level, args, kwargs))
+
+class DtsCacheEntry(object):
+    def __init__(self, key, dtsXbrl, messages):
+        self.key = key
+        self.dtsXbrl = dtsXbrl # ModelXbrl of an empty instance with the schemaRefs
+        dtsEntryFile = os.path.basename(dtsXbrl.modelDocument.uri)
+        self.messages = [message # messages of DTS documents, not of the empty instance
+                         for message in messages
+                         if not any(ref.get(u"href", u"").startswith(dtsEntryFile)
+                                    for ref in message[2].get(u"extra", {}).get(u"refs", ()))]
+        self.modelDocuments = [doc
+                               for doc in dtsXbrl.urlDocs.values()
+                               if doc is not dtsXbrl.modelDocument]
+        self.fileMtimes = self.currentFileMtimes()
+        self.numObjects = len(dtsXbrl.modelObjects)
+        self.internedQNames = self.referencedQNames()
+        self.formulaResourceStates = self.currentFormulaResourceStates()
+        self.modelXbrl = None # instance ModelXbrl the DTS is attached to
+        self.attachments = 0
+
+    def referencedQNames(self):
+        # QNames referenced by the DTS objects (keys of the DTS dicts and QNames cached by its model objects), by intern
+        # key, which are kept interned while the DTS is cached (see ModelManager.resetInternedQNames)
+        QName = ModelValue.QName
+        qnames = {}
+        for attr in DTS_DICT_ATTRIBUTES:
+            for key in getattr(self.dtsXbrl, attr):
+                if type(key) is QName:
+                    qnames[(key.prefix, key.namespaceURI, key.localName)] = key
+        for modelObject in self.dtsXbrl.modelObjects:
+            for value in getattr(modelObject, u"__dict__", {}).values():
+                if type(value) is QName:
+                    qnames[(value.prefix, value.namespaceURI, value.localName)] = value
+        return qnames
+
+    def currentFormulaResourceStates(self):
+        # attributes of the formula (and table rendering) resources before an instance compiles their XPath expressions
+        # and caches compile results (which must be compiled and reported again for each instance)
+        from arelle.ModelFormulaObject import ModelFormulaResource
+        return [(modelObject, dict(modelObject.__dict__))
+                for modelObject in self.dtsXbrl.modelObjects
+                if isinstance(modelObject, ModelFormulaResource)]
+
+    def currentFileMtimes(self):
+        mtimes = []
+        for doc in self.modelDocuments:
+            try:
+                mtimes.append(os.path.getmtime(doc.filepath))
+            except (EnvironmentError, TypeError):
+                mtimes.append(None)
+        return mtimes
+
+    @property
+    def isCurrent(self):
+        return self.fileMtimes == self.currentFileMtimes()
+
+    def attach(self, modelXbrl):
+        self.modelXbrl = modelXbrl
+        self.attachments += 1
+        dtsXbrl = self.dtsXbrl
+        for doc in self.modelDocuments:
+            doc.modelXbrl = modelXbrl
+            modelXbrl.urlDocs[doc.uri] = doc
+        for modelObject in dtsXbrl.modelObjects:
+            if getattr(modelObject, u"modelDocument", None) is not dtsXbrl.modelDocument: # not the schemaRefs instance
+                modelObject.objectIndex = len(modelXbrl.modelObjects)
+                modelXbrl.modelObjects.append(modelObject)
+        for attr in DTS_DICT_ATTRIBUTES:
+            getattr(modelXbrl, attr).update(getattr(dtsXbrl, attr))
+        for attr in DTS_LIST_DICT_ATTRIBUTES:
+            modelXbrlDict = getattr(modelXbrl, attr)
+            for key, values in getattr(dtsXbrl, attr).items():
+                modelXbrlDict[key].extend(values)
+        for attr in DTS_SET_ATTRIBUTES:
+            getattr(modelXbrl, attr).update(getattr(dtsXbrl, attr))
+        for attr in DTS_FLAG_ATTRIBUTES:
+            if getattr(dtsXbrl, attr, False):
+                setattr(modelXbrl, attr, True)
+        modelXbrl.dtsCacheEntry = self
+        for numericLevel, args, kwargs in self.messages:
+            modelXbrl.logCount[numericLevel] = modelXbrl.logCount.get(numericLevel, 0) + 1
+            if numericLevel >= modelXbrl.errorCaptureLevel:
+                modelXbrl.errors.append(kwargs[u"extra"][u"messageCode"])
+            modelXbrl.logger.log(numericLevel, *args, **kwargs)
+
+    def detach(self):
+        modelXbrl = self.modelXbrl
+        cachedDocs = set(self.modelDocuments)
+        for doc in self.modelDocuments:
+            modelXbrl.urlDocs.pop(doc.uri, None)
+            doc.modelXbrl = self.dtsXbrl
+        for doc in modelXbrl.urlDocs.values(): # instance documents must not close the cached documents
+            for referencedDoc in cachedDocs & set(doc.referencesDocument.keys()):
+                del doc.referencesDocument[referencedDoc]
+        for modelObject, state in self.formulaResourceStates:
+            modelObject.__dict__.clear()
+            modelObject.__dict__.update(state)
+        for objectIndex, modelObject in enumerate(self.dtsXbrl.modelObjects):
+            modelObject.objectIndex = objectIndex
+        del modelXbrl.dtsCacheEntry
+        self.modelXbrl = None
+        self.internedQNames = self.referencedQNames() # including QNames the instance cached in the DTS objects
+
+    def close(self):
+        self.dtsXbrl.close()
+        del self.modelDocuments[:]
+
+class DtsCache(object):
+    u"""Least-recently-used cache of loaded DTSes for a ModelManager (as modelManager.dtsCache).
+
+    :param maxEntries: Number of DTSes to keep
+    :param maxObjects: Total model objects (elements and documents) of DTSes to keep (0 or None for no limit), limiting memory use
+    """
+    def __init__(self, modelManager, maxEntries=4, maxObjects=None):
+        self.modelManager = modelManager
+        self.maxEntries = maxEntries
+        self.maxObjects = maxObjects
+        self.entries = OrderedDict() # least recently used first
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0 # instances with an attached DTS in use or not cacheable
+        self.invalidations = 0 # DTSes with changed files
+        self.evictions = 0
+        self.saveImageFile = None # DTS image file to save the next DTS loaded to (see DtsImage)
+
+    def dtsKey(self, modelXbrl, modelDocument, rootNode):
+        # (localName, url, role, arcrole) of instance schemaRefs and linkbaseRefs, or None if the DTS is not cacheable
+        if (modelXbrl.modelManager.validateDisclosureSystem or # disclosure system checks are relative to the entry
+            modelXbrl.modelManager.skipDTS or modelXbrl.fileSource.isArchive):
+            return None
+        refs = set()
+        for element in rootNode.iterchildren(u"{http://www.xbrl.org/2003/linkbase}schemaRef",
+                                             u"{http://www.xbrl.org/2003/linkbase}linkbaseRef"):
+            href = element.get(u"{http://www.w3.org/1999/xlink}href")
+            if not href:
+                return None
+            url = self.modelManager.cntlr.webCache.normalizeUrl(href.partition(u"#")[0], modelDocument.baseForElement(element))
+            if modelXbrl.fileSource.isMappedUrl(url):
+                return None
+            refs.add((element.localName, url, 
+                      element.get(u"{http://www.w3.org/1999/xlink}role"),
+                      element.get(u"{http://www.w3.org/1999/xlink}arcrole")))
+        if not any(ref[0] == u"schemaRef" for ref in refs):
+            return None
+        return tuple(sorted(refs, key=lambda ref: tuple(r or u"" for r in ref)))
+
+    def attach(self, modelXbrl, modelDocument, rootNode):
+        u"""Attaches a cached DTS, or a newly loaded and cached DTS, to an entry instance being loaded, before its
+        schemaRefs are discovered.
+
+        :returns: bool -- True if a DTS was attached
+        """
+        key = self.dtsKey(modelXbrl, modelDocument, rootNode)
+        if key is None:
+            self.bypassed += 1
+            return False
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry.modelXbrl is not None: # attached to another instance
+                    self.bypassed += 1
+                    return False
+                del self.entries[key]
+                if entry.isCurrent:
+                    self.hits += 1
+                else:
+                    self.invalidations += 1
+                    entry.close()
+                    entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self.entries[key] = entry # most recently used
+                entry.modelXbrl = modelXbrl # in use
+        if entry is None:
+            entry = self.load(key)
+            if entry is None:
+                return False
+            with self.lock:
+                if key in self.entries: # loaded concurrently, keep the other DTS in cache
+                    self.bypassed += 1
+                    entry.close()
+                    return False
+                self.entries[key] = entry
+                entry.modelXbrl = modelXbrl
+        if any(doc.uri in modelXbrl.urlDocs for doc in entry.modelDocuments):
+            entry.modelXbrl = None
+            self.bypassed += 1
+            return False
+        if self.saveImageFile and not entry.attachments: # before an instance uses (and adds state to) the DTS objects
+            from arelle import DtsImage
+            DtsImage.save(entry, self.saveImageFile)
+            self.saveImageFile = None
+        entry.attach(modelXbrl)
+        return True
+
+    def load(self, key):
+        from arelle import ModelXbrl, ModelDocument, XmlValidate, XmlValidateSchema
+        url, initialXml = dtsEntryXml(key)
+        dtsXbrl = ModelXbrl.create(self.modelManager, ModelDocument.Type.INSTANCE, url=url, createModelDocument=False)
+        logger = dtsXbrl.logger
+        dtsXbrl.logger = DtsLoadLogger(logger)
+        dtsXbrl.modelDocument = ModelDocument.create(dtsXbrl, ModelDocument.Type.INSTANCE, url, isEntry=True, initialXml=initialXml)
+        del dtsXbrl.entryLoadingUrl
+        ModelXbrl.loadSchemalocatedSchemas(dtsXbrl)
+        while dtsXbrl.schemaDocsToValidate:
+            doc = dtsXbrl.schemaDocsToValidate.pop()
+            XmlValidateSchema.validate(doc, doc.xmlRootElement, doc.targetNamespace) # validate schema elements
+        for doc in dtsXbrl.urlDocs.values(): # as by ValidateXbrlDTS, so errors are in the messages of each instance
+            if doc.type == ModelDocument.Type.SCHEMA:
+                XmlValidate.validate(dtsXbrl, doc.xmlRootElement)
+                for linkbaseElt in doc.xmlRootElement.iterdescendants(u"{http://www.xbrl.org/2003/linkbase}linkbase"):
+                    XmlValidate.validate(dtsXbrl, linkbaseElt)
+            elif doc.type == ModelDocument.Type.LINKBASE:
+                XmlValidate.validate(dtsXbrl, doc.xmlRootElement)
+        messages = dtsXbrl.logger.messages
+        dtsXbrl.logger = logger
+        if any(doc.type == ModelDocument.Type.UnknownNonXML for doc in dtsXbrl.urlDocs.values()) or len(dtsXbrl.urlDocs) <= 1:
+            dtsXbrl.close() # not loadable, let instance discovery report errors
+            return None
+        return DtsCacheEntry(key, dtsXbrl, messages)
+
+    def add(self, entry):
+        u"""Adds a DTS not loaded by this cache, such as from a DTS image, as the most recently used DTS."""
+        with self.lock:
+            previous = self.entries.pop(entry.key, None)
+            if previous is not None and previous.modelXbrl is None:
+                previous.close()
+            self.entries[entry.key] = entry
+
+    def release(self, modelXbrl):
+        u"""Detaches the cached DTS from an instance ModelXbrl being closed, and evicts least recently used DTSes over
+        the cache limits."""
+        entry = modelXbrl.dtsCacheEntry
+        evictions = self.evictions
+        with self.lock:
+            entry.detach()
+            numObjects = sum(e.numObjects for e in self.entries.values())
+            for key, e in list(self.entries.items()):
+                if len(self.entries) <= self.maxEntries and (not self.maxObjects or numObjects <= self.maxObjects):
+                    break
+                if e.modelXbrl is None:
+                    del self.entries[key]
+                    numObjects -= e.numObjects
+                    self.evictions += 1
+                    e.close()
+        if self.evictions != evictions: # release QNames of the evicted DTSes, even while other models are loaded
+            self.modelManager.resetInternedQNames()
+
+    def clear(self):
+        with self.lock:
+            for key, entry in list(self.entries.items()):
+                if entry.modelXbrl is None:
+                    del self.entries[key]
+                    entry.close()
+        self.modelManager.resetInternedQNames()
+
+    def cachedEntries(self):
+        u""":returns: list -- DtsCacheEntries of the cached DTSes"""
+        with self.lock:
+            return list(self.entries.values())
+
+    def stats(self):
+        u"""Cache metrics.
+
+        :returns: dict -- hits, misses, hitRate, bypassed, invalidations, evictions, entries, objects
+        """
+        requests = self.hits + self.misses
+        return OrderedDict(((u"hits", self.hits),
+                            (u"misses", self.misses),
+                            (u"hitRate", round(float(self.hits) / requests, 4) if requests else 0.0),
+                            (u"bypassed", self.bypassed),
+                            (u"invalidations", self.invalidations),
+                            (u"evictions", self.evictions),
+                            (u"entries", len(self.entries)),
+                            (u"objects", sum(e.numObjects for e in self.entries.values()))))
@@ -0,0 +1,230 @@
+u'''
+Use this module to save the taxonomy documents (DTS) of an instance's schemaRefs, as discovered and
+validated by DtsCache, to a DTS image file, and to load a DTS image into a DtsCache, so that a later
+run with an instance having the same schemaRefs attaches the DTS without discovering and validating
+its documents again.
+
+A DTS image is a versioned binary file with the text of each DTS document and the model object
+class of each of its nodes, and the pickled state of the model objects, documents and ModelXbrl
+(concepts, types, role and arcrole types, base sets, label languages and roles, dimension defaults,
+as attached by DtsCacheEntry), where references to model objects and documents are pickled by their
+position.  Model objects are lxml proxy elements, which can not be pickled, so loading parses the
+document texts (with the saved classes, not by class lookup and schema discovery), and restores
+the state of the parsed elements.
+
+An image is not loaded if it was saved by another version of Arelle or python, or if any of its
+document files has been modified since it was saved, in which case the DTS is discovered.
+'''
+import io, os, sys, time, zlib, logging
+from lxml import etree
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+from arelle import ModelDocument, ModelXbrl
+from arelle.ModelObjectFactory import parser
+from arelle.DtsCache import (DtsCacheEntry, DtsLoadLogger, dtsEntryXml, DTS_DICT_ATTRIBUTES, DTS_LIST_DICT_ATTRIBUTES,
+                             DTS_SET_ATTRIBUTES, DTS_FLAG_ATTRIBUTES)
+
+DTS_IMAGE_SIGNATURE = "Arelle DTS image\n"
+DTS_IMAGE_FORMAT = 1
+# ModelDocument attributes recreated on loading
+DOCUMENT_PARSER_ATTRIBUTES = (u"modelXbrl", u"xmlDocument", u"parser", u"parserLookupName", u"parserLookupClass")
+
+class ImageClassLookup(etree.CustomElementClassLookup):
+    # assigns saved classes to nodes in the order their proxies are created, which is document order when iterated
+    def __init__(self, nodeClasses):
+        super(ImageClassLookup, self).__init__()
+        self.nodeClasses = iter(nodeClasses)
+
+    def lookup(self, node_type, document, namespace, name):
+        return next(self.nodeClasses, None)
+
+def classRef(cls):
+    # lxml internal classes are not assigned by class lookups (are the default)
+    if cls.__module__ == u"lxml.etree" and cls.__name__.startswith(u"_"):
+        return None
+    return (cls.__module__, cls.__name__)
+
+def refClass(ref):
+    if ref is None:
+        return None
+    module, name = ref
+    __import__(module)
+    return getattr(sys.modules[module], name)
+
+def versionSignature():
+    from arelle.Version import version
+    return (DTS_IMAGE_FORMAT, version, tuple(sys.version_info[:2]))
+
+def save(entry, imageFile):
+    u"""Saves the DTS of a DtsCacheEntry to a DTS image file, before the DTS is attached to an instance.
+
+    :param entry: DtsCacheEntry, as loaded by DtsCache
+    :param imageFile: File name of DTS image
+    :returns: bool -- True if saved
+    """
+    startedAt = time.time()
+    dtsXbrl = entry.dtsXbrl
+    cntlr = dtsXbrl.modelManager.cntlr
+    persistentIds = {id(dtsXbrl): u"dts"}
+    classes = []
+    classIndexes = {}
+    documentImages = []
+    nodes = [] # iterated nodes are kept while saving, so their ids identify them
+    for docIndex, doc in enumerate(entry.modelDocuments):
+        persistentIds[id(doc)] = (u"doc", docIndex)
+        fh = dtsXbrl.fileSource.file(doc.filepath, stripDeclaration=True)[0]
+        try:
+            text = fh.read()
+        finally:
+            fh.close()
+        nodeClasses = []
+        for node in doc.xmlRootElement.iter():
+            nodeClass = type(node)
+            if nodeClass not in classIndexes:
+                classIndexes[nodeClass] = len(classes)
+                classes.append(classRef(nodeClass))
+            nodeClasses.append(classIndexes[nodeClass])
+            persistentIds[id(node)] = len(nodes)
+            nodes.append(node)
+        documentImages.append((classRef(type(doc)), doc.uri, doc.filepath, text, nodeClasses))
+    documentStates = [dict((attr, value)
+                           for attr, value in doc.__dict__.items()
+                           if attr not in DOCUMENT_PARSER_ATTRIBUTES)
+                      for doc in entry.modelDocuments]
+    nodeStates = [(i, node.__dict__)
+                  for i, node in enumerate(nodes)
+                  if getattr(node, u"__dict__", None)]
+    modelObjects = [modelObject
+                    for modelObject in dtsXbrl.modelObjects
+                    if getattr(modelObject, u"modelDocument", None) is not dtsXbrl.modelDocument] # not the schemaRefs instance
+    dtsAttributes = dict((attr, getattr(dtsXbrl, attr))
+                         for attrs in (DTS_DICT_ATTRIBUTES, DTS_LIST_DICT_ATTRIBUTES, DTS_SET_ATTRIBUTES, DTS_FLAG_ATTRIBUTES)
+                         for attr in attrs
+                         if hasattr(dtsXbrl, attr))
+    tempFile = u"{0}.{1}".format(imageFile, os.getpid())
+    try:
+        image = io.BytesIO()
+        pickle.dump((classes, documentImages), image, pickle.HIGHEST_PROTOCOL)
+        pickler = pickle.Pickler(image, pickle.HIGHEST_PROTOCOL)
+        pickler.persistent_id = lambda obj: persistentIds.get(id(obj))
+        pickler.dump((documentStates, nodeStates, modelObjects, dtsAttributes, entry.messages))
+        with open(tempFile, u"wb") as fh:
+            fh.write(DTS_IMAGE_SIGNATURE)
+            pickle.dump((versionSignature(), entry.key,
+                         [(doc.filepath, mtime) for doc, mtime in zip(entry.modelDocuments, entry.fileMtimes)]),
+                        fh, pickle.HIGHEST_PROTOCOL)
+            fh.write(zlib.compress(image.getvalue()))
+        if os.path.exists(imageFile): # windows rename won't replace
+            os.remove(imageFile)
+        os.rename(tempFile, imageFile)
+    except (EnvironmentError, pickle.PicklingError, TypeError), err: # TypeError for unpicklable objects
+        if os.path.exists(tempFile):
+            os.remove(tempFile)
+        cntlr.addToLog(_(u"DTS image not saved: %(error)s"),
+                       messageCode=u"arelle:dtsImageNotSaved", messageArgs={u"error": err},
+                       file=imageFile, level=logging.ERROR)
+        return False
+    cntlr.addToLog(_(u"DTS image of %(documents)s documents saved in %(time).2f secs"),
+                   messageCode=u"info", messageArgs={u"documents": len(documentImages), u"time": time.time() - startedAt},
+                   file=imageFile)
+    return True
+
+def load(dtsCache, imageFile):
+    u"""Loads a DTS image into a DtsCache, to be attached to an instance with the DTS image's schemaRefs.
+
+    :param dtsCache: DtsCache of the ModelManager
+    :param imageFile: File name of DTS image
+    :returns: DtsCacheEntry -- the DTS, or None if not loadable (not a DTS image, saved by another version,
+    or with modified document files)
+    """
+    startedAt = time.time()
+    modelManager = dtsCache.modelManager
+    cntlr = modelManager.cntlr
+    try:
+        with open(imageFile, u"rb") as fh:
+            if fh.read(len(DTS_IMAGE_SIGNATURE)) != DTS_IMAGE_SIGNATURE:
+                raise ValueError(_(u"not a DTS image"))
+            signature, key, fileMtimes = pickle.load(fh)
+            if signature != versionSignature():
+                cntlr.addToLog(_(u"DTS image not loaded, it was saved by another version of Arelle or python"),
+                               messageCode=u"arelle:dtsImageNotLoaded", file=imageFile, level=logging.INFO)
+                return None
+            for filepath, mtime in fileMtimes:
+                try:
+                    currentMtime = os.path.getmtime(filepath)
+                except (EnvironmentError, TypeError):
+                    currentMtime = None
+                if currentMtime != mtime:
+                    cntlr.addToLog(_(u"DTS image not loaded, %(filepath)s has been modified"),
+                                   messageCode=u"arelle:dtsImageNotLoaded", messageArgs={u"filepath": filepath},
+                                   file=imageFile, level=logging.INFO)
+                    return None
+            image = io.BytesIO(zlib.decompress(fh.read()))
+        classes, documentImages = pickle.load(image)
+        classes = [refClass(ref) for ref in classes]
+    except Exception, err: # not readable by this python or corrupted
+        cntlr.addToLog(_(u"DTS image not loaded: %(error)s"),
+                       messageCode=u"arelle:dtsImageNotLoaded", messageArgs={u"error": err},
+                       file=imageFile, level=logging.WARNING)
+        return None
+    url, initialXml = dtsEntryXml(key)
+    dtsXbrl = ModelXbrl.create(modelManager, ModelDocument.Type.INSTANCE, url=url, createModelDocument=False)
+    nodes = []
+    documents = []
+    for docClassRef, uri, filepath, text, nodeClasses in documentImages:
+        modelManager.showStatus(_(u"loading {0}").format(uri))
+        _parser, _parserLookupName, _parserLookupClass = parser(dtsXbrl, filepath)
+        _parser.set_element_class_lookup(ImageClassLookup(classes[i] for i in nodeClasses))
+        xmlDocument = etree.parse(io.StringIO(text), parser=_parser, base_url=filepath)
+        docNodes = list(xmlDocument.getroot().iter())
+        _parser.set_element_class_lookup(_parserLookupName) # for nodes not used by discovery
+        if len(docNodes) != len(nodeClasses) or any(classes[i] is not None and type(node) is not classes[i]
+                                                    for node, i in zip(docNodes, nodeClasses)):
+            cntlr.addToLog(_(u"DTS image not loaded, document %(uri)s is not as when the image was saved"),
+                           messageCode=u"arelle:dtsImageNotLoaded", messageArgs={u"uri": uri},
+                           file=imageFile, level=logging.WARNING)
+            dtsXbrl.close()
+            return None
+        nodes.extend(docNodes)
+        docClass = refClass(docClassRef)
+        doc = docClass.__new__(docClass)
+        doc.modelXbrl = dtsXbrl
+        doc.xmlDocument = xmlDocument
+        doc.parser = _parser
+        doc.parserLookupName = _parserLookupName
+        doc.parserLookupClass = _parserLookupClass
+        documents.append(doc)
+    def persistentLoad(persistentId):
+        if isinstance(persistentId, _INT_TYPES):
+            return nodes[persistentId]
+        elif persistentId == u"dts":
+            return dtsXbrl
+        return documents[persistentId[1]]
+    unpickler = pickle.Unpickler(image)
+    unpickler.persistent_load = persistentLoad
+    documentStates, nodeStates, modelObjects, dtsAttributes, messages = unpickler.load()
+    for doc, state in zip(documents, documentStates):
+        doc.__dict__.update(state)
+        dtsXbrl.urlDocs[doc.uri] = doc
+    for i, state in nodeStates:
+        nodes[i].__dict__.update(state)
+    del nodes[:] # nodes not referenced by the restored state are not kept
+    dtsXbrl.modelObjects.extend(modelObjects)
+    for attr, value in dtsAttributes.items():
+        setattr(dtsXbrl, attr, value)
+    # entry document with the schemaRefs, discovering the restored documents
+    logger = dtsXbrl.logger
+    dtsXbrl.logger = DtsLoadLogger(logger) # messages of the DTS are those saved in the image
+    dtsXbrl.modelDocument = ModelDocument.create(dtsXbrl, ModelDocument.Type.INSTANCE, url, isEntry=True, initialXml=initialXml)
+    del dtsXbrl.entryLoadingUrl
+    dtsXbrl.logger = logger
+    for objectIndex, modelObject in enumerate(dtsXbrl.modelObjects):
+        modelObject.objectIndex = objectIndex
+    entry = DtsCacheEntry(key, dtsXbrl, messages)
+    dtsCache.add(entry)
+    cntlr.addToLog(_(u"DTS image of %(documents)s documents loaded in %(time).2f secs"),
+                   messageCode=u"info", messageArgs={u"documents": len(documents), u"time": time.time() - startedAt},
+                   file=imageFile)
+    return entry
@@ -0,0 +1,748 @@
+u'''
+Use this module to replace the facts, contexts and units of a loaded instance by a compact fact
+store, and to release their XML elements, such as for plug-ins which store or export the facts of
+large instances after they have been validated.
+
+The fact store keeps facts in columns (typed arrays of concept, context, unit, parent and lang
+indexes, decimals, precision, flags and source lines, and a list of values), and contexts and
+units as slotted objects with their semantic values.  Facts are accessed by StoredFact objects,
+created as needed, which have the ModelFact properties used by factsInInstance consumers
+(qname, concept, context, unit, decimals, precision, xmlLang, isNil, value, xValue, modelTupleFacts
+and so forth).  Properties needing the XML elements (such as the non-dimensional contents of
+segments and scenarios, and footnote relationships) are not available after the elements are
+released.  StoredFacts, StoredContexts and StoredUnits keep the objectIndex of the model objects
+they replace, so model object lookup (ModelXbrl.modelObject) finds them.
+
+The facts are stored after validation, which needs their elements, so the store reduces the
+memory held by an instance after it has been validated (such as while plug-ins store it in a
+database), not the peak memory of loading and validating it.  For an instance of 100,000 facts
+and 1,000 contexts, the memory held by the instance is about 385 MB loaded and 35 MB stored.
+'''
+from array import array
+from decimal import Decimal, InvalidOperation
+from lxml import etree
+from arelle.ModelInstanceObject import ModelContext, ModelUnit, measuresStr
+
+NONE = -32768 # decimals or precision absent
+INF = 32767
+OTHER = -32767 # decimals or precision not an int of 16 bits, kept as a string in otherDecimals
+# flags
+ITEM = 0x01
+TUPLE = 0x02
+NUMERIC = 0x04
+FRACTION = 0x08
+NIL = 0x10
+# xValue kinds, for xValues which are (re)constructed from the fact value
+XVALUE_NONE = 0
+XVALUE_TEXT = 1
+XVALUE_DECIMAL = 2
+XVALUE_INT = 3
+XVALUE_FLOAT = 4
+XVALUE_OTHER = 5 # kept in xValues
+xValueKindTypes = {XVALUE_DECIMAL: Decimal, XVALUE_INT: _INT, XVALUE_FLOAT: float}
+# instance elements not released (DTS references)
+noDimValues = {} # shared by stored contexts without dimensions, not to be modified
+dtsRefTags = set(u"{http://www.xbrl.org/2003/linkbase}" + ln
+                 for ln in (u"schemaRef", u"linkbaseRef", u"roleRef", u"arcroleRef"))
+
+def storeFacts(modelXbrl):
+    u"""Replaces the facts, contexts and units of an instance by a FactStore and StoredFacts, and
+    releases the instance's elements (other than DTS references).  The model objects of the released
+    facts, contexts and units are replaced in modelObjects by their StoredFacts, StoredContexts and
+    StoredUnits, which keep their objectIndex, and those of other released elements are removed.
+    Relationship sets of the instance's footnote links are no longer available.
+
+    :param modelXbrl: ModelXbrl of a loaded (and validated, as needed) instance
+    :returns: FactStore -- fact store of modelXbrl, or None if not an instance document
+    """
+    from arelle.ModelDocument import Type
+    modelDocument = modelXbrl.modelDocument
+    if modelDocument is None or modelDocument.type != Type.INSTANCE:
+        return None
+    if modelXbrl.factStore is not None:
+        return modelXbrl.factStore
+    store = FactStore(modelXbrl)
+    xbrlElement = modelDocument.xmlRootElement
+    releasedElements = [elt
+                        for elt in xbrlElement.iterchildren()
+                        if elt.tag not in dtsRefTags]
+    # footnote links of the instance are no longer relationship sources
+    releasedArcroles = set()
+    for modelLink in list(modelXbrl.linkRelationships.keys()):
+        if getattr(modelLink, u"modelDocument", None) is modelDocument:
+            del modelXbrl.linkRelationships[modelLink]
+    for key, modelLinks in list(modelXbrl.baseSets.items()):
+        links = [link for link in modelLinks if getattr(link, u"modelDocument", None) is not modelDocument]
+        if len(links) != len(modelLinks):
+            releasedArcroles.add(key[0])
+            if links:
+                modelXbrl.baseSets[key] = links
+            else:
+                del modelXbrl.baseSets[key]
+    for key, relSet in list(modelXbrl.relationshipSets.items()):
+        if key[0] in releasedArcroles:
+            relSet.clear()
+            del modelXbrl.relationshipSets[key]
+    releasedIds = set()
+    for elt in releasedElements:
+        for descendant in elt.iter():
+            id = descendant.get(u"id")
+            if id:
+                releasedIds.add(id)
+    for id in releasedIds:
+        if id in modelDocument.idObjects:
+            del modelDocument.idObjects[id]
+    modelObjects = modelXbrl.modelObjects
+    for i, modelObject in enumerate(modelObjects):
+        if (getattr(modelObject, u"modelDocument", None) is modelDocument and
+            isinstance(modelObject, etree.ElementBase) and
+            modelObject.tag not in dtsRefTags and modelObject is not xbrlElement):
+            modelObjects[i] = None # object indexes of other model objects are unchanged
+    for i, objectIndex in enumerate(store.factObjectIndexes):
+        modelObjects[objectIndex] = StoredFact(store, i)
+    for storedObject in store.contexts + store.units:
+        modelObjects[storedObject.objectIndex] = storedObject
+    for attr in list(modelXbrl.__dict__.keys()):
+        if attr.startswith(u"_factsBy") or attr == u"_nonNilFactsInInstance":
+            delattr(modelXbrl, attr)
+    modelXbrl.facts = StoredFacts(store, store.topLevelIndexes)
+    modelXbrl.factsInInstance = StoredFacts(store)
+    modelXbrl.contexts = dict((cntx.id, cntx) for cntx in store.contexts)
+    modelXbrl.units = dict((unit.id, unit) for unit in store.units)
+    modelXbrl.undefinedFacts = []
+    modelXbrl.factStore = store
+    for elt in releasedElements:
+        xbrlElement.remove(elt)
+    del releasedElements[:]
+    return store
+
+class FactStore(object):
+    u"""
+    .. class:: FactStore(modelXbrl)
+
+    Columns of the facts (in document order), and the contexts and units, of an instance.
+
+    :param modelXbrl: ModelXbrl of the instance, whose facts, contexts and units are stored
+    :type modelXbrl: ModelXbrl
+
+        .. attribute:: contexts
+
+        ([StoredContext]) - Stored contexts, indexed by factContexts
+
+        .. attribute:: units
+
+        ([StoredUnit]) - Stored units, indexed by factUnits
+    """
+    def __init__(self, modelXbrl):
+        self.modelXbrl = modelXbrl
+        self.modelDocument = modelXbrl.modelDocument
+        self.qnames = []
+        self.langs = []
+        self.contexts = []
+        self.units = []
+        self.factQnames = array("l")
+        self.factContexts = array("l") # -1 if no context (tuple)
+        self.factUnits = array("l") # -1 if no unit
+        self.factParents = array("l") # -1 if not nested in a tuple
+        self.factLangs = array("h") # -1 if no xml:lang
+        self.factDecimals = array("h")
+        self.factPrecisions = array("h")
+        self.factSequences = array("l") # element sequence in parent, for fragment identifiers
+        self.factSourcelines = array("l")
+        self.factObjectIndexes = array("l") # of the released ModelFacts, whose modelObjects are StoredFacts
+        self.factFlags = bytearray()
+        self.factXValueKinds = bytearray()
+        self.values = []
+        self.xValues = {} # xValues which are not constructed from the value
+        self.ids = {}
+        self.otherDecimals = {} # by (fact index, attribute name)
+        self.fractionValues = {}
+        self.tupleFacts = {} # indexes of child facts by tuple index
+        self.topLevelIndexes = array("l")
+        self.qnameIndexes = {}
+        self.langIndexes = {}
+        self.valueInterns = {} # repeated values are stored once
+        self.contextIndexes = dict((cntx, self.addContext(cntx))
+                                   for cntx in modelXbrl.contexts.values()
+                                   if isinstance(cntx, ModelContext))
+        self.unitIndexes = dict((unit, self.addUnit(unit))
+                                for unit in modelXbrl.units.values()
+                                if isinstance(unit, ModelUnit))
+        factsInInstance = modelXbrl.factsInInstance
+        for fact in modelXbrl.facts:
+            if fact in factsInInstance:
+                self.topLevelIndexes.append(self.addFact(fact, -1))
+        # tables only needed while storing
+        del self.qnameIndexes, self.langIndexes, self.valueInterns, self.contextIndexes, self.unitIndexes
+
+    def __len__(self):
+        return len(self.factQnames)
+
+    def tableIndex(self, table, tableIndexes, value):
+        try:
+            return tableIndexes[value]
+        except KeyError:
+            tableIndexes[value] = i = len(table)
+            table.append(value)
+            return i
+
+    def addContext(self, modelContext):
+        self.contexts.append(StoredContext(self.modelXbrl, modelContext))
+        return len(self.contexts) - 1
+
+    def addUnit(self, modelUnit):
+        self.units.append(StoredUnit(modelUnit))
+        return len(self.units) - 1
+
+    def addFact(self, fact, parentIndex):
+        i = len(self.factQnames)
+        self.factQnames.append(self.tableIndex(self.qnames, self.qnameIndexes, fact.qname))
+        cntx = fact.context
+        self.factContexts.append(self.contextIndexes.get(cntx, -1) if cntx is not None else -1)
+        unit = fact.unit
+        self.factUnits.append(self.unitIndexes.get(unit, -1) if unit is not None else -1)
+        self.factParents.append(parentIndex)
+        lang = fact.xmlLang
+        self.factLangs.append(self.tableIndex(self.langs, self.langIndexes, lang) if lang else -1)
+        flags = 0
+        if fact.isItem: flags |= ITEM
+        if fact.isTuple: flags |= TUPLE
+        if fact.isNumeric: flags |= NUMERIC
+        if fact.isFraction: flags |= FRACTION
+        if fact.isNil: flags |= NIL
+        self.factFlags.append(flags)
+        for attr, column in ((u"decimals", self.factDecimals), (u"precision", self.factPrecisions)):
+            column.append(self.decimalsCode(i, attr, getattr(fact, attr) if flags & NUMERIC else None))
+        self.factSequences.append(getattr(fact, u"_elementSequence", 0))
+        self.factSourcelines.append(fact.sourceline or 0)
+        self.factObjectIndexes.append(fact.objectIndex)
+        id = fact.id
+        if id:
+            self.ids[i] = id
+        if flags & FRACTION:
+            self.fractionValues[i] = fact.fractionValue
+        value = fact.value
+        if value is not None:
+            value = self.valueInterns.setdefault(value, value)
+        self.values.append(value)
+        self.factXValueKinds.append(self.xValueKind(i, value, getattr(fact, u"xValue", None)))
+        if flags & TUPLE:
+            self.tupleFacts[i] = array("l", (self.addFact(tupleFact, i)
+                                               for tupleFact in fact.modelTupleFacts))
+        return i
+
+    def decimalsCode(self, i, attr, value):
+        if value is None:
+            return NONE
+        if value == u"INF":
+            return INF
+        try:
+            code = _INT(value)
+            if OTHER < code < INF and unicode(code) == value:
+                return code
+        except ValueError:
+            pass
+        self.otherDecimals[i, attr] = value
+        return OTHER
+
+    def decimalsValue(self, i, attr, code):
+        if code == NONE:
+            return None
+        if code == INF:
+            return u"INF"
+        if code == OTHER:
+            return self.otherDecimals[i, attr]
+        return unicode(code)
+
+    def xValueKind(self, i, value, xValue):
+        if xValue is None:
+            return XVALUE_NONE
+        if isinstance(xValue, _STR_BASE) and xValue == value:
+            return XVALUE_TEXT
+        for kind, kindType in xValueKindTypes.items():
+            if type(xValue) is kindType:
+                try:
+                    if kindType(value) == xValue:
+                        return kind
+                except (ValueError, TypeError, InvalidOperation):
+                    pass
+                break
+        self.xValues[i] = xValue
+        return XVALUE_OTHER
+
+    def xValue(self, i):
+        kind = self.factXValueKinds[i]
+        if kind == XVALUE_NONE:
+            return None
+        if kind == XVALUE_TEXT:
+            return self.values[i]
+        if kind == XVALUE_OTHER:
+            return self.xValues[i]
+        return xValueKindTypes[kind](self.values[i])
+
+class StoredFacts(object):
+    u"""
+    .. class:: StoredFacts(store, indexes=None)
+
+    Sequence of StoredFacts of a FactStore, used for the facts (top level facts) and factsInInstance
+    (all facts) of a ModelXbrl whose facts are stored.
+
+    :param store: FactStore
+    :param indexes: array of fact indexes, or None for all facts
+    """
+    __slots__ = (u"store", u"indexes")
+
+    def __init__(self, store, indexes=None):
+        self.store = store
+        self.indexes = indexes
+
+    def __len__(self):
+        return len(self.store) if self.indexes is None else len(self.indexes)
+
+    def __iter__(self):
+        store = self.store
+        if self.indexes is None:
+            return (StoredFact(store, i) for i in _RANGE(len(store)))
+        return (StoredFact(store, i) for i in self.indexes)
+
+    def __getitem__(self, i):
+        if self.indexes is None:
+            if i < 0: i += len(self.store)
+            if not 0 <= i < len(self.store):
+                raise IndexError(i)
+            return StoredFact(self.store, i)
+        return StoredFact(self.store, self.indexes[i])
+
+    def __contains__(self, fact):
+        if not isinstance(fact, StoredFact) or fact.store is not self.store:
+            return False
+        return self.indexes is None or fact.index in self.indexes
+
+class StoredFact(object):
+    u"""
+    .. class:: StoredFact(store, index)
+
+    Fact of a FactStore, with ModelFact properties for consumers of facts which do not need their XML
+    elements.  StoredFacts are created as needed, and are equal (and hash equally) when they are of the
+    same stored fact.
+
+    :param store: FactStore
+    :param index: index of fact in the store's columns
+    """
+    __slots__ = (u"store", u"index")
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    def __eq__(self, other):
+        return isinstance(other, StoredFact) and other.index == self.index and other.store is self.store
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.index)
+
+    @property
+    def modelXbrl(self):
+        return self.store.modelXbrl
+
+    @property
+    def modelDocument(self):
+        return self.store.modelDocument
+
+    @property
+    def qname(self):
+        u"""(QName) -- QName of the fact's concept"""
+        return self.store.qnames[self.store.factQnames[self.index]]
+
+    elementQname = qname
+
+    @property
+    def concept(self):
+        u"""(ModelConcept) -- concept of the fact."""
+        return self.store.modelXbrl.qnameConcepts.get(self.qname)
+
+    @property
+    def id(self):
+        return self.store.ids.get(self.index)
+
+    @property
+    def sourceline(self):
+        return self.store.factSourcelines[self.index] or None
+
+    @property
+    def context(self):
+        u"""(StoredContext) -- context of the fact if any else None (e.g., tuple)"""
+        i = self.store.factContexts[self.index]
+        return self.store.contexts[i] if i >= 0 else None
+
+    @property
+    def contextID(self):
+        cntx = self.context
+        return cntx.id if cntx is not None else None
+
+    @property
+    def unit(self):
+        u"""(StoredUnit) -- unit of the fact if any else None (e.g., non-numeric or tuple)"""
+        i = self.store.factUnits[self.index]
+        return self.store.units[i] if i >= 0 else None
+
+    @property
+    def unitID(self):
+        unit = self.unit
+        return unit.id if unit is not None else None
+
+    @property
+    def isItem(self):
+        return bool(self.store.factFlags[self.index] & ITEM)
+
+    @property
+    def isTuple(self):
+        return bool(self.store.factFlags[self.index] & TUPLE)
+
+    @property
+    def isNumeric(self):
+        return bool(self.store.factFlags[self.index] & NUMERIC)
+
+    @property
+    def isFraction(self):
+        return bool(self.store.factFlags[self.index] & FRACTION)
+
+    @property
+    def isNil(self):
+        return bool(self.store.factFlags[self.index] & NIL)
+
+    @property
+    def xsiNil(self):
+        return u"true" if self.isNil else u"false"
+
+    @property
+    def decimals(self):
+        u"""(str) -- Value of decimals attribute, or fixed or default value for decimals on concept type declaration"""
+        return self.store.decimalsValue(self.index, u"decimals", self.store.factDecimals[self.index])
+
+    @property
+    def precision(self):
+        u"""(str) -- Value of precision attribute, or fixed or default value for precision on concept type declaration"""
+        return self.store.decimalsValue(self.index, u"precision", self.store.factPrecisions[self.index])
+
+    @property
+    def xmlLang(self):
+        i = self.store.factLangs[self.index]
+        return self.store.langs[i] if i >= 0 else None
+
+    @property
+    def value(self):
+        u"""(str) -- Text value of fact or default or fixed if any, otherwise None"""
+        return self.store.values[self.index]
+
+    textValue = value
+
+    @property
+    def xValue(self):
+        u"""(object) -- Typed (PSVI) value of the fact, as validated when the fact was stored"""
+        return self.store.xValue(self.index)
+
+    @property
+    def fractionValue(self):
+        return self.store.fractionValues.get(self.index)
+
+    @property
+    def parentFact(self):
+        u"""(StoredFact) -- tuple fact of a nested fact, else None"""
+        i = self.store.factParents[self.index]
+        return StoredFact(self.store, i) if i >= 0 else None
+
+    @property
+    def modelTupleFacts(self):
+        u"""([StoredFact]) -- child facts of a tuple, in document order"""
+        return [StoredFact(self.store, i) for i in self.store.tupleFacts.get(self.index, ())]
+
+    @property
+    def fragmentIdentifier(self):
+        u"""(str) -- Fragment identifier of the fact's (released) element, as by XmlUtil.elementFragmentIdentifier"""
+        childSequence = []
+        fact = self
+        while fact is not None:
+            id = fact.id
+            if id:
+                if fact is self:
+                    return id
+                childSequence.insert(0, id)
+                break
+            childSequence.insert(0, unicode(fact.store.factSequences[fact.index]))
+            fact = fact.parentFact
+        else:
+            childSequence.insert(0, u"1") # xbrli:xbrl element
+            childSequence.insert(0, u"")
+        return u"element({0})".format(u"/".join(childSequence))
+
+    @property
+    def propertyView(self):
+        cntx = self.context
+        unit = self.unit
+        return ((u"concept", unicode(self.qname)),
+                (u"contextRef", cntx.id if cntx is not None else u""),
+                (u"unitRef", unit.id if unit is not None else u""),
+                (u"decimals", self.decimals or u""),
+                (u"precision", self.precision or u""),
+                (u"xsi:nil", self.xsiNil),
+                (u"value", self.value if self.value is not None else u""))
+
+    @property
+    def objectIndex(self):
+        u"""(int) -- objectIndex of the released ModelFact, whose modelObjects entry is this fact"""
+        return self.store.factObjectIndexes[self.index]
+
+    def objectId(self, refId=u""):
+        return u"_{0}_{1}".format(refId, self.objectIndex)
+
+    def __repr__(self):
+        return (u"storedFact[{0}, qname: {1}, contextRef: {2}, unitRef: {3}, value: {4}, line {5}]"
+                .format(self.index, self.qname, self.contextID, self.unitID,
+                        u"(nil)" if self.isNil else self.value, self.sourceline))
+
+class StoredContext(object):
+    u"""
+    .. class:: StoredContext(modelXbrl, modelContext)
+
+    Context of a FactStore, with the semantic values (period, entity identifier, dimensions) of a
+    ModelContext.  Non-dimensional segment and scenario contents are not stored.
+    """
+    __slots__ = (u"modelXbrl", u"objectIndex", u"id", u"sourceline", u"entityIdentifier",
+                 u"isStartEndPeriod", u"isInstantPeriod", u"isForeverPeriod",
+                 u"startDatetime", u"endDatetime", u"instantDatetime",
+                 u"qnameDims", u"segDimValues", u"scenDimValues")
+
+    def __init__(self, modelXbrl, modelContext):
+        self.modelXbrl = modelXbrl
+        self.objectIndex = modelContext.objectIndex
+        self.id = modelContext.id
+        self.sourceline = modelContext.sourceline
+        self.entityIdentifier = modelContext.entityIdentifier
+        self.isStartEndPeriod = modelContext.isStartEndPeriod
+        self.isInstantPeriod = modelContext.isInstantPeriod
+        self.isForeverPeriod = modelContext.isForeverPeriod
+        self.startDatetime = modelContext.startDatetime
+        self.endDatetime = modelContext.endDatetime
+        self.instantDatetime = modelContext.instantDatetime
+        if not modelContext.qnameDims:
+            self.qnameDims = self.segDimValues = self.scenDimValues = noDimValues
+            return
+        self.qnameDims = {}
+        self.segDimValues = {}
+        self.scenDimValues = {}
+        for dimQname, modelDimValue in modelContext.qnameDims.items():
+            dimValue = StoredDimensionValue(modelXbrl, modelDimValue)
+            self.qnameDims[dimQname] = dimValue
+            dimension = modelDimValue.dimension
+            if dimension is not None:
+                if modelContext.segDimValues.get(dimension) is modelDimValue:
+                    self.segDimValues[dimension] = dimValue
+                elif modelContext.scenDimValues.get(dimension) is modelDimValue:
+                    self.scenDimValues[dimension] = dimValue
+
+    @property
+    def periodHash(self):
+        return hash((self.startDatetime,self.endDatetime))
+
+    @property
+    def entityIdentifierHash(self):
+        return hash(self.entityIdentifier)
+
+    @property
+    def dimsHash(self):
+        return hash( frozenset(self.qnameDims.values()) )
+
+    def dimValues(self, contextElement):
+        if contextElement == u"segment":
+            return self.segDimValues
+        elif contextElement == u"scenario":
+            return self.scenDimValues
+        return {}
+
+    def hasDimension(self, dimQname):
+        return dimQname in self.qnameDims
+
+    def dimValue(self, dimQname):
+        u"""(StoredDimensionValue or QName) -- dimension value if dimension is reported, or QName of dimension default if there is a default, otherwise None"""
+        try:
+            return self.qnameDims[dimQname]
+        except KeyError:
+            return self.modelXbrl.qnameDimensionDefaults.get(dimQname)
+
+    def dimMemberQname(self, dimQname, includeDefaults=False):
+        dimValue = self.qnameDims.get(dimQname)
+        if dimValue is not None:
+            return dimValue.memberQname
+        if includeDefaults:
+            return self.modelXbrl.qnameDimensionDefaults.get(dimQname)
+        return None
+
+    def dimAspects(self, defaultDimensionAspects=None):
+        if defaultDimensionAspects:
+            return _DICT_SET(self.qnameDims.keys()) | defaultDimensionAspects
+        return _DICT_SET(self.qnameDims.keys())
+
+    def nonDimValues(self, contextElement):
+        return []
+
+    def isPeriodEqualTo(self, cntx2):
+        if self.isForeverPeriod:
+            return cntx2.isForeverPeriod
+        elif self.isStartEndPeriod:
+            if not cntx2.isStartEndPeriod:
+                return False
+            return self.startDatetime == cntx2.startDatetime and self.endDatetime == cntx2.endDatetime
+        elif self.isInstantPeriod:
+            if not cntx2.isInstantPeriod:
+                return False
+            return self.instantDatetime == cntx2.instantDatetime
+        else:
+            return False
+
+    def isEntityIdentifierEqualTo(self, cntx2):
+        return self.entityIdentifierHash == cntx2.entityIdentifierHash
+
+    def objectId(self, refId=u""):
+        return u"_{0}_{1}".format(refId, self.objectIndex)
+
+    def __repr__(self):
+        return u"storedContext[{0}, line {1}]".format(self.id, self.sourceline)
+
+class StoredDimensionValue(object):
+    u"""
+    .. class:: StoredDimensionValue(modelXbrl, modelDimValue)
+
+    Dimension value of a StoredContext.  The typedMember of a typed dimension value is a
+    StoredTypedMember, with the qname and string value of its typed member element.
+    """
+    __slots__ = (u"modelXbrl", u"dimensionQname", u"memberQname", u"typedMember", u"contextElement")
+
+    def __init__(self, modelXbrl, modelDimValue):
+        self.modelXbrl = modelXbrl
+        self.dimensionQname = modelDimValue.dimensionQname
+        self.contextElement = modelDimValue.contextElement
+        if modelDimValue.isExplicit:
+            self.memberQname = modelDimValue.memberQname
+            self.typedMember = None
+        else:
+            self.memberQname = None
+            typedMember = modelDimValue.typedMember
+            self.typedMember = StoredTypedMember(typedMember) if typedMember is not None else None
+
+    def __eq__(self, other):
+        return (isinstance(other, StoredDimensionValue) and self.dimensionQname == other.dimensionQname and
+                self.memberQname == other.memberQname and self.typedMember == other.typedMember)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash( (self.dimensionQname, self.memberQname, self.typedMember) )
+
+    @property
+    def isExplicit(self):
+        return self.memberQname is not None
+
+    @property
+    def isTyped(self):
+        return self.memberQname is None
+
+    @property
+    def dimension(self):
+        return self.modelXbrl.qnameConcepts.get(self.dimensionQname)
+
+    @property
+    def member(self):
+        return self.modelXbrl.qnameConcepts.get(self.memberQname)
+
+    def isEqualTo(self, other):
+        if self.isExplicit:
+            return self.memberQname == (other.memberQname if isinstance(other, StoredDimensionValue) else other)
+        return self.typedMemberValue == (other.typedMemberValue if isinstance(other, StoredDimensionValue) else other)
+
+    @property
+    def typedMemberValue(self):
+        typedMember = self.typedMember
+        return typedMember.stringValue if typedMember is not None else None
+
+    @property
+    def propertyView(self):
+        return (unicode(self.dimensionQname), unicode(self.memberQname) if self.isExplicit else self.typedMemberValue)
+
+class StoredTypedMember(object):
+    u"""
+    .. class:: StoredTypedMember(typedMember)
+
+    Typed member of a StoredDimensionValue, with the qname and string value of the typed member element.
+    """
+    __slots__ = (u"qname", u"stringValue")
+
+    def __init__(self, typedMember):
+        self.qname = typedMember.qname
+        self.stringValue = typedMember.stringValue
+
+    def __eq__(self, other):
+        return (isinstance(other, StoredTypedMember) and self.qname == other.qname and
+                self.stringValue == other.stringValue)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash( (self.qname, self.stringValue) )
+
+    def __repr__(self):
+        return u"storedTypedMember[{0}, {1}]".format(self.qname, self.stringValue)
+
+class StoredUnit(object):
+    u"""
+    .. class:: StoredUnit(modelUnit)
+
+    Unit of a FactStore, with the measures of a ModelUnit.
+    """
+    __slots__ = (u"objectIndex", u"id", u"sourceline", u"measures", u"hash")
+
+    def __init__(self, modelUnit):
+        self.objectIndex = modelUnit.objectIndex
+        self.id = modelUnit.id
+        self.sourceline = modelUnit.sourceline
+        self.measures = modelUnit.measures
+        self.hash = modelUnit.hash
+
+    @property
+    def isDivide(self):
+        return bool(self.measures[1])
+
+    @property
+    def isSingleMeasure(self):
+        measures = self.measures
+        return len(measures[0]) == 1 and len(measures[1]) == 0
+
+    def isEqualTo(self, unit2):
+        if unit2 is None or unit2.hash != self.hash:
+            return False
+        return unit2 is self or self.measures == unit2.measures
+
+    @property
+    def value(self):
+        mul, div = self.measures
+        return u' '.join([measuresStr(m) for m in mul] + ([u'/'] + [measuresStr(d) for d in div] if div else []))
+
+    @property
+    def propertyView(self):
+        measures = self.measures
+        if measures[1]:
+            return tuple((u'mul',m) for m in measures[0]) + \
+                   tuple((u'div',d) for d in measures[1])
+        else:
+            return tuple((u'measure',m) for m in measures[0])
+
+    def objectId(self, refId=u""):
+        return u"_{0}_{1}".format(refId, self.objectIndex)
+
+    def __repr__(self):
+        return u"storedUnit[{0}, line {1}]".format(self.id, self.sourceline)
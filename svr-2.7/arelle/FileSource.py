@@ -11,6 +11,7 @@ from arelle import XmlUtil
 from arelle import PackageManager
 from arelle.UrlUtil import isHttpUrl
 from operator import indexOf
+from collections import OrderedDict
 from io import open
 
 archivePathSeparators = (u".zip" + os.sep, u".tar.gz" + os.sep, u".eis" + os.sep, u".xml" + os.sep, u".xfd" + os.sep, u".frm" + os.sep, u'.taxonomyPackage.xml' + os.sep) + \
@@ -23,6 +24,8 @@ XMLdeclaration = re.compile(ur"<\?xml[^><\?]*\?>", re.DOTALL)
 
 TAXONOMY_PACKAGE_FILE_NAMES = (u'.taxonomyPackage.xml', u'catalog.xml')
 
+ARCHIVE_ENTRY_CACHE_SIZE = 32 * 1024 * 1024 # bytes of decoded EIS and XFD archive files kept for reopening
+
 def openFileSource(filename, cntlr=None, sourceZipStream=None, checkIfXmlIsEis=False):
     if sourceZipStream:
         filesource = FileSource(POST_UPLOADED_ZIP, cntlr)
@@ -100,6 +103,10 @@ class FileSource(object):
         self.fs = None
         self.selection = None
         self.filesDir = None
+        self.archiveEntries = None  # EIS and XFD archive file name, base64 contents
+        self.archiveEntryNames = None  # EIS and XFD archive file names in archive order
+        self.archiveEntryCache = OrderedDict()  # recently opened archive file name, decoded bytes
+        self.archiveEntryCacheSize = 0
         self.referencedFileSources = {}  # archive file name, fileSource object
         self.mappedPaths = None  # remappings of path segments may be loaded by taxonomyPackage manifest
         
@@ -174,14 +181,12 @@ class FileSource(object):
                 
                 if buf.startswith("<?xml "):
                     try:
-                        # must strip encoding
-                        unicode = buf.decode(XmlUtil.encoding(buf))
-                        endEncoding = unicode.index(u"?>", 0, 128)
-                        if endEncoding > 0:
-                            unicode = unicode[endEncoding+2:]
-                        file = io.StringIO(initial_value=unicode)
-                        parser = etree.XMLParser(recover=True, huge_tree=True)
-                        self.eisDocument = etree.parse(file, parser=parser)
+                        file = io.BytesIO(buf)
+                        buf = None
+                        self.indexArchiveEntries(file, u"{http://www.sec.gov/edgar/common}document",
+                                                 u"{http://www.sec.gov/edgar/common}conformedName",
+                                                 u"{http://www.sec.gov/edgar/common}contents",
+                                                 recover=True, huge_tree=True)
                         file.close()
                         self.isOpen = True
                     except EnvironmentError, err:
@@ -228,13 +233,13 @@ class FileSource(object):
                     #for learning the content of xfd file, uncomment this:
                     #with open("c:\\temp\\test.xml", "wb") as fh:
                     #    fh.write(ungzippedBytes)
-                    file = io.StringIO(initial_value=ungzippedBytes.decode(u"utf-8"))
+                    file = io.BytesIO(ungzippedBytes)
                 else:
                     # position to start of file
                     file.seek(0,io.SEEK_SET)
                     
                 try:
-                    self.xfdDocument = etree.parse(file)
+                    self.indexArchiveEntries(file, u"data", u"filename", u"mimedata")
                     file.close()
                     self.isOpen = True
                 except EnvironmentError, err:
@@ -276,6 +281,42 @@ class FileSource(object):
                     self.logError(err)
                     return # provide error message later
 
+    def indexArchiveEntries(self, file, entryTag, nameTag, contentsTag, **parserOptions):
+        u''' index the base64 contents of EIS or XFD archive entries by file name, streaming the
+            archive so its elements are released as they are indexed (instead of held in a tree)
+        '''
+        self.archiveEntries = {}
+        self.archiveEntryNames = []
+        for event, elt in etree.iterparse(file, events=(u"end",), tag=entryTag, **parserOptions):
+            outfn = elt.findtext(nameTag)
+            if outfn:
+                self.archiveEntryNames.append(outfn)
+                b64data = elt.findtext(contentsTag)
+                if b64data and outfn not in self.archiveEntries: # first entry of a name with contents
+                    self.archiveEntries[outfn] = b64data
+            elt.clear()
+            while elt.getprevious() is not None: # release indexed entries
+                del elt.getparent()[0]
+
+    def archiveEntryBytes(self, archiveFileName):
+        u''' decoded bytes of an EIS or XFD archive entry, the most recently used are cached '''
+        b = self.archiveEntryCache.pop(archiveFileName, None)
+        if b is None:
+            b64data = self.archiveEntries.get(archiveFileName)
+            if not b64data:
+                raise ArchiveFileIOError(self, archiveFileName)
+            b = base64.b64decode(b64data.encode(u"latin-1"))
+            # remove BOM codes if present
+            if b.startswith(b"\xef\xbb\xbf"):
+                b = b[3:]
+            if len(b) > ARCHIVE_ENTRY_CACHE_SIZE:
+                return b
+            self.archiveEntryCacheSize += len(b)
+            while self.archiveEntryCacheSize > ARCHIVE_ENTRY_CACHE_SIZE: # evict least recently used
+                self.archiveEntryCacheSize -= len(self.archiveEntryCache.popitem(last=False)[1])
+        self.archiveEntryCache[archiveFileName] = b
+        return b
+
     def openZipStream(self, sourceZipStream):
         if not self.isOpen:
             self.basefile = self.url
@@ -296,14 +337,13 @@ class FileSource(object):
             self.fs.close()
             self.isOpen = False
             self.isTarGz = False
-        if self.isEis and self.isOpen:
-            self.eisDocument.getroot().clear() # unlink nodes
-            self.eisDocument = None
-            self.isEis = False
-        if self.isXfd and self.isOpen:
-            self.xfdDocument.getroot().clear() # unlink nodes
-            self.xfdDocument = None
-            self.isXfd = False
+        if (self.isEis or self.isXfd) and self.isOpen:
+            self.archiveEntries = None
+            self.archiveEntryNames = None
+            self.archiveEntryCache.clear()
+            self.archiveEntryCacheSize = 0
+            self.isOpen = False
+            self.isEis = self.isXfd = False
         if self.isRss and self.isOpen:
             self.rssDocument.getroot().clear() # unlink nodes
             self.rssDocument = None
@@ -408,50 +448,14 @@ class FileSource(object):
                             encoding)
                 except KeyError:
                     raise ArchiveFileIOError(self, archiveFileName)
-            elif archiveFileSource.isEis:
-                for docElt in self.eisDocument.iter(tag=u"{http://www.sec.gov/edgar/common}document"):
-                    outfn = docElt.findtext(u"{http://www.sec.gov/edgar/common}conformedName")
-                    if outfn == archiveFileName:
-                        b64data = docElt.findtext(u"{http://www.sec.gov/edgar/common}contents")
-                        if b64data:
-                            b = base64.b64decode(b64data.encode(u"latin-1"))
-                            # remove BOM codes if present
-                            if len(b) > 3 and b[0] == 239 and b[1] == 187 and b[2] == 191:
-                                start = 3;
-                                length = len(b) - 3;
-                                b = b[start:start + length]
-                            else:
-                                start = 0;
-                                length = len(b);
-                            if binary:
-                                return (io.BytesIO(b), )
-                            if encoding is None:
-                                encoding = XmlUtil.encoding(b, default=u"latin-1")
-                            return (io.TextIOWrapper(io.BytesIO(b), encoding=encoding), 
-                                    encoding)
-                raise ArchiveFileIOError(self, archiveFileName)
-            elif archiveFileSource.isXfd:
-                for data in archiveFileSource.xfdDocument.iter(tag=u"data"):
-                    outfn = data.findtext(u"filename")
-                    if outfn == archiveFileName:
-                        b64data = data.findtext(u"mimedata")
-                        if b64data:
-                            b = base64.b64decode(b64data.encode(u"latin-1"))
-                            # remove BOM codes if present
-                            if len(b) > 3 and b[0] == 239 and b[1] == 187 and b[2] == 191:
-                                start = 3;
-                                length = len(b) - 3;
-                                b = b[start:start + length]
-                            else:
-                                start = 0;
-                                length = len(b);
-                            if binary:
-                                return (io.BytesIO(b), )
-                            if encoding is None:
-                                encoding = XmlUtil.encoding(b, default=u"latin-1")
-                            return (io.TextIOWrapper(io.BytesIO(b), encoding=encoding), 
-                                    encoding)
-                raise ArchiveFileIOError(self, archiveFileName)
+            elif archiveFileSource.isEis or archiveFileSource.isXfd:
+                b = archiveFileSource.archiveEntryBytes(archiveFileName)
+                if binary:
+                    return (io.BytesIO(b), )
+                if encoding is None:
+                    encoding = XmlUtil.encoding(b, default=u"latin-1")
+                return (io.TextIOWrapper(io.BytesIO(b), encoding=encoding), 
+                        encoding)
             elif archiveFileSource.isInstalledTaxonomyPackage:
                 # remove TAXONOMY_PACKAGE_FILE_NAME from file path
                 if filepath.startswith(archiveFileSource.basefile):
@@ -481,21 +485,14 @@ class FileSource(object):
         elif self.isTarGz:
             self.filesDir = self.fs.getnames()
         elif self.isEis:
-            files = []
-            for docElt in self.eisDocument.iter(tag=u"{http://www.sec.gov/edgar/common}document"):
-                outfn = docElt.findtext(u"{http://www.sec.gov/edgar/common}conformedName")
-                if outfn:
-                    files.append(outfn);
-            self.filesDir = files
+            self.filesDir = list(self.archiveEntryNames)
         elif self.isXfd:
             files = []
-            for data in self.xfdDocument.iter(tag=u"data"):
-                outfn = data.findtext(u"filename")
-                if outfn:
-                    if len(outfn) > 2 and outfn[0].isalpha() and \
-                        outfn[1] == u':' and outfn[2] == u'\\':
-                        continue
-                    files.append(outfn);
+            for outfn in self.archiveEntryNames:
+                if len(outfn) > 2 and outfn[0].isalpha() and \
+                    outfn[1] == u':' and outfn[2] == u'\\':
+                    continue
+                files.append(outfn);
             self.filesDir = files
         elif self.isRss:
             files = []  # return title, descr, pubdate, linst doc
@@ -32,6 +32,9 @@ def evaluate(xpCtx, varSet, variablesInScope=False, uncoveredAspectFacts=None):
         uncoveredAspectFacts = {}
     xpCtx.evaluations = []  # list of evaluations 
     xpCtx.evaluationHashDicts = [] # hash indexs of evaluations
+    profile = xpCtx.formulaProfile
+    if profile is not None:
+        profile.startVariableSet(varSet)
     try:
         xpCtx.variableSet = varSet
         if isinstance(varSet, ModelExistenceAssertion):
@@ -42,6 +45,8 @@ def evaluate(xpCtx, varSet, variablesInScope=False, uncoveredAspectFacts=None):
         initialTraceCount = xpCtx.modelXbrl.logCount.get(logging.getLevelName(u'INFO'), 0)
         evaluateVar(xpCtx, varSet, 0, {}, uncoveredAspectFacts)
         if isinstance(varSet, ModelExistenceAssertion):
+            if profile is not None:
+                timeProfileStarted = time.time()
             prog = varSet.testProg
             if prog:
                 assertionParamQnames = []  # set and then remove assertion variable quames
@@ -79,6 +84,8 @@ def evaluate(xpCtx, varSet, variablesInScope=False, uncoveredAspectFacts=None):
                     modelObject=varSet,
                     messageCodes=(u"message:{variableSetID|xlinkLabel}",))
                 xpCtx.inScopeVars.pop(XbrlConst.qnEaTestExpression)
+            if profile is not None:
+                profile.existenceTested(time.time() - timeProfileStarted)
         if xpCtx.formulaOptions.traceVariableSetExpressionResult and initialTraceCount == xpCtx.modelXbrl.logCount.get(logging._checkLevel(u'INFO'), 0):
             xpCtx.modelXbrl.info(u"formula:trace",
                  _(u"Variable set %(xlinkLabel)s had no xpCtx.evaluations"),
@@ -94,6 +101,9 @@ def evaluate(xpCtx, varSet, variablesInScope=False, uncoveredAspectFacts=None):
                  _(u"Variable set %(label)s \nException: %(error)s"), 
                  modelObject=varSet, label=varSet.logLabel(), error=err.message)
         xpCtx.variableSet = None
+    finally: # balanced if evaluation ends by any exception, such as of exceeding the formula run time
+        if profile is not None:
+            profile.endVariableSet()
     if xpCtx.formulaOptions.traceVariableSetExpressionResult:
         xpCtx.modelXbrl.info(u"formula:trace",
                              _(u"Variable set %(xlinkLabel)s evaluations: %(evaluations)s x %(variables)s"),
@@ -112,6 +122,7 @@ def evaluate(xpCtx, varSet, variablesInScope=False, uncoveredAspectFacts=None):
         pass     
     
 def evaluateVar(xpCtx, varSet, varIndex, cachedFilteredFacts, uncoveredAspectFacts):
+    profile = xpCtx.formulaProfile
     if varIndex == len(varSet.orderedVariableRelationships):
         # check if all fact vars are fallen back
         anyFactVar = False; anyBoundFactVar = False
@@ -124,6 +135,8 @@ def evaluateVar(xpCtx, varSet, varIndex, cachedFilteredFacts, uncoveredAspectFac
                 xpCtx.modelXbrl.info(u"formula:trace",
                      _(u"Variable set %(xlinkLabel)s skipped evaluation, all fact variables have fallen back"),
                      modelObject=varSet, xlinkLabel=varSet.xlinkLabel)
+            if profile is not None:
+                profile.skipped(fallback=True)
             return
         # record completed evaluation, for fallback blocking purposes
         fbVars = set(vb.qname for vb in xpCtx.varBindings.values() if vb.isFallback)
@@ -134,6 +147,8 @@ def evaluateVar(xpCtx, varSet, varIndex, cachedFilteredFacts, uncoveredAspectFac
                     _(u"Variable set %(xlinkLabel)s skipped non-different or fallback evaluation, duplicates another evaluation"),
                      modelObject=varSet, xlinkLabel=varSet.xlinkLabel)
             varSet.evaluationNumber += 1
+            if profile is not None:
+                profile.skipped()
             if xpCtx.formulaOptions.timeVariableSetEvaluation:
                 now = time.time()
                 xpCtx.modelXbrl.info(u"formula:time",
@@ -149,6 +164,8 @@ def evaluateVar(xpCtx, varSet, varIndex, cachedFilteredFacts, uncoveredAspectFac
             while i >= len(xpCtx.evaluationHashDicts): xpCtx.evaluationHashDicts.append(defaultdict(set))
             xpCtx.evaluationHashDicts[i][hash(fb)].add(len(xpCtx.evaluations))  # hash and eval index        
         xpCtx.evaluations.append(thisEvaluation)  # complete evaluations tuple
+        if profile is not None:
+            timeProfileStarted = time.time()
         # evaluate preconditions
         for precondition in varSet.preconditions:
             result = precondition.evalTest(xpCtx)
@@ -157,6 +174,8 @@ def evaluateVar(xpCtx, varSet, varIndex, cachedFilteredFacts, uncoveredAspectFac
                      _(u"Variable set %(xlinkLabel)s \nPrecondition %(precondition)s \nResult: %(result)s"), 
                      modelObject=varSet, xlinkLabel=varSet.xlinkLabel, precondition=precondition.xlinkLabel, result=result)
             if not result: # precondition blocks evaluation
+                if profile is not None:
+                    profile.preconditionBlocked(time.time() - timeProfileStarted)
                 if xpCtx.formulaOptions.timeVariableSetEvaluation:
                     varSet.evaluationNumber += 1
                     now = time.time()
@@ -171,6 +190,8 @@ def evaluateVar(xpCtx, varSet, varIndex, cachedFilteredFacts, uncoveredAspectFac
         # evaluate variable set
         if isinstance(varSet, ModelExistenceAssertion):
             varSet.evaluationsCount += 1
+            if profile is not None:
+                profile.evaluated(time.time() - timeProfileStarted)
         else:
             if isinstance(varSet, ModelTuple):
                 result = u"(tuple)"
@@ -232,6 +253,8 @@ def evaluateVar(xpCtx, varSet, varIndex, cachedFilteredFacts, uncoveredAspectFac
             if varSet.hasConsistencyAssertion:
                 from arelle import FormulaConsisAsser
                 FormulaConsisAsser.evaluate(xpCtx, varSet, newFact)
+            if profile is not None:
+                profile.evaluated(time.time() - timeProfileStarted)
                 
             if xpCtx.formulaOptions.timeVariableSetEvaluation:
                 varSet.evaluationNumber += 1
@@ -276,6 +299,8 @@ def evaluateVar(xpCtx, varSet, varIndex, cachedFilteredFacts, uncoveredAspectFac
         vb = VariableBinding(xpCtx, varRel)
         var = vb.var
         if vb.isFactVar:
+            if profile is not None:
+                timeProfileStarted = time.time()
             vb.aspectsDefined = set(aspectModels[varSet.aspectModel])  # has to be a mutable set
             vb.values = None
             varHasNoVariableDependencies = var.hasNoVariableDependencies
@@ -317,19 +342,24 @@ def evaluateVar(xpCtx, varSet, varIndex, cachedFilteredFacts, uncoveredAspectFac
                 coverAspectCoverFilterDims(xpCtx, vb, var.filterRelationships) # filters need to know what dims are covered
                 if varHasNoVariableDependencies:
                     cachedFilteredFacts[varQname] = (facts, vb.aspectsDefined, vb.aspectsCovered)
+            if profile is not None:
+                profileFactsFiltered = len(facts)
             considerFallback = bool(var.fallbackValueProg)
             if varSet.implicitFiltering == u"true":
                 if any((_vb.isFactVar and not _vb.isFallback) for _vb in xpCtx.varBindings.values()):
                     factCount = len(facts)
                     # uncovered aspects of the prior variable bindings may include aspects not in current variable binding
                     uncoveredAspects = (vb.aspectsDefined | _DICT_SET(uncoveredAspectFacts.keys())) - vb.aspectsCovered - set([Aspect.DIMENSIONS])
-                    facts = implicitFilter(xpCtx, vb, facts, uncoveredAspects, uncoveredAspectFacts)
+                    facts = implicitFilter(xpCtx, vb, facts, uncoveredAspects, uncoveredAspectFacts,
+                                           cachedFilteredFacts if varHasNoVariableDependencies else None)
                     if (considerFallback and varHasNoVariableDependencies and 
                         factCount and
                         factCount - len(facts) == 0 and
                         len(xpCtx.varBindings) > 1 and
                         all((len(_vb.aspectsDefined) == len(vb.aspectsDefined) for _vb in xpCtx.varBindings.values()))):
                         considerFallback = False
+            if profile is not None:
+                profile.variableFiltered(varQname, profileFactsFiltered, len(facts), time.time() - timeProfileStarted)
             vb.facts = facts
             if xpCtx.formulaOptions.traceVariableFiltersResult:
                 xpCtx.modelXbrl.info(u"formula:trace",
@@ -364,6 +394,8 @@ def evaluateVar(xpCtx, varSet, varIndex, cachedFilteredFacts, uncoveredAspectFac
             overriddenInScopeVar = xpCtx.inScopeVars.get(varQname)
             xpCtx.inScopeVars[varQname] = evaluationResult
             evaluationContributedUncoveredAspects = {}
+            if profile is not None:
+                profile.variableBound(varQname)
             if vb.isFactVar and not vb.isFallback:
                 # cache uncoveredAspect facts for nested evaluations
                 for aspect in vb.aspectsDefined | vb.aspectsCovered:  # covered aspects may not be defined e.g., test 12062 v11, undefined aspect is a complemented aspect
@@ -393,12 +425,17 @@ def filterFacts(xpCtx, vb, facts, filterRelationships, filterType):
     typeLbl = filterType + u" " if filterType else u""
     orFilter = filterType == u"or"
     groupFilter = filterType == u"group"
+    profile = xpCtx.formulaProfile
     if orFilter: 
         factSet = set()
     for varFilterRel in filterRelationships:
         _filter = varFilterRel.toModelObject
         if isinstance(_filter,ModelFilter):  # relationship not constrained to real filters
+            if profile is not None:
+                timeProfileStarted = time.time()
             result = _filter.filter(xpCtx, vb, facts, varFilterRel.isComplemented)
+            if profile is not None:
+                profile.filtered(vb, _filter, filterType, len(facts), len(result), time.time() - timeProfileStarted)
             if xpCtx.formulaOptions.traceVariableFilterWinnowing:
                 xpCtx.modelXbrl.info(u"formula:trace",
                     _(u"Fact Variable %(variable)s %(filterType)s %(filter)s filter %(xlinkLabel)s passes %(factCount)s facts"), 
@@ -424,7 +461,7 @@ def coverAspectCoverFilterDims(xpCtx, vb, filterRelationships):
         elif isinstance(_filter,ModelBooleanFilter) and varFilterRel.isCovered:
             coverAspectCoverFilterDims(xpCtx, vb, _filter.filterRelationships)
             
-def implicitFilter(xpCtx, vb, facts, aspects, uncoveredAspectFacts):
+def implicitFilter(xpCtx, vb, facts, aspects, uncoveredAspectFacts, cachedFilteredFacts=None):
     if xpCtx.formulaOptions.traceVariableFilterWinnowing:  # trace shows by aspect by bound variable match    
         for aspect in aspects:
             if uncoveredAspectFacts.get(aspect, u"none") is not None:
@@ -445,11 +482,90 @@ def implicitFilter(xpCtx, vb, facts, aspects, uncoveredAspectFacts):
         #                       if not vb.hasAspectValueCovered(aspect)]
         if testableAspectFacts:
             # not tracing, do bulk aspect filtering
+            if cachedFilteredFacts is not None:
+                # same facts are filtered for each binding of prior variables, only test hashed candidates
+                facts = implicitFilterCandidates(vb, facts, testableAspectFacts, cachedFilteredFacts)
             facts = [fact
                      for fact in facts
                      if all(aspectMatches(xpCtx, uncoveredAspectFact, fact, aspect)
                             for (aspect, uncoveredAspectFact) in testableAspectFacts)]
     return facts
+
+def implicitFilterCandidates(vb, facts, testableAspectFacts, cachedFilteredFacts):
+    # facts index is built on first use and kept while the variable's filtered facts are cached
+    indexKey = (u"implicit", vb.qname)
+    factsIndex = cachedFilteredFacts.get(indexKey)
+    if factsIndex is None or factsIndex[0] is not facts:
+        factsList = list(facts)
+        modelXbrls = set(fact.modelXbrl for fact in factsList)
+        # multi-instance aspect matching isn't by aspect value, only index facts of a single instance
+        modelXbrl = modelXbrls.pop() if len(modelXbrls) == 1 else None
+        factsIndex = (facts, factsList, modelXbrl, {}, {})
+        cachedFilteredFacts[indexKey] = factsIndex
+    facts, factsList, modelXbrl, keysByAspect, factsByKeys = factsIndex
+    if modelXbrl is None:
+        return factsList
+    keyedAspects = []
+    boundKeys = []
+    for aspect, uncoveredAspectFact in testableAspectFacts:
+        if uncoveredAspectFact.modelXbrl is modelXbrl:
+            boundKey = aspectKey(uncoveredAspectFact, aspect)
+            if boundKey is not NO_ASPECT_KEY:
+                if aspect not in keysByAspect:
+                    keysByAspect[aspect] = aspectKeys(factsList, aspect)
+                if keysByAspect[aspect] is not None:
+                    keyedAspects.append(aspect)
+                    boundKeys.append(boundKey)
+    if not keyedAspects:
+        return factsList
+    keyedAspects = tuple(keyedAspects)
+    if keyedAspects not in factsByKeys:
+        factsByKey = defaultdict(list)
+        for fact, factKeys in zip(factsList, zip(*[keysByAspect[aspect] for aspect in keyedAspects])):
+            factsByKey[factKeys].append(fact)
+        factsByKeys[keyedAspects] = factsByKey
+    return factsByKeys[keyedAspects].get(tuple(boundKeys), ())
+
+# aspect keys are equal for facts whose aspect matches (by aspectMatches), within a single instance,
+# facts with equal keys must still be matched; typed dimension and segment/scenario aspects aren't keyed
+NO_ASPECT_KEY = object()
+TUPLE_ASPECT_KEY = object()
+
+def aspectKey(fact, aspect):
+    if aspect == 1: # Aspect.LOCATION:
+        return fact.getparent()
+    elif aspect == 2: # Aspect.CONCEPT:
+        return fact.qname
+    elif fact.isTuple:
+        return TUPLE_ASPECT_KEY
+    elif aspect == 5: # Aspect.UNIT:
+        unit = fact.unit
+        if unit is not None:
+            return unit.hash
+        return None
+    elif aspect == 3 or aspect == 4 or isinstance(aspect, QName):
+        context = fact.context
+        if context is None:
+            return NO_ASPECT_KEY
+        if aspect == 3: # Aspect.ENTITY_IDENTIFIER:
+            return context.entityIdentifierHash
+        if aspect == 4: # Aspect.PERIOD:
+            return context.periodHash
+        dimValue = context.dimValue(aspect)
+        if dimValue is None or isinstance(dimValue, QName): # absent or default
+            return dimValue
+        if dimValue.isExplicit:
+            return dimValue.memberQname
+    return NO_ASPECT_KEY
+
+def aspectKeys(facts, aspect):
+    keys = []
+    for fact in facts:
+        key = aspectKey(fact, aspect)
+        if key is NO_ASPECT_KEY:
+            return None # aspect can't be keyed for all of the facts
+        keys.append(key)
+    return keys
     
 def aspectsMatch(xpCtx, fact1, fact2, aspects):
     return all(aspectMatches(xpCtx, fact1, fact2, aspect) for aspect in aspects)
@@ -573,6 +689,25 @@ def aspectMatches(xpCtx, fact1, fact2, aspect):
 
 def factsPartitions(xpCtx, facts, aspects):
     factsPartitions = []
+    if len(facts) > 1 and len(set(fact.modelXbrl for fact in facts)) == 1:
+        factsList = list(facts)
+        keysByAspect = [keys 
+                        for keys in (aspectKeys(factsList, aspect) for aspect in aspects)
+                        if keys is not None]
+        if keysByAspect:
+            # only partitions whose first fact has the same aspect keys can match
+            keyedPartitions = defaultdict(list)
+            for fact, factKeys in zip(factsList, zip(*keysByAspect)):
+                partitions = keyedPartitions[factKeys]
+                for partition in partitions:
+                    if aspectsMatch(xpCtx, fact, partition[0], aspects):
+                        partition.append(fact)
+                        break
+                else:
+                    partition = [fact,]
+                    partitions.append(partition)
+                    factsPartitions.append(partition)
+            return factsPartitions
     for fact in facts:
         matched = False
         for partition in factsPartitions:
@@ -0,0 +1,228 @@
+u'''
+Formula profile collects, for each variable set evaluated, the time spent in filtering, binding and
+evaluating (assertion tests, formula values and preconditions), the counts of evaluations performed,
+skipped as duplicates or fallbacks, and blocked by preconditions, the facts passing each filter and
+bound to each variable, and the XPath function calls made, for saving as a JSON or CSV file.
+
+Times of variable sets evaluated in the variables-scope of another variable set are reported
+separately for the chained variable set, and excluded from the times of the scoping variable set.
+'''
+import csv, io, json, sys, time
+from collections import defaultdict, OrderedDict
+
+def functionCallCounts(functionCalls):
+    # function qnames with and without the fn prefix are counted by their displayed name
+    counts = defaultdict(int)
+    for qn, count in functionCalls.items():
+        counts[unicode(qn)] += count
+    return OrderedDict(sorted(counts.items()))
+
+class FilterStats(object):
+    def __init__(self, variable, modelFilter):
+        self.variable = variable # variable qname or "group" for variable set group filters
+        self.modelFilter = modelFilter
+        self.calls = 0
+        self.time = 0.0
+        self.factsIn = 0
+        self.factsOut = 0
+
+class VariableStats(object):
+    def __init__(self, qname):
+        self.qname = qname
+        self.filterings = 0
+        self.filteringTime = 0.0
+        self.factsFiltered = 0 # facts passing the variable's (and group) filters
+        self.factsImplicitFiltered = 0 # facts passing implicit filtering
+        self.bindings = 0
+
+class VariableSetStats(object):
+    def __init__(self, modelVariableSet):
+        self.modelVariableSet = modelVariableSet
+        self.evaluations = 0
+        self.skippedEvaluations = 0 # evaluationIsUnnecessary, duplicating a prior evaluation
+        self.fallbackEvaluations = 0 # all fact variables fallen back
+        self.preconditionBlocked = 0
+        self.totalTime = 0.0
+        self.filteringTime = 0.0
+        self.evaluationTime = 0.0
+        self.chainedTime = 0.0 # time of variable sets evaluated in the variables-scope of this one
+        self.variables = OrderedDict()
+        self.filters = OrderedDict()
+        self.functionCalls = defaultdict(int)
+
+    @property
+    def bindingTime(self):
+        return max(self.totalTime - self.filteringTime - self.evaluationTime - self.chainedTime, 0.0)
+
+    def variable(self, qname):
+        try:
+            return self.variables[qname]
+        except KeyError:
+            varStats = self.variables[qname] = VariableStats(qname)
+            return varStats
+
+class FormulaProfile(object):
+    def __init__(self, modelXbrl):
+        self.modelXbrl = modelXbrl
+        self.variableSets = OrderedDict()
+        self.stack = [] # [VariableSetStats, timeStarted] of variable sets being evaluated
+        self.functionCalls = defaultdict(int) # calls outside of variable set evaluation
+        self.timeStarted = time.time()
+
+    @property
+    def current(self):
+        if self.stack:
+            return self.stack[-1][0]
+        return None
+
+    def startVariableSet(self, modelVariableSet):
+        try:
+            stats = self.variableSets[modelVariableSet]
+        except KeyError:
+            stats = self.variableSets[modelVariableSet] = VariableSetStats(modelVariableSet)
+        self.stack.append([stats, time.time()])
+
+    def endVariableSet(self):
+        stats, timeStarted = self.stack.pop()
+        elapsed = time.time() - timeStarted
+        stats.totalTime += elapsed
+        if self.stack:
+            self.stack[-1][0].chainedTime += elapsed
+
+    def filtered(self, vb, modelFilter, filterType, factsIn, factsOut, elapsed):
+        stats = self.current
+        if stats is None:
+            return
+        variable = u"group" if filterType == u"group" else unicode(vb.qname)
+        key = (variable, modelFilter)
+        try:
+            filterStats = stats.filters[key]
+        except KeyError:
+            filterStats = stats.filters[key] = FilterStats(variable, modelFilter)
+        filterStats.calls += 1
+        filterStats.time += elapsed
+        filterStats.factsIn += factsIn
+        filterStats.factsOut += factsOut
+
+    def variableFiltered(self, qname, factsFiltered, factsImplicitFiltered, elapsed):
+        stats = self.current
+        varStats = stats.variable(qname)
+        varStats.filterings += 1
+        varStats.filteringTime += elapsed
+        varStats.factsFiltered += factsFiltered
+        varStats.factsImplicitFiltered += factsImplicitFiltered
+        stats.filteringTime += elapsed
+
+    def variableBound(self, qname):
+        self.current.variable(qname).bindings += 1
+
+    def evaluated(self, elapsed):
+        stats = self.current
+        stats.evaluationTime += elapsed
+        stats.evaluations += 1
+
+    def preconditionBlocked(self, elapsed):
+        stats = self.current
+        stats.evaluationTime += elapsed
+        stats.preconditionBlocked += 1
+
+    def existenceTested(self, elapsed):
+        self.current.evaluationTime += elapsed
+
+    def skipped(self, fallback=False):
+        if fallback:
+            self.current.fallbackEvaluations += 1
+        else:
+            self.current.skippedEvaluations += 1
+
+    def functionCalled(self, qname):
+        stats = self.current
+        if stats is None:
+            self.functionCalls[qname] += 1
+        else:
+            stats.functionCalls[qname] += 1
+
+    def variableSetProperties(self, stats):
+        varSet = stats.modelVariableSet
+        return OrderedDict(((u"id", varSet.id),
+                            (u"label", varSet.xlinkLabel),
+                            (u"type", varSet.localName),
+                            (u"document", varSet.modelDocument.basename),
+                            (u"line", varSet.sourceline)))
+
+    def toJson(self):
+        varSets = []
+        for stats in self.variableSets.values():
+            varSet = self.variableSetProperties(stats)
+            varSet.update(((u"evaluations", stats.evaluations),
+                           (u"skippedEvaluations", stats.skippedEvaluations),
+                           (u"fallbackEvaluations", stats.fallbackEvaluations),
+                           (u"preconditionBlocked", stats.preconditionBlocked),
+                           (u"totalTime", round(stats.totalTime, 6)),
+                           (u"filteringTime", round(stats.filteringTime, 6)),
+                           (u"bindingTime", round(stats.bindingTime, 6)),
+                           (u"evaluationTime", round(stats.evaluationTime, 6)),
+                           (u"chainedTime", round(stats.chainedTime, 6)),
+                           (u"variables", [OrderedDict(((u"name", unicode(v.qname)),
+                                                        (u"filterings", v.filterings),
+                                                        (u"filteringTime", round(v.filteringTime, 6)),
+                                                        (u"factsFiltered", v.factsFiltered),
+                                                        (u"factsImplicitFiltered", v.factsImplicitFiltered),
+                                                        (u"bindings", v.bindings)))
+                                           for v in stats.variables.values()]),
+                           (u"filters", [OrderedDict(((u"variable", f.variable),
+                                                      (u"filter", f.modelFilter.localName),
+                                                      (u"label", f.modelFilter.xlinkLabel),
+                                                      (u"line", f.modelFilter.sourceline),
+                                                      (u"calls", f.calls),
+                                                      (u"time", round(f.time, 6)),
+                                                      (u"factsIn", f.factsIn),
+                                                      (u"factsOut", f.factsOut)))
+                                         for f in stats.filters.values()]),
+                           (u"functionCalls", functionCallCounts(stats.functionCalls))))
+            varSets.append(varSet)
+        return OrderedDict(((u"instance", self.modelXbrl.modelDocument.uri if self.modelXbrl.modelDocument is not None else None),
+                            (u"totalTime", round(time.time() - self.timeStarted, 6)),
+                            (u"variableSets", varSets),
+                            (u"functionCalls", functionCallCounts(self.functionCalls))))
+
+    def csvRows(self):
+        yield (u"variableSet", u"row", u"name", u"count", u"skipped", u"fallback", u"blocked",
+               u"time", u"filteringTime", u"bindingTime", u"evaluationTime", u"chainedTime",
+               u"factsIn", u"factsOut")
+        for stats in self.variableSets.values():
+            varSetId = stats.modelVariableSet.id or stats.modelVariableSet.xlinkLabel
+            yield (varSetId, stats.modelVariableSet.localName, stats.modelVariableSet.xlinkLabel,
+                   stats.evaluations, stats.skippedEvaluations, stats.fallbackEvaluations, stats.preconditionBlocked,
+                   round(stats.totalTime, 6), round(stats.filteringTime, 6), round(stats.bindingTime, 6),
+                   round(stats.evaluationTime, 6), round(stats.chainedTime, 6), u"", u"")
+            for v in stats.variables.values():
+                yield (varSetId, u"variable", v.qname, v.bindings, u"", u"", u"",
+                       u"", round(v.filteringTime, 6), u"", u"", u"",
+                       v.factsFiltered, v.factsImplicitFiltered)
+            for f in stats.filters.values():
+                yield (varSetId, u"filter", u"{} {} {}".format(f.variable, f.modelFilter.localName, f.modelFilter.xlinkLabel),
+                       f.calls, u"", u"", u"",
+                       round(f.time, 6), u"", u"", u"", u"",
+                       f.factsIn, f.factsOut)
+            for name, count in functionCallCounts(stats.functionCalls).items():
+                yield (varSetId, u"function", name, count, u"", u"", u"", u"", u"", u"", u"", u"", u"", u"")
+        for name, count in functionCallCounts(self.functionCalls).items():
+            yield (u"", u"function", name, count, u"", u"", u"", u"", u"", u"", u"", u"", u"", u"")
+
+    def save(self, profileFile):
+        if profileFile.endswith(u".csv"):
+            if sys.version[0] >= u'3':
+                with io.open(profileFile, u'w', newline=u'', encoding=u'utf-8') as fh:
+                    csvWriter = csv.writer(fh, dialect=u"excel")
+                    for row in self.csvRows():
+                        csvWriter.writerow(row)
+            else: # 2.7 csv writes encoded byte strings
+                with open(profileFile, u'wb') as fh:
+                    csvWriter = csv.writer(fh, dialect=u"excel")
+                    for row in self.csvRows():
+                        csvWriter.writerow([(unicode(col).encode(u'utf-8') if not isinstance(col, _NUM_TYPES) else col)
+                                            for col in row])
+        else:
+            with io.open(profileFile, u'wt', encoding=u'utf-8') as fh:
+                fh.write(_STR_UNICODE(json.dumps(self.toJson(), ensure_ascii=False, indent=1)))
@@ -15,7 +15,7 @@ from arelle.ModelInstanceObject import ModelDimensionValue, ModelFact, ModelInli
 from arelle.ModelFormulaObject import ModelFormulaResource
 from arelle.XmlValidate import UNKNOWN, VALID, validate, NCNamePattern
 from arelle.ValidateXbrlCalcs import inferredDecimals, inferredPrecision
-from arelle.ValidateXbrlDimensions import priItemElrHcRels
+from arelle.ValidateXbrlDimensions import priItemElrHcRels, drsTables
 from arelle.Locale import format_picture
 from arelle import XmlValidate
 from lxml import etree
@@ -717,17 +717,15 @@ def filter_member_DRS_selection(xc, p, args):
     if memConcept is None or not memConcept.isDomainMember or not dimConcept.isDimensionItem:
         # not an error, just don't find anything
         return ()
+    _drsTables = drsTables(xc.modelXbrl)
     for hcELR, hcRels in priItemElrHcRels(xc, priItemConcept, linkroleURI).items():
         if not linkroleURI or linkroleURI == hcELR:
             for hasHcRel in hcRels:
-                hcConcept = hasHcRel.toModelObject
-                if hasHcRel.arcrole == XbrlConst.all:                
-                    dimELR = (hasHcRel.targetRole or hcELR)
-                    for hcDimRel in xc.modelXbrl.relationshipSet(XbrlConst.hypercubeDimension, dimELR).fromModelObject(hcConcept):
-                        if dimConcept == hcDimRel.toModelObject:
+                if hasHcRel.arcrole == XbrlConst.all:
+                    for drsDim in _drsTables.hypercube(hasHcRel).dims:
+                        if dimConcept == drsDim.dimConcept:
                             filter_member_DRS_members(xc,
-                                                      xc.modelXbrl.relationshipSet(XbrlConst.dimensionDomain, 
-                                                                                   (hcDimRel.targetRole or dimELR))
+                                                      xc.modelXbrl.relationshipSet(XbrlConst.dimensionDomain, drsDim.domELR)
                                                       .fromModelObject(dimConcept),
                                                       axis,
                                                       memConcept,
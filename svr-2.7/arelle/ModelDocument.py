@@ -5,7 +5,7 @@ Created on Oct 3, 2010
 (c) Copyright 2010 Mark V Systems Limited, All rights reserved.
 '''
 from __future__ import with_statement
-import os, io, sys
+import os, io, sys, threading
 from collections import defaultdict
 from lxml import etree
 from xml.sax import SAXParseException
@@ -50,9 +50,7 @@ def load(modelXbrl, uri, base=None, referringElement=None, isEntry=False, isDisc
         modelXbrl.uriDir = os.path.dirname(normalizedUri)
         for i in xrange(modelXbrl.modelManager.disclosureSystem.maxSubmissionSubdirectoryEntryNesting):
             modelXbrl.uriDir = os.path.dirname(modelXbrl.uriDir)
-    if modelXbrl.modelManager.validateDisclosureSystem and \
-       not normalizedUri.startswith(modelXbrl.uriDir) and \
-       not modelXbrl.modelManager.disclosureSystem.hrefValid(normalizedUri):
+    if isDisallowedUri(modelXbrl, normalizedUri):
         blocked = modelXbrl.modelManager.disclosureSystem.blockDisallowedReferences
         if normalizedUri not in modelXbrl.urlUnloadableDocs:
             # HMRC note, HMRC.blockedFile should be in this list if hmrc-taxonomies.xml is maintained an dup to date
@@ -68,12 +66,7 @@ def load(modelXbrl, uri, base=None, referringElement=None, isEntry=False, isDisc
     if modelXbrl.modelManager.skipLoading and modelXbrl.modelManager.skipLoading.match(normalizedUri):
         return None
     
-    if modelXbrl.fileSource.isMappedUrl(normalizedUri):
-        mappedUri = modelXbrl.fileSource.mappedUrl(normalizedUri)
-    elif PackageManager.isMappedUrl(normalizedUri):
-        mappedUri = PackageManager.mappedUrl(normalizedUri)
-    else:
-        mappedUri = modelXbrl.modelManager.disclosureSystem.mappedUrl(normalizedUri)
+    mappedUri = mappedUrl(modelXbrl, normalizedUri)
         
     if isEntry:
         modelXbrl.entryLoadingUrl = mappedUri   # for error loggiong during loading
@@ -121,26 +114,35 @@ def load(modelXbrl, uri, base=None, referringElement=None, isEntry=False, isDisc
             modelDocument = pluginMethod(modelXbrl, mappedUri, filepath, **kwargs)
             if modelDocument is not None:
                 return modelDocument
-        if (modelXbrl.modelManager.validateDisclosureSystem and 
-            modelXbrl.modelManager.disclosureSystem.validateFileText):
-            file, _encoding = ValidateFilingText.checkfile(modelXbrl,filepath)
+        parsedDocument = modelXbrl.parsedDocuments.pop(filepath, None)
+        if parsedDocument is not None: # read and parsed ahead by parseDocuments
+            (_parser, _parserLookupName, _parserLookupClass), text, _encoding, xmlDocument, parserErrors = parsedDocument
+            if xmlDocument is None: # not parseable from text in parse thread, parse as file here
+                xmlDocument = etree.parse(io.BytesIO(text) if isinstance(text, _STR_8BIT) else io.StringIO(text),
+                                          parser=_parser,base_url=filepath)
+                parserErrors = _parser.error_log
         else:
-            file, _encoding = modelXbrl.fileSource.file(filepath, stripDeclaration=True)
-        xmlDocument = None
-        isPluginParserDocument = False
-        for pluginMethod in pluginClassMethods(u"ModelDocument.CustomLoader"):
-            modelDocument = pluginMethod(modelXbrl, file, mappedUri, filepath)
-            if modelDocument is not None:
-                file.close()
-                return modelDocument
-        _parser, _parserLookupName, _parserLookupClass = parser(modelXbrl,filepath)
-        xmlDocument = etree.parse(file,parser=_parser,base_url=filepath)
-        for error in _parser.error_log:
+            if (modelXbrl.modelManager.validateDisclosureSystem and 
+                modelXbrl.modelManager.disclosureSystem.validateFileText):
+                file, _encoding = ValidateFilingText.checkfile(modelXbrl,filepath)
+            else:
+                file, _encoding = modelXbrl.fileSource.file(filepath, stripDeclaration=True)
+            xmlDocument = None
+            isPluginParserDocument = False
+            for pluginMethod in pluginClassMethods(u"ModelDocument.CustomLoader"):
+                modelDocument = pluginMethod(modelXbrl, file, mappedUri, filepath)
+                if modelDocument is not None:
+                    file.close()
+                    return modelDocument
+            _parser, _parserLookupName, _parserLookupClass = parser(modelXbrl,filepath)
+            xmlDocument = etree.parse(file,parser=_parser,base_url=filepath)
+            parserErrors = _parser.error_log
+            file.close()
+        for error in parserErrors:
             modelXbrl.error(u"xmlSchema:syntax",
                     _(u"%(error)s, %(fileName)s, line %(line)s, column %(column)s, %(sourceAction)s source element"),
                     modelObject=referringElement, fileName=os.path.basename(uri), 
                     error=error.message, line=error.line, column=error.column, sourceAction=(u"including" if isIncluded else u"importing"))
-        file.close()
     except (EnvironmentError, KeyError), err:  # missing zip file raises KeyError
         if file:
             file.close()
@@ -280,6 +282,10 @@ def load(modelXbrl, uri, base=None, referringElement=None, isEntry=False, isDisc
         if isEntry or isDiscovered:
             modelDocument.inDTS = True
         
+        if (_type in (Type.SCHEMA, Type.LINKBASE, Type.INSTANCE, Type.INLINEXBRL) and
+            modelXbrl.modelManager.cntlr.webCache.prefetchThreads and not modelDocument.skipDTS):
+            modelDocument.prefetchHrefs(rootNode) # remote documents download while this one is discovered
+        
         # discovery (parsing)
         if any(pluginMethod(modelDocument)
                for pluginMethod in pluginClassMethods(u"ModelDocument.Discover")):
@@ -289,6 +295,8 @@ def load(modelXbrl, uri, base=None, referringElement=None, isEntry=False, isDisc
         elif _type == Type.LINKBASE:
             modelDocument.linkbaseDiscover(rootNode)
         elif _type == Type.INSTANCE:
+            if isEntry and modelXbrl.modelManager.dtsCache is not None:
+                modelXbrl.modelManager.dtsCache.attach(modelXbrl, modelDocument, rootNode)
             modelDocument.instanceDiscover(rootNode)
         elif _type == Type.INLINEXBRL:
             modelDocument.inlineXbrlDiscover(rootNode)
@@ -316,6 +324,105 @@ def load(modelXbrl, uri, base=None, referringElement=None, isEntry=False, isDisc
 
     return modelDocument
 
+def isDisallowedUri(modelXbrl, normalizedUri):
+    # True if the disclosure system does not allow references to normalizedUri (outside of the entry's directory)
+    return (modelXbrl.modelManager.validateDisclosureSystem and
+            not normalizedUri.startswith(modelXbrl.uriDir) and
+            not modelXbrl.modelManager.disclosureSystem.hrefValid(normalizedUri))
+
+def mappedUrl(modelXbrl, normalizedUri):
+    # url of normalizedUri as mapped by the file source, a package, or the disclosure system
+    if modelXbrl.fileSource.isMappedUrl(normalizedUri):
+        return modelXbrl.fileSource.mappedUrl(normalizedUri)
+    elif PackageManager.isMappedUrl(normalizedUri):
+        return PackageManager.mappedUrl(normalizedUri)
+    return modelXbrl.modelManager.disclosureSystem.mappedUrl(normalizedUri)
+
+def parseDocuments(modelXbrl, uris, base=None):
+    u"""Parses the documents of uris concurrently, ahead of their loading by load, such as for the
+    html documents of an inline XBRL document set.  Files are read (and text checked) in order by this 
+    thread, and parsed from their text by modelManager.parseThreads threads (lxml releases the GIL while
+    parsing), returning when all are parsed.  Load of each uri then discovers its parsed document, by
+    the file path which load resolves for it.  Only local and archive files are parsed ahead (web files
+    are retrieved by load, in order), and not those which load would block or skip.
+    Nothing is parsed ahead if parseThreads is under 2, or if any plug-in provides its own loader.
+    
+    :param uris: Uris of documents to parse, as they will be loaded (relative to base).
+    :type uris: [str]
+    :param base: The base uri of relative uris.
+    :type base: str
+    """
+    parseThreads = min(modelXbrl.modelManager.parseThreads, len(uris))
+    if (parseThreads < 2 or 
+        any(True for pluginMethod in pluginClassMethods(u"ModelDocument.PullLoader")) or
+        any(True for pluginMethod in pluginClassMethods(u"ModelDocument.CustomLoader"))):
+        return
+    validateFileText = (modelXbrl.modelManager.validateDisclosureSystem and 
+                        modelXbrl.modelManager.disclosureSystem.validateFileText)
+    skipLoading = modelXbrl.modelManager.skipLoading
+    webCache = modelXbrl.modelManager.cntlr.webCache
+    documentsToParse = []
+    for uri in uris:
+        normalizedUri = webCache.normalizeUrl(uri, base)
+        if (normalizedUri in modelXbrl.urlDocs or normalizedUri in modelXbrl.urlUnloadableDocs or
+            isDisallowedUri(modelXbrl, normalizedUri) or # load reports the disallowed reference
+            (skipLoading and skipLoading.match(normalizedUri))):
+            continue
+        mappedUri = mappedUrl(modelXbrl, normalizedUri)
+        if modelXbrl.fileSource.isInArchive(mappedUri):
+            filepath = mappedUri
+        elif not UrlUtil.isHttpUrl(mappedUri):
+            filepath = webCache.getfilename(mappedUri) # as by load
+        else:
+            continue
+        if not filepath or filepath in modelXbrl.parsedDocuments:
+            continue
+        try:
+            if validateFileText:
+                file, _encoding = ValidateFilingText.checkfile(modelXbrl,filepath)
+            else:
+                file, _encoding = modelXbrl.fileSource.file(filepath, stripDeclaration=True)
+            text = file.read()
+            file.close()
+        except (EnvironmentError, KeyError):
+            continue # load reports the file error
+        documentsToParse.append((filepath, parser(modelXbrl,filepath), text, _encoding))
+    documentsToParse.reverse() # parse in order popped from end
+    
+    def parseDocument():
+        while True:
+            try:
+                filepath, parserLookup, text, _encoding = documentsToParse.pop()
+            except IndexError:
+                return
+            _parser = parserLookup[0]
+            try:
+                rootElement = etree.fromstring(text,parser=_parser,base_url=filepath)
+            except (etree.LxmlError, ValueError): # load reparses as a file and reports the error
+                rootElement = None
+            if rootElement is not None:
+                modelXbrl.parsedDocuments[filepath] = (parserLookup, None, _encoding, 
+                                                       rootElement.getroottree(), list(_parser.error_log))
+            else:
+                modelXbrl.parsedDocuments[filepath] = (parserLookup, text, _encoding, None, None)
+    
+    threads = [threading.Thread(target=parseDocument) for i in xrange(parseThreads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads: # documents may be discovered when all parsing threads are done with their parser dictionaries
+        thread.join()
+
+prefetchHrefTags = frozenset((u"{http://www.xbrl.org/2003/linkbase}loc",
+                              u"{http://www.xbrl.org/2003/linkbase}roleRef",
+                              u"{http://www.xbrl.org/2003/linkbase}arcroleRef",
+                              u"{http://www.xbrl.org/2003/linkbase}linkbaseRef",
+                              u"{http://www.xbrl.org/2003/linkbase}schemaRef"))
+prefetchSchemaLocationTags = frozenset((u"{http://www.w3.org/2001/XMLSchema}import",
+                                        u"{http://www.w3.org/2001/XMLSchema}include",
+                                        u"{http://www.w3.org/2001/XMLSchema}redefine"))
+prefetchInstanceTags = (u"{http://www.xbrl.org/2003/linkbase}schemaRef",
+                        u"{http://www.xbrl.org/2003/linkbase}linkbaseRef")
+
 def loadSchemalocatedSchema(modelXbrl, element, relativeUrl, namespace, baseUrl):
     importSchemaLocation = modelXbrl.modelManager.cntlr.webCache.normalizeUrl(relativeUrl, baseUrl)
     doc = load(modelXbrl, importSchemaLocation, isIncluded=False, isDiscovered=False, namespace=namespace, referringElement=element)
@@ -703,6 +810,35 @@ class ModelDocument(object):
                 return productKey
         return creationSoftwareComment # "Other"
     
+    def prefetchHrefs(self, rootElement):
+        # queue remote documents referenced by this document for web cache download ahead of their discovery
+        # (hrefs are resolved ignoring xml:base, a url so misresolved is just not used by discovery)
+        modelXbrl = self.modelXbrl
+        modelManager = modelXbrl.modelManager
+        if self.type == Type.INSTANCE:
+            elements = rootElement.iterchildren(*prefetchInstanceTags)
+        else:
+            elements = rootElement.iter(*(prefetchHrefTags | prefetchSchemaLocationTags))
+        urls = []
+        for element in elements:
+            if element.tag in prefetchSchemaLocationTags:
+                href = element.get(u"schemaLocation")
+            else:
+                href = element.get(u"{http://www.w3.org/1999/xlink}href")
+            if not href:
+                continue
+            url, id = UrlUtil.splitDecodeFragment(href)
+            if not url:
+                continue
+            normalizedUri = modelManager.cntlr.webCache.normalizeUrl(url, self.uri)
+            if (normalizedUri in modelXbrl.urlDocs or
+                modelXbrl.fileSource.isMappedUrl(normalizedUri) or PackageManager.isMappedUrl(normalizedUri) or
+                (modelManager.validateDisclosureSystem and not modelManager.disclosureSystem.hrefValid(normalizedUri))):
+                continue
+            urls.append(modelManager.disclosureSystem.mappedUrl(normalizedUri))
+        if urls:
+            modelManager.cntlr.webCache.prefetch(urls)
+
     def schemaDiscover(self, rootElement, isIncluded, namespace):
         targetNamespace = rootElement.get(u"targetNamespace")
         if targetNamespace:
@@ -1063,25 +1199,28 @@ class ModelDocument(object):
             #XmlValidate.validate(self.modelXbrl, htmlElement, ixFacts=False)
         ixNS = None
         conflictingNSelts = []
-        # find namespace, only 1 namespace
-        for inlineElement in htmlElement.iterdescendants():
-            if isinstance(inlineElement,ModelObject) and inlineElement.namespaceURI in XbrlConst.ixbrlAll:
+        ixHeaderElements = defaultdict(list) # references and resources elements by tag
+        # find namespace, only 1 namespace, in a single pass over the ix elements
+        for inlineElement in htmlElement.iterdescendants(*[u"{" + ns + u"}*" for ns in XbrlConst.ixbrlAll]):
+            if isinstance(inlineElement,ModelObject):
                 if ixNS is None:
                     ixNS = inlineElement.namespaceURI
                 elif ixNS != inlineElement.namespaceURI:
                     conflictingNSelts.append(inlineElement)
+                if inlineElement.localName in (u"references", u"resources"):
+                    ixHeaderElements[inlineElement.tag].append(inlineElement)
         if conflictingNSelts:
             self.modelXbrl.error(u"ix.3.1:multipleIxNamespaces",
                     _(u"Multiple ix namespaces were found"),
                     modelObject=conflictingNSelts)
         self.ixNStag = ixNStag = u"{" + ixNS + u"}"
-        for inlineElement in htmlElement.iterdescendants(tag=ixNStag + u"references"):
+        for inlineElement in ixHeaderElements[ixNStag + u"references"]:
             self.schemaLinkbaseRefsDiscover(inlineElement)
             XmlValidate.validate(self.modelXbrl, inlineElement) # validate instance elements
         if not hasattr(self.modelXbrl, u"targetRoleRefs"):
             self.modelXbrl.targetRoleRefs = {}
             self.modelXbrl.targetArcroleRefs = {}
-        for inlineElement in htmlElement.iterdescendants(tag=ixNStag + u"resources"):
+        for inlineElement in ixHeaderElements[ixNStag + u"resources"]:
             self.instanceContentsDiscover(inlineElement)
             XmlValidate.validate(self.modelXbrl, inlineElement) # validate instance elements
             for refElement in inlineElement.iterchildren(u"{http://www.xbrl.org/2003/linkbase}roleRef"):
@@ -1178,9 +1317,23 @@ def inlineIxdsDiscover(modelXbrl):
     tupleElements = []
     continuationElements = {}
     tuplesByTupleID = {}
+    ixdsElements = [] # of each document, its inline elements by kind, found in a single pass in document order
     for htmlElement in modelXbrl.ixdsHtmlElements:  
         mdlDoc = htmlElement.modelDocument
-        for modelInlineTuple in htmlElement.iterdescendants(tag=mdlDoc.ixNStag + u"tuple"):
+        ixNStag = mdlDoc.ixNStag
+        elementKinds = {ixNStag + u"tuple": u"tuple",
+                        ixNStag + u"continuation": u"continuation",
+                        ixNStag + u"nonNumeric": u"fact",
+                        ixNStag + u"nonFraction": u"fact",
+                        ixNStag + u"fraction": u"fact",
+                        u"{http://www.xbrl.org/2008/inlineXBRL}footnote": u"footnote",
+                        u"{http://www.xbrl.org/CR-2013-08-21/inlineXBRL}footnote": u"ix11footnote",
+                        u"{http://www.xbrl.org/CR-2013-08-21/inlineXBRL}relationship": u"relationship"}
+        docElements = defaultdict(list)
+        for elt in htmlElement.iterdescendants(*elementKinds.keys()):
+            docElements[elementKinds[elt.tag]].append(elt)
+        ixdsElements.append((mdlDoc, docElements))
+        for modelInlineTuple in docElements[u"tuple"]:
             if isinstance(modelInlineTuple,ModelObject):
                 modelInlineTuple.unorderedTupleFacts = []
                 if modelInlineTuple.tupleID:
@@ -1188,7 +1341,7 @@ def inlineIxdsDiscover(modelXbrl):
                 tupleElements.append(modelInlineTuple)
                 for r in modelInlineTuple.footnoteRefs:
                     footnoteRefs[r].append(modelInlineTuple)
-        for elt in htmlElement.iterdescendants(tag=mdlDoc.ixNStag + u"continuation"):
+        for elt in docElements[u"continuation"]:
             if isinstance(elt,ModelObject) and elt.id:
                 continuationElements[elt.id] = elt
                     
@@ -1232,38 +1385,34 @@ def inlineIxdsDiscover(modelXbrl):
                     element._continuationElement = contElt
                     locateContinuation(contElt, chain)
 
-    for htmlElement in modelXbrl.ixdsHtmlElements:  
-        mdlDoc = htmlElement.modelDocument
-        ixNStag = mdlDoc.ixNStag
-        # hook up tuples to their container
-        for tupleFact in tupleElements:
-            locateFactInTuple(tupleFact, tuplesByTupleID, ixNStag)
+    # hook up tuples to their container
+    for tupleFact in tupleElements:
+        locateFactInTuple(tupleFact, tuplesByTupleID, tupleFact.modelDocument.ixNStag)
 
-        factTags = set(ixNStag + ln for ln in (u"nonNumeric", u"nonFraction", u"fraction"))
-        for tag in factTags:
-            for modelInlineFact in htmlElement.iterdescendants(tag=tag):
-                if isinstance(modelInlineFact,ModelInlineFact):
-                    mdlDoc.modelXbrl.factsInInstance.add( modelInlineFact )
-                    locateFactInTuple(modelInlineFact, tuplesByTupleID, ixNStag)
-                    locateContinuation(modelInlineFact)
-                    for r in modelInlineFact.footnoteRefs:
-                        footnoteRefs[r].append(modelInlineFact)
-        # order tuple facts
-        for tupleFact in tupleElements:
-            tupleFact.modelTupleFacts = [
-                 mdlDoc.modelXbrl.modelObject(objectIndex) 
-                 for order,objectIndex in sorted(tupleFact.unorderedTupleFacts)]
-                        
-        # validate particle structure of elements after transformations and established tuple structure
-        for rootModelFact in modelXbrl.facts:
-            # validate XBRL (after complete document set is loaded)
-            XmlValidate.validate(modelXbrl, rootModelFact, ixFacts=True)
+    for mdlDoc, docElements in ixdsElements:
+        ixNStag = mdlDoc.ixNStag
+        for modelInlineFact in docElements[u"fact"]:
+            if isinstance(modelInlineFact,ModelInlineFact):
+                modelXbrl.factsInInstance.add( modelInlineFact )
+                locateFactInTuple(modelInlineFact, tuplesByTupleID, ixNStag)
+                locateContinuation(modelInlineFact)
+                for r in modelInlineFact.footnoteRefs:
+                    footnoteRefs[r].append(modelInlineFact)
+    # order tuple facts
+    for tupleFact in tupleElements:
+        tupleFact.modelTupleFacts = [
+             modelXbrl.modelObject(objectIndex) 
+             for order,objectIndex in sorted(tupleFact.unorderedTupleFacts)]
+                    
+    # validate particle structure of elements after transformations and established tuple structure
+    for rootModelFact in modelXbrl.facts:
+        # validate XBRL (after complete document set is loaded)
+        XmlValidate.validate(modelXbrl, rootModelFact, ixFacts=True)
             
     footnoteLinkPrototypes = {}
-    for htmlElement in modelXbrl.ixdsHtmlElements:  
-        mdlDoc = htmlElement.modelDocument
+    for mdlDoc, docElements in ixdsElements:
         # inline 1.0 ixFootnotes, build resources (with ixContinuation)
-        for modelInlineFootnote in htmlElement.iterdescendants(tag=u"{http://www.xbrl.org/2008/inlineXBRL}footnote"):
+        for modelInlineFootnote in docElements[u"footnote"]:
             if isinstance(modelInlineFootnote,ModelObject):
                 # link
                 linkrole = modelInlineFootnote.get(u"footnoteLinkRole", XbrlConst.defaultLinkRole)
@@ -1295,7 +1444,7 @@ def inlineIxdsDiscover(modelXbrl):
                                                                 linkrole, arcrole))
                 
         # inline 1.1 ixRelationships and ixFootnotes
-        for modelInlineFootnote in htmlElement.iterdescendants(tag=u"{http://www.xbrl.org/CR-2013-08-21/inlineXBRL}footnote"):
+        for modelInlineFootnote in docElements[u"ix11footnote"]:
             if isinstance(modelInlineFootnote,ModelObject):
                 locateContinuation(modelInlineFootnote)
                 linkPrototype = LinkPrototype(mdlDoc, mdlDoc.xmlRootElement, XbrlConst.qnLinkFootnoteLink, XbrlConst.defaultLinkRole)
@@ -1303,7 +1452,7 @@ def inlineIxdsDiscover(modelXbrl):
                 modelXbrl.baseSets[baseSetKey].append(linkPrototype) # allows generating output instance with this loc
                 linkPrototype.childElements.append(modelInlineFootnote)
 
-        for modelInlineRel in htmlElement.iterdescendants(tag=u"{http://www.xbrl.org/CR-2013-08-21/inlineXBRL}relationship"):
+        for modelInlineRel in docElements[u"relationship"]:
             if isinstance(modelInlineRel,ModelObject):
                 linkrole = modelInlineRel.get(u"linkRole", XbrlConst.defaultLinkRole)
                 arcrole = modelInlineRel.get(u"arcrole", XbrlConst.factFootnote)
@@ -1898,14 +1898,18 @@ class ModelRelationship(ModelObject):
         
     @property
     def equivalenceHash(self): # not exact, use equivalenceKey if hashes are the same
-        return hash((self.qname, 
-                     self.linkQname,
-                     self.linkrole,  # needed when linkrole=None merges multiple links
-                     self.fromModelObject.objectIndex if self.fromModelObject is not None else -1, 
-                     self.toModelObject.objectIndex if self.toModelObject is not None else -1, 
-                     self.order, 
-                     self.weight, 
-                     self.preferredLabel))
+        try: # relationships are shared by the relationship sets of their link
+            return self._equivalenceHash
+        except AttributeError:
+            self._equivalenceHash = hash((self.qname, 
+                                          self.linkQname,
+                                          self.linkrole,  # needed when linkrole=None merges multiple links
+                                          self.fromModelObject.objectIndex if self.fromModelObject is not None else -1, 
+                                          self.toModelObject.objectIndex if self.toModelObject is not None else -1, 
+                                          self.order, 
+                                          self.weight, 
+                                          self.preferredLabel))
+            return self._equivalenceHash
         
     @property
     def equivalenceKey(self):
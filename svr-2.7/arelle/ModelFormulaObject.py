@@ -149,6 +149,10 @@ class FormulaOptions():
         self.traceVariableExpressionCode = False
         self.traceVariableExpressionEvaluation = False
         self.traceVariableExpressionResult = False
+        self.interpretXPath = False # True to evaluate XPath by interpreter instead of compiled expressions
+        self.cacheParsedProgs = True # reuse parsed XPath expressions within and across runs
+        self.evaluationWorkers = 0 # number of processes to evaluate independent assertions, 0 or 1 for sequential
+        self.profileFile = None # file (.json or .csv) to save formula evaluation profile
         if isinstance(savedValues, dict):
             self.__dict__.update(savedValues)
             
@@ -873,6 +877,16 @@ class ModelFilter(ModelFormulaResource):
             self._hasNoVariableDependencies = len(self.variableRefs() - xpCtx.parameterQnames) == 0
             return self._hasNoVariableDependencies
         
+    def hasStaticExpressions(self, xpCtx, progs):
+        # expressions have the same value for all facts, and may be evaluated once to look up indexed facts
+        try:
+            return self._hasStaticExpressions
+        except AttributeError:
+            self._hasStaticExpressions = (self.hasNoFilterVariableDependencies(xpCtx) and
+                                          all(XPathParser.isContextItemIndependent(prog) 
+                                              for prog in progs if prog))
+            return self._hasStaticExpressions
+        
     @property
     def isFilterShared(self):
         try:
@@ -1181,8 +1195,9 @@ class ModelConceptBalance(ModelFilter):
         return self.get(u"balance")
     
     def filter(self, xpCtx, varBinding, facts, cmplmt):
-        return set(fact for fact in facts 
-                   if cmplmt ^ ((fact.concept.balance == self.balance) if fact.concept.balance else (self.balance == u"none"))) 
+        factsOfBalance = set.union(*[inst.factsByBalance(self.balance)
+                                     for inst in varBinding.instances])
+        return (facts - factsOfBalance) if cmplmt else (facts & factsOfBalance)
        
     @property
     def propertyView(self):
@@ -1609,6 +1624,12 @@ class ModelEntitySpecificIdentifier(ModelFilter):
         return super(ModelEntitySpecificIdentifier, self).variableRefs((self.schemeProg or []) + (self.valueProg or []), varRefSet)
         
     def filter(self, xpCtx, varBinding, facts, cmplmt):
+        if facts and self.hasStaticExpressions(xpCtx, (self.schemeProg, self.valueProg)):
+            entityIdentifier = (xpCtx.evaluateAtomicValue(self.schemeProg, u'xs:string'),
+                                xpCtx.evaluateAtomicValue(self.valueProg, u'xs:string'))
+            entityFacts = set.union(*[inst.factsByEntity[entityIdentifier]
+                                      for inst in varBinding.instances])
+            return (facts - entityFacts) if cmplmt else (facts & entityFacts)
         return set(fact for fact in facts 
                    if cmplmt ^ (fact.isItem and ( 
                                                  fact.context.entityIdentifier[0] == xpCtx.evaluateAtomicValue(self.schemeProg, u'xs:string', fact) and 
@@ -1651,6 +1672,13 @@ class ModelEntityScheme(ModelFilter):
         return super(ModelEntityScheme, self).variableRefs(self.schemeProg, varRefSet)
         
     def filter(self, xpCtx, varBinding, facts, cmplmt):
+        if facts and self.hasStaticExpressions(xpCtx, (self.schemeProg,)):
+            scheme = xpCtx.evaluateAtomicValue(self.schemeProg, u'xs:string')
+            schemeFacts = set.union(set(), *[entityFacts
+                                             for inst in varBinding.instances
+                                             for entityIdentifier, entityFacts in inst.factsByEntity.items()
+                                             if entityIdentifier[0] == scheme])
+            return (facts - schemeFacts) if cmplmt else (facts & schemeFacts)
         return set(fact for fact in facts 
                    if cmplmt ^ (fact.isItem and 
                                 fact.context.entityIdentifier[0] == xpCtx.evaluateAtomicValue(self.schemeProg, u'xs:string', fact))) 
@@ -1857,6 +1885,15 @@ class ModelDateTimeFilter(ModelFilter):
             return date + datetime.timedelta(1)
         return date
     
+    def hasStaticDatetime(self, xpCtx):
+        return self.hasStaticExpressions(xpCtx, (self.dateProg, getattr(self, u"timeProg", None)))
+    
+    def periodFacts(self, varBinding, periodMatches):
+        return set.union(set(), *[periodFacts
+                                  for inst in varBinding.instances
+                                  for period, periodFacts in inst.factsByPeriod.items()
+                                  if periodMatches(period)])
+    
     @property
     def propertyView(self):
         return ((u"label", self.xlinkLabel),
@@ -1876,6 +1913,11 @@ class ModelPeriodStart(ModelDateTimeFilter):
         super(ModelPeriodStart, self).init(modelDocument)
 
     def filter(self, xpCtx, varBinding, facts, cmplmt):
+        if facts and self.hasStaticDatetime(xpCtx):
+            startDatetime = self.evalDatetime(xpCtx, None, addOneDay=False)
+            periodFacts = self.periodFacts(varBinding, 
+                                           lambda period: isinstance(period, tuple) and period[0] == startDatetime)
+            return (facts - periodFacts) if cmplmt else (facts & periodFacts)
         return set(fact for fact in facts 
                    if cmplmt ^ (fact.isItem and 
                                 fact.context.startDatetime == self.evalDatetime(xpCtx, fact, addOneDay=False))) 
@@ -1885,6 +1927,11 @@ class ModelPeriodEnd(ModelDateTimeFilter):
         super(ModelPeriodEnd, self).init(modelDocument)
 
     def filter(self, xpCtx, varBinding, facts, cmplmt):
+        if facts and self.hasStaticDatetime(xpCtx):
+            endDatetime = self.evalDatetime(xpCtx, None, addOneDay=True)
+            periodFacts = self.periodFacts(varBinding, 
+                                           lambda period: isinstance(period, tuple) and period[1] == endDatetime)
+            return (facts - periodFacts) if cmplmt else (facts & periodFacts)
         return set(fact for fact in facts 
                    if cmplmt ^ (fact.isItem and (fact.context.isStartEndPeriod 
                                                  and fact.context.endDatetime == self.evalDatetime(xpCtx, fact, addOneDay=True)))) 
@@ -1894,6 +1941,11 @@ class ModelPeriodInstant(ModelDateTimeFilter):
         super(ModelPeriodInstant, self).init(modelDocument)
 
     def filter(self, xpCtx, varBinding, facts, cmplmt):
+        if facts and self.hasStaticDatetime(xpCtx):
+            instantDatetime = self.evalDatetime(xpCtx, None, addOneDay=True)
+            periodFacts = self.periodFacts(varBinding, 
+                                           lambda period: not isinstance(period, tuple) and period == instantDatetime)
+            return (facts - periodFacts) if cmplmt else (facts & periodFacts)
         return set(fact for fact in facts 
                    if cmplmt ^ (fact.isItem and 
                                 fact.context.instantDatetime == self.evalDatetime(xpCtx, fact, addOneDay=True))) 
@@ -1903,8 +1955,9 @@ class ModelForever(ModelFilter):
         super(ModelForever, self).init(modelDocument)
 
     def filter(self, xpCtx, varBinding, facts, cmplmt):
-        return set(fact for fact in facts 
-                   if cmplmt ^ (fact.isItem and fact.context.isForeverPeriod)) 
+        foreverFacts = set.union(*[inst.factsByPeriod[u"forever"]
+                                   for inst in varBinding.instances])
+        return (facts - foreverFacts) if cmplmt else (facts & foreverFacts)
 
     def aspectsCovered(self, varBinding):
         return set([Aspect.PERIOD])
@@ -2046,10 +2099,30 @@ class ModelExplicitDimension(ModelFilter):
         except:
             return None
     
+    def evalStaticMemberQnames(self, xpCtx):
+        # member qname expressions with the same value for all facts, evaluated once, are treated as static member qnames,
+        # None if not all members are static or member qnames aren't concepts (reported as by dynamic filtering)
+        if (self.dimQname and not self.dimQnameExpressionProg and self.memberProgs and
+            all(mp.isMemberStatic or (mp.qnameExprProg and not mp.variable and not mp.axis) 
+                for mp in self.memberProgs) and
+            self.hasStaticExpressions(xpCtx, [mp.qnameExprProg for mp in self.memberProgs])):
+            dimConcept = xpCtx.modelXbrl.qnameConcepts.get(self.dimQname)
+            if dimConcept is not None and dimConcept.isExplicitDimension:
+                memQnames = set(mp.qname or xpCtx.evaluateAtomicValue(mp.qnameExprProg, u'xs:QName')
+                                for mp in self.memberProgs)
+                if all(memQname in xpCtx.modelXbrl.qnameConcepts for memQname in memQnames):
+                    return memQnames
+        return None
+    
     def filter(self, xpCtx, varBinding, facts, cmplmt):
         if self.isFilterStatic:
-            dimQname = self.dimQname
             memQnames = self.staticMemberQnames
+        elif facts:
+            memQnames = self.evalStaticMemberQnames(xpCtx)
+        else:
+            memQnames = None
+        if self.isFilterStatic or memQnames:
+            dimQname = self.dimQname
             if memQnames:
                 dimedFacts = set.union(*[inst.factsByDimMemQname(dimQname, memQname)
                                          for inst in varBinding.instances
@@ -2565,6 +2638,11 @@ class ModelSingleMeasure(ModelFilter):
             return None
     
     def filter(self, xpCtx, varBinding, facts, cmplmt):
+        if facts and self.hasStaticExpressions(xpCtx, (self.qnameExpressionProg,)):
+            measureQname = self.evalQname(xpCtx, None)
+            unitFacts = set.union(*[inst.factsByUnit[(measureQname,), ()]
+                                    for inst in varBinding.instances])
+            return (facts - unitFacts) if cmplmt else (facts & unitFacts)
         return set(fact for fact in facts 
                    if cmplmt ^ (fact.isNumeric and 
                                 fact.unit.isSingleMeasure and
@@ -782,7 +782,8 @@ class ModelContext(ModelObject):
         try:
             return self._startDatetime
         except AttributeError:
-            self._startDatetime = XmlUtil.datetimeValue(XmlUtil.child(self.period, XbrlConst.xbrli, u"startDate"))
+            self._startDatetime = self.modelXbrl.internedAspectKey(
+                XmlUtil.datetimeValue(XmlUtil.child(self.period, XbrlConst.xbrli, u"startDate")))
             return self._startDatetime
 
     @property
@@ -791,7 +792,8 @@ class ModelContext(ModelObject):
         try:
             return self._endDatetime
         except AttributeError:
-            self._endDatetime = XmlUtil.datetimeValue(XmlUtil.child(self.period, XbrlConst.xbrli, (u"endDate",u"instant")), addOneDay=True)
+            self._endDatetime = self.modelXbrl.internedAspectKey(
+                XmlUtil.datetimeValue(XmlUtil.child(self.period, XbrlConst.xbrli, (u"endDate",u"instant")), addOneDay=True))
             return self._endDatetime
         
     @property
@@ -800,7 +802,8 @@ class ModelContext(ModelObject):
         try:
             return self._instantDatetime
         except AttributeError:
-            self._instantDatetime = XmlUtil.datetimeValue(XmlUtil.child(self.period, XbrlConst.xbrli, u"instant"), addOneDay=True)
+            self._instantDatetime = self.modelXbrl.internedAspectKey(
+                XmlUtil.datetimeValue(XmlUtil.child(self.period, XbrlConst.xbrli, u"instant"), addOneDay=True))
             return self._instantDatetime
     
     @property
@@ -847,7 +850,8 @@ class ModelContext(ModelObject):
         except AttributeError:
             eiElt = self.entityIdentifierElement
             if eiElt is not None:
-                self._entityIdentifier = (eiElt.get(u"scheme"), eiElt.xValue or eiElt.textValue) # no xValue if --skipDTS
+                self._entityIdentifier = self.modelXbrl.internedAspectKey(
+                    (eiElt.get(u"scheme"), eiElt.xValue or eiElt.textValue)) # no xValue if --skipDTS
             else:
                 self._entityIdentifier = (u"(Error)", u"(Error)")
             return self._entityIdentifier
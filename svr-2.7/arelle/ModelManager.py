@@ -5,7 +5,7 @@ Created on Oct 3, 2010
 (c) Copyright 2010 Mark V Systems Limited, All rights reserved.
 '''
 import gc, sys, traceback, logging
-from arelle import ModelXbrl, Validate, DisclosureSystem
+from arelle import ModelXbrl, Validate, DisclosureSystem, ModelValue
 from arelle.PluginManager import pluginClassMethods
 
 def initialize(cntlr):
@@ -58,7 +58,14 @@ class ModelManager(object):
         self.skipLoading = None
         self.abortOnMajorError = False
         self.collectProfileStats = False
+        self.rssWorkers = 0 # number of processes to validate RSS feed items, 0 or 1 for sequential
+        self.rssItemTimeout = None # seconds an RSS feed item may be validated by a worker process
+        self.testcaseWorkers = 0 # number of processes to validate testcases of a testcases index, 0 or 1 for sequential
+        self.testcaseTimeout = None # seconds a testcase may be validated by a worker process
+        self.parseThreads = 0 # number of threads to parse the documents of an inline XBRL document set, 0 or 1 for sequential
         self.loadedModelXbrls = []
+        self.dtsCache = None # DtsCache.DtsCache to reuse DTSes of instances with the same schemaRefs
+        self.internedQNames = ModelValue.internedQNames = {} # QName intern table, see resetInternedQNames
         from arelle import Locale
         self.locale = Locale.getUserLocale(cntlr.config.get(u"userInterfaceLocaleOverride",u""))
         self.defaultLang = Locale.getLanguageCode()
@@ -205,5 +212,16 @@ class ModelManager(object):
                 else:
                     self.modelXbrl = None
             modelXbrl.close()
+            if not self.loadedModelXbrls:
+                self.resetInternedQNames()
             gc.collect()
 
+    def resetInternedQNames(self):
+        u"""Releases the interned QNames of closed models, keeping only those of the DTSes of the DTS cache, if any, 
+        interned.  QNames created later are equal to, but not the same object as, released QNames."""
+        internedQNames = {}
+        if self.dtsCache is not None:
+            for entry in self.dtsCache.cachedEntries():
+                internedQNames.update(entry.internedQNames)
+        self.internedQNames = ModelValue.internedQNames = internedQNames
+
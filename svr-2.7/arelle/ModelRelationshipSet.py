@@ -89,6 +89,29 @@ def labelroles(modelXbrl, includeConceptName=False):
                         for r in (modelXbrl.labelroles | (set([XbrlConst.conceptNameLabelRole]) if includeConceptName else set()))
                         if r is not None))
     
+def linkRelationships(modelXbrl, modelLink):
+    # relationships of the arcs of a base set link, resolved once for all relationship sets of modelXbrl,
+    # as (arcrole, arc qname, relationship) tuples in arc order, and a dict of relationship lists by arcrole
+    try:
+        return modelXbrl.linkRelationships[modelLink]
+    except KeyError:
+        arcRels = []
+        arcroleRels = defaultdict(list)
+        for linkChild in modelLink:
+            linkChildArcrole = linkChild.get(u"{http://www.w3.org/1999/xlink}arcrole")
+            if linkChild.get(u"{http://www.w3.org/1999/xlink}type") == u"arc" and linkChildArcrole:
+                linkChildQname = linkChild.qname
+                fromLabel = linkChild.get(u"{http://www.w3.org/1999/xlink}from")
+                toLabel = linkChild.get(u"{http://www.w3.org/1999/xlink}to")
+                for fromResource in modelLink.labeledResources[fromLabel]:
+                    for toResource in modelLink.labeledResources[toLabel]:
+                        if isinstance(fromResource,(ModelResource,LocPrototype)) and isinstance(toResource,(ModelResource,LocPrototype)):
+                            modelRel = ModelDtsObject.ModelRelationship(modelLink.modelDocument, linkChild, fromResource.dereference(), toResource.dereference())
+                            arcRels.append( (linkChildArcrole, linkChildQname, modelRel) )
+                            arcroleRels[linkChildArcrole].append(modelRel)
+        modelXbrl.linkRelationships[modelLink] = result = (arcRels, dict(arcroleRels))
+        return result
+
 def baseSetRelationship(arcElement):
     modelXbrl = arcElement.modelXbrl
     arcrole = arcElement.get(u"{http://www.w3.org/1999/xlink}arcrole")
@@ -101,7 +124,7 @@ def baseSetRelationship(arcElement):
 class ModelRelationshipSet(object):
     __slots__ = (u"isChanged", u"modelXbrl", u"arcrole", u"linkrole", u"linkqname", u"arcqname",
                  u"modelRelationshipsFrom", u"modelRelationshipsTo", u"modelConceptRoots", u"modellinkRoleUris",
-                 u"modelRelationships", u"_testHintedLabelLinkrole")
+                 u"modelRelationships", u"modelLabelIndex", u"_testHintedLabelLinkrole")
     
     # arcrole can either be a single string or a tuple or frozenset of strings
     def __init__(self, modelXbrl, arcrole, linkrole=None, linkqname=None, arcqname=None, includeProhibits=False):
@@ -132,53 +155,45 @@ class ModelRelationshipSet(object):
             arcrole = (arcrole,)
         
         for modelLink in modelLinks:
-            arcs = []
-            linkEltQname = modelLink.qname
-            for linkChild in modelLink:
-                linkChildArcrole = linkChild.get(u"{http://www.w3.org/1999/xlink}arcrole")
-                if linkChild.get(u"{http://www.w3.org/1999/xlink}type") == u"arc" and linkChildArcrole:
-                    if isFootnoteRel:
-                        arcs.append(linkChild)
-                    elif isDimensionRel: 
-                        if XbrlConst.isDimensionArcrole(linkChildArcrole):
-                            arcs.append(linkChild)
-                    elif isFormulaRel:
-                        if XbrlConst.isFormulaArcrole(linkChildArcrole):
-                            arcs.append(linkChild)
-                    elif isTableRenderingRel:
-                        if XbrlConst.isTableRenderingArcrole(linkChildArcrole):
-                            arcs.append(linkChild)
-                    elif (linkChildArcrole in arcrole and 
-                          (arcqname is None or arcqname == linkChild.qname) and 
-                          (linkqname is None or linkqname == linkEltQname)):
-                        arcs.append(linkChild)
+            # relationships of the link's arcs are resolved once, and selected here
+            arcRels, arcroleRels = linkRelationships(modelXbrl, modelLink)
+            if isFootnoteRel:
+                modelRels = [modelRel for arcArcrole, arcQname, modelRel in arcRels]
+            elif isDimensionRel: 
+                modelRels = [modelRel for arcArcrole, arcQname, modelRel in arcRels if XbrlConst.isDimensionArcrole(arcArcrole)]
+            elif isFormulaRel:
+                modelRels = [modelRel for arcArcrole, arcQname, modelRel in arcRels if XbrlConst.isFormulaArcrole(arcArcrole)]
+            elif isTableRenderingRel:
+                modelRels = [modelRel for arcArcrole, arcQname, modelRel in arcRels if XbrlConst.isTableRenderingArcrole(arcArcrole)]
+            elif linkqname is not None and linkqname != modelLink.qname:
+                modelRels = ()
+            elif arcqname is None and not isinstance(self.arcrole,(tuple,frozenset)):
+                modelRels = arcroleRels.get(self.arcrole, ())
+            else:
+                modelRels = [modelRel for arcArcrole, arcQname, modelRel in arcRels
+                             if arcArcrole in arcrole and (arcqname is None or arcqname == arcQname)]
                         
             # build network
-            for arcElement in arcs:
-                fromLabel = arcElement.get(u"{http://www.w3.org/1999/xlink}from")
-                toLabel = arcElement.get(u"{http://www.w3.org/1999/xlink}to")
-                for fromResource in modelLink.labeledResources[fromLabel]:
-                    for toResource in modelLink.labeledResources[toLabel]:
-                        if isinstance(fromResource,(ModelResource,LocPrototype)) and isinstance(toResource,(ModelResource,LocPrototype)):
-                            modelRel = ModelDtsObject.ModelRelationship(modelLink.modelDocument, arcElement, fromResource.dereference(), toResource.dereference())
-                            modelRelEquivalenceHash = modelRel.equivalenceHash
-                            if modelRelEquivalenceHash not in relationships:
-                                relationships[modelRelEquivalenceHash] = modelRel
-                            else: # use equivalenceKey instead of hash
-                                otherRel = relationships[modelRelEquivalenceHash]
-                                if otherRel is not USING_EQUIVALENCE_KEY: # move equivalentRel to use key instead of hasn
-                                    relationships[otherRel.equivalenceKey] = otherRel
-                                    relationships[modelRelEquivalenceHash] = USING_EQUIVALENCE_KEY
-                                modelRelEquivalenceKey = modelRel.equivalenceKey    # this is a complex tuple to compute, get once for below
-                                if modelRelEquivalenceKey not in relationships or \
-                                   modelRel.priorityOver(relationships[modelRelEquivalenceKey]):
-                                    relationships[modelRelEquivalenceKey] = modelRel
+            for modelRel in modelRels:
+                modelRelEquivalenceHash = modelRel.equivalenceHash
+                if modelRelEquivalenceHash not in relationships:
+                    relationships[modelRelEquivalenceHash] = modelRel
+                else: # use equivalenceKey instead of hash
+                    otherRel = relationships[modelRelEquivalenceHash]
+                    if otherRel is not USING_EQUIVALENCE_KEY: # move equivalentRel to use key instead of hasn
+                        relationships[otherRel.equivalenceKey] = otherRel
+                        relationships[modelRelEquivalenceHash] = USING_EQUIVALENCE_KEY
+                    modelRelEquivalenceKey = modelRel.equivalenceKey    # this is a complex tuple to compute, get once for below
+                    if modelRelEquivalenceKey not in relationships or \
+                       modelRel.priorityOver(relationships[modelRelEquivalenceKey]):
+                        relationships[modelRelEquivalenceKey] = modelRel
 
         #reduce effective arcs and order relationships...
         self.modelRelationshipsFrom = None
         self.modelRelationshipsTo = None
         self.modelConceptRoots = None
         self.modellinkRoleUris = None
+        self.modelLabelIndex = None
         orderRels = defaultdict(list)
         for modelRel in relationships.values():
             if (modelRel is not USING_EQUIVALENCE_KEY and 
@@ -199,6 +214,8 @@ class ModelRelationshipSet(object):
             self.modelRelationshipsFrom.clear()
         if self.modelConceptRoots is not None:
             del self.modelConceptRoots[:]
+        if self.modelLabelIndex is not None:
+            self.modelLabelIndex.clear()
         self.linkqname = self.arcqname = None
         
     def __nonzero__(self):  # some modelRelationships exist
@@ -307,7 +324,85 @@ class ModelRelationshipSet(object):
                     visited.discard(toConcept)
         return False
     
+    def labelIndex(self, modelFrom):
+        # label texts of modelFrom by role, for all links (None) and by linkrole if more than one, each as
+        # (dict of text by lang, tuple of label langs in priority order), indexed when modelFrom's labels are first
+        # requested.  Labels may be requested by concurrent threads (e.g., web server requests), so each entry is
+        # complete when stored and not modified after (an entry built by two threads at once is built twice).
+        modelLabelIndex = self.modelLabelIndex
+        if modelLabelIndex is None:
+            self.modelLabelIndex = modelLabelIndex = {}
+        try:
+            return modelLabelIndex[modelFrom]
+        except KeyError:
+            pass
+        isMultipleLinkroles = len(self.linkRoleUris) > 1
+        roleLabels = defaultdict(lambda: defaultdict(list))
+        for modelLabelRel in sorted(self.fromModelObject(modelFrom), key=lambda rel: rel.priority, reverse=True):
+            label = modelLabelRel.toModelObject
+            labelLangText = (label.xmlLang, label.textValue)
+            roleLabels[label.role][None].append(labelLangText)
+            if isMultipleLinkroles:
+                roleLabels[label.role][modelLabelRel.linkrole].append(labelLangText)
+        # langs of the DTS and the default lang are resolved here, other langs when requested (not memoized)
+        indexedLangs = self.modelXbrl.langs | set([self.modelXbrl.modelManager.defaultLang])
+        fromLabels = {}
+        for role, linkroleLabels in roleLabels.items():
+            fromLabels[role] = linkroleTexts = {}
+            for linkrole, langLabels in linkroleLabels.items():
+                langTexts = {None: langLabels[0][1]}
+                labelLangs = []
+                for labelLang, text in langLabels:
+                    if labelLang == u"": # as by the label scan, the last label without a lang is the most general
+                        if labelLang not in langTexts:
+                            labelLangs.append(labelLang)
+                        langTexts[labelLang] = text
+                    elif labelLang is not None and labelLang not in langTexts:
+                        langTexts[labelLang] = text
+                        labelLangs.append(labelLang)
+                langLabelTexts = (langTexts, tuple(labelLangs))
+                for lang in indexedLangs:
+                    if lang and lang not in langTexts:
+                        langTexts[lang] = self.langLabelText(langLabelTexts, lang)
+                linkroleTexts[linkrole] = langLabelTexts
+        modelLabelIndex[modelFrom] = fromLabels
+        return fromLabels
+    
+    def langLabelText(self, langLabelTexts, lang):
+        # text of lang by exact, else shorter (more general), else longer lang match
+        langTexts, labelLangs = langLabelTexts
+        try:
+            return langTexts[lang]
+        except KeyError:
+            pass
+        shorterLangInLabel = longerLangInLabel = None
+        for labelLang in labelLangs:
+            if labelLang.startswith(lang):
+                if longerLangInLabel is None or len(longerLangInLabel) > len(labelLang):
+                    longerLangInLabel = labelLang
+            elif lang.startswith(labelLang):
+                if shorterLangInLabel is None or len(shorterLangInLabel) < len(labelLang):
+                    shorterLangInLabel = labelLang
+        if shorterLangInLabel is not None:  # more general has preference
+            return langTexts[shorterLangInLabel]
+        elif longerLangInLabel is not None:
+            return langTexts[longerLangInLabel]
+        return None
+    
     def label(self, modelFrom, role, lang, returnMultiple=False, returnText=True, linkroleHint=None):
+        if returnText and not returnMultiple and role != u'*':
+            # single label text is found from the label index
+            try:
+                linkroleTexts = self.labelIndex(modelFrom)[role]
+            except KeyError:
+                return None
+            if linkroleHint:  # order of preference of linkroles to find label
+                langLabelTexts = (linkroleTexts.get(linkroleHint) or 
+                                  linkroleTexts.get(XbrlConst.defaultLinkRole) or
+                                  linkroleTexts[None])
+            else:
+                langLabelTexts = linkroleTexts[None]
+            return self.langLabelText(langLabelTexts, lang or None)
         shorterLangInLabel = longerLangInLabel = None
         shorterLangLabels = longerLangLabels = None
         langLabels = []
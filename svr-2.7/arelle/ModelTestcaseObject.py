@@ -17,6 +17,7 @@ class ModelTestcaseVariation(ModelObject):
         self.status = u""
         self.actual = []
         self.assertions = None
+        self.duration = None # seconds to validate the variation
         
     @property
     def id(self):
@@ -104,15 +104,39 @@ def qnameEltPfxName(element, prefixedName, prefixException=None):
             namespaceURI = None # cancel namespace if it is a zero length string
     return QName(prefix, namespaceURI, localName)
 
+# QNames are interned, so that equal QNames (with the same prefix) are the same object, compared by identity
+# and stored once.  The intern table is the internedQNames of the ModelManager (of the most recently created one,
+# if a process has several), which is reset to the QNames of the DTSes of its DTS cache when no models remain
+# loaded, and when cached DTSes are evicted (QNames created later are equal to, but not the same object as, 
+# those released).  Subclasses (such as XPathParser.QNameDef, which has state of its occurrence in an 
+# expression) are not interned.
+internedQNames = {} # by (prefix, namespaceURI, localName)
+
 class QName(object):
     __slots__ = (u"prefix", u"namespaceURI", u"localName", u"qnameValueHash")
-    def __init__(self,prefix,namespaceURI,localName):
-        self.prefix = prefix
-        self.namespaceURI = namespaceURI
-        self.localName = localName
-        self.qnameValueHash = hash( (namespaceURI, localName) )
+    def __new__(cls,prefix,namespaceURI,localName):
+        if cls is QName:
+            key = (prefix, namespaceURI, localName)
+            try:
+                return internedQNames[key]
+            except KeyError:
+                pass
+        qn = object.__new__(cls)
+        qn.prefix = prefix
+        qn.namespaceURI = namespaceURI
+        qn.localName = localName
+        qn.qnameValueHash = hash( (namespaceURI, localName) )
+        if cls is QName:
+            return internedQNames.setdefault(key, qn)
+        return qn
+    def __copy__(self):
+        return self # immutable and interned
+    def __deepcopy__(self, memo):
+        return self
     def __hash__(self):
         return self.qnameValueHash
+    def __reduce__(self): # pickle without hash value, which may differ in another process
+        return (QName, (self.prefix, self.namespaceURI, self.localName))
     @property
     def clarkNotation(self):
         if self.namespaceURI:
@@ -127,6 +151,8 @@ class QName(object):
         else:
             return self.localName
     def __eq__(self,other):
+        if self is other:
+            return True
         try:
             return (self.qnameValueHash == other.qnameValueHash and 
                     self.localName == other.localName and self.namespaceURI == other.namespaceURI)
@@ -262,6 +288,8 @@ class DateTime(datetime.datetime):
         return dateTime
     def __copy__(self):
         return DateTime(self.year, self.month, self.day, self.hour, self.minute, self.second, self.microsecond, self.tzinfo, self.dateOnly)
+    def __reduce__(self): # pickle with dateOnly (datetime pickles only its date and time)
+        return (DateTime, (self.year, self.month, self.day, self.hour, self.minute, self.second, self.microsecond, self.tzinfo, self.dateOnly))
     def __str__(self):
         if self.dateOnly:
             return u"{0.year:04}-{0.month:02}-{0.day:02}".format(self)
@@ -340,6 +368,8 @@ class DayTimeDuration(datetime.timedelta):
     def __new__(cls, days, hours, minutes, seconds):
         dyTm = datetime.timedelta.__new__(cls,days,hours,minutes,seconds)
         return dyTm
+    def __reduce__(self): # pickle as constructed from timedelta days, seconds and microseconds
+        return (DayTimeDuration, (self.days, self.seconds, self.microseconds, 0))
     def dayHrsMinsSecs(self):
         days = int(self.days)
         if days < 0 and (self.seconds > 0 or self.microseconds > 0):
@@ -395,6 +425,8 @@ class Time(datetime.time):
         time = datetime.time.__new__(cls, hour, minute, second, microsecond, tzinfo)
         time.hour24 = hour24
         return time
+    def __reduce__(self): # pickle with hour24 (time pickles only its time)
+        return (Time, (24 if self.hour24 else self.hour, self.minute, self.second, self.microsecond, self.tzinfo))
     
 class gYearMonth():
     def __init__(self, year, month):
@@ -110,6 +110,10 @@ class ModelXbrl(object):
         
         Dict, by URL, of loaded modelDocuments
         
+        .. attribute:: parsedDocuments
+        
+        Dict, by file path, of documents parsed ahead of their loading (by ModelDocument.parseDocuments), removed as loaded
+        
         .. attribute:: errorCaptureLevel
         
         Minimum logging level to capture in errors list (default is INCONSISTENCY)
@@ -154,6 +158,10 @@ class ModelXbrl(object):
 
         Dict of effective relationship sets indexed same as baseSets (including collective indices), but lazily resolved when requested.
 
+        .. attribute:: linkRelationships
+
+        Dict by base set link of the ModelRelationships of its arcs, resolved once (when a relationship set first needs the link) and selected by each relationship set of the link.
+
         .. attribute:: qnameDimensionDefaults
 
         Dict of dimension defaults by qname of dimension
@@ -174,6 +182,10 @@ class ModelXbrl(object):
 
         Dict of units by id
 
+        .. attribute:: factStore
+
+        FactStore of the facts, contexts and units, if their elements have been released (by FactStore.storeFacts), else None.  If so, facts and factsInInstance are sequences of StoredFacts, and contexts and units have StoredContexts and StoredUnits.
+
         .. attribute:: modelObjects
 
         Model objects in loaded order, allowing object access by ordinal index (for situations, such as tkinter, where a reference to an object would create a memory freeing difficulty).
@@ -245,6 +257,7 @@ class ModelXbrl(object):
         self.uuid = uuid.uuid1().urn
         self.namespaceDocs = defaultdict(list)
         self.urlDocs = {}
+        self.parsedDocuments = {}
         self.urlUnloadableDocs = {}  # if entry is True, entry is blocked and unloadable, False means loadable but warned
         self.errorCaptureLevel = (errorCaptureLevel or logging._checkLevel(u"INCONSISTENCY"))
         self.errors = []
@@ -259,12 +272,15 @@ class ModelXbrl(object):
         self.qnameTypes = {} # contains ModelTypes by qname key of type
         self.baseSets = defaultdict(list) # contains ModelLinks for keys arcrole, arcrole#linkrole
         self.relationshipSets = {} # contains ModelRelationshipSets by bas set keys
+        self.linkRelationships = {} # resolved relationships of the arcs of base set links, by link
         self.qnameDimensionDefaults = {} # contains qname of dimension (index) and default member(value)
         self.facts = []
         self.factsInInstance = set()
         self.undefinedFacts = [] # elements presumed to be facts but not defined
         self.contexts = {}
         self.units = {}
+        self.factStore = None
+        self.aspectKeys = {} # interned context and unit aspect keys
         self.modelObjects = []
         self.qnameParameters = {}
         self.modelVariableSets = set()
@@ -301,6 +317,8 @@ class ModelXbrl(object):
                 self.formulaOutputInstance.close()
             if hasattr(self,u"fileSource") and self.closeFileSource:
                 self.fileSource.close()
+            if getattr(self, u"dtsCacheEntry", None) is not None: # cached DTS documents are kept open
+                self.modelManager.dtsCache.release(self)
             modelDocument = getattr(self,u"modelDocument",None)
             urlDocs = getattr(self,u"urlDocs",None)
             for relSet in self.relationshipSets.values():
@@ -669,6 +687,17 @@ class ModelXbrl(object):
         self.modelDocument.unitDiscover(newUnitElt)
         return newUnitElt
     
+    def internedAspectKey(self, key):
+        u"""Interns a context or unit aspect key, such as an entity identifier or a period datetime, so that equal
+        keys of different contexts and units are the same object (compared by identity in fact indexes, and stored once).
+        
+        :param key: hashable aspect key, or None
+        :returns: key, or the equal key (of the same type) of a context or unit which interned it first
+        """
+        if key is None:
+            return None
+        return self.aspectKeys.setdefault((type(key), key), key)
+        
     @property
     def nonNilFactsInInstance(self): # indexed by fact (concept) qname
         u"""Facts in the instance which are not nil, cached
@@ -733,6 +762,78 @@ class ModelXbrl(object):
         except KeyError:
             return set()  # no facts for this period type
         
+    def factsByBalance(self, balance): # indexed by fact (concept) balance
+        u"""Facts in the instance indexed by concept balance, cached
+
+        :param balance: Balance to match ("debit", "credit", or "none" for concepts without balance)
+        :type balance: str
+        :returns: set -- ModelFacts that have specified balance
+        """
+        try:
+            return self._factsByBalance[balance]
+        except AttributeError:
+            self._factsByBalance = fbb = defaultdict(set)
+            for f in self.factsInInstance:
+                c = f.concept
+                if c is not None:
+                    fbb[c.balance or u"none"].add(f)
+            return self.factsByBalance(balance)
+        except KeyError:
+            return set()  # no facts for this balance
+        
+    @property
+    def factsByPeriod(self): # indexed by item fact period
+        u"""Item facts in the instance indexed by their context period, cached
+        
+        :returns: dict -- indexes are (startDatetime, endDatetime) for duration periods, instantDatetime for 
+        instant periods, and "forever" for forever periods, values are sets of ModelFacts
+        """
+        try:
+            return self._factsByPeriod
+        except AttributeError:
+            self._factsByPeriod = fbp = defaultdict(set)
+            for f in self.factsInInstance:
+                if f.isItem and f.context is not None:
+                    c = f.context
+                    if c.isStartEndPeriod:
+                        fbp[c.startDatetime, c.endDatetime].add(f)
+                    elif c.isInstantPeriod:
+                        fbp[c.instantDatetime].add(f)
+                    elif c.isForeverPeriod:
+                        fbp[u"forever"].add(f)
+            return fbp
+        
+    @property
+    def factsByEntity(self): # indexed by item fact entity identifier
+        u"""Item facts in the instance indexed by their context entity identifier, cached
+        
+        :returns: dict -- indexes are (scheme, identifier) tuples, values are sets of ModelFacts
+        """
+        try:
+            return self._factsByEntity
+        except AttributeError:
+            self._factsByEntity = fbe = defaultdict(set)
+            for f in self.factsInInstance:
+                if f.isItem and f.context is not None:
+                    fbe[f.context.entityIdentifier].add(f)
+            return fbe
+        
+    @property
+    def factsByUnit(self): # indexed by numeric fact unit measures
+        u"""Numeric facts in the instance indexed by their unit measures, cached
+        
+        :returns: dict -- indexes are (multiply measures, divide measures) tuples of tuples of measure QNames, values are sets of ModelFacts
+        """
+        try:
+            return self._factsByUnit
+        except AttributeError:
+            self._factsByUnit = fbu = defaultdict(set)
+            for f in self.factsInInstance:
+                if f.isNumeric and f.unit is not None:
+                    measures = f.unit.measures
+                    fbu[tuple(measures[0]), tuple(measures[1])].add(f)
+            return fbu
+        
     def factsByDimMemQname(self, dimQname, memQname=None): # indexed by fact (concept) qname
         u"""Facts in the instance indexed by their Dimension  and Member QName, cached
         
@@ -825,6 +926,11 @@ class ModelXbrl(object):
                 del self._factsByDatatype # would need to iterate derived type ancestry to populate
             if hasattr(self, u"_factsByPeriodType"):
                 self._factsByPeriodType[newFact.concept.periodType].add(newFact)
+            if hasattr(self, u"_factsByBalance"):
+                self._factsByBalance[newFact.concept.balance or u"none"].add(newFact)
+            for factsIndex in (u"_factsByPeriod", u"_factsByEntity", u"_factsByUnit"):
+                if hasattr(self, factsIndex):
+                    delattr(self, factsIndex) # rebuilt when next used
             if hasattr(self, u"_factsByDimQname"):
                 del self._factsByDimQname
         return newFact    
@@ -4,8 +4,8 @@ Created on Oct 17, 2010
 @author: Mark V Systems Limited
 (c) Copyright 2010 Mark V Systems Limited, All rights reserved.
 '''
-import os, sys, traceback
-from collections import defaultdict
+import os, sys, time, traceback
+from collections import defaultdict, deque
 from arelle import (ModelXbrl, ModelVersReport, XbrlConst, 
                ValidateXbrl, ValidateFiling, ValidateHmrc, ValidateVersReport, ValidateFormula,
                ValidateInfoset, RenderingEvaluator, ViewFileRenderedGrid)
@@ -61,8 +61,14 @@ class Validate(object):
                 _(u"Validation skipped, document not successfully loaded: %(file)s"),
                 modelXbrl=self.modelXbrl, file=self.modelXbrl.modelDocument.basename)
         elif self.modelXbrl.modelDocument.type in (Type.TESTCASESINDEX, Type.REGISTRY):
-            for doc in sorted(self.modelXbrl.modelDocument.referencesDocument.keys(), key=lambda doc: doc.uri):
-                self.validateTestcase(doc)  # testcases doc's are sorted by their uri (file names), e.g., for formula
+            testcases = sorted(self.modelXbrl.modelDocument.referencesDocument.keys(), key=lambda doc: doc.uri)
+            modelManager = self.modelXbrl.modelManager
+            if modelManager.testcaseWorkers > 1 and canValidateByWorkers(modelManager):
+                validateByWorkers(self, testcases, modelManager.testcaseWorkers, modelManager.testcaseTimeout,
+                                  self.testcaseResults, self.setTestcaseResults)
+            else:
+                for doc in testcases:
+                    self.validateTestcase(doc)  # testcases doc's are sorted by their uri (file names), e.g., for formula
         elif self.modelXbrl.modelDocument.type in (Type.TESTCASE, Type.REGISTRYTESTCASE):
             try:
                 self.validateTestcase(self.modelXbrl.modelDocument)
@@ -100,50 +106,75 @@ class Validate(object):
         
     def validateRssFeed(self):
         self.modelXbrl.info(u"info", u"RSS Feed", modelDocument=self.modelXbrl)
+        modelManager = self.modelXbrl.modelManager
+        rssItems = self.modelXbrl.modelDocument.rssItems
+        if modelManager.rssWorkers > 1 and canValidateByWorkers(modelManager):
+            validateByWorkers(self, rssItems, modelManager.rssWorkers, modelManager.rssItemTimeout,
+                              self.rssItemResults, self.setRssItemResults)
+            return
+        for rssItem in rssItems:
+            self.validateRssItem(rssItem)
+            
+    def validateRssItem(self, rssItem):
         from arelle.FileSource import openFileSource
-        for rssItem in self.modelXbrl.modelDocument.rssItems:
-            if getattr(rssItem, u"skipRssItem", False):
-                self.modelXbrl.info(u"info", _(u"skipping RSS Item %(accessionNumber)s %(formType)s %(companyName)s %(period)s"),
-                    modelObject=rssItem, accessionNumber=rssItem.accessionNumber, formType=rssItem.formType, companyName=rssItem.companyName, period=rssItem.period)
-                continue
-            self.modelXbrl.info(u"info", _(u"RSS Item %(accessionNumber)s %(formType)s %(companyName)s %(period)s"),
+        if getattr(rssItem, u"skipRssItem", False):
+            self.modelXbrl.info(u"info", _(u"skipping RSS Item %(accessionNumber)s %(formType)s %(companyName)s %(period)s"),
                 modelObject=rssItem, accessionNumber=rssItem.accessionNumber, formType=rssItem.formType, companyName=rssItem.companyName, period=rssItem.period)
-            modelXbrl = None
+            return
+        self.modelXbrl.info(u"info", _(u"RSS Item %(accessionNumber)s %(formType)s %(companyName)s %(period)s"),
+            modelObject=rssItem, accessionNumber=rssItem.accessionNumber, formType=rssItem.formType, companyName=rssItem.companyName, period=rssItem.period)
+        modelXbrl = None
+        try:
+            modelXbrl = ModelXbrl.load(self.modelXbrl.modelManager, 
+                                       openFileSource(rssItem.zippedUrl, self.modelXbrl.modelManager.cntlr),
+                                       _(u"validating"), rssItem=rssItem)
+            for pluginXbrlMethod in pluginClassMethods(u"RssItem.Xbrl.Loaded"):  
+                pluginXbrlMethod(modelXbrl, {}, rssItem)      
+            if getattr(rssItem, u"doNotProcessRSSitem", False) or modelXbrl.modelDocument is None:
+                modelXbrl.close()
+                return # skip entry based on processing criteria
+            self.instValidator.validate(modelXbrl, self.modelXbrl.modelManager.formulaOptions.typedParameters())
+            self.instValidator.close()
+            rssItem.setResults(modelXbrl)
+            self.modelXbrl.modelManager.viewModelObject(self.modelXbrl, rssItem.objectId())
+            for pluginXbrlMethod in pluginClassMethods(u"Validate.RssItem"):
+                pluginXbrlMethod(self, modelXbrl, rssItem)
+            modelXbrl.close()
+        except Exception, err:
+            self.modelXbrl.error(u"exception",
+                _(u"RSS item validation exception: %(error)s, instance: %(instance)s"),
+                modelXbrl=(self.modelXbrl, modelXbrl),
+                instance=rssItem.zippedUrl, error=err,
+                exc_info=True)
             try:
-                modelXbrl = ModelXbrl.load(self.modelXbrl.modelManager, 
-                                           openFileSource(rssItem.zippedUrl, self.modelXbrl.modelManager.cntlr),
-                                           _(u"validating"), rssItem=rssItem)
-                for pluginXbrlMethod in pluginClassMethods(u"RssItem.Xbrl.Loaded"):  
-                    pluginXbrlMethod(modelXbrl, {}, rssItem)      
-                if getattr(rssItem, u"doNotProcessRSSitem", False) or modelXbrl.modelDocument is None:
-                    modelXbrl.close()
-                    continue # skip entry based on processing criteria
-                self.instValidator.validate(modelXbrl, self.modelXbrl.modelManager.formulaOptions.typedParameters())
                 self.instValidator.close()
-                rssItem.setResults(modelXbrl)
-                self.modelXbrl.modelManager.viewModelObject(self.modelXbrl, rssItem.objectId())
-                for pluginXbrlMethod in pluginClassMethods(u"Validate.RssItem"):
-                    pluginXbrlMethod(self, modelXbrl, rssItem)
-                modelXbrl.close()
+                if modelXbrl is not None:
+                    modelXbrl.close()
             except Exception, err:
-                self.modelXbrl.error(u"exception",
-                    _(u"RSS item validation exception: %(error)s, instance: %(instance)s"),
-                    modelXbrl=(self.modelXbrl, modelXbrl),
-                    instance=rssItem.zippedUrl, error=err,
-                    exc_info=True)
-                try:
-                    self.instValidator.close()
-                    if modelXbrl is not None:
-                        modelXbrl.close()
-                except Exception, err:
-                    pass
-            del modelXbrl  # completely dereference
+                pass
+        del modelXbrl  # completely dereference
+        
+    def rssItemResults(self, rssItem):
+        # validates rssItem in a worker process, returning its results to the parent process
+        self.validateRssItem(rssItem)
+        return dict((name, getattr(rssItem, name)) for name in RSS_ITEM_RESULTS if hasattr(rssItem, name))
+    
+    def setRssItemResults(self, rssItem, results, failure):
+        if failure:
+            self.modelXbrl.error(u"arelle:rssItemNotValidated",
+                _(u"%(failure)s, instance: %(instance)s"),
+                modelObject=rssItem, failure=failure, instance=rssItem.zippedUrl)
+        else:
+            for name, value in results.items():
+                setattr(rssItem, name, value)
+            self.modelXbrl.modelManager.viewModelObject(self.modelXbrl, rssItem.objectId())
    
     def validateTestcase(self, testcase):
         self.modelXbrl.info(u"info", u"Testcase", modelDocument=testcase)
         self.modelXbrl.viewModelObject(testcase.objectId())
         if hasattr(testcase, u"testcaseVariations"):
             for modelTestcaseVariation in testcase.testcaseVariations:
+                startedAt = time.time()
                 # update ui thread via modelManager (running in background here)
                 self.modelXbrl.modelManager.viewModelObject(self.modelXbrl, modelTestcaseVariation.objectId())
                 # is this a versioning report?
@@ -328,11 +359,29 @@ class Validate(object):
                         self.determineTestStatus(modelTestcaseVariation, formulaOutputInstance)
                         formulaOutputInstance.close()
                         del formulaOutputInstance
+                modelTestcaseVariation.duration = time.time() - startedAt
                 # update ui thread via modelManager (running in background here)
                 self.modelXbrl.modelManager.viewModelObject(self.modelXbrl, modelTestcaseVariation.objectId())
                     
             self.modelXbrl.modelManager.showStatus(_(u"ready"), 2000)
             
+    def testcaseResults(self, testcase):
+        # validates testcase in a worker process, returning results of its variations to the parent process
+        self.validateTestcase(testcase)
+        return [dict((name, getattr(modelTestcaseVariation, name)) for name in TESTCASE_VARIATION_RESULTS)
+                for modelTestcaseVariation in getattr(testcase, u"testcaseVariations", ())]
+    
+    def setTestcaseResults(self, testcase, results, failure):
+        if failure:
+            self.modelXbrl.error(u"arelle:testcaseNotValidated",
+                _(u"%(failure)s, testcase: %(testcase)s"),
+                modelObject=testcase, failure=failure, testcase=testcase.basename)
+        else:
+            for modelTestcaseVariation, variationResults in zip(getattr(testcase, u"testcaseVariations", ()), results):
+                for name, value in variationResults.items():
+                    setattr(modelTestcaseVariation, name, value)
+                self.modelXbrl.modelManager.viewModelObject(self.modelXbrl, modelTestcaseVariation.objectId())
+            
     def noErrorCodes(self, modelTestcaseVariation):
         return not any(not isinstance(actual,dict) for actual in modelTestcaseVariation)
                 
@@ -406,6 +455,136 @@ class Validate(object):
             status = u"pass"
         modelTestcaseVariation.status = status
                 
+# RSS feed items and testcases are validated by forked worker processes, sharing the loaded feed or testcases
+# index and controller state copy-on-write, which return each item's results and log records to the parent
+# process, which sets the results and logs the records in item order.  A worker which fails, or exceeds the
+# item timeout, is terminated and replaced.
+RSS_ITEM_RESULTS = (u"status", u"results", u"assertions", u"assertionUnsuccessful")
+TESTCASE_VARIATION_RESULTS = (u"status", u"actual", u"assertions", u"duration")
+workerValidation = None
+
+def canValidateByWorkers(modelManager):
+    return hasattr(os, u"fork") and not modelManager.cntlr.hasGui
+
+class ValidationWorker(object):
+    def __init__(self):
+        import multiprocessing
+        self.itemIndex = None
+        self.startedAt = None
+        self.conn, workerConn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=validationWorkerMain, args=(workerConn,))
+        self.process.daemon = True
+        self.process.start()
+        workerConn.close()
+        
+    def run(self, itemIndex):
+        self.itemIndex = itemIndex
+        self.startedAt = time.time()
+        self.conn.send(itemIndex)
+        
+    def stop(self):
+        try:
+            self.conn.send(None)
+            self.conn.close()
+        except (EOFError, IOError):
+            pass
+        self.process.join(1.0)
+        if self.process.is_alive():
+            self.terminate()
+            
+    def terminate(self):
+        self.process.terminate()
+        self.process.join(1.0)
+        self.conn.close()
+
+def validateByWorkers(val, items, numWorkers, timeout, itemResults, setItemResults):
+    u"""Validates items by worker processes.  itemResults(item) is called in a worker process to validate the
+    item and return its (picklable) results, setItemResults(item, results, failure) is called in the parent
+    process, in item order, with the results, or a failure message if the worker failed or timed out."""
+    global workerValidation
+    import select
+    modelXbrl = val.modelXbrl
+    modelXbrl.modelManager.showStatus(_(u"validating {0} items by {1} workers").format(len(items), numWorkers))
+    sys.stdout.flush() # don't let workers repeat buffered output
+    sys.stderr.flush()
+    workerValidation = (val, items, itemResults)
+    toValidate = deque(_RANGE(len(items)))
+    completed = {} # by item index: (results, log records, failure message)
+    workers = []
+    nextToSet = 0
+    try:
+        while nextToSet < len(items):
+            idleWorkers = [worker for worker in workers if worker.itemIndex is None]
+            while toValidate and (idleWorkers or len(workers) < numWorkers):
+                if idleWorkers:
+                    worker = idleWorkers.pop()
+                else:
+                    worker = ValidationWorker()
+                    workers.append(worker)
+                worker.run(toValidate.popleft())
+            busyWorkers = [worker for worker in workers if worker.itemIndex is not None]
+            waitTime = None
+            if timeout:
+                waitTime = max(min(worker.startedAt for worker in busyWorkers) + timeout - time.time(), 0)
+            readyConns = select.select([worker.conn for worker in busyWorkers], [], [], waitTime)[0]
+            for worker in busyWorkers:
+                i = worker.itemIndex
+                if worker.conn in readyConns:
+                    try:
+                        completed[i] = worker.conn.recv() + (None,)
+                        worker.itemIndex = None
+                        continue
+                    except (EOFError, IOError):
+                        completed[i] = (None, (), _(u"Validation worker process failed"))
+                elif timeout and time.time() >= worker.startedAt + timeout:
+                    completed[i] = (None, (), _(u"Validation exceeded {0} seconds").format(timeout))
+                else:
+                    continue
+                workers.remove(worker)
+                worker.terminate()
+            while nextToSet in completed:
+                results, logRecords, failure = completed.pop(nextToSet)
+                for level, msg, args, extras in logRecords:
+                    modelXbrl.logCount[level] = modelXbrl.logCount.get(level, 0) + 1
+                    if level >= modelXbrl.errorCaptureLevel:
+                        modelXbrl.errors.append(extras.get(u"messageCode"))
+                    if args:
+                        modelXbrl.logger.log(level, msg, args, extra=extras)
+                    else:
+                        modelXbrl.logger.log(level, msg, extra=extras)
+                setItemResults(items[nextToSet], results, failure)
+                nextToSet += 1
+    finally:
+        for worker in workers:
+            if worker.itemIndex is None:
+                worker.stop()
+            else:
+                worker.terminate()
+        workerValidation = None
+        
+def validationWorkerMain(conn):
+    # worker process: validates the items whose index it is sent, until sent None or parent ends
+    from arelle.ValidateFormula import WorkerLogHandler
+    val, items, itemResults = workerValidation
+    val.modelXbrl.modelManager.formulaOptions.evaluationWorkers = 0 # daemon processes can't have formula workers
+    logger = val.modelXbrl.logger
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+    workerLogHandler = WorkerLogHandler()
+    logger.addHandler(workerLogHandler)
+    logger.propagate = False
+    while True:
+        try:
+            i = conn.recv()
+        except (EOFError, IOError):
+            break
+        if i is None:
+            break
+        del workerLogHandler.logRecords[:]
+        results = itemResults(items[i])
+        conn.send((results, workerLogHandler.logRecords))
+    conn.close()
+
 import logging
 class ValidationLogListener(logging.Handler):
     def __init__(self, logView):
@@ -7,16 +7,21 @@ Created on Oct 17, 2010
 #import xml.sax, xml.sax.handler
 from __future__ import with_statement
 from lxml.etree import XML, DTD, SubElement, XMLSyntaxError
-import os, re, io
-from arelle import XbrlConst
+import os, re, io, mmap
+from arelle import XbrlConst, XmlUtil
 from arelle.ModelObject import ModelObject
 from io import open
 
-XMLdeclaration = re.compile(ur"<\?xml.*\?>", re.DOTALL)
+XMLdeclaration = re.compile(ur"<\?xml[^><\?]*\?>", re.DOTALL)
 XMLpattern = re.compile(ur".*(<|&lt;|&#x3C;|&#60;)[A-Za-z_]+[A-Za-z0-9_:]*[^>]*(/>|>|&gt;|/&gt;).*", re.DOTALL)
 CDATApattern = re.compile(ur"<!\[CDATA\[(.+)\]\]")
 #EFM table 5-1 and all &xxx; patterns
 docCheckPattern = re.compile(ur"&\w+;|[^0-9A-Za-z`~!@#$%&\*\(\)\.\-+ \[\]\{\}\|\\:;\"'<>,_?/=\t\n\r\m\f]") # won't match &#nnn;
+docCheckBytesPattern = re.compile(br"&\w+;|[\x80-\xff]+|[^0-9A-Za-z`~!@#$%&\*\(\)\.\-+ \[\]\{\}\|\\:;\"'<>,_?/=\t\n\r\m\f]") # non-ASCII as runs to decode
+lineBreakPattern = re.compile(br"\r\n?|\n")
+bareCRpattern = re.compile(br"\r(?!\n)") # lxml counts lines of bytes only by \n
+crLineEndPattern = re.compile(ur"\r\n?")
+asciiCompatibleEncodingPattern = re.compile(ur"(utf-?8(-sig)?|(us-)?ascii|latin-?1|iso-?8859-[0-9]+|(cp|windows-)125[0-8])$", re.IGNORECASE)
 namedEntityPattern = re.compile(u"&[_A-Za-z\xC0-\xD6\xD8-\xF6\xF8-\xFF\u0100-\u02FF\u0370-\u037D\u037F-\u1FFF\u200C-\u200D\u2070-\u218F\u2C00-\u2FEF\u3001-\uD7FF\uF900-\uFDCF\uFDF0-\uFFFD]"
                                 ur"[_\-\.:" 
                                 u"\xB7A-Za-z0-9\xC0-\xD6\xD8-\xF6\xF8-\xFF\u0100-\u02FF\u0370-\u037D\u037F-\u1FFF\u200C-\u200D\u2070-\u218F\u2C00-\u2FEF\u3001-\uD7FF\uF900-\uFDCF\uFDF0-\uFFFD\u0300-\u036F\u203F-\u2040]*;")
@@ -384,43 +389,81 @@ xhtmlEntities = {
     }
 
 def checkfile(modelXbrl, filepath):
-    result = []
+    u''' checks file text for disallowed characters and entity codes, in one pass over the bytes of the file 
+        (memory mapped when a local file), returning a tuple of (file for parsing, encoding).  Files in 
+        an ASCII-compatible encoding known to lxml are returned as their original bytes, positioned at the 
+        start, for lxml to parse (with their XML declaration), otherwise (or when lines end with bare CRs, which
+        lxml doesn't count as lines) as decoded text without XML declaration, with line ends as read by lines.
+    '''
+    file = modelXbrl.fileSource.file(filepath, binary=True)[0]
+    try:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (io.UnsupportedOperation, ValueError, EnvironmentError): # in-memory (archive) or empty file
+        buffer = file.read()
+    try:
+        encoding = XmlUtil.encoding(buffer[0:512], default=None)
+        if encoding is None:
+            archiveFileSource = modelXbrl.fileSource.fileSourceContainingFilepath(filepath)
+            if archiveFileSource is not None and (archiveFileSource.isEis or archiveFileSource.isXfd):
+                encoding = u"latin-1"
+            else:
+                encoding = u"utf-8"
+            isBytesParseable = encoding == u"utf-8" # lxml presumes utf-8 for bytes without XML declaration
+        else:
+            isBytesParseable = True
+        if (isBytesParseable and asciiCompatibleEncodingPattern.match(encoding) and
+            not bareCRpattern.search(buffer)):
+            # a utf-8 BOM is checked (as a disallowed character) as when read as text
+            runEncoding = u"utf-8" if encoding.lower() == u"utf-8-sig" else encoding
+            checkText(modelXbrl, filepath, buffer, 0, docCheckBytesPattern, lambda b: b.decode(runEncoding))
+            file.seek(0)
+            return (file, encoding)
+        text = buffer[:].decode(encoding)
+    except Exception:
+        file.close()
+        raise
+    finally:
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
+    file.close()
+    checkText(modelXbrl, filepath, text, 0, docCheckPattern, _STR_UNICODE)
+    if u"\r" in text: # as universal newlines of text read by lines, for lxml line numbers
+        text = crLineEndPattern.sub(u"\n", text)
+    xmlDeclarationMatch = XMLdeclaration.search(text)
+    if xmlDeclarationMatch: # remove it for lxml, keeping line breaks of a multi-line declaration
+        start,end = xmlDeclarationMatch.span()
+        text = text[0:start] + u"\n" * text.count(u"\n", start, end) + text[end:]
+    return (io.StringIO(initial_value=text), encoding)
+
+def checkText(modelXbrl, filepath, text, pos, checkPattern, decode):
+    u''' reports checkPattern matches of text (unicode, or bytes which decode to unicode) from pos, with  
+        line and column (in characters) as if read by lines, counting line breaks only ahead of matches
+    '''
+    isEFM = modelXbrl.modelManager.disclosureSystem.EFM
     lineNum = 1
-    foundXmlDeclaration = False
-    file, encoding = modelXbrl.fileSource.file(filepath)
-    with file as f:
-        while True:
-            line = f.readline()
-            if line == u"":
-                break;
-            # check for disallowed characters or entity codes
-            for match in docCheckPattern.finditer(line):
-                text = match.group()
-                if text.startswith(u"&"):
-                    if not text in xhtmlEntities:
-                        modelXbrl.error((u"EFM.5.02.02.06", u"GFM.1.01.02"),
-                            _(u"Disallowed entity code %(text)s in file %(file)s line %(line)s column %(column)s"),
-                            modelDocument=filepath, text=text, file=os.path.basename(filepath), line=lineNum, column=match.start())
-                elif modelXbrl.modelManager.disclosureSystem.EFM:
-                    modelXbrl.error(u"EFM.5.02.01.01",
-                        _(u"Disallowed character '%(text)s' in file %(file)s at line %(line)s col %(column)s"),
-                        modelDocument=filepath, text=text, file=os.path.basename(filepath), line=lineNum, column=match.start())
-            if lineNum == 1:
-                xmlDeclarationMatch = XMLdeclaration.search(line)
-                if xmlDeclarationMatch: # remove it for lxml
-                    start,end = xmlDeclarationMatch.span()
-                    line = line[0:start] + line[end:]
-                    foundXmlDeclaration = True
-            result.append(line)
-            lineNum += 1
-    result = u''.join(result)
-    if not foundXmlDeclaration: # may be multiline, try again
-        xmlDeclarationMatch = XMLdeclaration.search(result)
-        if xmlDeclarationMatch: # remove it for lxml
-            start,end = xmlDeclarationMatch.span()
-            result = result[0:start] + result[end:]
-            foundXmlDeclaration = True
-    return (io.StringIO(initial_value=result), encoding)
+    column = 0
+    for match in checkPattern.finditer(text, pos):
+        start, end = match.span()
+        if start > pos:
+            lineBreaks = len(lineBreakPattern.findall(text, pos, start))
+            if lineBreaks:
+                lineNum += lineBreaks
+                column = start - max(text.rfind(b"\n", pos, start), text.rfind(b"\r", pos, start)) - 1
+            else:
+                column += start - pos # characters between matches are ASCII (or already unicode)
+        matchedText = decode(match.group())
+        if matchedText.startswith(u"&"):
+            if not matchedText in xhtmlEntities:
+                modelXbrl.error((u"EFM.5.02.02.06", u"GFM.1.01.02"),
+                    _(u"Disallowed entity code %(text)s in file %(file)s line %(line)s column %(column)s"),
+                    modelDocument=filepath, text=matchedText, file=os.path.basename(filepath), line=lineNum, column=column)
+        elif isEFM:
+            for i, char in enumerate(matchedText): # non-ASCII bytes are matched as a run of characters
+                modelXbrl.error(u"EFM.5.02.01.01",
+                    _(u"Disallowed character '%(text)s' in file %(file)s at line %(line)s col %(column)s"),
+                    modelDocument=filepath, text=char, file=os.path.basename(filepath), line=lineNum, column=column + i)
+        column += len(matchedText)
+        pos = end
 
 def loadDTD(modelXbrl):
     global edbodyDTD
@@ -776,6 +776,7 @@ def validate(val, xpathContext=None, parametersOnly=False, statusMsg=u'', compil
     val.modelXbrl.profileActivity(u"... instances scopes and setup", minTimeToShow=1.0)
 
     val.modelXbrl.profileStat(_(u"formulaValidation"))
+    XPathParser.saveParsedProgsCache(val.modelXbrl.modelManager)
     if (initialErrorCount < val.modelXbrl.logCount.get(logging._checkLevel(u'ERROR'), 0) or
         compileOnly or 
         getattr(val, u"validateFormulaCompileOnly", False)):
@@ -812,6 +813,9 @@ def validate(val, xpathContext=None, parametersOnly=False, statusMsg=u'', compil
     val.modelXbrl.profileActivity(u"... output instances setup", minTimeToShow=1.0)
     val.modelXbrl.profileStat(_(u"formulaInstancesSetup"))
     timeFormulasStarted = time.time()
+    if formulaOptions.profileFile:
+        from arelle.FormulaProfiler import FormulaProfile
+        xpathContext.formulaProfile = FormulaProfile(val.modelXbrl)
         
     val.modelXbrl.modelManager.showStatus(_(u"running formulae"))
     
@@ -831,6 +835,7 @@ def validate(val, xpathContext=None, parametersOnly=False, statusMsg=u'', compil
             maxFormulaRunTimeTimer = None
         # evaluate variable sets not in consistency assertions
         val.modelXbrl.profileActivity(u"... evaluations", minTimeToShow=1.0)
+        workerVariableSets = []
         for instanceQname in orderedInstancesList:
             for modelVariableSet in instanceProducingVariableSets[instanceQname]:
                 # produce variable evaluations if no dependent variables-scope relationships
@@ -841,18 +846,14 @@ def validate(val, xpathContext=None, parametersOnly=False, statusMsg=u'', compil
                          any(modelRel.fromModelObject.id in runIDs
                              for modelRel in val.modelXbrl.relationshipSet(XbrlConst.consistencyAssertionFormula).toModelObject(modelVariableSet)
                              if isinstance(modelRel.fromModelObject, ModelConsistencyAssertion)))):
-                        from arelle.FormulaEvaluator import evaluate
-                        try:
-                            varSetId = (modelVariableSet.id or modelVariableSet.xlinkLabel)
-                            val.modelXbrl.profileActivity(u"... evaluating " + varSetId, minTimeToShow=10.0)
-                            val.modelXbrl.modelManager.showStatus(_(u"evaluating {0}").format(varSetId))
-                            val.modelXbrl.profileActivity(u"... evaluating " + varSetId, minTimeToShow=1.0)
-                            evaluate(xpathContext, modelVariableSet)
-                            val.modelXbrl.profileStat(modelVariableSet.localName + u"_" + varSetId)
-                        except XPathContext.XPathException, err:
-                            val.modelXbrl.error(err.code,
-                                _(u"Variable set \n%(variableSet)s \nException: \n%(error)s"), 
-                                modelObject=modelVariableSet, variableSet=unicode(modelVariableSet), error=err.message)
+                        if (formulaOptions.evaluationWorkers > 1 and maxFormulaRunTimeTimer is None and
+                            xpathContext.formulaProfile is None and # profiled sets are evaluated in this process
+                            isIndependentVariableSet(val, modelVariableSet)):
+                            workerVariableSets.append(modelVariableSet) # evaluated after sequential variable sets
+                            continue
+                        evaluateVariableSet(val, xpathContext, modelVariableSet)
+        if workerVariableSets:
+            evaluateByWorkers(val, xpathContext, workerVariableSets, formulaOptions.evaluationWorkers)
         if maxFormulaRunTimeTimer:
             maxFormulaRunTimeTimer.cancel()
     except XPathContext.RunTimeExceededException:
@@ -905,9 +906,117 @@ def validate(val, xpathContext=None, parametersOnly=False, statusMsg=u'', compil
     dependencyResolvedParameters.clear()
     orderedInstancesSet.clear()
     del orderedParameters, orderedInstances, orderedInstancesList
+    if xpathContext.formulaProfile is not None:
+        try:
+            xpathContext.formulaProfile.save(formulaOptions.profileFile)
+            val.modelXbrl.info(u"formula:profile",
+                _(u"Formula profile saved to %(file)s"),
+                modelObject=val.modelXbrl, file=formulaOptions.profileFile)
+        except (IOError, EnvironmentError), err:
+            val.modelXbrl.error(u"arelle:formulaProfileError",
+                _(u"Formula profile %(file)s could not be saved: %(error)s"),
+                modelObject=val.modelXbrl, file=formulaOptions.profileFile, error=err)
+        xpathContext.formulaProfile = None
     xpathContext.close()  # dereference everything
     val.modelXbrl.profileStat(_(u"formulaExecutionTotal"), time.time() - timeFormulasStarted)
 
+def evaluateVariableSet(val, xpathContext, modelVariableSet):
+    from arelle.FormulaEvaluator import evaluate
+    try:
+        varSetId = (modelVariableSet.id or modelVariableSet.xlinkLabel)
+        val.modelXbrl.profileActivity(u"... evaluating " + varSetId, minTimeToShow=10.0)
+        val.modelXbrl.modelManager.showStatus(_(u"evaluating {0}").format(varSetId))
+        val.modelXbrl.profileActivity(u"... evaluating " + varSetId, minTimeToShow=1.0)
+        evaluate(xpathContext, modelVariableSet)
+        val.modelXbrl.profileStat(modelVariableSet.localName + u"_" + varSetId)
+    except XPathContext.XPathException, err:
+        val.modelXbrl.error(err.code,
+            _(u"Variable set \n%(variableSet)s \nException: \n%(error)s"), 
+            modelObject=modelVariableSet, variableSet=unicode(modelVariableSet), error=err.message)
+
+def isIndependentVariableSet(val, modelVariableSet):
+    # value and existence assertions, on standard input instance facts, without variables-scope chaining,
+    # don't depend on or affect other variable sets' evaluations
+    return (isinstance(modelVariableSet, ModelVariableSetAssertion) and
+            not val.modelXbrl.relationshipSet(XbrlConst.variablesScope).fromModelObject(modelVariableSet) and
+            all(getattr(varRel.toModelObject, u"fromInstanceQnames", None) is None
+                for varRel in modelVariableSet.orderedVariableRelationships))
+
+# worker processes are forked with the loaded DTS and instance (shared copy-on-write), and return assertion
+# counts and log records to the parent process, which logs them in variable set order
+workerEvaluation = None
+workerLogHandler = None
+
+def evaluateByWorkers(val, xpathContext, modelVariableSets, numWorkers):
+    global workerEvaluation
+    if not hasattr(os, u"fork") or val.modelXbrl.modelManager.cntlr.hasGui or len(modelVariableSets) < 2:
+        for modelVariableSet in modelVariableSets:
+            evaluateVariableSet(val, xpathContext, modelVariableSet)
+        return
+    import multiprocessing
+    modelXbrl = val.modelXbrl
+    modelXbrl.modelManager.showStatus(_(u"evaluating {0} variable sets by {1} workers").format(len(modelVariableSets), numWorkers))
+    sys.stdout.flush() # don't let workers repeat buffered output
+    sys.stderr.flush()
+    workerEvaluation = (val, xpathContext, modelVariableSets)
+    pool = multiprocessing.Pool(min(numWorkers, len(modelVariableSets)), initializer=initializeWorker)
+    try:
+        for modelVariableSet, (countSatisfied, countNotSatisfied, logRecords, evaluationTime) in zip(
+                modelVariableSets, pool.imap(evaluateInWorker, _RANGE(len(modelVariableSets)))):
+            modelVariableSet.countSatisfied += countSatisfied
+            modelVariableSet.countNotSatisfied += countNotSatisfied
+            for level, msg, args, extras in logRecords:
+                modelXbrl.logCount[level] = modelXbrl.logCount.get(level, 0) + 1
+                if level >= modelXbrl.errorCaptureLevel:
+                    modelXbrl.errors.append(extras.get(u"messageCode"))
+                if args:
+                    modelXbrl.logger.log(level, msg, args, extra=extras)
+                else:
+                    modelXbrl.logger.log(level, msg, extra=extras)
+            modelXbrl.profileStat(modelVariableSet.localName + u"_" + (modelVariableSet.id or modelVariableSet.xlinkLabel),
+                                  evaluationTime)
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+        workerEvaluation = None
+        
+def initializeWorker():
+    global workerLogHandler
+    logger = workerEvaluation[0].modelXbrl.logger
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+    workerLogHandler = WorkerLogHandler()
+    logger.addHandler(workerLogHandler)
+    logger.propagate = False
+    
+def evaluateInWorker(i):
+    val, xpathContext, modelVariableSets = workerEvaluation
+    modelVariableSet = modelVariableSets[i]
+    del workerLogHandler.logRecords[:]
+    startedAt = time.time()
+    evaluateVariableSet(val, xpathContext, modelVariableSet)
+    return (modelVariableSet.countSatisfied, modelVariableSet.countNotSatisfied, 
+            workerLogHandler.logRecords, time.time() - startedAt)
+
+class WorkerLogHandler(logging.Handler):
+    def __init__(self):
+        super(WorkerLogHandler, self).__init__()
+        self.logRecords = []
+        
+    def emit(self, logRecord):
+        # arguments not of string or numeric types are passed to the parent process as strings 
+        args = logRecord.args
+        if isinstance(args, dict):
+            args = dict((name, value if isinstance(value, _STR_NUM_TYPES) else unicode(value))
+                        for name, value in args.items())
+        self.logRecords.append((logRecord.levelno, logRecord.msg, args,
+                                dict((name, getattr(logRecord, name))
+                                     for name in (u"messageCode", u"refs", u"sourceLine")
+                                     if hasattr(logRecord, name))))
+
 def checkVariablesScopeVisibleQnames(val, nameVariables, definedNamesSet, modelVariableSet):
     for visibleVarSetRel in val.modelXbrl.relationshipSet(XbrlConst.variablesScope).toModelObject(modelVariableSet):
         varqname = visibleVarSetRel.variableQname # name (if any) of the formula result
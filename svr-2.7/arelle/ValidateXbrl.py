@@ -92,6 +92,7 @@ class ValidateXbrl(object):
         modelXbrl.dimensionDefaultConcepts = {}
         modelXbrl.qnameDimensionDefaults = {}
         modelXbrl.qnameDimensionContextElement = {}
+        modelXbrl.drsTables = None # compiled when facts are checked, from the relationship sets as validated
         # check base set cycles, dimensions
         modelXbrl.modelManager.showStatus(_(u"validating relationship sets"))
         for baseSetKey in modelXbrl.baseSets.keys():
@@ -241,6 +242,8 @@ class ValidateXbrl(object):
                 del dimCheckableFacts
                 '''
                 self.checkFactsDimensions(modelXbrl.facts) # check fact dimensions in document order
+                if modelXbrl.modelManager.collectProfileStats:
+                    ValidateXbrlDimensions.logDimensionalValidityStats(self)
                 self.checkContextsDimensions(modelXbrl.contexts.values())
                 modelXbrl.profileStat(_(u"validateDimensions"))
                     
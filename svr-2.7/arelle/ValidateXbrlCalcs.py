@@ -11,6 +11,10 @@ try:
     from regex import compile as re_compile
 except ImportError:
     from re import compile as re_compile
+try:
+    import numpy
+except ImportError:
+    numpy = None
 import hashlib
 from arelle import Locale, XbrlConst, XbrlUtil
 from arelle.ModelObject import ObjectPropertyViewWrapper
@@ -22,6 +26,8 @@ ONE = decimal.Decimal(1)
 NaN = decimal.Decimal(u"NaN")
 floatNaN = float(u"NaN")
 floatINF = float(u"INF")
+MAX_SCALED = 10 ** 18 # coefficients of scaled terms summed as 64 bit integers
+MAX_SCALED_SUM = 10 ** 17 # sum of term magnitudes, below int64 overflow (and decimal context precision)
 
 def validate(modelXbrl, inferDecimals=False):
     ValidateXbrlCalcs(modelXbrl, inferDecimals).validate()
@@ -43,6 +49,7 @@ class ValidateXbrlCalcs(object):
         self.conceptsInEssencesAlias = set()
         self.requiresElementFacts = defaultdict(list)
         self.conceptsInRequiresElement = set()
+        self.roundedFacts = {}
         
     def validate(self):
         if not self.modelXbrl.contexts and not self.modelXbrl.facts:
@@ -111,10 +118,10 @@ class ValidateXbrlCalcs(object):
                                     itemBindingKeys = self.itemConceptBindKeys[itemConcept]
                                     boundSumKeys |= sumBindingKeys & itemBindingKeys
                             # add up rounded items
-                            boundSums = defaultdict(decimal.Decimal) # sum of facts meeting factKey
-                            boundSummationItems = defaultdict(list) # corresponding fact refs for messages
+                            boundSums = ScaledSums() # sum of facts meeting factKey
                             for modelRel in modelRels:
                                 weight = modelRel.weightDecimal
+                                scaledWeight = scaledDecimal(weight)
                                 itemConcept = modelRel.toModelObject
                                 if itemConcept is not None:
                                     for itemBindKey in boundSumKeys:
@@ -125,9 +132,9 @@ class ValidateXbrlCalcs(object):
                                                 if fact in self.duplicatedFacts:
                                                     dupBindingKeys.add(itemBindKey)
                                                 else:
-                                                    roundedValue = roundFact(fact, self.inferDecimals)
-                                                    boundSums[itemBindKey] += roundedValue * weight
-                                                    boundSummationItems[itemBindKey].append(wrappedFactWithWeight(fact,weight,roundedValue))
+                                                    roundedValue, scaledValue = self.roundedFactValue(fact)
+                                                    boundSums.add(itemBindKey, roundedValue, scaledValue, weight, scaledWeight)
+                            boundSums = boundSums.sums()
                             for sumBindKey in boundSumKeys:
                                 ancestor, contextHash, unit = sumBindKey
                                 factKey = (sumConcept, ancestor, contextHash, unit)
@@ -138,11 +145,11 @@ class ValidateXbrlCalcs(object):
                                             dupBindingKeys.add(sumBindKey)
                                         elif sumBindKey not in dupBindingKeys:
                                             roundedSum = roundFact(fact, self.inferDecimals)
-                                            roundedItemsSum = roundFact(fact, self.inferDecimals, vDecimal=boundSums[sumBindKey])
+                                            roundedItemsSum = roundFact(fact, self.inferDecimals, vDecimal=boundSums.get(sumBindKey, ZERO))
                                             if roundedItemsSum  != roundFact(fact, self.inferDecimals):
                                                 d = inferredDecimals(fact)
                                                 if isnan(d) or isinf(d): d = 4
-                                                _boundSummationItems = boundSummationItems[sumBindKey]
+                                                _boundSummationItems = self.boundSummationItems(modelRels, sumBindKey)
                                                 unreportedContribingItemQnames = [] # list the missing/unreported contributors in relationship order
                                                 for modelRel in modelRels:
                                                     itemConcept = modelRel.toModelObject
@@ -159,7 +166,7 @@ class ValidateXbrlCalcs(object):
                                                     contextID=fact.context.id, unitID=fact.unit.id,
                                                     unreportedContributors=u", ".join(unreportedContribingItemQnames) or u"none")
                                                 del unreportedContribingItemQnames[:]
-                            boundSummationItems.clear() # dereference facts in list
+                            del boundSums
                     elif arcrole == XbrlConst.essenceAlias:
                         for modelRel in relsSet.modelRelationships:
                             essenceConcept = modelRel.fromModelObject
@@ -206,6 +213,27 @@ class ValidateXbrlCalcs(object):
         self.modelXbrl.profileActivity(u"... find inconsistencies", minTimeToShow=1.0)
         self.modelXbrl.profileActivity() # reset
     
+    def roundedFactValue(self, fact):
+        # rounded value of item fact (and its scaledDecimal), determined once for all bindings of the fact
+        try:
+            return self.roundedFacts[fact]
+        except KeyError:
+            roundedValue = roundFact(fact, self.inferDecimals)
+            rounded = self.roundedFacts[fact] = (roundedValue, scaledDecimal(roundedValue))
+            return rounded
+    
+    def boundSummationItems(self, modelRels, itemBindKey):
+        # fact refs of items bound to an inconsistent sum, for messages, in relationship order
+        ancestor, contextHash, unit = itemBindKey
+        boundSummationItems = []
+        for modelRel in modelRels:
+            itemConcept = modelRel.toModelObject
+            if itemConcept is not None:
+                for fact in self.itemFacts.get((itemConcept, ancestor, contextHash, unit), ()):
+                    if fact not in self.duplicatedFacts:
+                        boundSummationItems.append(wrappedFactWithWeight(fact, modelRel.weightDecimal, self.roundedFactValue(fact)[0]))
+        return boundSummationItems
+    
     def bindFacts(self, facts, ancestors):
         for f in facts:
             concept = f.concept
@@ -248,6 +276,302 @@ class ValidateXbrlCalcs(object):
                 if concept in self.conceptsInRequiresElement:
                     self.requiresElementFacts[concept].append(f)
 
+def scaledDecimal(value):
+    # (integer coefficient, exponent) of a finite decimal, or None if NaN or infinite
+    if not value.is_finite():
+        return None
+    sign, digits, exponent = value.as_tuple()
+    coefficient = 0
+    for digit in digits:
+        coefficient = coefficient * 10 + digit
+    return (-coefficient if sign else coefficient, exponent)
+
+class ScaledSums(object):
+    u"""Sums of weighted rounded item values by binding key, accumulated as integer coefficients and exponents,
+    and summed in bulk as integers scaled to the exponent of each binding's sum (by numpy, if installed).
+
+    The sums are the decimals obtained by adding each binding's terms to a decimal zero, as in a
+    defaultdict(decimal.Decimal), including their exponents.  Bindings with NaN or infinite terms, or whose
+    scaled terms may exceed 64 bit integers, are summed as decimals.
+    """
+    def __init__(self):
+        self.bindKeys = [] # binding key by binding index
+        self.bindIndexes = {}
+        self.terms = [] # (binding index, value, weight) of each term, for bindings summed as decimals
+        self.indexes = [] # binding index, coefficient and exponent of each scaled term
+        self.coefficients = []
+        self.exponents = []
+        self.decimalBindings = set() # binding indexes summed as decimals
+
+    def add(self, bindKey, value, scaledValue, weight, scaledWeight):
+        u"""Adds value * weight to the sum of bindKey
+
+        :param scaledValue: scaledDecimal(value)
+        :param scaledWeight: scaledDecimal(weight)
+        """
+        try:
+            i = self.bindIndexes[bindKey]
+        except KeyError:
+            i = self.bindIndexes[bindKey] = len(self.bindKeys)
+            self.bindKeys.append(bindKey)
+        self.terms.append((i, value, weight))
+        if scaledValue is not None and scaledWeight is not None:
+            coefficient = scaledValue[0] * scaledWeight[0]
+            if -MAX_SCALED < coefficient < MAX_SCALED:
+                self.indexes.append(i)
+                self.coefficients.append(coefficient)
+                self.exponents.append(scaledValue[1] + scaledWeight[1])
+                return
+        self.decimalBindings.add(i)
+
+    def sums(self):
+        u""":returns: dict -- decimal sum by binding key"""
+        if numpy is not None:
+            totals, bindExponents = self.numpySums()
+        else:
+            totals, bindExponents = self.intSums()
+        decimalBindings = self.decimalBindings
+        sums = {}
+        for i, bindKey in enumerate(self.bindKeys):
+            if i not in decimalBindings:
+                sums[bindKey] = decimal.Decimal(int(totals[i])).scaleb(int(bindExponents[i]))
+        if decimalBindings:
+            decimalSums = defaultdict(decimal.Decimal)
+            for i, value, weight in self.terms:
+                if i in decimalBindings:
+                    decimalSums[i] += value * weight
+            for i in decimalBindings:
+                sums[self.bindKeys[i]] = decimalSums[i]
+        return sums
+
+    def intSums(self):
+        bindExponents = [0] * len(self.bindKeys) # sums start from decimal zero, exponent 0
+        for i, exponent in zip(self.indexes, self.exponents):
+            if exponent < bindExponents[i]:
+                bindExponents[i] = exponent
+        totals = [0] * len(self.bindKeys)
+        magnitudes = [0] * len(self.bindKeys)
+        for i, coefficient, exponent in zip(self.indexes, self.coefficients, self.exponents):
+            if coefficient:
+                scaled = coefficient * 10 ** (exponent - bindExponents[i])
+                totals[i] += scaled
+                magnitudes[i] += abs(scaled)
+        for i, magnitude in enumerate(magnitudes):
+            if magnitude >= MAX_SCALED_SUM:
+                self.decimalBindings.add(i)
+        return totals, bindExponents
+
+    def numpySums(self):
+        n = len(self.bindKeys)
+        indexes = numpy.array(self.indexes, dtype=numpy.int64)
+        coefficients = numpy.array(self.coefficients, dtype=numpy.int64)
+        exponents = numpy.array(self.exponents, dtype=numpy.int64)
+        bindExponents = numpy.zeros(n, dtype=numpy.int64) # sums start from decimal zero, exponent 0
+        numpy.minimum.at(bindExponents, indexes, exponents)
+        shifts = numpy.where(coefficients == 0, 0, exponents - bindExponents[indexes])
+        # magnitudes estimated in floating point, bindings which may overflow int64 are summed as decimals
+        magnitudes = numpy.zeros(n, dtype=numpy.float64)
+        numpy.add.at(magnitudes, indexes, numpy.abs(coefficients.astype(numpy.float64)) * numpy.power(10.0, shifts))
+        overflows = magnitudes >= float(MAX_SCALED_SUM)
+        self.decimalBindings.update(numpy.flatnonzero(overflows).tolist())
+        scaled = ~overflows[indexes]
+        totals = numpy.zeros(n, dtype=numpy.int64)
+        numpy.add.at(totals, indexes[scaled], coefficients[scaled] * numpy.power(10, shifts[scaled]).astype(numpy.int64))
+        return totals, bindExponents
+
+class StreamedFact(object):
+    u"""Properties of a streamed sum fact needed to report its inconsistency after the fact has been dropped"""
+    __slots__ = (u"qname", u"value", u"decimals", u"precision", u"contextID", u"unitID", u"sourceline")
+    def __init__(self, fact):
+        self.qname = fact.qname
+        self.value = fact.value
+        self.decimals = fact.decimals
+        self.precision = fact.precision
+        self.contextID = fact.context.id if fact.context is not None else None
+        self.unitID = fact.unit.id if fact.unit is not None else None
+        self.sourceline = fact.sourceline
+
+class StreamingValidateXbrlCalcs(object):
+    u"""Calculation, essence-alias and requires-element validation of a streamed instance, whose facts are 
+    provided in batches (by validateFacts) and dropped after each batch, instead of being bound together 
+    after loading.  Inconsistencies are reported by finish, at the end of the instance.
+    
+    Instead of facts, there are kept partial sums of rounded weighted items (by summation base set, sum 
+    concept, tuple parent, context and unit), the properties of reported sums, counts of facts by calculation
+    binding (to detect duplicates), and the s-values of essence-alias facts.  Contexts and units are bound 
+    by their s-equal hash and measures (as they may be dropped before equal ones are streamed).
+    
+    Only facts of concepts of summation relationships (and s-values of facts of essence-alias concepts) are 
+    kept.  The state is not bounded: it grows with the distinct calculation bindings (concept, tuple ancestor, 
+    context and unit) of such facts, which for an instance mostly of calculated facts is of the order of 
+    its facts (though without their values, elements or contexts).
+    """
+    def __init__(self, modelXbrl, inferDecimals=False):
+        self.modelXbrl = modelXbrl
+        self.inferDecimals = inferDecimals
+        self.summationRelSets = [] # (ELR, {sumConcept: modelRels}) of each summation base set
+        self.itemSummations = defaultdict(list) # itemConcept: [(summationRelSet index, sumConcept, weight)]
+        self.sumConcepts = set()
+        self.essenceAliasRels = [] # (ELR, modelRel) of essence-alias base sets
+        self.requiresElementRels = [] # (ELR, modelRel) of requires-element base sets
+        self.conceptsInEssencesAlias = set()
+        for baseSetKey in self.modelXbrl.baseSets.keys():
+            arcrole, ELR, linkqname, arcqname = baseSetKey
+            if ELR and linkqname and arcqname:
+                if arcrole in (XbrlConst.summationItem, XbrlConst.essenceAlias, XbrlConst.requiresElement):
+                    relsSet = self.modelXbrl.relationshipSet(arcrole,ELR,linkqname,arcqname)
+                    if arcrole == XbrlConst.summationItem:
+                        i = len(self.summationRelSets)
+                        fromRelationships = relsSet.fromModelObjects()
+                        self.summationRelSets.append((ELR, fromRelationships))
+                        for sumConcept, modelRels in fromRelationships.items():
+                            self.sumConcepts.add(sumConcept)
+                            for modelRel in modelRels:
+                                itemConcept = modelRel.toModelObject
+                                if itemConcept is not None and itemConcept.qname is not None:
+                                    self.itemSummations[itemConcept].append((i, sumConcept, modelRel.weightDecimal))
+                    elif arcrole == XbrlConst.essenceAlias:
+                        for modelRel in relsSet.modelRelationships:
+                            self.essenceAliasRels.append((ELR, modelRel))
+                            for concept in (modelRel.fromModelObject, modelRel.toModelObject):
+                                if concept is not None and concept.qname is not None:
+                                    self.conceptsInEssencesAlias.add(concept)
+                    elif arcrole == XbrlConst.requiresElement:
+                        for modelRel in relsSet.modelRelationships:
+                            self.requiresElementRels.append((ELR, modelRel))
+        self.calcConcepts = self.sumConcepts | _DICT_SET(self.itemSummations.keys()) # concepts of bound facts
+        self.partialSums = defaultdict(decimal.Decimal) # (summationRelSet index, sumConcept, ancestor, contextHash, unitMeasures): sum
+        self.nestedItemCalcKeys = defaultdict(set) # partial sum key: calcKeys of items nested below the ancestor tuple
+        self.calcKeyFactCounts = defaultdict(lambda: [0, 0]) # calcKey of calcConcepts: [facts, non-nil facts] with key's immediate parent
+        self.itemCalcKeys = set() # calcKeys of items with non-nil facts (with key's ancestor)
+        self.sumFacts = {} # calcKey: StreamedFact of first non-nil sum fact
+        self.esAlFacts = defaultdict(list) # (concept, ancestor, contextHash): [(sValue, unitMeasures, contextID, sourceline)]
+        self.conceptsReported = set() # for requires-element
+        
+    def validateFacts(self, facts, ancestors=(None,)):
+        u"""Binds a batch of streamed facts (with their tuple descendants) before they are dropped.
+        
+        :param facts: Root facts (or tuple children facts when recursing)
+        :param ancestors: Ancestor tuple keys (objectIndex of tuple fact, None for the instance root)
+        """
+        for f in facts:
+            concept = f.concept
+            if concept is not None:
+                self.conceptsReported.add(concept)
+                context = f.context
+                # must use nonDimAwareHash to achieve s-equal comparison of contexts
+                contextHash = context.contextNonDimAwareHash if context is not None else hash(None)
+                if concept.isNumeric:
+                    if concept in self.calcConcepts: # other numeric facts are not bound by calculations
+                        unit = f.unit
+                        unitMeasures = (tuple(unit.measures[0]), tuple(unit.measures[1])) if unit is not None else None
+                        parent = ancestors[-1]
+                        calcKey = (concept, parent, contextHash, unitMeasures)
+                        counts = self.calcKeyFactCounts[calcKey]
+                        counts[0] += 1
+                        if not f.isNil:
+                            counts[1] += 1
+                            if concept in self.sumConcepts and calcKey not in self.sumFacts:
+                                self.sumFacts[calcKey] = StreamedFact(f)
+                            if concept in self.itemSummations:
+                                roundedValue = roundFact(f, self.inferDecimals)
+                                for ancestor in ancestors:
+                                    self.itemCalcKeys.add((concept, ancestor, contextHash, unitMeasures))
+                                    for i, sumConcept, weight in self.itemSummations[concept]:
+                                        partialSumKey = (i, sumConcept, ancestor, contextHash, unitMeasures)
+                                        self.partialSums[partialSumKey] += roundedValue * weight
+                                        if ancestor is not parent:
+                                            self.nestedItemCalcKeys[partialSumKey].add(calcKey)
+                elif concept.isTuple:
+                    self.validateFacts(f.modelTupleFacts, ancestors + (f.objectIndex,))
+                if concept in self.conceptsInEssencesAlias and not f.isNil:
+                    unit = f.unit
+                    self.esAlFacts[(concept, ancestors[-1], contextHash)].append(
+                        (f.sValue, 
+                         (tuple(unit.measures[0]), tuple(unit.measures[1])) if unit is not None else None,
+                         context.id if context is not None else None, 
+                         f.sourceline))
+                    
+    def isDuplicated(self, calcKey):
+        counts = self.calcKeyFactCounts.get(calcKey)
+        return counts is not None and counts[0] > 1 and counts[1] > 0
+    
+    def finish(self):
+        u"""Reports inconsistencies of the facts validated (at the end of the streamed instance)."""
+        modelXbrl = self.modelXbrl
+        docUri = modelXbrl.modelDocument.uri
+        # partial sums in order of their summation base sets
+        for partialSumKey, itemsSum in sorted(self.partialSums.items(), key=lambda partialSum: partialSum[0][0]):
+            i, sumConcept, ancestor, contextHash, unitMeasures = partialSumKey
+            ELR, fromRelationships = self.summationRelSets[i]
+            itemConcepts = [modelRel.toModelObject 
+                            for modelRel in fromRelationships[sumConcept] 
+                            if modelRel.toModelObject is not None]
+            sumKey = (sumConcept, ancestor, contextHash, unitMeasures)
+            fact = self.sumFacts.get(sumKey)
+            if (fact is None or self.isDuplicated(sumKey) or
+                any(self.isDuplicated((itemConcept, ancestor, contextHash, unitMeasures))
+                    for itemConcept in itemConcepts) or
+                any(self.isDuplicated(calcKey) for calcKey in self.nestedItemCalcKeys.get(partialSumKey, ()))):
+                continue
+            roundedSum = roundFact(fact, self.inferDecimals)
+            roundedItemsSum = roundFact(fact, self.inferDecimals, vDecimal=itemsSum)
+            if roundedItemsSum != roundedSum:
+                d = inferredDecimals(fact)
+                if isnan(d) or isinf(d): d = 4
+                unreportedContribingItemQnames = [unicode(itemConcept.qname)
+                                                  for itemConcept in itemConcepts
+                                                  if (itemConcept, ancestor, contextHash, unitMeasures) not in self.itemCalcKeys]
+                modelXbrl.log(u'INCONSISTENCY', u"xbrl.5.2.5.2:calcInconsistency",
+                    _(u"Calculation inconsistent from %(concept)s in link role %(linkrole)s reported sum %(reportedSum)s computed sum %(computedSum)s context %(contextID)s unit %(unitID)s unreportedContributingItems %(unreportedContributors)s"),
+                    sourceFileLine=(docUri, fact.sourceline),
+                    concept=sumConcept.qname, linkrole=ELR, 
+                    linkroleDefinition=modelXbrl.roleTypeDefinition(ELR),
+                    reportedSum=Locale.format_decimal(modelXbrl.locale, roundedSum, 1, max(d,0)),
+                    computedSum=Locale.format_decimal(modelXbrl.locale, roundedItemsSum, 1, max(d,0)), 
+                    contextID=fact.contextID, unitID=fact.unitID,
+                    unreportedContributors=u", ".join(unreportedContribingItemQnames) or u"none")
+        for ELR, modelRel in self.essenceAliasRels:
+            essenceConcept = modelRel.fromModelObject
+            aliasConcept = modelRel.toModelObject
+            for (concept, ancestor, contextHash), essenceFacts in self.esAlFacts.items():
+                if concept != essenceConcept:
+                    continue
+                for eValue, eUnit, eContextID, eLine in essenceFacts:
+                    for aValue, aUnit, aContextID, aLine in self.esAlFacts.get((aliasConcept, ancestor, contextHash), ()):
+                        if eUnit != aUnit:
+                            modelXbrl.log(u'INCONSISTENCY', u"xbrl.5.2.6.2.2:essenceAliasUnitsInconsistency",
+                                _(u"Essence-Alias inconsistent units from %(essenceConcept)s to %(aliasConcept)s in link role %(linkrole)s context %(contextID)s"),
+                                sourceFileLines=((docUri, eLine), (docUri, aLine)), 
+                                essenceConcept=essenceConcept.qname, aliasConcept=aliasConcept.qname, 
+                                linkrole=ELR, 
+                                linkroleDefinition=modelXbrl.roleTypeDefinition(ELR),
+                                contextID=eContextID)
+                        if eValue != aValue:
+                            modelXbrl.log(u'INCONSISTENCY', u"xbrl.5.2.6.2.2:essenceAliasUnitsInconsistency",
+                                _(u"Essence-Alias inconsistent value from %(essenceConcept)s to %(aliasConcept)s in link role %(linkrole)s context %(contextID)s"),
+                                sourceFileLines=((docUri, eLine), (docUri, aLine)), 
+                                essenceConcept=essenceConcept.qname, aliasConcept=aliasConcept.qname, 
+                                linkrole=ELR,
+                                linkroleDefinition=modelXbrl.roleTypeDefinition(ELR),
+                                contextID=eContextID)
+        for ELR, modelRel in self.requiresElementRels:
+            sourceConcept = modelRel.fromModelObject
+            requiredConcept = modelRel.toModelObject
+            if sourceConcept in self.conceptsReported and not requiredConcept in self.conceptsReported:
+                modelXbrl.log(u'INCONSISTENCY', u"xbrl.5.2.6.2.4:requiresElementInconsistency",
+                    _(u"Requires-Element %(requiringConcept)s missing required fact for %(requiredConcept)s in link role %(linkrole)s"),
+                    modelObject=sourceConcept, 
+                    requiringConcept=sourceConcept.qname, requiredConcept=requiredConcept.qname, 
+                    linkrole=ELR,
+                    linkroleDefinition=modelXbrl.roleTypeDefinition(ELR))
+        self.partialSums.clear()
+        self.nestedItemCalcKeys.clear()
+        self.calcKeyFactCounts.clear()
+        self.itemCalcKeys.clear()
+        self.sumFacts.clear()
+        self.esAlFacts.clear()
+
 def roundFact(fact, inferDecimals=False, vDecimal=None):
     if vDecimal is None:
         vStr = fact.value
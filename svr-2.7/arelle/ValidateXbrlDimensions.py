@@ -329,13 +329,15 @@ def checkFact(val, f, otherFacts=None):
             modelObject=f, fact=f.qname, contextID=f.context.id)
 
 def isFactDimensionallyValid(val, f, setPrototypeContextElements=False, otherFacts=None):
+    if not setPrototypeContextElements and not isinstance(f.context, ContextPrototype):
+        return priItemContextValidity(val, f.concept, f.context)
     hasElrHc = False
-    for ELR, hcRels in priItemElrHcRels(val, f.concept).items():
+    for ELR, drsHcs in drsTables(val.modelXbrl).priItemHypercubes(f.concept):
         hasElrHc = True
         u'''
         if otherFacts: # find relevant facts with compatible primary items and same dims
-            relevantPriItems = set.intersection(*[priItemsOfElrHc(val, rel.fromModelObject, ELR, ELR)
-                                                  for rel in hcRels])
+            relevantPriItems = set.intersection(*[priItemsOfElrHc(val, drsHc.hasHcRel.fromModelObject, ELR, ELR)
+                                                  for drsHc in drsHcs])
             relevantFactsByPriItems = set.union(*[val.factsByQname(priItem.qname)
                                                 for priItem in relevantPriItems]) & otherFacts
             relevantFactsByDims = set.instersection(relevantFactsByPriItems,
@@ -344,7 +346,7 @@ def isFactDimensionallyValid(val, f, setPrototypeContextElements=False, otherFac
         else:
             relevantFactsByDims = None
         '''
-        if checkFactElrHcs(val, f, ELR, hcRels, setPrototypeContextElements):
+        if checkFactElrHcs(val, f, ELR, drsHcs, setPrototypeContextElements):
             return True # meets hypercubes in this ELR
         
     if hasElrHc:
@@ -352,6 +354,199 @@ def isFactDimensionallyValid(val, f, setPrototypeContextElements=False, otherFac
         return False
     return True
     
+def priItemContextValidity(val, priItem, context):
+    # validity is memoized by primary item and context dimension signature, shared by facts of the primary item
+    # in contexts with the same dimension members (differing in period or entity)
+    try:
+        dimValidity = val.dimValidity
+    except AttributeError:
+        dimValidity = val.dimValidity = {}
+        val.dimValidityHits = val.dimValidityMisses = 0
+    signature = contextDimSignature(val, context)
+    key = (priItem, signature)
+    try:
+        isValid = dimValidity[key]
+        val.dimValidityHits += 1
+    except KeyError:
+        isValid = dimValidity[key] = isSignatureValid(val.modelXbrl, drsTables(val.modelXbrl).priItemHypercubes(priItem), signature)
+        val.dimValidityMisses += 1
+    return isValid
+
+def contextDimSignature(val, context):
+    # (segment, scenario) each as (frozenset of (dimension, member or None if typed), has non-dimensional content)
+    try:
+        contextDimSignatures = val.contextDimSignatures
+    except AttributeError:
+        contextDimSignatures = val.contextDimSignatures = {}
+    try:
+        return contextDimSignatures[context]
+    except KeyError:
+        signature = contextDimSignatures[context] = tuple(
+            (frozenset((dimConcept, modelDimValue.member) 
+                       for dimConcept, modelDimValue in context.dimValues(contextElement).items()),
+             len(context.nonDimValues(contextElement)) > 0)
+            for contextElement in (u"segment", u"scenario"))
+        return signature
+
+CONTEXT_ELEMENT_INDEX = {u"segment": 0, u"scenario": 1}
+
+def isSignatureValid(modelXbrl, elrHypercubes, signature):
+    # as by checkFactElrHcs (without prototype context element assignment) for each ELR of the primary item
+    if not elrHypercubes:
+        return True
+    dimensionDefaultConcepts = modelXbrl.dimensionDefaultConcepts
+    contextElementDims = [dict(dimMembers) for dimMembers, hasNonDimValues in signature]
+    for ELR, drsHcs in elrHypercubes:
+        elrValid = True
+        for drsHc in drsHcs:
+            contextElementIndex = CONTEXT_ELEMENT_INDEX.get(drsHc.contextElement)
+            if contextElementIndex is None:
+                dimMembers = {}
+                hasNonDimValues = False
+            else:
+                dimMembers = contextElementDims[contextElementIndex]
+                hasNonDimValues = signature[contextElementIndex][1]
+            if drsHc.isClosed and hasNonDimValues:
+                hcValid = False
+            else:
+                hcValid = True
+                for drsDim in drsHc.dims:
+                    dimConcept = drsDim.dimConcept
+                    if dimConcept in dimMembers:
+                        memConcept = dimMembers[dimConcept]
+                    elif dimConcept in dimensionDefaultConcepts:
+                        memConcept = dimensionDefaultConcepts[dimConcept]
+                    else:
+                        hcValid = False
+                        continue
+                    if drsDim.usableMembers is not None and memConcept not in drsDim.usableMembers:
+                        hcValid = False
+            if drsHc.isClosed and any(dimConcept not in drsHc.dimConcepts for dimConcept in dimMembers):
+                hcValid = False # has extra stuff in the context element
+            if drsHc.isNegating:
+                hcValid = not hcValid
+            if not hcValid:
+                elrValid = False
+                break
+        if elrValid:
+            return True # meets hypercubes in this ELR
+    return False
+
+def logDimensionalValidityStats(val):
+    hits = getattr(val, u"dimValidityHits", 0)
+    misses = getattr(val, u"dimValidityMisses", 0)
+    val.modelXbrl.info(u"info:dimensionalValidityCache",
+        _(u"Dimensional validity of %(facts)s facts determined for %(combinations)s distinct primary item and context dimensions combinations, hit ratio %(hitRatio)s"),
+        modelObject=val.modelXbrl.modelDocument, facts=hits + misses, combinations=misses,
+        hitRatio=u"{0:.3f}".format(float(hits) / (hits + misses) if hits + misses else 0.0))
+
+class DrsDimension(object):
+    u"""Dimension of a hypercube, with the domain ELR of its dimension-domain relationships and the frozenset 
+    of usable members of its domain (None for a typed dimension)."""
+    __slots__ = (u"dimConcept", u"domELR", u"usableMembers")
+    def __init__(self, dimConcept, domELR, usableMembers):
+        self.dimConcept = dimConcept
+        self.domELR = domELR
+        self.usableMembers = usableMembers
+
+class DrsHypercube(object):
+    u"""Hypercube of a has-hypercube relationship, with its DrsDimensions (of ModelConcept dimensions)."""
+    __slots__ = (u"hasHcRel", u"hcConcept", u"isClosed", u"contextElement", u"isNegating", u"dimELR", 
+                 u"dims", u"dimConcepts")
+    def __init__(self, hasHcRel, dimELR, dims):
+        self.hasHcRel = hasHcRel
+        self.hcConcept = hasHcRel.toModelObject
+        self.isClosed = hasHcRel.isClosed
+        self.contextElement = hasHcRel.contextElement
+        self.isNegating = hasHcRel.arcrole == XbrlConst.notAll
+        self.dimELR = dimELR
+        self.dims = dims
+        self.dimConcepts = frozenset(drsDim.dimConcept for drsDim in dims)
+
+class DrsTables(object):
+    u"""Dimensional relationship sets of a DTS, compiled once (on first use) for dimensional validity checks 
+    of facts (and prototype facts of formula output and table rendering), and for DRS navigation by formula 
+    functions, as the hypercubes of each primary item by ELR, the dimensions of each hypercube, and the 
+    usable members of each dimension domain, so that checks are set membership tests instead of 
+    relationship set navigation.
+    
+    Dimension defaults are not compiled, they are loaded by validation (or loadDimensionDefaults).
+    
+    :param modelXbrl: ModelXbrl of the DTS
+    """
+    def __init__(self, modelXbrl):
+        self.modelXbrl = modelXbrl
+        self.hypercubes = {} # (arc, primary item, hypercube): DrsHypercube
+        self.usableMembers = {} # (dimension, domain ELR): frozenset of usable members
+        self.priItems = {} # primary item: ((ELR, (DrsHypercube, ...)), ...)
+        # primary items with hypercubes are sources of has-hypercube relationships and their domain-member descendants
+        priItems = set()
+        for arcrole in (XbrlConst.all, XbrlConst.notAll):
+            for hasHcRel in modelXbrl.relationshipSet(arcrole).modelRelationships:
+                if hasHcRel.fromModelObject is not None:
+                    priItems.add(hasHcRel.fromModelObject)
+        domMbrRelSet = modelXbrl.relationshipSet(XbrlConst.domainMember)
+        pendingPriItems = list(priItems)
+        while pendingPriItems:
+            for domMbrRel in domMbrRelSet.fromModelObject(pendingPriItems.pop()):
+                toConcept = domMbrRel.toModelObject
+                if toConcept is not None and toConcept not in priItems:
+                    priItems.add(toConcept)
+                    pendingPriItems.append(toConcept)
+        for priItem in priItems:
+            self.priItems[priItem] = tuple((ELR, tuple(self.hypercube(hasHcRel) for hasHcRel in hcRels))
+                                           for ELR, hcRels in findPriItemElrHcRels(modelXbrl, priItem).items())
+        
+    def priItemHypercubes(self, priItem):
+        u"""Hypercubes of a primary item (including inherited from its domain-member ancestors) 
+        
+        :returns: tuple -- ((ELR, (DrsHypercube, ...)), ...), empty if the primary item has no hypercubes
+        """
+        return self.priItems.get(priItem, ())
+    
+    def hypercube(self, hasHcRel):
+        u"""DrsHypercube of a has-hypercube relationship (of any relationship set)"""
+        key = (hasHcRel.arcElement, hasHcRel.fromModelObject, hasHcRel.toModelObject)
+        try:
+            return self.hypercubes[key]
+        except KeyError:
+            dimELR = (hasHcRel.targetRole or hasHcRel.linkrole)
+            dims = []
+            for hcDimRel in self.modelXbrl.relationshipSet(
+                                XbrlConst.hypercubeDimension, dimELR).fromModelObject(hasHcRel.toModelObject):
+                dimConcept = hcDimRel.toModelObject
+                if isinstance(dimConcept, ModelConcept):
+                    domELR = (hcDimRel.targetRole or dimELR)
+                    dims.append(DrsDimension(dimConcept, domELR,
+                                             None if dimConcept.isTypedDimension 
+                                             else self.dimensionUsableMembers(dimConcept, domELR)))
+            drsHc = self.hypercubes[key] = DrsHypercube(hasHcRel, dimELR, tuple(dims))
+            return drsHc
+        
+    def dimensionUsableMembers(self, dimConcept, domELR):
+        u"""Usable members of a dimension's domain in the domain ELR
+        
+        :returns: frozenset -- usable member concepts
+        """
+        key = (dimConcept, domELR)
+        try:
+            return self.usableMembers[key]
+        except KeyError:
+            usableMembers = set()
+            unusableMembers = set()
+            # build set of usable members in dimension/domain/ELR
+            findUsableMembersInDomainELR(self, self.modelXbrl.relationshipSet(XbrlConst.dimensionDomain, domELR).fromModelObject(dimConcept),
+                                         domELR, usableMembers, unusableMembers, defaultdict(set))
+            usableMembers = self.usableMembers[key] = frozenset(usableMembers - unusableMembers)
+            return usableMembers
+
+def drsTables(modelXbrl):
+    # DRS tables are compiled on first use after loading of the DTS (and again after validation starts)
+    _drsTables = getattr(modelXbrl, u"drsTables", None)
+    if _drsTables is None:
+        _drsTables = modelXbrl.drsTables = DrsTables(modelXbrl)
+    return _drsTables
+
 def priItemElrHcRels(val, priItem, ELR=None):
     key = (priItem, ELR)
     try:
@@ -394,15 +589,14 @@ NOT_FOUND = 0
 MEMBER_USABLE = 1
 MEMBER_NOT_USABLE = 2
 
-def checkFactElrHcs(val, f, ELR, hcRels, setPrototypeContextElements=False):
+def checkFactElrHcs(val, f, ELR, drsHcs, setPrototypeContextElements=False):
     context = f.context
     elrValid = True # start assuming ELR is valid
     
-    for hasHcRel in hcRels:
-        hcConcept = hasHcRel.toModelObject
-        hcIsClosed = hasHcRel.isClosed
-        hcContextElement = hasHcRel.contextElement
-        hcNegating = hasHcRel.arcrole == XbrlConst.notAll
+    for drsHc in drsHcs:
+        hcIsClosed = drsHc.isClosed
+        hcContextElement = drsHc.contextElement
+        hcNegating = drsHc.isNegating
         modelDimValues = context.dimValues(hcContextElement)
         if setPrototypeContextElements and isinstance(context,ContextPrototype):
             oppositeContextDimValues = context.dimValues(hcContextElement, oppositeContextElement=True)
@@ -414,31 +608,26 @@ def checkFactElrHcs(val, f, ELR, hcRels, setPrototypeContextElements=False):
         if hcIsClosed and len(modelNonDimValues) > 0:
             hcValid = False
         else:
-            dimELR = (hasHcRel.targetRole or ELR)
-            for hcDimRel in val.modelXbrl.relationshipSet(
-                                XbrlConst.hypercubeDimension, dimELR).fromModelObject(hcConcept):
-                dimConcept = hcDimRel.toModelObject
-                if isinstance(dimConcept, ModelConcept):
-                    domELR = (hcDimRel.targetRole or dimELR)
-                    if dimConcept in modelDimValues:
-                        memModelDimension = modelDimValues[dimConcept]
-                        contextElementDimSet.discard(dimConcept)
-                        memConcept = memModelDimension.member
-                    elif dimConcept in val.modelXbrl.dimensionDefaultConcepts:
-                        memConcept = val.modelXbrl.dimensionDefaultConcepts[dimConcept]
-                        memModelDimension = None
-                    elif setPrototypeContextElements and isinstance(context,ContextPrototype) and dimConcept in oppositeContextDimValues:
-                        memModelDimension = oppositeContextDimValues[dimConcept]
-                        memConcept = memModelDimension.member
-                    else:
+            for drsDim in drsHc.dims:
+                dimConcept = drsDim.dimConcept
+                if dimConcept in modelDimValues:
+                    memModelDimension = modelDimValues[dimConcept]
+                    contextElementDimSet.discard(dimConcept)
+                    memConcept = memModelDimension.member
+                elif dimConcept in val.modelXbrl.dimensionDefaultConcepts:
+                    memConcept = val.modelXbrl.dimensionDefaultConcepts[dimConcept]
+                    memModelDimension = None
+                elif setPrototypeContextElements and isinstance(context,ContextPrototype) and dimConcept in oppositeContextDimValues:
+                    memModelDimension = oppositeContextDimValues[dimConcept]
+                    memConcept = memModelDimension.member
+                else:
+                    hcValid = False
+                    continue
+                if drsDim.usableMembers is not None: # not typed dimension
+                    if memConcept not in drsDim.usableMembers:
                         hcValid = False
-                        continue
-                    if not dimConcept.isTypedDimension:
-                        # change to cache all member concepts usability per domain: if dimensionMemberState(val, dimConcept, memConcept, domELR) != MEMBER_USABLE:
-                        if not dimensionMemberUsable(val, dimConcept, memConcept, domELR):
-                            hcValid = False
-                    if hcValid and setPrototypeContextElements and isinstance(memModelDimension,DimValuePrototype) and not hcNegating:
-                        memModelDimension.contextElement = hcContextElement
+                if hcValid and setPrototypeContextElements and isinstance(memModelDimension,DimValuePrototype) and not hcNegating:
+                    memModelDimension.contextElement = hcContextElement
         if hcIsClosed:
             if len(contextElementDimSet) > 0:
                 hcValid = False # has extra stuff in the context element
@@ -457,22 +646,7 @@ def checkFactElrHcs(val, f, ELR, hcRels, setPrototypeContextElements=False):
     return elrValid
                             
 def dimensionMemberUsable(val, dimConcept, memConcept, domELR):
-    try:
-        dimensionMembersUsable = val.dimensionMembersUsable
-    except AttributeError:
-        dimensionMembersUsable = val.dimensionMembersUsable = {}
-    key = (dimConcept, domELR)
-    try:
-        return memConcept in dimensionMembersUsable[key]
-    except KeyError:
-        usableMembers = set()
-        unusableMembers = set()
-        dimensionMembersUsable[key] = usableMembers
-        # build set of usable members in dimension/domain/ELR
-        findUsableMembersInDomainELR(val, val.modelXbrl.relationshipSet(XbrlConst.dimensionDomain, domELR).fromModelObject(dimConcept),
-                                     domELR, usableMembers, unusableMembers, defaultdict(set))
-        usableMembers -= unusableMembers
-        return memConcept in usableMembers
+    return memConcept in drsTables(val.modelXbrl).dimensionUsableMembers(dimConcept, domELR)
     
 def findUsableMembersInDomainELR(val, rels, ELR, usableMembers, unusableMembers, toConceptELRs):
     for rel in rels:
@@ -20,10 +20,10 @@ class ViewTests(ViewFile.View):
         
     def viewTestcaseIndexElement(self, modelDocument):
         if self.cols:
-            if isinstance(self.cols,unicode): self.cols = self.cols.replace(u',',u' ').split()
+            if isinstance(self.cols,_STR_BASE): self.cols = self.cols.replace(u',',u' ').split()
             unrecognizedCols = []
             for col in self.cols:
-                if col not in (u"Index", u"Testcase", u"ID", u"Name", u"Reference", u"ReadMeFirst", u"Status", u"Expected",u"Actual"):
+                if col not in (u"Index", u"Testcase", u"ID", u"Name", u"Reference", u"ReadMeFirst", u"Status", u"Expected",u"Actual",u"Duration"):
                     unrecognizedCols.append(col)
             if unrecognizedCols:
                 self.modelXbrl.error(u"arelle:unrecognizedTestReportColumn",
@@ -91,6 +91,9 @@ class ViewTests(ViewFile.View):
                 cols.append(modelTestcaseVariation.expected)
             elif col == u"Actual":
                 cols.append(u" ".join(unicode(code) for code in modelTestcaseVariation.actual))
+            elif col == u"Duration":
+                duration = modelTestcaseVariation.duration
+                cols.append(u"{0:.3f}".format(duration) if duration is not None else u"")
             else:
                 cols.append(u"")
         self.addRow(cols, xmlRowElementName=u"variation")
@@ -6,8 +6,12 @@ Created on Oct 5, 2010
 '''
 from __future__ import division
 from __future__ import with_statement
-import os, posixpath, sys, re, shutil, time, calendar, io, json, logging
+import os, posixpath, sys, re, shutil, time, calendar, io, json, logging, threading
 from io import open
+try:
+    from queue import Queue
+except ImportError:
+    from Queue import Queue
 if sys.version[0] >= u'3':
     from urllib import quote, unquote
     from urllib import ContentTooShortError
@@ -103,6 +107,12 @@ class WebCache(object):
         self.workOffline = False
         self._logDownloads = False
         self.maxAgeSeconds = 60.0 * 60.0 * 24.0 * 7.0 # seconds before checking again for file
+        self.prefetchThreads = 0 # threads downloading discovered urls ahead of loading them, 0 to not prefetch
+        self.prefetchingUrls = {} # url: threading.Event set when its prefetch is done
+        self.prefetchLimit = 1000 # urls queued or being prefetched, beyond which discovered urls are left for getfilename
+        self.prefetchLock = threading.Lock()
+        self.prefetchQueue = None
+        self.urlCheckTimesLock = threading.Lock() # check times are set by prefetch threads too
         if cntlr.hasFileSystem:
             self.urlCheckJsonFile = cntlr.userAppDir + os.sep + u"cachedUrlCheckTimes.json"
             try:
@@ -151,11 +161,18 @@ class WebCache(object):
         self._logDownloads = _logDownloads
 
     def saveUrlCheckTimes(self):
-        if self.cachedUrlCheckTimesModified:
-            with io.open(self.urlCheckJsonFile, u'wt', encoding=u'utf-8') as f:
-                jsonStr = _STR_UNICODE(json.dumps(self.cachedUrlCheckTimes, ensure_ascii=False, indent=0)) # might not be unicode in 2.7
-                f.write(jsonStr)  # 2.7 gets unicode this way
-        self.cachedUrlCheckTimesModified = False
+        with self.urlCheckTimesLock:
+            if not self.cachedUrlCheckTimesModified:
+                return
+            jsonStr = _STR_UNICODE(json.dumps(self.cachedUrlCheckTimes, ensure_ascii=False, indent=0)) # might not be unicode in 2.7
+            self.cachedUrlCheckTimesModified = False
+        with io.open(self.urlCheckJsonFile, u'wt', encoding=u'utf-8') as f:
+            f.write(jsonStr)  # 2.7 gets unicode this way
+            
+    def setUrlCheckTime(self, url, timeNowStr):
+        with self.urlCheckTimesLock:
+            self.cachedUrlCheckTimes[url] = timeNowStr
+            self.cachedUrlCheckTimesModified = True
         
     def resetProxies(self, httpProxyTuple):
         try:
@@ -268,6 +285,9 @@ class WebCache(object):
                 filepath = filepath.replace(u'/', u'\\')
             if self.workOffline or filenameOnly:
                 return filepath
+            prefetchDone = self.prefetchingUrls.get(url)
+            if prefetchDone is not None:
+                prefetchDone.wait() # the prefetched file is found below as recently checked
             filepathtmp = filepath + u".tmp"
             fileExt = os.path.splitext(filepath)[1]
             timeNow = time.time()
@@ -289,8 +309,7 @@ class WebCache(object):
                         pass # for now, forget about authentication here
                     if not newerOnWeb:
                         # update ctime by copying file and return old file
-                        self.cachedUrlCheckTimes[url] = timeNowStr
-                        self.cachedUrlCheckTimesModified = True
+                        self.setUrlCheckTime(url, timeNowStr)
                         return filepath
                     retrievingDueToRecheckInterval = True
                 else:
@@ -472,8 +491,7 @@ class WebCache(object):
                 webFileTime = lastModifiedTime(headers)
                 if webFileTime: # set mtime to web mtime
                     os.utime(filepath,(webFileTime,webFileTime))
-                self.cachedUrlCheckTimes[url] = timeNowStr
-                self.cachedUrlCheckTimesModified = True
+                self.setUrlCheckTime(url, timeNowStr)
                 return filepath
         
         if url.startswith(u"file://"): url = url[7:]
@@ -482,14 +500,97 @@ class WebCache(object):
             url = url.replace(u'/', u'\\')
         return url
     
+    def prefetch(self, urls):
+        u"""Queues http urls, such as of hrefs found in a document being loaded, for download to the cache by 
+        prefetch threads, so that their getfilename, when discovered, does not wait on the network (or waits 
+        only for the download in progress)."""
+        if not self.prefetchThreads or self.workOffline or self.cacheDir == SERVER_WEB_CACHE:
+            return
+        with self.prefetchLock:
+            if self.prefetchQueue is None:
+                self.prefetchQueue = Queue()
+                for i in _RANGE(self.prefetchThreads):
+                    thread = threading.Thread(target=self.prefetcher)
+                    thread.daemon = True
+                    thread.start()
+            for url in urls:
+                if len(self.prefetchingUrls) >= self.prefetchLimit:
+                    break # remaining urls are retrieved by getfilename when loaded
+                if url not in self.prefetchingUrls and isHttpUrl(url):
+                    self.prefetchingUrls[url] = threading.Event()
+                    self.prefetchQueue.put(url)
+                    
+    def prefetcher(self):
+        while True:
+            url = self.prefetchQueue.get()
+            try:
+                self.prefetchFile(url)
+            except Exception:
+                pass # getfilename retrieves url when loaded, reporting any errors
+            finally:
+                with self.prefetchLock:
+                    self.prefetchingUrls.pop(url).set()
+                    
+    def prefetchFile(self, url):
+        # retrieve url to cache if not cached or due for recheck, without logging or user interaction, 
+        # any file not retrieved here (such as needing authentication, retry or logon) is left for getfilename
+        if self.workOffline:
+            return
+        filepath = self.urlToCacheFilepath(url)
+        if filepath.endswith(u"/"):
+            filepath += DIRECTORY_INDEX_FILE
+        if os.sep == u'\\':
+            filepath = filepath.replace(u'/', u'\\')
+        urlScheme, schemeSep, urlSchemeSpecificPart = url.partition(u"://")
+        quotedUrl = urlScheme + schemeSep + quote(urlSchemeSpecificPart, u'/?=&')
+        timeNow = time.time()
+        timeNowStr = time.strftime(u'%Y-%m-%dT%H:%M:%S UTC', time.gmtime(timeNow))
+        if os.path.exists(filepath):
+            if url in self.cachedUrlCheckTimes:
+                cachedTime = calendar.timegm(time.strptime(self.cachedUrlCheckTimes[url], u'%Y-%m-%dT%H:%M:%S UTC'))
+            else:
+                cachedTime = 0
+            if timeNow - cachedTime <= self.maxAgeSeconds:
+                return
+            remoteFileTime = lastModifiedTime( self.getheaders(quotedUrl) )
+            if not (remoteFileTime and remoteFileTime > os.path.getmtime(filepath)):
+                self.setUrlCheckTime(url, timeNowStr)
+                return
+        filedir = os.path.dirname(filepath)
+        if not os.path.exists(filedir):
+            try:
+                os.makedirs(filedir)
+            except OSError: # made by another prefetch thread
+                pass
+        filepathtmp = filepath + u".tmp"
+        try:
+            savedfile, headers, initialBytes = self.retrieve(quotedUrl, filename=filepathtmp)
+            if os.path.splitext(filepath)[1] in (u".xsd", u".xml", u".xbrl") and "<html" in initialBytes:
+                raise IOError(u"possible logon request") # for getfilename to retrieve and resolve
+        except Exception:
+            if os.path.exists(filepathtmp):
+                os.remove(filepathtmp)
+            raise
+        if os.path.exists(filepath):
+            os.remove(filepath)
+        os.rename(filepathtmp, filepath)
+        if self._logDownloads:
+            self.cntlr.addToLog(_(u"Downloaded %(URL)s"),
+                                messageCode=u"webCache:download",
+                                messageArgs={u"URL": url, u"filepath": filepath},
+                                level=logging.INFO)
+        webFileTime = lastModifiedTime(headers)
+        if webFileTime: # set mtime to web mtime
+            os.utime(filepath,(webFileTime,webFileTime))
+        self.setUrlCheckTime(url, timeNowStr)
+
     def internetRecheckFailedRecovery(self, filepath, url, err, timeNowStr):
         self.cntlr.addToLog(_(u"During refresh of web file ignoring error: %(error)s for %(URL)s"),
                             messageCode=u"webCache:unableToRefreshFile",
                             messageArgs={u"URL": url, u"error": err},
                             level=logging.info)
         # skip this checking cycle, act as if retrieval was ok
-        self.cachedUrlCheckTimes[url] = timeNowStr
-        self.cachedUrlCheckTimesModified = True
+        self.setUrlCheckTime(url, timeNowStr)
         return filepath
     
     def reportProgress(self, blockCount, blockSize, totalSize):
@@ -16,6 +16,7 @@ from arelle.PluginManager import pluginClassMethods
 from decimal import Decimal, InvalidOperation
 from lxml import etree
 from types import LambdaType
+import operator
 
 class XPathException(Exception):
     def __init__(self, progStep, code, message):
@@ -106,11 +107,13 @@ class XPathContext(object):
         self.variableSet = None
         self.inScopeVars = {} if inScopeVars is None else inScopeVars
         self.cachedFilterResults = {}
+        self.formulaProfile = None # FormulaProfiler.FormulaProfile when profiling formula evaluation
         if inputXbrlInstance: 
             self.inScopeVars[XbrlConst.qnStandardInputInstance] = inputXbrlInstance.modelXbrl
         self.customFunctions = {}
         for pluginXbrlMethod in pluginClassMethods(u"Formula.CustomFunctions"):
             self.customFunctions.update(pluginXbrlMethod())
+        self.compiledXPath = not self.formulaOptions.interpretXPath
         
     def copy(self):  # shallow copy (for such as for Table LB table processiong
         xpCtxCpy = XPathContext(self.modelXbrl, self.inputXbrlInstance, self.sourceElement, 
@@ -135,6 +138,11 @@ class XPathContext(object):
         return self.modelXbrl.modelManager.formulaOptions
         
     def evaluate(self, exprStack, contextItem=None, resultStack=None, parentOp=None):
+        if self.compiledXPath and parentOp is None and exprStack and isinstance(exprStack[0], ProgHeader):
+            progHeader = exprStack[0]
+            if progHeader.compiledProg is None:
+                progHeader.compiledProg = compileProg(exprStack)
+            return progHeader.compiledProg(self, contextItem, resultStack)
         if resultStack is None: resultStack =  []
         if contextItem is None: contextItem = self.contextItem
         setProgHeader = False
@@ -160,6 +168,8 @@ class XPathContext(object):
                 if isinstance(op, QNameDef): # function call
                     args = self.evaluate(p.args, contextItem=contextItem)
                     ns = op.namespaceURI; localname = op.localName
+                    if self.formulaProfile is not None:
+                        self.formulaProfile.functionCalled(op)
                     try:
                         from arelle import (FunctionXs, FunctionFn, FunctionXfi, FunctionIxt, FunctionCustom)
                         if op in self.modelXbrl.modelCustomFunctionSignatures:
@@ -757,7 +767,7 @@ class XPathContext(object):
             else:
                 h = 0
             l.add((h,e))
-        return [e for h,e in sorted(l, key=lambda h: h[0] or 0)]  # or 0 in case sourceline is None
+        return [e for line,e in sorted(l, key=lambda lineNode: lineNode[0] or 0)]  # or 0 in case sourceline is None
     
     def modelItem(self, x):
         if isinstance(x, (ModelFact, ModelInlineFact)) and x.isItem:
@@ -771,4 +781,449 @@ class XPathContext(object):
             return x.modelXbrl
         return None
         
-        
\ No newline at end of file
+        
+
+# compiled evaluation of expression stacks
+# each parsed expression stack is compiled (on its first evaluation) into nested closures, which perform the
+# same operations as XPathContext.evaluate, with the per-step type tests and operator dispatch resolved once
+# at compile time instead of on every evaluation.  Closures are called as step(xc, contextItem, resultStack).
+
+VALUE_OPERATIONS = {
+    u'+': operator.add, u'-': operator.sub, u'*': operator.mul, 
+    u'div': operator.truediv, u'idiv': operator.floordiv, u'mod': operator.mod,
+    u'ge': operator.ge, u'gt': operator.gt, u'le': operator.le, u'lt': operator.lt, u'eq': operator.eq, u'ne': operator.ne,
+    u'to': lambda op1, op2: _RANGE( _INT(op1), _INT(op2) + 1 )}
+ARITHMETIC_OPS = set([u'+', u'-', u'*', u'div', u'idiv', u'mod'])
+DIVISION_OPS = set([u'div', u'idiv', u'mod'])
+GENERALCOMPARISON_OPERATIONS = {
+    u'>=': operator.ge, u'>': operator.gt, u'<=': operator.le, u'<': operator.lt, u'=': operator.eq, u'!=': operator.ne}
+KINDTEST_NAMES = set([u'attribute', u'comment', u'document-node', u'element', u'item', u'node', 
+                      u'processing-instruction', u'schema-attribute', u'schema-element', u'text'])
+
+def compileProg(exprStack, parentOp=None):
+    steps = []
+    setProgHeader = False
+    for p in exprStack:
+        step = compileStep(p, parentOp)
+        if step is not None:
+            steps.append(step)
+        if isinstance(p,ProgHeader):
+            setProgHeader = True
+    steps = tuple(steps)
+    def evaluateProg(xc, contextItem=None, resultStack=None):
+        if resultStack is None: resultStack =  []
+        if contextItem is None: contextItem = xc.contextItem
+        for step in steps:
+            step(xc, contextItem, resultStack)
+        if setProgHeader:
+            xc.progHeader = None
+        return resultStack
+    return evaluateProg
+
+def compileStep(p, parentOp):
+    if isinstance(p,QNameDef) or (p == u'*' and parentOp in (u'/', u'//')): # path step QName or wildcard
+        def axisStep(xc, contextItem, resultStack):
+            if len(resultStack) == 0 or not xc.isNodeSequence(resultStack[-1]):
+                resultStack.append( [ contextItem, ] )
+            resultStack.append( xc.flattenSequence( xc.stepAxis(parentOp, p, resultStack.pop()) ) )
+        return axisStep
+    elif isinstance(p,_STR_NUM_TYPES):
+        def literal(xc, contextItem, resultStack):
+            resultStack.append( [ p, ] )
+        return literal
+    elif isinstance(p,VariableRef):
+        varName = p.name
+        def variableRef(xc, contextItem, resultStack):
+            inScopeVars = xc.inScopeVars
+            if varName in inScopeVars:
+                result = inScopeVars[varName]
+                if result is None: # None atomic result is XPath empty sequence
+                    resultStack.append( [] )
+                else:
+                    resultStack.append( xc.flattenSequence( result ) )
+        return variableRef
+    elif isinstance(p,OperationDef):
+        op = p.name
+        if isinstance(op, QNameDef): # function call
+            return compileFunctionCall(p, op, parentOp)
+        elif op in VALUE_OPS:
+            return compileValueOp(p, op)
+        elif op in GENERALCOMPARISON_OPS:
+            return compileGeneralComparison(p, op)
+        elif op in NODECOMPARISON_OPS:
+            return compileNodeComparison(p, op)
+        elif op in COMBINING_OPS:
+            return compileCombiningOp(p, op)
+        elif op in LOGICAL_OPS:
+            return compileLogicalOp(p, op)
+        elif op in UNARY_OPS:
+            return compileUnaryOp(p, op)
+        elif op == u'instance':
+            return compileInstanceOf(p)
+        elif op == u'sequence':
+            evaluateArgs = compileProg(p.args)
+            def sequence(xc, contextItem, resultStack):
+                resultStack.append( xc.flattenSequence( evaluateArgs(xc, contextItem) ) )
+            return sequence
+        elif op == u'predicate':
+            return compilePredicate(p)
+        elif op in FORSOMEEVERY_OPS: # for, some, every
+            evaluateRangeVars = compileRangeVars(op, p.args[0], p.args[1:])
+            def forSomeEvery(xc, contextItem, resultStack):
+                result = []
+                evaluateRangeVars(xc, contextItem, result)
+                resultStack.append( xc.flattenSequence( result ) )
+            return forSomeEvery
+        elif op == u'if':
+            evaluateTest = compileProg(p.args[0].expr[0])
+            evaluateThen = compileProg(p.args[1].args)
+            evaluateElse = compileProg(p.args[2].args)
+            def ifThenElse(xc, contextItem, resultStack):
+                if xc.effectiveBooleanValue( p, evaluateTest(xc, contextItem) ):
+                    result = evaluateThen(xc, contextItem)
+                else:
+                    result = evaluateElse(xc, contextItem)
+                resultStack.append( xc.flattenSequence( result ) )
+            return ifThenElse
+        elif op == u'.':
+            def contextItemStep(xc, contextItem, resultStack):
+                if contextItem is not None:
+                    resultStack.append( xc.flattenSequence( contextItem ) )
+            return contextItemStep
+        elif op == u'..':
+            def parentStep(xc, contextItem, resultStack):
+                result = XmlUtil.parent(contextItem)
+                if result is not None:
+                    resultStack.append( xc.flattenSequence( result ) )
+            return parentStep
+        elif op in PATH_OPS:
+            return compilePathOp(p, op)
+    elif isinstance(p,ProgHeader):
+        from arelle.ModelFormulaObject import Trace
+        setTraceType = p.traceType not in (Trace.MESSAGE, Trace.CUSTOM_FUNCTION)
+        def progHeader(xc, contextItem, resultStack):
+            xc.progHeader = p
+            if setTraceType: 
+                xc.traceType = p.traceType
+        return progHeader
+    return None # not an evaluated step (such as grouping tokens)
+
+def compileFunctionCall(p, op, parentOp):
+    from arelle import (FunctionXs, FunctionFn, FunctionXfi, FunctionIxt, FunctionCustom)
+    evaluateArgs = compileProg(p.args)
+    ns = op.namespaceURI; localname = op.localName
+    if op.unprefixed and localname in KINDTEST_NAMES:
+        def callFunction(xc, contextItem, resultStack, args):
+            # step axis operation
+            if len(resultStack) == 0 or not xc.isNodeSequence(resultStack[-1]):
+                if isinstance(contextItem, (tuple,list)):
+                    resultStack.append( contextItem )
+                else:
+                    resultStack.append( [ contextItem, ] )
+            return xc.stepAxis(parentOp, p, resultStack.pop() )
+    elif op.unprefixed or ns == XbrlConst.fn:
+        def callFunction(xc, contextItem, resultStack, args):
+            return FunctionFn.call(xc, p, localname, contextItem, args)
+    elif ns == XbrlConst.xfi or ns == XbrlConst.xff:
+        def callFunction(xc, contextItem, resultStack, args):
+            return FunctionXfi.call(xc, p, localname, args)
+    elif ns == XbrlConst.xsd:
+        def callFunction(xc, contextItem, resultStack, args):
+            return FunctionXs.call(xc, p, localname, args)
+    elif ns in FunctionIxt.ixtNamespaceURIs:
+        def callFunction(xc, contextItem, resultStack, args):
+            return FunctionIxt.call(xc, p, localname, args)
+    else:
+        def callFunction(xc, contextItem, resultStack, args):
+            raise XPathException(p, u'err:XPST0017', _(u'Function call not identified: {0}.').format(op))
+    def functionCall(xc, contextItem, resultStack):
+        args = evaluateArgs(xc, contextItem)
+        if xc.formulaProfile is not None:
+            xc.formulaProfile.functionCalled(op)
+        try:
+            if op in xc.modelXbrl.modelCustomFunctionSignatures:
+                result = FunctionCustom.call(xc, p, op, contextItem, args)
+            else:
+                result = callFunction(xc, contextItem, resultStack, args)
+        except FunctionNumArgs, err:
+            raise XPathException(p, err.errCode, u"{}: {}".format(err.errText, op))
+        except FunctionArgType, err:
+            raise XPathException(p, err.errCode, _(u'Argument {0} does not match expected type {1} for {2} {3}.')
+                                 .format(err.argNum, err.expectedType, op, err.foundObject))
+        except FunctionNotAvailable:
+            raise XPathException(p, u'err:XPST0017', _(u'Function named {0} does not have a custom or built-in implementation.').format(op))
+        if result is not None:
+            resultStack.append( xc.flattenSequence( result ) )
+    return functionCall
+
+def compileValueOp(p, op):
+    from arelle.FunctionUtil import (testTypeCompatiblity)
+    evaluateArgs = compileProg(p.args)
+    operation = VALUE_OPERATIONS[op]
+    isArithmetic = op in ARITHMETIC_OPS
+    isDivision = op in DIVISION_OPS
+    def valueOp(xc, contextItem, resultStack):
+        # binary arithmetic operations and value comparisons
+        s1 = xc.atomize( p, resultStack.pop() ) if len(resultStack) > 0 else []
+        s2 = xc.atomize( p, evaluateArgs(xc, contextItem) )
+        if len(s1) > 1 or len(s2) > 1:
+            raise XPathException(p, u'err:XPTY0004', _(u"Value operation '{0}' sequence length error").format(op))
+        if len(s1) == 0 or len(s2) == 0:
+            result = []
+        else:
+            op1 = s1[0]
+            op2 = s2[0]
+            testTypeCompatiblity( xc, p, op, op1, op2 )
+            if isArithmetic and type(op1) != type(op2):
+                # check if type promotion needed (Decimal-float, not needed for integer-Decimal)
+                if isinstance(op1,Decimal) and isinstance(op2,float):
+                    op1 = float(op1) # per http://http://www.w3.org/TR/xpath20/#dt-type-promotion 1b
+                elif isinstance(op2,Decimal) and isinstance(op1,float):
+                    op2 = float(op2)
+            if isDivision:
+                try:
+                    result = operation(op1, op2)
+                except ZeroDivisionError:
+                    raise XPathException(p, u'err:FOAR0001', _(u'Attempt to divide by zero: {0} {1} {2}.')
+                                         .format(op1, op, op2))
+            else:
+                result = operation(op1, op2)
+        resultStack.append( xc.flattenSequence( result ) )
+    return valueOp
+
+def compileGeneralComparison(p, op):
+    evaluateArgs = compileProg(p.args)
+    comparison = GENERALCOMPARISON_OPERATIONS[op]
+    def generalComparison(xc, contextItem, resultStack):
+        s1 = xc.atomize( p, resultStack.pop() ) if len(resultStack) > 0 else []
+        s2 = xc.atomize( p, evaluateArgs(xc, contextItem) )
+        result = []
+        for op1 in s1:
+            for op2 in s2:
+                result = comparison(op1, op2)
+                if result:
+                    break
+            if result:
+                break
+        resultStack.append( xc.flattenSequence( result ) )
+    return generalComparison
+
+def compileNodeComparison(p, op):
+    evaluateArgs = compileProg(p.args)
+    def nodeComparison(xc, contextItem, resultStack):
+        s1 = resultStack.pop() if len(resultStack) > 0 else []
+        s2 = evaluateArgs(xc, contextItem)
+        if len(s1) > 1 or len(s2) > 1 or not xc.isNodeSequence(s1) or not xc.isNodeSequence(s2[0]):
+            raise XPathException(p, u'err:XPTY0004', _(u'Node comparison sequence error'))
+        if len(s1) == 0 or len(s2[0]) == 0:
+            result = []
+        else:
+            n1 = s1[0]
+            n2 = s2[0][0]
+            result = False;
+            for op1 in s1:
+                for op2 in s2:
+                    if op == u'is':
+                        result = n1 == n2
+                    elif op == u'>>':
+                        result = op1 > op2
+                    elif op == u'<<':
+                        result = op1 <= op2
+                if result:
+                    break
+        resultStack.append( xc.flattenSequence( result ) )
+    return nodeComparison
+
+def compileCombiningOp(p, op):
+    evaluateArgs = compileProg(p.args)
+    def combiningOp(xc, contextItem, resultStack):
+        s1 = resultStack.pop() if len(resultStack) > 0 else []
+        s2 = xc.flattenSequence(evaluateArgs(xc, contextItem))
+        if not xc.isNodeSequence(s1) or not xc.isNodeSequence(s2):
+            raise XPathException(p, u'err:XPTY0004', _(u'Node operation sequence error'))
+        set1 = set(s1)
+        set2 = set(s2)
+        if op == u'intersect':
+            resultset = set1 & set2
+        elif op == u'except':
+            resultset = set1 - set2
+        else: # union or |
+            resultset = set1 | set2
+        # convert to a list in document order
+        resultStack.append( xc.flattenSequence( xc.documentOrderedNodes(resultset) ) )
+    return combiningOp
+
+def compileLogicalOp(p, op):
+    evaluateArgs = compileProg(p.args)
+    isAnd = op == u'and'
+    def logicalOp(xc, contextItem, resultStack):
+        if len(resultStack) == 0:
+            result = []
+        else:
+            # both operands are evaluated, as by the interpreter, for identical error reporting
+            op1 = xc.effectiveBooleanValue( p, resultStack.pop() )
+            op2 = xc.effectiveBooleanValue( p, evaluateArgs(xc, contextItem) )
+            if isAnd:
+                result = op1 and op2
+            else:
+                result = op1 or op2
+        resultStack.append( xc.flattenSequence( result ) )
+    return logicalOp
+
+def compileUnaryOp(p, op):
+    evaluateArgs = compileProg(p.args)
+    isNegation = op == u'u-'
+    def unaryOp(xc, contextItem, resultStack):
+        s1 = xc.atomize( p, evaluateArgs(xc, contextItem) )
+        if len(s1) > 1:
+            raise XPathException(p, u'err:XPTY0004', _(u'Unary expression sequence length error'))
+        if len(s1) == 0:
+            result = []
+        elif isNegation:
+            result = -s1[0]
+        else:
+            result = s1[0]
+        resultStack.append( xc.flattenSequence( result ) )
+    return unaryOp
+
+def compileInstanceOf(p):
+    occurenceIndicator = p.args[1] if len(p.args) > 1 else None
+    t = p.args[0] if len(p.args) > 0 else None
+    tType = None
+    if isinstance(t, QNameDef) and t.namespaceURI == XbrlConst.xsd:
+        tType = {
+               u"integer": _INT_TYPES,
+               u"string": _STR_BASE,
+               u"decimal": Decimal,
+               u"double": float,
+               u"float": float,
+               u"boolean": bool,
+               u"QName": QName,
+               u"anyURI": AnyURI,
+               u"date": DateTime,
+               u"dateTime": DateTime,
+                }.get(t.localName)
+    def instanceOf(xc, contextItem, resultStack):
+        result = False
+        s1 = xc.flattenSequence( resultStack.pop() ) if len(resultStack) > 0 else []
+        arity = len(s1)
+        if occurenceIndicator is not None:
+            if (occurenceIndicator == u'?' and arity in (0,1) ) or \
+               (occurenceIndicator == u'+' and arity >= 1) or \
+               (occurenceIndicator == u'*'):
+                result = True
+        elif arity == 1:
+            result = True
+        if result and t is not None:
+            for x in s1:
+                if tType:
+                    result = isinstance(x, tType)
+                    if result and tType == DateTime:
+                        result = x.dateOnly == (t.localName == u"date")
+                elif isinstance(t, OperationDef):
+                    if t.name == u"element":
+                        if isinstance(x,ModelObject):
+                            if len(t.args) >= 1:
+                                qn = t.args[0]
+                                if qn== u'*' or (isinstance(qn,QNameDef) and qn == x):
+                                    result = True
+                                    if len(t.args) >= 2 and isinstance(t.args[1],QNameDef):
+                                        modelXbrl = x.modelDocument.modelXbrl
+                                        modelConcept = modelXbrl.qnameConcepts.get(qname(x))
+                                        if not modelConcept.instanceOfType(t.args[1]):
+                                            result = False
+                        else:
+                            result = False
+                    # elif t.name == "item" comes here and result stays True
+                if not result: 
+                    break
+        resultStack.append( xc.flattenSequence( result ) )
+    return instanceOf
+
+def compilePredicate(p):
+    evaluateArgs = compileProg(p.args)
+    def predicate(xc, contextItem, resultStack):
+        targetSequence = []
+        if len(resultStack) > 0:
+            sourcePosition = 0
+            for item in resultStack.pop():
+                sourcePosition += 1
+                predicateResult = evaluateArgs(xc, item)
+                if len(predicateResult) == 1: predicateResult = predicateResult[0] # first result
+                if len(predicateResult) == 1 and isinstance(predicateResult[0],_NUM_TYPES):
+                    result = predicateResult[0]
+                    if isinstance(result, bool):  # note that bool is subclass of int
+                        if result:
+                            targetSequence.append(item)
+                    elif sourcePosition == result:
+                        targetSequence.append(item)
+                elif xc.effectiveBooleanValue(p, predicateResult):
+                        targetSequence.append(item)
+        resultStack.append( xc.flattenSequence( targetSequence ) )
+    return predicate
+
+def compileRangeVars(op, p, args):
+    if isinstance(p, RangeDecl):
+        evaluateBindingSeq = compileProg(p.bindingSeq)
+        evaluateNext = compileRangeVars(op, args[0], args[1:])
+        rvQname = p.rangeVar.name
+        isShortCircuit = op != u'for'
+        isEvery = op == u'every'
+        def rangeVars(xc, contextItem, result):
+            r = evaluateBindingSeq(xc, contextItem)
+            if len(r) == 1: # should be an expr single
+                r = r[0]
+                if isinstance(r, (tuple,list,set)):
+                    if len(r) == 1 and isinstance(r[0],_RANGE):
+                        r = r[0]
+                    inScopeVars = xc.inScopeVars
+                    hasPrevValue = rvQname in inScopeVars
+                    if hasPrevValue: 
+                        prevValue = inScopeVars[rvQname]
+                    for rv in r:
+                        inScopeVars[rvQname] = rv 
+                        evaluateNext(xc, contextItem, result)
+                        if isShortCircuit and len(result) > 0:
+                            break	# short circuit evaluation
+                    if isEvery and len(result) == 0:
+                        result.append( True )   # true if no false result returned during iteration
+                    if hasPrevValue: 
+                        inScopeVars[rvQname] = prevValue
+        return rangeVars
+    elif isinstance(p, Expr):
+        evaluateExpr = compileProg(p.expr)
+        if p.name == u'return':
+            def returnExpr(xc, contextItem, result):
+                result.append( evaluateExpr(xc, contextItem) )
+            return returnExpr
+        elif p.name == u'satisfies':
+            isEvery = op == u'every'
+            def satisfiesExpr(xc, contextItem, result):
+                boolresult = xc.effectiveBooleanValue(p, evaluateExpr(xc, contextItem))
+                if isEvery != boolresult:
+                    # stop short circuit eval
+                    result.append( boolresult )
+            return satisfiesExpr
+    def noRangeExpr(xc, contextItem, result):
+        pass
+    return noRangeExpr
+
+def compilePathOp(p, op):
+    isRootOp = op in (u'rootChild', u'rootDescendant')
+    if isRootOp:
+        op = u'/' if op == u'rootChild' else u'//'
+    # contains QNameDefs and predicates
+    evaluateSteps = compileProg(p.args, parentOp=op)
+    def pathOp(xc, contextItem, resultStack):
+        if isRootOp:
+            # fix up for multi-instance
+            resultStack.append( [xc.inputXbrlInstance.xmlDocument,] )
+        if len(resultStack) > 0:
+            innerFocusNodes = resultStack.pop()
+        else:
+            innerFocusNodes = contextItem
+        navSequence = []
+        for innerFocusNode in xc.flattenSequence(innerFocusNodes):
+            navSequence += evaluateSteps(xc, innerFocusNode)
+        resultStack.append( xc.flattenSequence( xc.documentOrderedNodes(xc.flattenSequence(navSequence)) ) )
+    return pathOp
@@ -15,17 +15,22 @@ if sys.version[0] >= u'3':
     from arelle.pyparsing.pyparsing_py3 import (Word, Keyword, alphas, ParseException, ParseSyntaxException,
                  Literal, CaselessLiteral,
                  Combine, Optional, nums, Or, Forward, Group, ZeroOrMore, StringEnd, alphanums,
-                 ParserElement, quotedString, delimitedList, Suppress, Regex)
+                 ParserElement, quotedString, delimitedList, Suppress, Regex, ParseResults)
 else:
     # installed for python 2.7 and clean packages, otherwise use tweaked version
     from arelle.pyparsing.pyparsing_py2 import (Word, Keyword, alphas, ParseException, ParseSyntaxException,
                  Literal, CaselessLiteral,
                  Combine, Optional, nums, Or, Forward, Group, ZeroOrMore, StringEnd, alphanums,
-                 ParserElement, quotedString, delimitedList, Suppress, Regex)
+                 ParserElement, quotedString, delimitedList, Suppress, Regex, ParseResults)
 from arelle.Locale import format_string
-import time, xml.dom
+import os, time, xml.dom, logging
+from collections import OrderedDict
 from decimal import Decimal
 from arelle import (XmlUtil, ModelValue, XbrlConst)
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
 
 
 # Debugging flag can be set to either "debug_flag=True" or "debug_flag=False"
@@ -35,6 +40,7 @@ exprStack = []
 xmlElement = None
 modelXbrl = None
 xbrlResource = None
+isCacheableProg = True # false when a parse depends on more than the expression and its namespace bindings
 
 class ProgHeader(object):
     def __init__(self, modelObject, name, element, sourceStr, traceType):
@@ -43,6 +49,7 @@ class ProgHeader(object):
         self.element = element
         self.sourceStr = sourceStr
         self.traceType = traceType
+        self.compiledProg = None # compiled on first evaluation (see XPathContext.compileProg)
     def __repr__(self):
         return (u"ProgHeader({0},{1})".format(self.name,self.modelObject))
 
@@ -72,12 +79,13 @@ def pushQuotedString( sourceStr, loc, toks ):
     return dequotedStr
 
 class QNameDef(ModelValue.QName):
-    def __init__(self, loc, prefix, namespaceURI, localName, isAttribute=False, axis=None):
-        super(QNameDef, self).__init__(prefix, namespaceURI, localName)
-        self.unprefixed = prefix is None
-        self.isAttribute = isAttribute or axis == u"attribute"
-        self.loc = loc
-        self.axis = (axis or None) # store "" from rpartition of step as None
+    def __new__(cls, loc, prefix, namespaceURI, localName, isAttribute=False, axis=None):
+        qn = ModelValue.QName.__new__(cls, prefix, namespaceURI, localName) # not interned
+        qn.unprefixed = prefix is None
+        qn.isAttribute = isAttribute or axis == u"attribute"
+        qn.loc = loc
+        qn.axis = (axis or None) # store "" from rpartition of step as None
+        return qn
     def __hash__(self):
         return self.qnameValueHash
     def __repr__(self):
@@ -89,6 +97,8 @@ class QNameDef(ModelValue.QName):
             return super(QNameDef, self).__eq__(other)
     def __ne__(self,other):
         return not self.__eq__(other)
+    def __reduce__(self): # pickled for parsed programs cache, hash is recomputed on loading
+        return (QNameDef, (self.loc, self.prefix, self.namespaceURI, self.localName, self.isAttribute, self.axis))
 
 defaultNsmap = {
     u"fn":u"http://www.w3.org/2005/xpath-functions",
@@ -100,6 +110,7 @@ axesSupported = set([u"", u"child", u"descendant", u"attribute", u"self", u"desc
                  u"preceding-sibling", u"preceding", u"ancestor-or-self"])
 
 def pushQName( sourceStr, loc, toks ):
+    global isCacheableProg
     step = toks[0]
     axis, sep, qname = step.rpartition(u"::") # axes are not splitting correctly
     if axis not in axesSupported:
@@ -126,12 +137,13 @@ def pushQName( sourceStr, loc, toks ):
                     name=qname)
                 return
             
-        if (nsLocalname == (XbrlConst.xff,u"uncovered-aspect",u"xff") and
-            xmlElement.localName not in (u"formula", u"consistencyAssertion", u"valueAssertion", u"message")):
+        if nsLocalname == (XbrlConst.xff,u"uncovered-aspect",u"xff"):
+            isCacheableProg = False # validity depends on the element containing the expression
+            if xmlElement.localName not in (u"formula", u"consistencyAssertion", u"valueAssertion", u"message"):
                 modelXbrl.error(u"xffe:invalidFunctionUse",
-                    _(u"Function %(name)s cannot be used on an XPath expression associated with a %(name2)s"),
-                    modelObject=xmlElement,
-                    name=qname, name2=xmlElement.localName)
+                        _(u"Function %(name)s cannot be used on an XPath expression associated with a %(name2)s"),
+                        modelObject=xmlElement,
+                        name=qname, name2=xmlElement.localName)
     else:
         nsLocalname = (None,qname)
     q = QNameDef(loc, nsLocalname[2], nsLocalname[0], nsLocalname[1], axis=axis)
@@ -238,6 +250,7 @@ def pushUnaryOperation( sourceStr, loc, toks ):
     return operation
 
 def pushFunction( sourceStr, loc, toks ):
+    global isCacheableProg
     name = toks[0]
     operation = OperationDef(sourceStr, loc, name, toks, True)
     exprStack[exprStack.index(toks[0]):] = [operation]  # replace tokens with production
@@ -246,6 +259,7 @@ def pushFunction( sourceStr, loc, toks ):
         if (not name.unprefixed and 
             ns not in set([XbrlConst.fn, XbrlConst.xfi, XbrlConst.xff, XbrlConst.xsd]) and
             not ns.startswith(u"http://www.xbrl.org/inlineXBRL/transformation")):
+            isCacheableProg = False # signature is checked against the DTS of each parse
             if name not in modelXbrl.modelCustomFunctionSignatures: # indexed by both [qname] and [qname,arity]
                 modelXbrl.error(u"xbrlve:noCustomFunctionSignature",
                     _(u"No custom function signature for %(custFunction)s in %(resource)s"),
@@ -641,17 +655,93 @@ isInitialized = False
 def initializeParser(modelManager):
     global isInitialized
     if not isInitialized:
-        modelManager.showStatus(_(u"initializing formula xpath2 grammar"))
         startedAt = time.time()
-        xpathExpr.parseString( u"0", parseAll=True )
-        modelManager.addToLog(format_string(modelManager.locale, 
-                                    _(u"Formula xpath2 grammar initialized in %.2f secs"), 
-                                    time.time() - startedAt))
-        modelManager.showStatus(None)
+        if loadParsedProgsCache(modelManager):
+            # grammar is initialized on first parse of an expression not in the cache
+            modelManager.addToLog(format_string(modelManager.locale, 
+                                        _(u"Formula xpath2 parsed expressions cache (%s expressions) loaded in %.2f secs"), 
+                                        (len(parsedProgsCache), time.time() - startedAt)))
+        else:
+            modelManager.showStatus(_(u"initializing formula xpath2 grammar"))
+            xpathExpr.parseString( u"0", parseAll=True )
+            modelManager.addToLog(format_string(modelManager.locale, 
+                                        _(u"Formula xpath2 grammar initialized in %.2f secs"), 
+                                        time.time() - startedAt))
+            modelManager.showStatus(None)
         isInitialized = True
         return True # was initialized on this call
     return False # had already been initialized
 
+# parsed programs (exprStack less its ProgHeader) are cached by normalized expression and the in-scope 
+# namespace bindings of the expression element, least recently used first, and persisted in the user 
+# application directory for subsequent runs (discarded if saved by a different Arelle version)
+PARSED_PROGS_CACHE_SIZE = 20000
+parsedProgsCache = OrderedDict()
+parsedProgsCacheChanged = False
+
+def parsedProgsCacheFile(modelManager):
+    if modelManager.cntlr.hasFileSystem and modelManager.formulaOptions.cacheParsedProgs:
+        return os.path.join(modelManager.cntlr.userAppDir, u"formulaParsedProgs.pickle")
+    return None
+
+def loadParsedProgsCache(modelManager):
+    cacheFile = parsedProgsCacheFile(modelManager)
+    if cacheFile and os.path.exists(cacheFile):
+        from arelle.Version import version
+        try:
+            with open(cacheFile, u"rb") as f:
+                cacheVersion, parsedProgs = pickle.load(f)
+            if cacheVersion == version:
+                parsedProgsCache.update(parsedProgs)
+                return True
+        except Exception, err: # not readable by this python or corrupted by an interrupted save
+            modelManager.addToLog(_(u"Formula xpath2 parsed expressions cache {0} not loaded: {1}").format(cacheFile, err))
+    return False
+
+def saveParsedProgsCache(modelManager):
+    global parsedProgsCacheChanged
+    cacheFile = parsedProgsCacheFile(modelManager)
+    if cacheFile and parsedProgsCacheChanged:
+        from arelle.Version import version
+        tempFile = u"{0}.{1}".format(cacheFile, os.getpid()) # another process may be saving concurrently
+        try:
+            with open(tempFile, u"wb") as f:
+                pickle.dump((version, parsedProgsCache), f, pickle.HIGHEST_PROTOCOL)
+            if os.path.exists(cacheFile): # windows rename won't replace
+                os.remove(cacheFile)
+            os.rename(tempFile, cacheFile)
+            parsedProgsCacheChanged = False
+        except (EnvironmentError, pickle.PicklingError), err:
+            modelManager.addToLog(_(u"Formula xpath2 parsed expressions cache {0} not saved: {1}").format(cacheFile, err))
+    
+def cachedParsedProg(cacheKey):
+    parsedProg = parsedProgsCache.pop(cacheKey, None)
+    if parsedProg is not None:
+        parsedProgsCache[cacheKey] = parsedProg # now most recently used
+    return parsedProg
+
+def cacheParsedProg(cacheKey, parsedProg):
+    global parsedProgsCacheChanged
+    parsedProgsCache[cacheKey] = parsedProg
+    while len(parsedProgsCache) > PARSED_PROGS_CACHE_SIZE:
+        parsedProgsCache.popitem(last=False) # least recently used
+    parsedProgsCacheChanged = True
+
+def plainProg(prog):
+    # replace pyparsing results groups (which don't pickle and reference parse state) by lists
+    plainList = []
+    for p in prog:
+        if isinstance(p, OperationDef):
+            p.args = plainProg(p.args)
+        elif isinstance(p, Expr):
+            p.expr = plainProg(p.expr)
+        elif isinstance(p, RangeDecl):
+            p.bindingSeq = plainProg(p.bindingSeq)
+        elif isinstance(p, (list, ParseResults)):
+            p = plainProg(p)
+        plainList.append(p)
+    return plainList
+
 def exceptionErrorIndication(exception):
     errorAt = exception.column
     source = u''
@@ -690,6 +780,8 @@ def parse(modelObject, xpathExpression, element, name, traceType):
     exprStack = []
     global xmlElement
     xmlElement = element
+    global isCacheableProg
+    isCacheableProg = True
     returnProg = None
 
     # throws ParseException
@@ -714,7 +806,21 @@ def parse(modelObject, xpathExpression, element, name, traceType):
                 source=normalizedExpr)
             exprStack.append( ProgHeader(modelObject,name,element,normalizedExpr,traceType) )
 
-            L = xpathExpr.parseString( normalizedExpr, parseAll=True )
+            nsmap = getattr(element, u"nsmap", None)
+            if formulaOptions.cacheParsedProgs and nsmap is not None:
+                cacheKey = (normalizedExpr, frozenset(nsmap.items()))
+                parsedProg = cachedParsedProg(cacheKey)
+            else:
+                cacheKey = parsedProg = None
+            if parsedProg is not None:
+                exprStack.extend(parsedProg)
+            else:
+                errorCount = modelXbrl.logCount.get(logging._checkLevel(u'ERROR'), 0)
+                xpathExpr.parseString( normalizedExpr, parseAll=True )
+                if (cacheKey is not None and isCacheableProg and
+                    errorCount == modelXbrl.logCount.get(logging._checkLevel(u'ERROR'), 0)):
+                    exprStack[1:] = plainProg(exprStack[1:])
+                    cacheParsedProg(cacheKey, exprStack[1:])
             
             #modelXbrl.error( _("AST {0} {1}").format(name, L),
             #    "info", "formula:trace")
@@ -733,7 +839,7 @@ def parse(modelObject, xpathExpression, element, name, traceType):
                 _(u"Parse error in %(name)s error: %(error)s \n%(source)s"),
                 modelObject=element,
                 name=name,
-                error=err, 
+                error=unicode(err), # pyparsing reuses the exception object of an expression element for later errors
                 source=exceptionErrorIndication(err))
         except (ValueError), err:
             modelXbrl.error(u"parser:unableToParse",
@@ -743,17 +849,6 @@ def parse(modelObject, xpathExpression, element, name, traceType):
                 error=err, 
                 source=normalizedExpr)
         
-        u'''
-        code = []
-        compile(exprStack, code)
-        pyCode = ''.join(code)
-        val.modelXbrl.error(
-            _("PyCode {0} {1}").format(
-                 name,
-                 pyCode),
-            "info", "formula:trace")
-        return pyCode
-        '''
         returnProg = exprStack
     exprStack = [] # dereference
     xmlElement = None
@@ -792,11 +887,43 @@ def variableReferences(exprStack, varRefSet, element, rangeVars=None):
         if localRangeVar in rangeVars:
             rangeVars.remove(localRangeVar)
 
+# operations whose value depends only on their operands
+CONTEXT_ITEM_INDEPENDENT_OPERATIONS = set([
+    u'sequence', u'u+', u'u-', u'+', u'-', u'*', u'div', u'idiv', u'mod', u'to', u'and', u'or',
+    u'=', u'!=', u'<', u'<=', u'>', u'>=', u'eq', u'ne', u'lt', u'le', u'gt', u'ge'])
+
+def isContextItemIndependent(exprStack):
+    # true if expression has no steps, context item, or context-using functions (only literals, variables, 
+    # operators and xs constructors), so it evaluates the same for any context item
+    for p in exprStack:
+        if isinstance(p, (ProgHeader, VariableRef, OpDef)):
+            continue
+        elif isinstance(p, _STR_NUM_TYPES):
+            continue # literal
+        elif isinstance(p, OperationDef):
+            if isinstance(p.name, QNameDef):
+                if p.name.namespaceURI != XbrlConst.xsd:
+                    return False
+            elif p.name not in CONTEXT_ITEM_INDEPENDENT_OPERATIONS:
+                return False
+            if not isContextItemIndependent(p.args):
+                return False
+        elif isinstance(p, Expr):
+            if not isContextItemIndependent(p.expr):
+                return False
+        elif hasattr(p, u'__iter__') and not isinstance(p, RangeDecl):
+            if not isContextItemIndependent(p):
+                return False
+        else:
+            return False
+    return True
+
 def clearProg(exprStack):
     if exprStack:
         for p in exprStack:
             if isinstance(p, ProgHeader):
                 p.element = None
+                p.compiledProg = None
                 break
         del exprStack[:]
     
@@ -807,103 +934,6 @@ def clearNamedProgs(ownerObject, progsListName):
     for prog in ownerObject.getattr(progsListName, []):
         clearProg(prog)
 
-u'''
-pyOpForXPathOp = {
-    '+': '+', '-':'-', '*':'*', ',':',',
-    'div': '/', 'idiv': '/', 'mod':'%', 
-    'gt': '>', 'ge': '>=', 'eq':'==', 'ne':'!=', 'lt':'<', 'le':'<=',
-    '>': '>', '>=': '>=', '=':'==', '!=':'!=', '<':'<', '<=':'<=',
-    }
-pyGeneratorExprOp = { 'for':'flatten(tuple(', 'some':'any(', 'every':'all('}
-pyGeneratorExprEnd = { 'for':'))', 'some':')', 'every':')'}
-
-def compile(exprStack, code, inScopeVars=None):
-    if inScopeVars is None: inScopeVars = []
-    codeStartIndex = len(code)
-    for p in exprStack:
-        if isinstance(p,_STR_BASE):
-            code.append(p.__repr__())
-        elif isinstance(p,_NUM_TYPES):
-            code.append(str(p))
-        elif isinstance(p,VariableRef):
-            code.append((" {0} ","variables.get({0})")[p.name in inScopeVars].format(p.name))
-        elif isinstance(p,QNameDef):
-            code.append(" '{0}' ".format(p.name))
-        elif isinstance(p,OperationDef):
-            op = p.name
-            if isinstance(op, QNameDef):
-                code.append("{0}(".format(op.name))
-                compile(p.args, code)
-                code.append(")")
-            elif op in pyOpForXPathOp:
-                code.append(" {0} ".format(pyOpForXPathOp[p.name]))
-                compile(p.args, code)
-            elif op in ('u+', 'u-'):
-                code.append(" {0}".format(op[1]))
-                compile(p.args, code)
-            elif op == "sequence":
-                code.append('(')
-                compile(p.args, code)
-                code.append(')')
-            elif op == "predicate":
-                code.append('predicate(')
-                compile(p.args, code)
-                code.append(')')
-            elif op == "range":
-                code.insert(codeStartIndex, 'range(')
-                code.append(', ')
-                compile(p.args, code)
-                code.append(' + 1 )')
-            elif op in pyGeneratorExprOp: # for, some, every
-                code.append('{0}'.format(pyGeneratorExprOp[op]))
-                rangeVars = tuple(rv.rangeVar.name for rv in p.args[0:-1])
-                # operation has all in-scope variables
-                for rv in rangeVars: inScopeVars.append(rv)
-                compile(p.args[-1:], code)   # return expression
-                for rv in rangeVars: inScopeVars.remove(rv)
-                # for clauses have prior in-scope variables
-                for i in range(len(p.args) - 1):
-                    if i > 0: inScopeVars.append(rangeVars[i-1])
-                    compile(p.args[i:i+1], code) # for expression
-                for i in range(len(p.args) - 2): inScopeVars.remove(rangeVars[i])
-                code.append(pyGeneratorExprEnd[op])
-            elif op == "pathRoot":
-                code.append(" self.stepAxis(self.inputXbrlInstance.xmlRootElement) ")
-                compile(p.args, code)
-            elif op == "/":
-                code.append(" .stepAxis('child::' ")
-                compile(p.args, code)
-                code.append(" )")
-            elif op == "//":
-                code.append(" .stepAxis('descendant::' ")
-                compile(p.args, code)
-                code.append(" )")
-        elif isinstance(p,OpDef):
-            op = p.name
-            if op in pyOpForXPathOp:
-                code.append("{0}".format(pyOpForXPathOp[p.name]))
-        elif isinstance(p,RangeDecl):
-            code.append(' for {0} in '.format(p.rangeVar.name))
-            compile(p.bindingSeq, code)
-        elif isinstance(p,Expr):
-            if p.name in ("return","satisfies"):
-                compile(p.expr, code)
-'''
-                
-def codeModule(code):
-    return \
-        u'''
-        def flatten(x):
-            result = []
-            for el in x:
-                if hasattr(el, "__iter__") and not isinstance(el, basestring):
-                    result.extend(flatten(el))
-                else:
-                    result.append(el)
-            return result
-        ''' + \
-        u''.join(code)
-
 def parser_unit_test():
     #initialize
     xpathExpr.parseString( u"0", parseAll=True )
@@ -1052,11 +1082,6 @@ def parser_unit_test():
         if len(L)==0 or L[0] != u'Parse Failure':
             if debug_flag: 
                 log.append(u"exprStack={0}".format(exprStack))
-                u'''
-                code = []
-                compile(exprStack, code)
-                print ("code=", ''.join(code))
-                '''
             # calculate result , store a copy in ans , display the result to user
             u'''
             result=evaluateStack(exprStack)
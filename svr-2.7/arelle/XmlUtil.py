@@ -724,6 +724,8 @@ def xpointerElement(modelDocument, fragmentIdentifier):
     return None
 
 def elementFragmentIdentifier(element):
+    if not isinstance(element,etree._Element) and hasattr(element, u"fragmentIdentifier"): # e.g., fact of a FactStore
+        return element.fragmentIdentifier
     if isinstance(element,etree.ElementBase) and element.get(u'id'):
         return element.get(u'id')  # "short hand pointer" for element fragment identifier
     else:
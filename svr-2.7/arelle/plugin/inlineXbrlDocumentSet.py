@@ -11,7 +11,7 @@ Saves extracted instance document.
 '''
 from arelle import ModelXbrl, ValidateXbrlDimensions, XmlUtil, XbrlConst
 from arelle.PrototypeDtsObject import LocPrototype
-from arelle.ModelDocument import ModelDocument, ModelDocumentReference, Type, load
+from arelle.ModelDocument import ModelDocument, ModelDocumentReference, Type, load, parseDocuments
 import os
 
 class ModelInlineXbrlDocumentSet(ModelDocument):
@@ -22,7 +22,12 @@ class ModelInlineXbrlDocumentSet(ModelDocument):
             self.targetDocumentId = targetId
             self.targetDocumentPreferredFilename = instanceElt.get('preferredFilename')
             self.targetDocumentSchemaRefs = set()  # union all the instance schemaRefs
-            for ixbrlElt in instanceElt.iter(tag="{http://disclosure.edinet-fsa.go.jp/2013/manifest}ixbrl"):
+            ixbrlElts = [ixbrlElt
+                         for ixbrlElt in instanceElt.iter(tag="{http://disclosure.edinet-fsa.go.jp/2013/manifest}ixbrl")
+                         if ixbrlElt.textValue.strip()]
+            # parse the inline documents concurrently (if parseThreads) before discovering them in order
+            parseDocuments(self.modelXbrl, [ixbrlElt.textValue.strip() for ixbrlElt in ixbrlElts], base=self.filepath)
+            for ixbrlElt in ixbrlElts:
                 uri = ixbrlElt.textValue.strip()
                 if uri:
                     doc = load(self.modelXbrl, uri, base=self.filepath, referringElement=instanceElt)
@@ -13,12 +13,15 @@ Calls these plug-in classes:
    Streaming.Start(modelXbrl): notifies that streaming is starting for modelXbrl; simulated modelDocument is established
    Streaming.ValidateFacts(modelXbrl, modelFacts) modelFacts are available for streaming processing
    Streaming.Finish(modelXbrl): notifies that streaming is finished
+
+When validating with calculation LB validation, calculation inconsistencies are determined from partial sums of
+each batch of facts (ValidateXbrlCalcs.StreamingValidateXbrlCalcs) and reported when streaming is finished.
 '''
 
 import io, os, time, sys, re, gc
 from decimal import Decimal, InvalidOperation
 from lxml import etree
-from arelle import XbrlConst, XmlUtil, XmlValidate, ValidateXbrlDimensions
+from arelle import XbrlConst, XmlUtil, XmlValidate, ValidateXbrlDimensions, ValidateXbrlCalcs
 from arelle.ModelDocument import ModelDocument, Type
 from arelle.ModelObjectFactory import parser
 from arelle.ModelObject import ModelObject
@@ -216,8 +219,6 @@ def streamingExtensionsLoader(modelXbrl, mappedUri, filepath, **kwargs):
             incompatibleValidations.append("GFM")
         if _validateDisclosureSystem and _disclosureSystem.HMRC:
             incompatibleValidations.append("HMRC")
-        if modelXbrl.modelManager.validateCalcLB:
-            incompatibleValidations.append("calculation LB")
         if incompatibleValidations:
             modelXbrl.error("streamingExtensions:incompatibleValidation",
                     _("Streaming instance validation does not support %(incompatibleValidations)s validation"),
@@ -246,6 +247,7 @@ def streamingExtensionsLoader(modelXbrl, mappedUri, filepath, **kwargs):
     if _streamingExtensionsValidate:
         validator = Validate(modelXbrl)
         instValidator = validator.instValidator
+    calcsValidator = None # StreamingValidateXbrlCalcs when DTS is loaded, if validating calculations
 
     contextBuffer = []
     contextsToDrop = []
@@ -560,6 +562,9 @@ def streamingExtensionsLoader(modelXbrl, mappedUri, filepath, **kwargs):
                         beforeInstanceStream = False
                         if _streamingExtensionsValidate:
                             instValidator.validate(modelXbrl, modelXbrl.modelManager.formulaOptions.typedParameters())
+                            if modelXbrl.modelManager.validateCalcLB:
+                                calcsValidator = ValidateXbrlCalcs.StreamingValidateXbrlCalcs(
+                                                    modelXbrl, inferDecimals=modelXbrl.modelManager.validateInferDecimals)
                         else: # need default dimensions
                             ValidateXbrlDimensions.loadDimensionDefaults(modelXbrl)
                 elif not beforeInstanceStream and beforeStartStreamingPlugin:
@@ -667,6 +672,8 @@ def streamingExtensionsLoader(modelXbrl, mappedUri, filepath, **kwargs):
                                         modelXbrl.error("streamingExtensions:xbrlFactsCheckError",
                                                 _("Invalid sum-of-md5s %(sumOfMd5)s"),
                                                 modelObject=modelXbrl, sumOfMd5=_matchGroups[1])
+                    if calcsValidator is not None:
+                        calcsValidator.finish()
                     if _streamingValidateFactsPlugin:
                         for pluginMethod in pluginClassMethods("Streaming.ValidateFinish"):
                             pluginMethod(instValidator)
@@ -710,6 +717,8 @@ def streamingExtensionsLoader(modelXbrl, mappedUri, filepath, **kwargs):
                         instValidator.checkFacts(factsToCheck)
                         if modelXbrl.hasXDT:
                             instValidator.checkFactsDimensions(factsToCheck)
+                        if calcsValidator is not None:
+                            calcsValidator.validateFacts(factsToCheck)
                     if _streamingFactsPlugin or _streamingValidateFactsPlugin:
                         # plugin attempts to process batch of all root facts not yet processed (not just current one)
                         # use batches of 1000 facts
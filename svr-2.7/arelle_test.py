@@ -30,6 +30,9 @@ In order to use SVN tests, you will need an XII user name and password (in [DEFA
 To get a standard xml file out of the test run, add --junittests=foo.xml, e.g.:
 
 c:arelleSrcTopDirectory> \python32\scripts\py.test --tests=myIniWithPassword.ini -junittests=foo.xml
+
+To validate the testcases of a section's testcases index in parallel worker processes, add an option
+testcaseWorkers = N to the section (testReportCols = ... Duration reports seconds per variation).
  
 '''
 
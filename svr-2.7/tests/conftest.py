@@ -0,0 +1,104 @@
+u'''
+Fixtures of the unit tests in this directory, which load the small DTSes and instances of
+tests/data by CntlrCmdLine.parseAndRun (as arelle_test.py does for the conformance suites).
+
+Run them from the directory of arelle_test.py:
+
+$ py.test tests
+
+They run offline, with a configuration directory of their own whose web cache has the minimal copies of the
+XBRL 2.1 and XDT schemas of tests/data/cache.
+'''
+import os, io, shutil, logging, wsgiref.util
+import pytest
+from arelle.CntlrCmdLine import parseAndRun
+
+dataDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), u"data")
+
+@pytest.fixture(scope=u"session", autouse=True)
+def xdgConfigHome(tmpdir_factory):
+    u''' sets XDG_CONFIG_HOME of the controllers of the tests to a temporary directory, whose arelle/cache
+        is a copy of tests/data/cache (so user configuration and web cache do not affect the tests)
+    '''
+    configHomeDir = unicode(tmpdir_factory.mktemp(u"xdgConfigHome"))
+    shutil.copytree(os.path.join(dataDir, u"cache"), os.path.join(configHomeDir, u"arelle", u"cache"))
+    priorConfigHomeDir = os.environ.get(u"XDG_CONFIG_HOME")
+    os.environ[u"XDG_CONFIG_HOME"] = configHomeDir
+    yield configHomeDir
+    if priorConfigHomeDir is None:
+        del os.environ[u"XDG_CONFIG_HOME"]
+    else:
+        os.environ[u"XDG_CONFIG_HOME"] = priorConfigHomeDir
+
+@pytest.fixture
+def dataFile():
+    u''' returns the path of a file of tests/data, e.g. dataFile("rels", "rels.xml") '''
+    def dataFilePath(*names):
+        return os.path.join(dataDir, *names)
+    return dataFilePath
+
+@pytest.fixture
+def runArelle():
+    u''' runs Arelle with command line options, keeping loaded models open (offline, logging to a buffer),
+        returning its controller; the loaded models are closed after the test
+    '''
+    cntlrs = []
+    def run(*args):
+        success, modelXbrl, g = parseAndRun([u"--keepOpen", u"--logFile", u"logToBuffer", 
+                                             u"--internetConnectivity", u"offline"] + list(args))
+        cntlr = modelXbrl.modelManager.cntlr
+        cntlrs.append(cntlr)
+        return cntlr
+    yield run
+    for cntlr in cntlrs:
+        for modelXbrl in list(cntlr.modelManager.loadedModelXbrls):
+            cntlr.modelManager.close(modelXbrl)
+        logging.getLogger(u"arelle").removeHandler(cntlr.logHandler)
+
+@pytest.fixture
+def xpathEvaluate():
+    u''' evaluates an XPath expression with the in-scope namespaces of the instance root element,
+        compiled (or interpreted if interpretXPath), returning the result sequence
+    '''
+    from arelle import XPathParser, XPathContext
+    from arelle.ModelFormulaObject import Trace
+    def evaluate(modelXbrl, expression, interpretXPath=False):
+        element = modelXbrl.modelDocument.xmlRootElement
+        XPathParser.initializeParser(modelXbrl.modelManager)
+        prog = XPathParser.parse(element, expression, element, u"test", Trace.VARIABLE)
+        assert prog is not None and not modelXbrl.errors, modelXbrl.errors
+        xc = XPathContext.create(modelXbrl)
+        xc.compiledXPath = not interpretXPath
+        try:
+            return xc.flattenSequence(xc.evaluate(prog))
+        finally:
+            xc.close()
+    return evaluate
+
+@pytest.fixture
+def webServer():
+    u''' starts the web server as a wsgi application, offline, with web server options, e.g. webServer("--webserverJobQueue", "1"),
+        returning a function making a request of it, request(method, path, query, body, contentType), which returns the http
+        status and the response body bytes; the job queue of the web server is closed after the test
+    '''
+    from arelle import CntlrWebMain
+    def start(*args):
+        app = parseAndRun([u"--webserver=::wsgi", u"--internetConnectivity", u"offline"] + list(args))
+        app.catchall = False
+        def request(method, path, query=u"", body=b"", contentType=u""):
+            environ = {}
+            wsgiref.util.setup_testing_defaults(environ)
+            environ.update(REQUEST_METHOD=method, PATH_INFO=path, QUERY_STRING=query, 
+                           CONTENT_LENGTH=unicode(len(body)), CONTENT_TYPE=contentType)
+            environ[u"wsgi.input"] = io.BytesIO(body)
+            statuses = []
+            def start_response(status, headers, exc_info=None):
+                statuses.append(status)
+            responseBody = b"".join(app(environ, start_response))
+            return int(statuses[0].partition(u" ")[0]), responseBody
+        return request
+    yield start
+    if CntlrWebMain.jobQueue is not None:
+        CntlrWebMain.jobQueue.close()
+        CntlrWebMain.jobQueue = None
+        logging.getLogger(u"arelle").removeHandler(CntlrWebMain.cntlr.logHandler)
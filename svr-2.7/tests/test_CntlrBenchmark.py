@@ -0,0 +1,79 @@
+u'''
+Tests of the benchmark controller's merging of the runs of the filings of a corpus (CntlrBenchmark.runCorpus,
+with the runs of filings given by the test instead of run in benchmark processes) and its comparison of
+results to a baseline (CntlrBenchmark.compare).
+'''
+import os, json, logging
+import pytest
+from arelle.CntlrBenchmark import CntlrBenchmark
+
+@pytest.fixture
+def cntlr():
+    cntlr = CntlrBenchmark()
+    yield cntlr
+    logging.getLogger(u"arelle").removeHandler(cntlr.logHandler)
+
+def filingResults(times, peakMemory=1000, errors=0, exception=None):
+    return {u"runs": 1, u"exception": exception, u"errors": errors, u"peakMemory": peakMemory, u"times": times}
+
+def test_runCorpusBestOfRuns(cntlr, tmpdir, capsys):
+    corpusFile = tmpdir.join(u"corpus.json")
+    corpusFile.write(json.dumps({u"options": [u"--calcDecimals"],
+                                 u"filings": [{u"name": u"a", u"file": u"a.xml", u"options": [u"--efm"], u"repeat": 3},
+                                              {u"name": u"b", u"file": u"b.xml"},
+                                              {u"file": u"c.xml", u"repeat": 3}]}))
+    runs = {u"a.xml": [filingResults({u"load": 2.0, u"total": 3.0}, 900),
+                       filingResults({u"load": 1.0, u"total": 4.0}, 1100),
+                       filingResults({u"load": 3.0, u"total": 5.0, u"formula": 1.0}, 1000)],
+            u"b.xml": [filingResults({u"load": 1.0}, 500)],
+            u"c.xml": [filingResults({}, 0, exception=u"IOError: no c.xml")]} # failed runs are not repeated
+    runArgs = []
+    def runFiling(args, timeout=None):
+        runArgs.append(args)
+        return runs[os.path.basename(args[1])].pop(0)
+    cntlr.runFiling = runFiling
+    results = cntlr.runCorpus(unicode(corpusFile), repeat=1)
+    assert runArgs[0] == [u"-f", unicode(tmpdir.join(u"a.xml")), u"-v", u"--calcDecimals", u"--efm"] # corpus, then filing options
+    assert len(runArgs) == 5 and not any(runs.values())
+    a, b, c = (results[u"filings"][name] for name in (u"a", u"b", u"c.xml"))
+    assert a[u"runs"] == 3 and dict(a[u"times"]) == {u"load": 1.0, u"total": 3.0, u"formula": 1.0} and a[u"peakMemory"] == 900
+    assert list(a[u"times"]) == [u"formula", u"load", u"total"]
+    assert b[u"runs"] == 1 and dict(b[u"times"]) == {u"load": 1.0}
+    assert c[u"runs"] == 1 and c[u"exception"] == u"IOError: no c.xml"
+    out = capsys.readouterr()[0]
+    assert u"[benchmark:status] benchmarking a, run 3" in out
+    assert u"[benchmark:filing] a total 3.000 secs, peak memory 900K, 0 errors" in out
+    assert u"[benchmark:failed] c.xml failed: IOError: no c.xml" in out
+
+def test_compare(cntlr, capsys):
+    baseline = {u"filings": {u"a": filingResults({u"load": 1.0, u"validate": 2.0, u"formula": 0.05, u"total": 3.0}, 1000),
+                             u"b": filingResults({u"load": 1.0}, 1000, errors=2),
+                             u"c": filingResults({u"load": 1.0}),
+                             u"d": filingResults({}, 0, exception=u"failed")}}
+    results = {u"filings": {u"a": filingResults({u"load": 1.19, # within threshold
+                                                 u"validate": 2.5, # regressed
+                                                 u"formula": 0.5, # baseline below minTime, not compared
+                                                 u"total": 4.0}, # regressed
+                                                1300), # regressed
+                            u"b": filingResults({u"load": 0.5}, 1100, errors=3), # errors changed
+                            u"c": filingResults({}, 0, exception=u"failed"), # failed
+                            u"d": filingResults({u"load": 1.0}), # no baseline results
+                            u"e": filingResults({u"load": 1.0})}}
+    assert cntlr.compare(results, baseline) == 5
+    out = capsys.readouterr()[0]
+    assert u"[benchmark:timeRegression] a validate 2.500 secs, baseline 2.000 secs (1.25x)" in out
+    assert u"[benchmark:timeRegression] a total 4.000 secs, baseline 3.000 secs (1.33x)" in out
+    assert u"a load" not in out and u"a formula" not in out
+    assert u"[benchmark:memoryRegression] a peak memory 1300K, baseline 1000K" in out
+    assert u"[benchmark:errorsChanged] b 3 errors, baseline 2 errors" in out
+    assert u"b peak memory" not in out and u"c " not in out
+    assert u"[benchmark:noBaseline] d has no baseline results" in out and u"[benchmark:noBaseline] e has" in out
+    assert u"[benchmark:compared] 5 regressions from baseline" in out
+
+def test_compareThresholds(cntlr):
+    baseline = {u"filings": {u"a": filingResults({u"load": 1.0, u"formula": 0.05}, 1000)}}
+    results = {u"filings": {u"a": filingResults({u"load": 1.4, u"formula": 0.5}, 1300)}}
+    assert cntlr.compare(results, baseline) == 2
+    assert cntlr.compare(results, baseline, timeThreshold=1.5, memoryThreshold=1.5) == 0
+    assert cntlr.compare(results, baseline, timeThreshold=1.5, memoryThreshold=1.5, minTime=0.01) == 1
+    assert cntlr.compare(results, results) == 0
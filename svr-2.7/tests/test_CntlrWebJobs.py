@@ -0,0 +1,96 @@
+u'''
+Tests of asynchronous jobs of the web server (CntlrWebJobs, /rest/jobs), which are submitted, polled for status,
+whose log entries are streamed, and whose result must be that of the synchronous request, and of the job queue,
+which refuses jobs as busy (http status 503) while too many jobs are waiting to be processed.
+'''
+import json, time, threading, urllib
+import pytest
+from arelle import CntlrWebMain
+
+def waitFinished(request, jobId, timeout=30.0):
+    startedAt = time.time()
+    while True:
+        status, body = request(u"GET", u"/rest/jobs/" + jobId)
+        assert status == 200
+        jobStatus = json.loads(body)
+        if jobStatus[u"status"] in (u"completed", u"failed") or time.time() - startedAt > timeout:
+            return jobStatus
+        time.sleep(0.05)
+
+def messageEntries(entries):
+    # variable sets are evaluated in no particular order, not timings, nor the time and object ids of each run
+    return sorted((entry[u"code"], entry[u"level"], entry[u"message"][u"text"].partition(u" [")[2],
+                   [(ref[u"href"], ref.get(u"sourceLine")) for ref in entry[u"refs"]])
+                  for entry in entries if entry[u"code"] not in (u"", u"info"))
+
+def test_jobSubmitPollLogResult(webServer, dataFile):
+    request = webServer()
+    query = urllib.urlencode({u"file": dataFile(u"formula", u"formula.xml"), u"media": u"json", u"formulaAsserResultCounts": u""})
+    status, body = request(u"GET", u"/rest/xbrl/validation", query)
+    assert status == 200
+    synchronousEntries = json.loads(body)[u"log"]
+    status, body = request(u"POST", u"/rest/jobs", query)
+    assert status == 202
+    submitted = json.loads(body)
+    assert submitted[u"status"] in (u"queued", u"running", u"completed") and submitted[u"submitted"]
+    jobStatus = waitFinished(request, submitted[u"id"])
+    assert jobStatus[u"status"] == u"completed" and jobStatus[u"successful"] is True
+    assert jobStatus[u"queued"] is None and jobStatus[u"finished"] and jobStatus[u"elapsed"] >= 0
+    # log entries, as produced, of the job
+    status, body = request(u"GET", u"/rest/jobs/{0}/log".format(submitted[u"id"]), u"media=json")
+    assert status == 200
+    logEntries = [json.loads(line) for line in body.decode(u"utf-8").splitlines()]
+    assert len(logEntries) == jobStatus[u"entries"] > 0
+    status, body = request(u"GET", u"/rest/jobs/{0}/log".format(submitted[u"id"]), u"start=2")
+    assert status == 200
+    assert body.decode(u"utf-8").splitlines() == [entry[u"message"][u"text"].rstrip() for entry in logEntries[2:]]
+    # result, as of the synchronous request
+    status, body = request(u"GET", u"/rest/jobs/{0}/result".format(submitted[u"id"]))
+    assert status == 200
+    resultEntries = json.loads(body)[u"log"]
+    assert messageEntries(resultEntries) == messageEntries(synchronousEntries)
+    assert messageEntries(logEntries) == messageEntries(synchronousEntries)
+    assert len([entry for entry in resultEntries if entry[u"code"] == u"formula:trace"]) == 17 # assertion result counts
+    for path in (u"/rest/jobs/unknown", u"/rest/jobs/unknown/log", u"/rest/jobs/unknown/result"):
+        assert request(u"GET", path)[0] == 404
+    status, body = request(u"POST", u"/rest/jobs", u"media=json")
+    assert status == 400 # no file
+
+def test_jobQueueFull(webServer, dataFile, monkeypatch):
+    request = webServer(u"--webserverJobQueue", u"1")
+    jobQueue = CntlrWebMain.jobQueue
+    assert jobQueue.maxQueued == 1
+    jobsStarted = []
+    release = threading.Event()
+    def runJob(job):
+        jobsStarted.append(job.id)
+        release.wait(30)
+        job.finish(True, u"result of {0}".format(job.id), u"text/plain; charset=UTF-8")
+    monkeypatch.setattr(jobQueue, u"runJob", runJob)
+    query = urllib.urlencode({u"file": dataFile(u"formula", u"formula.xml"), u"media": u"text"})
+    status, body = request(u"POST", u"/rest/jobs", query)
+    assert status == 202
+    running = json.loads(body)[u"id"]
+    for i in _RANGE(100):
+        if jobsStarted:
+            break
+        time.sleep(0.05)
+    assert jobsStarted == [running]
+    status, body = request(u"POST", u"/rest/jobs", query)
+    assert status == 202
+    queued = json.loads(body)[u"id"]
+    status, body = json.loads(request(u"GET", u"/rest/jobs/" + queued)[1])[u"status"], None
+    assert status == u"queued"
+    # the queue is full, the job is refused as busy and not kept
+    status, body = request(u"POST", u"/rest/jobs", query)
+    assert status == 503
+    assert b"job queue is full" in body
+    assert len(jobQueue.jobs) == 2
+    assert request(u"GET", u"/rest/jobs/{0}/result".format(queued))[0] == 202 # not finished
+    release.set()
+    for jobId in (running, queued):
+        assert waitFinished(request, jobId)[u"status"] == u"completed"
+        assert request(u"GET", u"/rest/jobs/{0}/result".format(jobId)) == (200, u"result of {0}".format(jobId).encode(u"utf-8"))
+    # finished jobs keep no posted zip file, and no longer fill the queue
+    assert all(job.sourceZip is None for job in jobQueue.jobs.values())
+    assert request(u"POST", u"/rest/jobs", query)[0] == 202
@@ -0,0 +1,78 @@
+u'''
+Tests of the web server worker pool (CntlrWebWorkers), whose worker processes, each with its own controller,
+must produce the results of the web server's own controller, for requests dispatched concurrently to the
+workers, for views written back to the requesting process, and for jobs whose log entries are streamed.
+'''
+import os, json, threading, urllib
+import pytest
+from arelle import CntlrWebMain
+from arelle.CntlrWebWorkers import WorkerPool
+from test_CntlrWebJobs import waitFinished, messageEntries
+
+pytestmark = pytest.mark.skipif(not hasattr(os, u"fork"), reason=u"worker processes are forked with the test's configuration")
+
+@pytest.fixture
+def workerPool(monkeypatch):
+    workerPools = []
+    def start(*args, **kwargs):
+        workerPool = WorkerPool(*args, **kwargs)
+        workerPools.append(workerPool)
+        monkeypatch.setattr(CntlrWebMain, u"workerPool", workerPool)
+        return workerPool
+    yield start
+    for workerPool in workerPools:
+        workerPool.close()
+
+def test_workerPoolResultsOfInProcessRequests(webServer, workerPool, dataFile):
+    request = webServer()
+    fileName = dataFile(u"formula", u"formula.xml")
+    validationQuery = urllib.urlencode({u"file": fileName, u"media": u"json", u"formulaAsserResultCounts": u""})
+    viewQuery = urllib.urlencode({u"file": fileName, u"media": u"json", u"view": u"facts"})
+    # by the web server's controller
+    status, body = request(u"GET", u"/rest/xbrl/validation", validationQuery)
+    assert status == 200
+    inProcessEntries = messageEntries(json.loads(body)[u"log"])
+    assert len([entry for entry in inProcessEntries if entry[0] == u"formula:trace"]) == 17 # assertion result counts
+    status, inProcessView = request(u"GET", u"/rest/xbrl/view", viewQuery)
+    assert status == 200 and inProcessView
+    # by worker processes, concurrently
+    pool = workerPool(2, maxQueued=4)
+    assert all(worker.process.pid != os.getpid() for worker in pool.workers)
+    assert len(set(worker.process.pid for worker in pool.workers)) == 2
+    responses = [None] * 4
+    def requestValidation(i):
+        responses[i] = request(u"GET", u"/rest/xbrl/validation", validationQuery)
+    threads = [threading.Thread(target=requestValidation, args=(i,)) for i in _RANGE(len(responses))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(60)
+    for status, body in responses:
+        assert status == 200
+        assert messageEntries(json.loads(body)[u"log"]) == inProcessEntries
+    # view file of the worker is written back to the request's view file
+    assert request(u"GET", u"/rest/xbrl/view", viewQuery) == (200, inProcessView)
+    assert sum(worker.jobs for worker in pool.workers) == 5
+
+def test_workerPoolJob(webServer, workerPool, dataFile):
+    request = webServer()
+    query = urllib.urlencode({u"file": dataFile(u"formula", u"formula.xml"), u"media": u"json", u"formulaAsserResultCounts": u""})
+    status, body = request(u"GET", u"/rest/xbrl/validation", query)
+    assert status == 200
+    inProcessEntries = messageEntries(json.loads(body)[u"log"])
+    pool = workerPool(1)
+    status, body = request(u"POST", u"/rest/jobs", query)
+    assert status == 202
+    jobId = json.loads(body)[u"id"]
+    jobStatus = waitFinished(request, jobId)
+    assert jobStatus[u"status"] == u"completed" and jobStatus[u"successful"] is True
+    # log entries streamed from the worker as produced
+    status, body = request(u"GET", u"/rest/jobs/{0}/log".format(jobId), u"media=json")
+    assert status == 200
+    logEntries = [json.loads(line) for line in body.decode(u"utf-8").splitlines()]
+    assert len(logEntries) == jobStatus[u"entries"] > 0
+    assert messageEntries(logEntries) == inProcessEntries
+    status, body = request(u"GET", u"/rest/jobs/{0}/result".format(jobId))
+    assert status == 200
+    assert messageEntries(json.loads(body)[u"log"]) == inProcessEntries
+    assert pool.workers[0].jobs == 1
@@ -0,0 +1,35 @@
+u'''
+Tests of instances attaching a cached DTS (DtsCache), whose validation messages must be those of an instance
+discovering the DTS, including the messages of compiling the formula linkbases of the DTS (in formula-err-frm.xml,
+XPath syntax errors) and the assertion results of its formulae.
+'''
+import pytest
+from arelle.DtsCache import DtsCache
+
+def validationMessages(cntlr, modelXbrl):
+    # variable sets are evaluated in no particular order
+    messages = sorted(line for line in cntlr.logHandler.getLines() if not line.startswith((u"[info]", u"[] "))) # not timings
+    return messages, sorted(error for error in modelXbrl.errors if isinstance(error, _STR_BASE)) # not assertion results
+
+@pytest.mark.parametrize(u"instance", (u"formula-err.xml", u"formula.xml"))
+def test_cachedFormulaDtsMessagesEqualUncached(runArelle, dataFile, instance):
+    cntlr = runArelle(u"--file", dataFile(u"formula", instance), u"--validate", u"--formulaAsserResultCounts")
+    modelManager = cntlr.modelManager
+    uncached = validationMessages(cntlr, modelManager.modelXbrl)
+    modelManager.close()
+    modelManager.dtsCache = DtsCache(modelManager)
+    for attachment in _RANGE(3):
+        modelXbrl = modelManager.load(dataFile(u"formula", instance))
+        assert modelXbrl.dtsCacheEntry is not None
+        modelManager.validate()
+        assert validationMessages(cntlr, modelXbrl) == uncached
+        modelManager.close(modelXbrl)
+    stats = modelManager.dtsCache.stats()
+    assert stats[u"misses"] == 1 and stats[u"hits"] == 2
+    modelManager.dtsCache.clear()
+    messages, errors = uncached
+    if instance == u"formula-err.xml":
+        assert errors == [u"err:XPST0003", u"err:XPST0003"]
+    else:
+        assert not errors
+        assert u"[formula:trace] Value Assertion sum evaluations : 5 satisfied, 3 not satisfied - formula-frm.xml 15" in messages
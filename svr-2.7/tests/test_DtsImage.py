@@ -0,0 +1,69 @@
+u'''
+Tests of saving the DTS of an instance to a DTS image (--saveDTSImage) and loading it (--loadDTSImage), which
+must give the same concepts, labels and relationship sets as discovery of the DTS.
+'''
+import pickle
+import py, pytest
+from arelle import XbrlConst
+from arelle.ModelValue import DateTime, dateTime, time, dayTimeDuration
+
+ELRS = (None, XbrlConst.defaultLinkRole, u"http://example.com/role/r1", u"http://example.com/role/r2")
+ARCROLES = (XbrlConst.parentChild, XbrlConst.generalSpecial, XbrlConst.essenceAlias, XbrlConst.conceptLabel)
+
+def dtsProperties(modelXbrl):
+    concepts = dict((qname, (concept.id, concept.typeQname, concept.periodType, concept.balance, concept.isAbstract,
+                             concept.substitutionGroupQname, concept.isNumeric, concept.isMonetary, concept.niceType,
+                             concept.label(lang=u"en"), concept.label(lang=u"de"),
+                             concept.label(XbrlConst.terseLabel, lang=u"en", fallbackToQname=False)))
+                    for qname, concept in modelXbrl.qnameConcepts.items())
+    relationshipSets = dict(((arcrole, elr), [(rel.fromModelObject.qname,
+                                               getattr(rel.toModelObject, u"qname", None) or rel.toModelObject.textValue,
+                                               rel.linkrole, rel.order, rel.priority, rel.arcElement.sourceline,
+                                               rel.modelDocument.basename)
+                                              for rel in modelXbrl.relationshipSet(arcrole, elr).modelRelationships])
+                            for arcrole in ARCROLES
+                            for elr in ELRS)
+    facts = [(fact.qname, fact.contextID, fact.unitID, fact.xValue, fact.isNil) for fact in modelXbrl.facts]
+    return (concepts, relationshipSets, facts, sorted(modelXbrl.roleTypes), sorted(modelXbrl.langs),
+            sorted(doc.basename for doc in modelXbrl.urlDocs.values()))
+
+def test_dtsImageRoundTrip(runArelle, dataFile, tmpdir):
+    imageFile = unicode(tmpdir.join(u"rels.dtsimage"))
+    cntlr = runArelle(u"--file", dataFile(u"rels", u"rels.xml"), u"--validate", u"--saveDTSImage", imageFile)
+    assert tmpdir.join(u"rels.dtsimage").check()
+    discovered = dtsProperties(cntlr.modelManager.modelXbrl)
+    discoveredErrors = cntlr.modelManager.modelXbrl.errors
+    cntlr = runArelle(u"--file", dataFile(u"rels", u"rels.xml"), u"--validate", u"--loadDTSImage", imageFile)
+    assert not any(u"dtsImageNot" in line for line in cntlr.logHandler.getLines())
+    assert cntlr.modelManager.dtsCache.stats()[u"hits"] == 1 # DTS was attached from the image
+    loaded = dtsProperties(cntlr.modelManager.modelXbrl)
+    assert loaded == discovered
+    assert cntlr.modelManager.modelXbrl.errors == discoveredErrors
+    concepts, relationshipSets = loaded[:2]
+    assert len(concepts) > 6 and relationshipSets[XbrlConst.parentChild, u"http://example.com/role/r1"]
+
+def test_dtsImageOfModifiedDocumentNotLoaded(runArelle, dataFile, tmpdir):
+    relsDir = tmpdir.join(u"rels")
+    py.path.local(dataFile(u"rels")).copy(relsDir)
+    imageFile = unicode(tmpdir.join(u"rels.dtsimage"))
+    runArelle(u"--file", unicode(relsDir.join(u"rels.xml")), u"--saveDTSImage", imageFile)
+    relsDir.join(u"rels-def.xml").setmtime(relsDir.join(u"rels-def.xml").mtime() + 10)
+    cntlr = runArelle(u"--file", unicode(relsDir.join(u"rels.xml")), u"--loadDTSImage", imageFile)
+    assert any(u"DTS image not loaded" in line for line in cntlr.logHandler.getLines())
+    assert cntlr.modelManager.modelXbrl.qnameConcepts # DTS was discovered
+
+@pytest.mark.parametrize(u"value", (
+    dateTime(u"2021-12-31", type=DateTime), # dateOnly
+    dateTime(u"2021-12-31", addOneDay=True, type=DateTime), # end of day as start of next day
+    dateTime(u"2021-12-31T10:11:12", type=DateTime),
+    time(u"24:00:00"), # hour24
+    time(u"10:11:12"),
+    dayTimeDuration(u"P3DT4H5M6S"),
+    dayTimeDuration(time(u"24:00:00")),
+    ))
+def test_dateTimeValuePickle(value):
+    for protocol in (0, pickle.HIGHEST_PROTOCOL):
+        loaded = pickle.loads(pickle.dumps(value, protocol))
+        assert type(loaded) is type(value) and loaded == value and str(loaded) == str(value)
+        for attr in (u"dateOnly", u"hour24"):
+            assert getattr(loaded, attr, None) == getattr(value, attr, None)
@@ -0,0 +1,129 @@
+u'''
+Tests of the fact store (FactStore.storeFacts), whose StoredFacts, StoredContexts and StoredUnits must have
+the properties of the ModelFacts, ModelContexts and ModelUnits they replace, and which releases the elements
+of the instance.
+'''
+import sys
+import pytest
+from lxml import etree
+from arelle import XmlUtil
+from arelle.FactStore import storeFacts, StoredFact, StoredContext, StoredUnit
+
+def factProperties(fact):
+    if isinstance(fact, StoredFact):
+        parent = fact.parentFact
+    else: # tuple of a nested fact
+        parent = fact.getparent()
+        if not getattr(parent, u"isTuple", False):
+            parent = None
+    return (fact.qname, fact.concept, fact.id, fact.sourceline, fact.contextID, fact.unitID,
+            fact.isItem, fact.isTuple, fact.isNumeric, fact.isFraction, fact.isNil, fact.xsiNil,
+            fact.decimals, fact.precision, fact.xmlLang, fact.value, fact.textValue, fact.xValue, type(fact.xValue),
+            XmlUtil.elementFragmentIdentifier(fact),
+            getattr(parent, u"qname", None),
+            [tupleFact.qname for tupleFact in fact.modelTupleFacts])
+
+def contextProperties(cntx):
+    return (cntx.id, cntx.sourceline, cntx.entityIdentifier, cntx.entityIdentifierHash, cntx.periodHash,
+            cntx.isStartEndPeriod, cntx.isInstantPeriod, cntx.isForeverPeriod,
+            cntx.startDatetime, cntx.endDatetime, cntx.instantDatetime,
+            dict((dimQname, dimValueProperties(dimValue)) for dimQname, dimValue in cntx.qnameDims.items()),
+            dict((dim.qname, dimValue.dimensionQname) for dim, dimValue in cntx.segDimValues.items()),
+            dict((dim.qname, dimValue.dimensionQname) for dim, dimValue in cntx.scenDimValues.items()),
+            sorted(cntx.dimAspects()))
+
+def dimValueProperties(dimValue):
+    return (dimValue.dimensionQname, dimValue.dimension, dimValue.isExplicit, dimValue.isTyped, dimValue.contextElement,
+            dimValue.memberQname if dimValue.isExplicit else (dimValue.typedMember.qname, dimValue.typedMember.stringValue),
+            dimValue.member if dimValue.isExplicit else None,
+            dimValue.propertyView if dimValue.isExplicit else None) # a stored typed member is only its qname and string value
+
+def unitProperties(unit):
+    return (unit.id, unit.sourceline, unit.measures, unit.hash, unit.isDivide, unit.isSingleMeasure, unit.value,
+            unit.propertyView)
+
+def instanceProperties(modelXbrl):
+    return ([fact.qname for fact in modelXbrl.facts],
+            dict((cntxID, contextProperties(cntx)) for cntxID, cntx in modelXbrl.contexts.items()),
+            dict((unitID, unitProperties(unit)) for unitID, unit in modelXbrl.units.items()),
+            dict((qname, sorted(fact.sourceline for fact in facts)) for qname, facts in modelXbrl.factsByQname.items()))
+
+@pytest.mark.parametrize(u"instance", ((u"rels", u"rels.xml"), (u"calc", u"calc.xml"), (u"dims", u"dims.xml")))
+def test_storedEqualsModelObjects(runArelle, dataFile, instance):
+    modelXbrl = runArelle(u"--file", dataFile(*instance), u"--validate").modelManager.modelXbrl
+    documentOrderFacts = [fact for fact in modelXbrl.modelDocument.xmlRootElement.iter()
+                          if fact in modelXbrl.factsInInstance]
+    modelFacts = [factProperties(fact) for fact in documentOrderFacts]
+    modelProperties = instanceProperties(modelXbrl)
+    store = storeFacts(modelXbrl)
+    assert store is not None and modelXbrl.factStore is store and storeFacts(modelXbrl) is store
+    assert [factProperties(fact) for fact in modelXbrl.factsInInstance] == modelFacts # in document order
+    assert instanceProperties(modelXbrl) == modelProperties
+    assert all(isinstance(cntx, StoredContext) for cntx in modelXbrl.contexts.values())
+    assert all(isinstance(unit, StoredUnit) for unit in modelXbrl.units.values())
+
+def test_storedFactsEquality(runArelle, dataFile):
+    modelXbrl = runArelle(u"--file", dataFile(u"calc", u"calc.xml")).modelManager.modelXbrl
+    storeFacts(modelXbrl)
+    fact = modelXbrl.factsInInstance[3]
+    assert fact == modelXbrl.factsInInstance[3] and hash(fact) == hash(modelXbrl.factsInInstance[3])
+    assert fact != modelXbrl.factsInInstance[4] and fact in modelXbrl.factsInInstance
+    tuples = [tupleFact for tupleFact in modelXbrl.facts if tupleFact.isTuple]
+    assert tuples and all(nestedFact not in modelXbrl.facts and nestedFact in modelXbrl.factsInInstance
+                          for tupleFact in tuples for nestedFact in tupleFact.modelTupleFacts)
+    assert list(modelXbrl.factsInInstance)[-1] == modelXbrl.factsInInstance[-1]
+    with pytest.raises(IndexError):
+        modelXbrl.factsInInstance[len(modelXbrl.factsInInstance)]
+
+def test_storedContextComparisons(runArelle, dataFile):
+    modelXbrl = runArelle(u"--file", dataFile(u"dims", u"dims.xml")).modelManager.modelXbrl
+    modelContexts = dict(modelXbrl.contexts)
+    dimQnames = set(dimQname for cntx in modelContexts.values() for dimQname in cntx.qnameDims)
+    defaultQnames = set(modelXbrl.qnameDimensionDefaults)
+    def comparisons(contexts):
+        return dict(((id1, id2), (cntx1.isPeriodEqualTo(cntx2), cntx1.isEntityIdentifierEqualTo(cntx2)))
+                    for id1, cntx1 in contexts.items() for id2, cntx2 in contexts.items())
+    def dimMembers(contexts):
+        return dict(((id, dimQname), (cntx.hasDimension(dimQname), cntx.dimMemberQname(dimQname),
+                                      cntx.dimMemberQname(dimQname, includeDefaults=True)))
+                    for id, cntx in contexts.items() for dimQname in dimQnames | defaultQnames)
+    modelComparisons, modelDimMembers = comparisons(modelContexts), dimMembers(modelContexts)
+    storeFacts(modelXbrl)
+    assert comparisons(modelXbrl.contexts) == modelComparisons
+    assert dimMembers(modelXbrl.contexts) == modelDimMembers
+
+def test_storeReleasesElements(runArelle, dataFile):
+    modelXbrl = runArelle(u"--file", dataFile(u"calc", u"calc.xml")).modelManager.modelXbrl
+    numFacts = len(modelXbrl.factsInInstance)
+    store = storeFacts(modelXbrl)
+    xbrlElement = modelXbrl.modelDocument.xmlRootElement
+    assert [elt.localName for elt in xbrlElement] == [u"schemaRef"]
+    assert [modelObject.localName for modelObject in modelXbrl.modelObjects
+            if getattr(modelObject, u"modelDocument", None) is modelXbrl.modelDocument and 
+            isinstance(modelObject, etree.ElementBase)] == [u"xbrl", u"schemaRef"]
+    assert u"tup1" not in modelXbrl.modelDocument.idObjects
+    assert len(store) == numFacts and modelXbrl.undefinedFacts == []
+    # columns of the facts (other than values) take tens of bytes a fact, not the KBs of an element and its model object
+    columnBytes = sum(sys.getsizeof(getattr(store, column))
+                      for column in (u"factQnames", u"factContexts", u"factUnits", u"factParents", u"factLangs",
+                                     u"factDecimals", u"factPrecisions", u"factSequences", u"factSourcelines",
+                                     u"factObjectIndexes", u"factFlags", u"factXValueKinds"))
+    assert columnBytes < 1000 + 64 * numFacts
+
+def test_storedObjectsKeepObjectIndexes(runArelle, dataFile):
+    modelXbrl = runArelle(u"--file", dataFile(u"dims", u"dims.xml")).modelManager.modelXbrl
+    documentOrderFacts = [fact for fact in modelXbrl.modelDocument.xmlRootElement.iter()
+                          if fact in modelXbrl.factsInInstance]
+    factObjectIndexes = [fact.objectIndex for fact in documentOrderFacts]
+    contextObjectIndexes = dict((id, cntx.objectIndex) for id, cntx in modelXbrl.contexts.items())
+    unitObjectIndexes = dict((id, unit.objectIndex) for id, unit in modelXbrl.units.items())
+    numModelObjects = len(modelXbrl.modelObjects)
+    storeFacts(modelXbrl)
+    assert len(modelXbrl.modelObjects) == numModelObjects
+    assert [fact.objectIndex for fact in modelXbrl.factsInInstance] == factObjectIndexes
+    for fact in modelXbrl.factsInInstance: # model object lookup resolves to the stored objects
+        assert modelXbrl.modelObjects[fact.objectIndex] == fact
+        assert modelXbrl.modelObject(fact.objectId()) == fact and modelXbrl.modelObject(fact.objectId(u"row")) == fact
+    for objects, objectIndexes in ((modelXbrl.contexts, contextObjectIndexes), (modelXbrl.units, unitObjectIndexes)):
+        assert dict((id, obj.objectIndex) for id, obj in objects.items()) == objectIndexes
+        assert all(modelXbrl.modelObject(obj.objectId()) is obj for obj in objects.values())
@@ -0,0 +1,111 @@
+u'''
+Tests of EIS and XFD archives (FileSource), whose entries are indexed on open and decoded when opened,
+the most recently opened kept in a cache bounded by ARCHIVE_ENTRY_CACHE_SIZE.
+'''
+import os, io, base64, struct, zlib
+import pytest
+from arelle import FileSource
+from arelle.FileSource import openFileSource, ArchiveFileIOError
+
+BOM = b"\xef\xbb\xbf"
+
+archiveEntries = [ # name, bytes (None for an entry without contents)
+    (u"a.xsd", b"<?xml version='1.0' encoding='utf-8'?><schema>\xc3\xa9t\xc3\xa9</schema>"),
+    (u"b.xml", BOM + b"<?xml version='1.0' encoding='utf-8'?><xbrl/>"),
+    (u"c.htm", b"<html>latin \xe9</html>"),
+    (u"d.txt", None),
+    (u"e.jpg", b"\x00\x01\x02\xff" * 16)]
+
+def writeEis(tmpdir, compressed):
+    envelope = u"".join(
+        u"<document><conformedName>{0}</conformedName>{1}</document>".format(
+            name, u"" if b is None else u"<contents>{0}</contents>".format(base64.b64encode(b).decode(u"latin-1")))
+        for name, b in archiveEntries)
+    xml = (u"<?xml version='1.0' encoding='utf-8'?>"
+           u"<edgarSubmission xmlns='http://www.sec.gov/edgar/common'>{0}</edgarSubmission>".format(envelope)
+           ).encode(u"utf-8")
+    if compressed: # chunks of 4 byte compressed length, 4 byte uncompressed length, zlib compressed bytes
+        data = b""
+        for i in _RANGE(0, len(xml), 256):
+            compressedBytes = zlib.compress(xml[i:i+256])
+            data += struct.pack(u">LL", len(compressedBytes), len(xml[i:i+256])) + compressedBytes
+    else:
+        data = xml
+    eisFile = tmpdir.join(u"submission.eis")
+    eisFile.write_binary(data)
+    return unicode(eisFile)
+
+def writeXfd(tmpdir):
+    entries = [(u"C:\\temp\\form.xml", b"<form/>")] + archiveEntries
+    xml = (u"<?xml version='1.0' encoding='utf-8'?><XFDL><globalpage>{0}</globalpage></XFDL>".format(u"".join(
+        u"<data><filename>{0}</filename>{1}</data>".format(
+            name, u"" if b is None else u"<mimedata>{0}</mimedata>".format(base64.b64encode(b).decode(u"latin-1")))
+        for name, b in entries))).encode(u"utf-8")
+    xfdFile = tmpdir.join(u"form.xfd")
+    xfdFile.write_binary(xml)
+    return unicode(xfdFile)
+
+@pytest.fixture(params=[u"eis", u"eisCompressed", u"xfd"])
+def archive(request, tmpdir):
+    if request.param == u"xfd":
+        fileSource = openFileSource(writeXfd(tmpdir))
+    else:
+        fileSource = openFileSource(writeEis(tmpdir, request.param == u"eisCompressed"))
+    fileSource.open()
+    yield fileSource
+    fileSource.close()
+
+def entryPath(fileSource, name):
+    return fileSource.basefile + os.sep + name
+
+def test_archiveDir(archive):
+    assert archive.isOpen
+    assert archive.isEis or archive.isXfd
+    # archive order, with entries without contents, without XFD drive letter file names
+    assert archive.dir == [name for name, b in archiveEntries]
+
+def test_archiveFile(archive):
+    b = archive.file(entryPath(archive, u"a.xsd"), binary=True)[0].read()
+    assert b == archiveEntries[0][1]
+    fh, encoding = archive.file(entryPath(archive, u"a.xsd"))
+    assert encoding == u"utf-8"
+    assert fh.read() == u"<?xml version='1.0' encoding='utf-8'?><schema>\xe9t\xe9</schema>"
+    fh, encoding = archive.file(entryPath(archive, u"c.htm"))
+    assert encoding == u"latin-1"
+    assert fh.read() == u"<html>latin \xe9</html>"
+    assert archive.file(entryPath(archive, u"e.jpg"), binary=True)[0].read() == archiveEntries[4][1]
+
+def test_archiveFileStripsBom(archive):
+    assert archive.file(entryPath(archive, u"b.xml"), binary=True)[0].read() == archiveEntries[1][1][3:]
+    fh, encoding = archive.file(entryPath(archive, u"b.xml"))
+    assert encoding == u"utf-8"
+    assert fh.read() == u"<?xml version='1.0' encoding='utf-8'?><xbrl/>"
+
+def test_archiveMissingFile(archive):
+    for name in (u"missing.xsd", u"d.txt"): # not in the archive, in the archive without contents
+        with pytest.raises(ArchiveFileIOError) as excinfo:
+            archive.file(entryPath(archive, name))
+        assert excinfo.value.fileName == name
+    assert archive.archiveEntryCacheSize == 0
+
+def test_archiveEntryCacheBounded(archive, monkeypatch):
+    monkeypatch.setattr(FileSource, u"ARCHIVE_ENTRY_CACHE_SIZE", 120)
+    sizes = dict((name, len(b) - (3 if b.startswith(BOM) else 0)) for name, b in archiveEntries if b is not None)
+    for name in (u"a.xsd", u"b.xml", u"a.xsd", u"c.htm", u"e.jpg", u"b.xml"):
+        archive.file(entryPath(archive, name), binary=True)
+        assert archive.archiveEntryCacheSize <= FileSource.ARCHIVE_ENTRY_CACHE_SIZE
+        assert archive.archiveEntryCacheSize == sum(len(b) for b in archive.archiveEntryCache.values())
+    # least recently used evicted first (a.xsd 60, b.xml 45, c.htm 20, e.jpg 64 bytes): b.xml by c.htm (reopened
+    # a.xsd being more recently used), a.xsd by e.jpg, c.htm by b.xml
+    assert list(archive.archiveEntryCache) == [u"e.jpg", u"b.xml"]
+    assert archive.archiveEntryCacheSize == sizes[u"e.jpg"] + sizes[u"b.xml"]
+    monkeypatch.setattr(FileSource, u"ARCHIVE_ENTRY_CACHE_SIZE", 50)
+    assert archive.file(entryPath(archive, u"a.xsd"), binary=True)[0].read() == archiveEntries[0][1]
+    assert list(archive.archiveEntryCache) == [u"e.jpg", u"b.xml"] # a.xsd larger than the cache, not cached
+
+def test_archiveClose(archive):
+    archive.file(entryPath(archive, u"a.xsd"), binary=True)
+    archive.close()
+    assert not archive.isOpen
+    assert archive.archiveEntries is None and archive.archiveEntryNames is None
+    assert not archive.archiveEntryCache and archive.archiveEntryCacheSize == 0
@@ -0,0 +1,67 @@
+u'''
+Tests of implicit filtering and fact partitioning (FormulaEvaluator.implicitFilter and factsPartitions), whose
+candidate facts are looked up by hashed aspect keys (aspectKey), which must find the facts and assertion results
+of filtering without the keys (as when aspects aren't keyable).
+
+tests/data/formula/formula.xml has facts of A, B and C (A + B = C except for entity E2, member M2 and typed
+member y), a nil A, and facts of other entity schemes, units, explicit and typed dimension members and periods,
+validated by the assertions and formula of formula-frm.xml.
+'''
+import pytest
+from arelle import FormulaEvaluator
+
+def factKey(fact):
+    return (unicode(fact.qname), fact.contextID, fact.unitID)
+
+def factAspects(fact): # of output facts, whose context and unit ids are in order of evaluation
+    context = fact.context
+    return (unicode(fact.qname), context.entityIdentifier, context.instantDatetime, context.endDatetime,
+            sorted((unicode(dimQname), unicode(dimValue.memberQname) if dimValue.isExplicit else dimValue.typedMember.stringValue)
+                   for dimQname, dimValue in context.qnameDims.items()),
+            fact.unit.measures, fact.value)
+
+def formulaResults(runArelle, dataFile, monkeypatch, keyed):
+    filtered = [] # facts of each implicit filtering (by variable resource label) and partitioning
+    implicitFilter = FormulaEvaluator.implicitFilter
+    factsPartitions = FormulaEvaluator.factsPartitions
+    def recordImplicitFilter(xpCtx, vb, facts, *args):
+        facts = implicitFilter(xpCtx, vb, facts, *args)
+        filtered.append((u"implicitFilter", vb.var.xlinkLabel, sorted(factKey(fact) for fact in facts)))
+        return facts
+    def recordFactsPartitions(xpCtx, facts, aspects):
+        partitions = factsPartitions(xpCtx, facts, aspects)
+        filtered.append((u"factsPartitions", sorted(sorted(factKey(fact) for fact in partition) for partition in partitions)))
+        return partitions
+    with monkeypatch.context() as m:
+        m.setattr(FormulaEvaluator, u"implicitFilter", recordImplicitFilter)
+        m.setattr(FormulaEvaluator, u"factsPartitions", recordFactsPartitions)
+        if not keyed:
+            m.setattr(FormulaEvaluator, u"aspectKeys", lambda facts, aspect: None)
+        cntlr = runArelle(u"--file", dataFile(u"formula", u"formula.xml"), u"--validate", u"--formulaAsserResultCounts")
+    modelXbrl = cntlr.modelManager.modelXbrl
+    counts = dict((varSet.id, (varSet.countSatisfied, varSet.countNotSatisfied)) 
+                  for varSet in modelXbrl.modelVariableSets if hasattr(varSet, u"countSatisfied"))
+    outputFacts = sorted(factAspects(fact) for fact in modelXbrl.formulaOutputInstance.facts)
+    # variable sets are evaluated in no particular order
+    messages = sorted(line for line in cntlr.logHandler.getLines() if not line.startswith((u"[info]", u"[] "))) # not timings
+    return sorted(filtered), counts, outputFacts, messages
+
+def test_keyedFilteringEqualsUnkeyed(runArelle, dataFile, monkeypatch):
+    keyed = formulaResults(runArelle, dataFile, monkeypatch, True)
+    unkeyed = formulaResults(runArelle, dataFile, monkeypatch, False)
+    filtered, counts, outputFacts, messages = keyed
+    assert filtered == unkeyed[0]
+    assert counts == unkeyed[1]
+    assert outputFacts == unkeyed[2]
+    assert messages == unkeyed[3]
+    assert counts[u"sum"] == (5, 3) # not equal for E2, M2 and y
+    assert counts[u"nils"] == (6, 3) # the nil A is bound
+    assert counts[u"uncovered"] == (0, 1) # B of M1
+    assert counts[u"seq"] == (9, 0) # A and B of each context and unit, and B of the context of the nil A
+    assert len(outputFacts) == 8 # T of each A except the nil A
+    # implicit filtering found the facts of the uncovered aspects of the other variables, including typed dimensions,
+    # A of M1 for B of M1 if D is not covered by the filter of A, and for C of any D member if covered
+    assert (u"implicitFilter", u"sum_c", [(u"f:C", u"cTy", u"USD")]) in filtered
+    aOfM1 = [(u"f:A", u"cM1", u"USD")]
+    assert [entry[2] for entry in filtered if entry[:2] == (u"implicitFilter", u"uncovered_a") and entry[2]] == [aOfM1]
+    assert [entry[2] for entry in filtered if entry[:2] == (u"implicitFilter", u"covered_a") and entry[2]] == [aOfM1] * 3
@@ -0,0 +1,76 @@
+u'''
+Tests of the formula profile (FormulaProfiler.FormulaProfile, --formulaProfile), saved as JSON or CSV, whose
+evaluation counts, variable bindings and filtered facts must be those of the evaluation of tests/data/formula,
+and whose variable set statistics must be ended when evaluation ends by an exception.
+'''
+import io, csv, json
+import pytest
+from arelle import FormulaEvaluator, XPathContext, ValidateXbrl
+from arelle.FormulaProfiler import FormulaProfile
+
+def evaluationCounts(modelXbrl):
+    counts = dict((varSet.id, varSet.countSatisfied + varSet.countNotSatisfied) 
+                  for varSet in modelXbrl.modelVariableSets if hasattr(varSet, u"countSatisfied"))
+    counts[u"total"] = len(modelXbrl.formulaOutputInstance.facts)
+    return counts
+
+def test_formulaProfileJson(runArelle, dataFile, tmpdir):
+    profileFile = unicode(tmpdir.join(u"profile.json"))
+    cntlr = runArelle(u"--file", dataFile(u"formula", u"formula.xml"), u"--validate", u"--formulaProfile", profileFile)
+    modelXbrl = cntlr.modelManager.modelXbrl
+    assert any(line.startswith(u"[formula:profile] Formula profile saved to ") for line in cntlr.logHandler.getLines())
+    with io.open(profileFile, encoding=u"utf-8") as fh:
+        profile = json.load(fh)
+    assert profile[u"instance"] == modelXbrl.modelDocument.uri
+    varSets = dict((varSet[u"id"], varSet) for varSet in profile[u"variableSets"])
+    assert dict((id, varSet[u"evaluations"]) for id, varSet in varSets.items()) == evaluationCounts(modelXbrl)
+    for varSet in varSets.values():
+        assert varSet[u"document"] == u"formula-frm.xml"
+        assert varSet[u"totalTime"] >= varSet[u"filteringTime"] >= 0 and varSet[u"chainedTime"] == 0
+    debit = varSets[u"debit"]
+    assert debit[u"type"] == u"valueAssertion" and debit[u"label"] == u"debit"
+    assert [(v[u"name"], v[u"filterings"], v[u"factsFiltered"], v[u"bindings"]) for v in debit[u"variables"]] == [
+        (u"v", 1, 17, 17)]
+    assert [(f[u"variable"], f[u"filter"], f[u"label"], f[u"calls"], f[u"factsIn"], f[u"factsOut"]) 
+            for f in debit[u"filters"]] == [(u"v", u"conceptBalance", u"debit_filter", 1, 28, 17)]
+    assert debit[u"functionCalls"] == {u"true": 17}
+    total = varSets[u"total"]
+    assert total[u"type"] == u"formula"
+    # A of each context and unit of a B (the nil A isn't bound)
+    assert sorted((v[u"name"], v[u"bindings"], v[u"factsImplicitFiltered"]) for v in total[u"variables"]) == [
+        (u"a", 8, 8), (u"b", 9, 9)]
+
+def test_formulaProfileCsv(runArelle, dataFile, tmpdir):
+    profileFile = unicode(tmpdir.join(u"profile.csv"))
+    modelXbrl = runArelle(u"--file", dataFile(u"formula", u"formula.xml"), u"--validate", 
+                          u"--formulaProfile", profileFile).modelManager.modelXbrl
+    with open(profileFile, u"rb") as fh:
+        rows = [[col.decode(u"utf-8") for col in row] for row in csv.reader(fh)]
+    assert rows[0][:4] == [u"variableSet", u"row", u"name", u"count"] and rows[0][-2:] == [u"factsIn", u"factsOut"]
+    assert dict((row[0], int(row[3])) for row in rows[1:] if row[1] in (u"valueAssertion", u"formula")
+                ) == evaluationCounts(modelXbrl)
+    assert [row[3:] for row in rows if row[:3] == [u"debit", u"filter", u"v conceptBalance debit_filter"]][0][-2:] == [
+        u"28", u"17"]
+    assert [u"debit", u"function", u"true", u"17"] in [row[:4] for row in rows]
+
+def test_formulaProfileEndedByException(runArelle, dataFile, tmpdir, monkeypatch):
+    savedProfiles = []
+    save = FormulaProfile.save
+    def recordSave(profile, profileFile):
+        savedProfiles.append((profile, list(profile.stack)))
+        save(profile, profileFile)
+    monkeypatch.setattr(FormulaProfile, u"save", recordSave)
+    evaluateVar = FormulaEvaluator.evaluateVar
+    def exceedRunTime(xpCtx, varSet, *args):
+        if varSet.id == u"sum":
+            raise XPathContext.RunTimeExceededException()
+        return evaluateVar(xpCtx, varSet, *args)
+    monkeypatch.setattr(FormulaEvaluator, u"evaluateVar", exceedRunTime)
+    monkeypatch.setattr(ValidateXbrl.ValidateXbrl, u"maxFormulaRunTime", 0, raising=False) # as set by plugins, without a timer
+    profileFile = unicode(tmpdir.join(u"profile.json"))
+    cntlr = runArelle(u"--file", dataFile(u"formula", u"formula.xml"), u"--validate", u"--formulaProfile", profileFile)
+    assert any(line.startswith(u"[formula:maxRunTime] ") for line in cntlr.logHandler.getLines())
+    assert len(savedProfiles) == 1
+    profile, stack = savedProfiles[0]
+    assert stack == [] # the statistics of sum were ended, and aren't the current variable set of later calls
+    assert u"sum" in [stats.modelVariableSet.id for stats in profile.variableSets.values()]
@@ -0,0 +1,74 @@
+u'''
+Tests of the parsing of documents ahead of their loading (ModelDocument.parseDocuments), such as of the
+documents of an inline XBRL document set, which must be found by load by the file path it resolves for
+each uri, and give the same documents as loading them sequentially.
+'''
+import os, re
+import pytest
+from arelle import ModelDocument
+
+def facts(modelXbrl):
+    return [(fact.qname, fact.contextID, fact.unitID, fact.xValue, fact.modelDocument.basename) for fact in modelXbrl.facts]
+
+def test_inlineDocumentSetParsedAhead(runArelle, dataFile):
+    loaded = runArelle(u"--file", dataFile(u"ixds", u"manifest.xml"), u"--plugins", u"inlineXbrlDocumentSet.py").modelManager.modelXbrl
+    parsedAhead = runArelle(u"--file", dataFile(u"ixds", u"manifest.xml"), u"--plugins", u"inlineXbrlDocumentSet.py", 
+                            u"--parseThreads", u"3").modelManager.modelXbrl
+    assert parsedAhead.modelManager.parseThreads == 3
+    assert facts(parsedAhead) == facts(loaded)
+    assert [fact.qname.localName for fact in loaded.facts] == [u"A", u"B", u"C", u"E", u"D"]
+    assert not parsedAhead.parsedDocuments # all were loaded
+
+@pytest.fixture
+def modelXbrl(runArelle, dataFile):
+    modelXbrl = runArelle(u"--file", dataFile(u"rels", u"rels.xml")).modelManager.modelXbrl
+    modelXbrl.modelManager.parseThreads = 2
+    return modelXbrl
+
+URIS = (u"doc1.xhtml", u"doc2.xhtml", u"doc3.xhtml")
+
+def test_parsedDocumentsLoadedByFilepath(modelXbrl, dataFile):
+    base = dataFile(u"ixds", u"manifest.xml")
+    ModelDocument.parseDocuments(modelXbrl, URIS, base)
+    assert set(modelXbrl.parsedDocuments) == set(dataFile(u"ixds", uri) for uri in URIS)
+    for uri in URIS:
+        doc = ModelDocument.load(modelXbrl, uri, base=base)
+        assert doc is not None and doc.filepath == dataFile(u"ixds", uri)
+        assert doc.filepath not in modelXbrl.parsedDocuments # taken by load
+    assert not modelXbrl.parsedDocuments
+    ModelDocument.parseDocuments(modelXbrl, URIS, base) # loaded documents are not parsed again
+    assert not modelXbrl.parsedDocuments
+
+def test_parsedDocumentsOfMappedUrls(modelXbrl, dataFile):
+    modelXbrl.modelManager.disclosureSystem.mappedPaths = [(u"http://example.com/ixds/", dataFile(u"ixds", u""))]
+    try:
+        base = u"http://example.com/ixds/manifest.xml"
+        ModelDocument.parseDocuments(modelXbrl, URIS + (u"http://example.com/other/doc1.xhtml",), base)
+        # mapped to local files, which load takes, and web files, which are left to load
+        assert set(modelXbrl.parsedDocuments) == set(dataFile(u"ixds", uri) for uri in URIS)
+        doc = ModelDocument.load(modelXbrl, u"doc2.xhtml", base=base)
+        assert doc is not None and doc.filepath == dataFile(u"ixds", u"doc2.xhtml")
+        assert dataFile(u"ixds", u"doc2.xhtml") not in modelXbrl.parsedDocuments
+    finally:
+        modelXbrl.modelManager.disclosureSystem.mappedPaths = []
+
+def test_skippedAndDisallowedDocumentsNotParsed(modelXbrl, dataFile):
+    base = dataFile(u"ixds", u"manifest.xml")
+    modelManager = modelXbrl.modelManager
+    modelManager.skipLoading = re.compile(u".*doc2[.]xhtml$")
+    ModelDocument.parseDocuments(modelXbrl, URIS, base)
+    assert set(modelXbrl.parsedDocuments) == set([dataFile(u"ixds", u"doc1.xhtml"), dataFile(u"ixds", u"doc3.xhtml")])
+    modelManager.skipLoading = None
+    modelXbrl.parsedDocuments.clear()
+    modelManager.validateDisclosureSystem = True # documents outside of the entry's directory are disallowed
+    modelXbrl.uriDir = os.path.dirname(dataFile(u"rels", u"rels.xml"))
+    try:
+        ModelDocument.parseDocuments(modelXbrl, URIS, base)
+        assert not modelXbrl.parsedDocuments
+    finally:
+        modelManager.validateDisclosureSystem = False
+
+def test_notParsedAheadSequentially(modelXbrl, dataFile):
+    modelXbrl.modelManager.parseThreads = 1
+    ModelDocument.parseDocuments(modelXbrl, URIS, dataFile(u"ixds", u"manifest.xml"))
+    assert not modelXbrl.parsedDocuments
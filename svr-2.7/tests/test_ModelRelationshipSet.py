@@ -0,0 +1,172 @@
+u'''
+Tests of relationship sets (ModelRelationshipSet), which select the relationships of their base set links'
+arcs, resolved once per link (ModelRelationshipSet.linkRelationships), and must have the relationships, order,
+and prohibition and override results of a rescan of the links' arcs for each relationship set, and whose label
+texts, found from a label index (ModelRelationshipSet.labelIndex), must be those found by a scan of the labels.
+'''
+import threading
+from collections import defaultdict
+import pytest
+from arelle import XbrlConst, ModelDtsObject
+from arelle.ModelDtsObject import ModelResource
+from arelle.PrototypeDtsObject import LocPrototype
+
+def rescannedRelationships(modelXbrl, arcrole, linkrole=None, linkqname=None, arcqname=None, includeProhibits=False):
+    # effective relationships of a relationship set, by a rescan of its links' arcs, as relationship sets were resolved
+    # before arcs were resolved once for all relationship sets of their link
+    arcroles = arcrole if isinstance(arcrole, (tuple, frozenset)) else (arcrole,)
+    modelLinks = []
+    for ar in arcroles:
+        modelLinks.extend(modelXbrl.baseSets.get((ar, linkrole, linkqname, arcqname), []))
+    relationships = {}
+    for modelLink in modelLinks:
+        for arcElement in modelLink:
+            linkChildArcrole = arcElement.get(u"{http://www.w3.org/1999/xlink}arcrole")
+            if arcElement.get(u"{http://www.w3.org/1999/xlink}type") != u"arc" or not linkChildArcrole:
+                continue
+            if arcrole == u"XBRL-dimensions":
+                if not XbrlConst.isDimensionArcrole(linkChildArcrole):
+                    continue
+            elif not (linkChildArcrole in arcroles and 
+                      (arcqname is None or arcqname == arcElement.qname) and 
+                      (linkqname is None or linkqname == modelLink.qname)):
+                continue
+            for fromResource in modelLink.labeledResources[arcElement.get(u"{http://www.w3.org/1999/xlink}from")]:
+                for toResource in modelLink.labeledResources[arcElement.get(u"{http://www.w3.org/1999/xlink}to")]:
+                    if isinstance(fromResource,(ModelResource,LocPrototype)) and isinstance(toResource,(ModelResource,LocPrototype)):
+                        modelRel = ModelDtsObject.ModelRelationship(modelLink.modelDocument, arcElement, 
+                                                                    fromResource.dereference(), toResource.dereference())
+                        equivalenceKey = modelRel.equivalenceKey
+                        if equivalenceKey not in relationships or modelRel.priorityOver(relationships[equivalenceKey]):
+                            relationships[equivalenceKey] = modelRel
+    orderRels = defaultdict(list)
+    for modelRel in relationships.values():
+        if includeProhibits or not modelRel.isProhibited:
+            orderRels[modelRel.order].append(modelRel)
+    return [modelRel for order in sorted(orderRels.keys()) for modelRel in orderRels[order]]
+
+def relationshipProperties(modelRels):
+    # relationships of each order, in order (relationships of the same order are not ordered)
+    orderRels = defaultdict(list)
+    for modelRel in modelRels:
+        orderRels[modelRel.order].append((modelRel.arcElement.modelDocument.basename, modelRel.arcElement.sourceline, # arc
+                                          modelRel.fromModelObject.objectIndex, modelRel.toModelObject.objectIndex,
+                                          modelRel.arcrole, modelRel.linkrole, modelRel.priority, modelRel.isProhibited))
+    assert [modelRel.order for modelRel in modelRels] == sorted(modelRel.order for modelRel in modelRels)
+    return [(order, sorted(orderRels[order])) for order in sorted(orderRels.keys())]
+
+R1 = u"http://example.com/role/r1"
+R2 = u"http://example.com/role/r2"
+RELATIONSHIP_SETS = ( # arcrole, linkrole, linkqname, arcqname, includeProhibits
+    (XbrlConst.parentChild,), (XbrlConst.parentChild, XbrlConst.defaultLinkRole),
+    (XbrlConst.parentChild, R1), (XbrlConst.parentChild, R2), (XbrlConst.parentChild, None, None, None, True),
+    (XbrlConst.parentChild, R1, None, None, True), (XbrlConst.parentChild, R2, None, None, True),
+    (XbrlConst.parentChild, R1, XbrlConst.qnLinkPresentationLink, XbrlConst.qnLinkPresentationArc),
+    (XbrlConst.parentChild, R2, XbrlConst.qnLinkPresentationLink, XbrlConst.qnLinkPresentationArc, True),
+    (XbrlConst.parentChild, R1, XbrlConst.qnLinkDefinitionLink, XbrlConst.qnLinkDefinitionArc),
+    (XbrlConst.parentChild, R1, XbrlConst.qnLinkPresentationLink, XbrlConst.qnLinkDefinitionArc),
+    (XbrlConst.generalSpecial,), (XbrlConst.generalSpecial, R1), (XbrlConst.generalSpecial, R1, None, None, True),
+    (XbrlConst.essenceAlias, R1), ((XbrlConst.generalSpecial, XbrlConst.essenceAlias),),
+    ((XbrlConst.parentChild, XbrlConst.generalSpecial), R1), ((XbrlConst.parentChild, XbrlConst.generalSpecial), R1, None, None, True),
+    (XbrlConst.conceptLabel,), (XbrlConst.conceptLabel, XbrlConst.defaultLinkRole, XbrlConst.qnLinkLabelLink, XbrlConst.qnLinkLabelArc),
+    (u"XBRL-dimensions",), (XbrlConst.all,), (XbrlConst.notAll,), (XbrlConst.hypercubeDimension,), 
+    (XbrlConst.dimensionDomain,), (XbrlConst.domainMember,), (XbrlConst.domainMember, None, None, None, True), 
+    (XbrlConst.dimensionDefault,),
+    )
+
+@pytest.mark.parametrize(u"instance", ((u"rels", u"rels.xml"), (u"dims", u"dims.xml")))
+def test_relationshipSetsEqualRescan(runArelle, dataFile, instance):
+    modelXbrl = runArelle(u"--file", dataFile(*instance)).modelManager.modelXbrl
+    relationshipSets = [(args, modelXbrl.relationshipSet(*args)) for args in RELATIONSHIP_SETS] # sharing link relationships
+    assert any(relSet.modelRelationships for args, relSet in relationshipSets)
+    for args, relSet in relationshipSets:
+        assert relationshipProperties(relSet.modelRelationships) == relationshipProperties(rescannedRelationships(modelXbrl, *args)), args
+
+def test_prohibitedAndOverriddenRelationships(runArelle, dataFile):
+    modelXbrl = runArelle(u"--file", dataFile(u"rels", u"rels.xml")).modelManager.modelXbrl
+    def rels(*args):
+        return [(modelRel.fromModelObject.name, modelRel.toModelObject.name, modelRel.priority, modelRel.isProhibited)
+                for modelRel in modelXbrl.relationshipSet(*args).modelRelationships]
+    assert rels(XbrlConst.parentChild, R1) == [(u"Root", u"A", 0, False), (u"Root", u"B", 1, False), (u"Root", u"E", 0, False)]
+    assert sorted(rels(XbrlConst.parentChild, R2)) == [(u"D", u"A", 2, False), (u"Root", u"D", 0, False)]
+    assert (u"D", u"B", 1, True) in rels(XbrlConst.parentChild, R2, None, None, True)
+    assert rels(XbrlConst.generalSpecial, R1) == [(u"A", u"B", 0, False)]
+    assert rels(XbrlConst.essenceAlias) == [(u"C", u"D", 0, False)]
+    assert rels(XbrlConst.parentChild, R1, XbrlConst.qnLinkPresentationLink, XbrlConst.qnLinkPresentationArc) == rels(XbrlConst.parentChild, R1)
+    assert not rels(XbrlConst.parentChild, R1, XbrlConst.qnLinkPresentationLink, XbrlConst.qnLinkDefinitionArc)
+
+def test_relationshipsSharedByRelationshipSets(runArelle, dataFile):
+    modelXbrl = runArelle(u"--file", dataFile(u"rels", u"rels.xml")).modelManager.modelXbrl
+    r1Rels = modelXbrl.relationshipSet(XbrlConst.parentChild, R1).modelRelationships
+    allRels = modelXbrl.relationshipSet(XbrlConst.parentChild).modelRelationships
+    arcRels = modelXbrl.relationshipSet(XbrlConst.parentChild, R1, XbrlConst.qnLinkPresentationLink, 
+                                        XbrlConst.qnLinkPresentationArc).modelRelationships
+    assert all(any(modelRel is otherRel for otherRel in allRels) and any(modelRel is otherRel for otherRel in arcRels)
+               for modelRel in r1Rels)
+    for modelRel in allRels: # cached hash is of the relationship's own arc
+        assert modelRel.equivalenceHash == hash(modelRel.equivalenceKey[:8])
+
+LANGS = (None, u"", u"en", u"en-US", u"en-GB", u"en-AU", u"e", u"fr", u"fr-CA", u"de", u"de-DE", u"de-AT", u"es")
+LABEL_ROLES = (XbrlConst.standardLabel, XbrlConst.terseLabel, XbrlConst.verboseLabel)
+LINKROLE_HINTS = (None, XbrlConst.defaultLinkRole, R1, R2)
+
+def labelTexts(labelRelSet, concepts):
+    return dict(((concept.name, role, lang, linkroleHint), labelRelSet.label(concept, role, lang, linkroleHint=linkroleHint))
+                for concept in concepts for role in LABEL_ROLES for lang in LANGS for linkroleHint in LINKROLE_HINTS)
+
+def scannedLabelTexts(labelRelSet, concepts): # label objects are found by a scan of the labels
+    return dict(((concept.name, role, lang, linkroleHint), getattr(labelRelSet.label(concept, role, lang, returnText=False, 
+                                                                                      linkroleHint=linkroleHint), u"textValue", None))
+                for concept in concepts for role in LABEL_ROLES for lang in LANGS for linkroleHint in LINKROLE_HINTS)
+
+@pytest.fixture
+def relsConcepts(runArelle, dataFile):
+    modelXbrl = runArelle(u"--file", dataFile(u"rels", u"rels.xml")).modelManager.modelXbrl
+    return modelXbrl, [concept for qname, concept in sorted(modelXbrl.qnameConcepts.items()) 
+                       if qname.namespaceURI == u"http://example.com/rels"]
+
+def test_labelIndexEqualsScan(relsConcepts):
+    modelXbrl, concepts = relsConcepts
+    for linkrole in (None, XbrlConst.defaultLinkRole, R1):
+        labelRelSet = modelXbrl.relationshipSet(XbrlConst.conceptLabel, linkrole)
+        indexed = labelTexts(labelRelSet, concepts)
+        assert indexed == scannedLabelTexts(labelRelSet, concepts)
+        assert indexed == labelTexts(labelRelSet, concepts) # from the index entries
+    labelRelSet = modelXbrl.relationshipSet(XbrlConst.conceptLabel)
+    texts = labelTexts(labelRelSet, concepts)
+    assert texts[u"A", XbrlConst.standardLabel, u"en-US", None] == u"A en-US" # exact
+    assert texts[u"A", XbrlConst.standardLabel, u"en-AU", XbrlConst.defaultLinkRole] == u"A en" # shorter
+    assert texts[u"A", XbrlConst.standardLabel, u"de", None] == u"A de-DE" # longer
+    assert texts[u"B", XbrlConst.standardLabel, u"en", None] == u"B en-US" # first (by arc order) of the shortest longer
+    assert texts[u"B", XbrlConst.standardLabel, u"de-AT", None] == u"B de" # shorter has preference
+    assert texts[u"A", XbrlConst.standardLabel, u"es", None] is None
+    assert texts[u"A", XbrlConst.terseLabel, u"en-US", None] == u"A terse"
+    assert texts[u"C", XbrlConst.terseLabel, u"en", None] is None
+    assert texts[u"E", XbrlConst.standardLabel, u"fr-CA", None] == u"E r1 fr" # higher priority
+    assert texts[u"E", XbrlConst.standardLabel, u"fr", XbrlConst.defaultLinkRole] == u"E fr" # of hinted link
+    assert texts[u"E", XbrlConst.standardLabel, u"fr", R2] == u"E fr" # of default link if none of hinted link
+    assert texts[u"A", XbrlConst.standardLabel, u"en-US", R1] == u"A r1 en" # shorter of hinted link
+    assert texts[u"D", XbrlConst.standardLabel, u"en", XbrlConst.defaultLinkRole] == u"D r1 en" # of other links
+
+def test_labelIndexOfRequestedConcepts(relsConcepts):
+    modelXbrl, concepts = relsConcepts
+    labelRelSet = modelXbrl.relationshipSet(XbrlConst.conceptLabel, R1)
+    conceptA = [concept for concept in concepts if concept.name == u"A"][0]
+    assert labelRelSet.label(conceptA, XbrlConst.standardLabel, u"en") == u"A r1 en"
+    assert list(labelRelSet.modelLabelIndex) == [conceptA]
+
+def test_labelIndexOfThreads(relsConcepts):
+    modelXbrl, concepts = relsConcepts
+    expected = scannedLabelTexts(modelXbrl.relationshipSet(XbrlConst.conceptLabel), concepts)
+    modelXbrl.relationshipSets.clear() # a new label relationship set is indexed by the threads
+    labelRelSet = modelXbrl.relationshipSet(XbrlConst.conceptLabel)
+    results = []
+    def requestLabels():
+        for i in _RANGE(20):
+            results.append(labelTexts(labelRelSet, concepts))
+    threads = [threading.Thread(target=requestLabels) for i in _RANGE(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 80 and all(result == expected for result in results)
@@ -0,0 +1,72 @@
+u'''
+Tests of the interning of QNames.
+'''
+import copy, pickle
+from arelle import ModelValue
+from arelle.ModelValue import QName, qname
+
+ns = u"http://example.com/rels"
+
+def test_equalQNamesAreSameObject():
+    assert QName(u"r", ns, u"A") is QName(u"r", ns, u"A")
+    assert qname(ns, u"r:A") is QName(u"r", ns, u"A")
+    assert ModelValue.qnameNsLocalName(ns, u"A") is ModelValue.qnameClarkName(u"{%s}A" % ns)
+    qn = QName(u"r", ns, u"A")
+    assert copy.copy(qn) is qn and copy.deepcopy(qn) is qn
+    assert pickle.loads(pickle.dumps(qn, pickle.HIGHEST_PROTOCOL)) is qn
+
+def test_prefixIsPartOfInternKey():
+    qn = QName(u"r", ns, u"A")
+    qnOtherPrefix = QName(u"s", ns, u"A")
+    assert qnOtherPrefix is not qn
+    assert qnOtherPrefix == qn and hash(qnOtherPrefix) == hash(qn)
+    assert unicode(qnOtherPrefix) == u"s:A"
+    assert QName(u"r", ns, u"B") != qn
+
+def test_equalByValueAfterClose(runArelle, dataFile):
+    cntlr = runArelle(u"--file", dataFile(u"rels", u"rels.xml"))
+    modelXbrl = cntlr.modelManager.modelXbrl
+    conceptQname = modelXbrl.qnameConcepts[QName(u"r", ns, u"A")].qname
+    assert conceptQname is QName(u"r", ns, u"A")
+    cntlr.modelManager.close(modelXbrl)
+    assert not ModelValue.internedQNames # cleared when no models remain loaded
+    qnAfterClose = QName(u"r", ns, u"A")
+    assert qnAfterClose is not conceptQname
+    assert qnAfterClose == conceptQname and hash(qnAfterClose) == hash(conceptQname)
+    assert {conceptQname: 1}[qnAfterClose] == 1
+
+def test_subclassNotInterned():
+    class QNameOccurrence(QName):
+        pass
+    qnSub = QNameOccurrence(u"r", ns, u"A")
+    assert type(qnSub) is QNameOccurrence
+    assert qnSub is not QName(u"r", ns, u"A") and qnSub is not QNameOccurrence(u"r", ns, u"A")
+    assert qnSub == QName(u"r", ns, u"A")
+    assert ModelValue.internedQNames[(u"r", ns, u"A")] is not qnSub
+
+def test_internedQNamesBoundedWithDtsCache(runArelle, dataFile):
+    from arelle.DtsCache import DtsCache
+    cntlr = runArelle(u"--file", dataFile(u"rels", u"rels.xml"))
+    modelManager = cntlr.modelManager
+    modelManager.close()
+    modelManager.dtsCache = DtsCache(modelManager, maxEntries=1)
+    tableSizes = []
+    for cycle in _RANGE(3):
+        for instance in ((u"rels", u"rels.xml"), (u"calc", u"calc.xml"), (u"dims", u"dims.xml")):
+            modelXbrl = modelManager.load(dataFile(*instance))
+            assert modelXbrl.dtsCacheEntry is not None
+            modelManager.close(modelXbrl)
+            # only the QNames of the cached DTS remain interned, not those of evicted DTSes and closed instances
+            entries = modelManager.dtsCache.cachedEntries()
+            assert len(entries) == 1
+            assert ModelValue.internedQNames is modelManager.internedQNames
+            assert modelManager.internedQNames == entries[0].internedQNames
+            tableSizes.append(len(modelManager.internedQNames))
+    assert modelManager.dtsCache.stats()[u"evictions"] == 8
+    assert tableSizes == tableSizes[:3] * 3 # not growing as DTSes are loaded again, nor depending on the DTSes loaded before
+    # QNames of the cached DTS are the same object as those of instances attaching it
+    dtsXbrl = modelManager.dtsCache.cachedEntries()[0].dtsXbrl
+    conceptQnames = [qn for qn in dtsXbrl.qnameConcepts if qn.namespaceURI == u"http://example.com/dims"]
+    assert conceptQnames and all(QName(qn.prefix, qn.namespaceURI, qn.localName) is qn for qn in conceptQnames)
+    modelManager.dtsCache.clear()
+    assert not modelManager.internedQNames
@@ -0,0 +1,122 @@
+u'''
+Tests of the fact indexes of ModelXbrl (factsByBalance, factsByPeriod, factsByEntity and factsByUnit), which must
+have the facts found by a scan of the instance facts after the instance is loaded and after facts are created (as by
+formula output, which rebuilds or updates indexes already built), and of the static period, entity, unit, balance
+and dimension filters which look up facts by them, whose assertion results must be those of per-fact filtering.
+'''
+import datetime
+from collections import defaultdict
+import pytest
+from arelle import ModelXbrl, ModelValue, XbrlConst
+from arelle.ModelFormulaObject import ModelFilter
+
+balances = (u"debit", u"credit", u"none")
+
+def factIndexes(modelXbrl):
+    # empty sets are of facts looked up in the indexes, but not found
+    return (dict((balance, modelXbrl.factsByBalance(balance)) for balance in balances),
+            dict((period, facts) for period, facts in modelXbrl.factsByPeriod.items() if facts),
+            dict((entityIdentifier, facts) for entityIdentifier, facts in modelXbrl.factsByEntity.items() if facts),
+            dict((measures, facts) for measures, facts in modelXbrl.factsByUnit.items() if facts))
+
+def factScans(modelXbrl):
+    byBalance = dict((balance, set()) for balance in balances)
+    byPeriod = defaultdict(set)
+    byEntity = defaultdict(set)
+    byUnit = defaultdict(set)
+    for fact in modelXbrl.factsInInstance:
+        if fact.concept is not None:
+            byBalance[fact.concept.balance or u"none"].add(fact)
+        if fact.isItem:
+            context = fact.context
+            if context.isStartEndPeriod:
+                byPeriod[context.startDatetime, context.endDatetime].add(fact)
+            elif context.isInstantPeriod:
+                byPeriod[context.instantDatetime].add(fact)
+            else:
+                byPeriod[u"forever"].add(fact)
+            byEntity[context.entityIdentifier].add(fact)
+        if fact.isNumeric:
+            byUnit[tuple(fact.unit.measures[0]), tuple(fact.unit.measures[1])].add(fact)
+    return byBalance, dict(byPeriod), dict(byEntity), dict(byUnit)
+
+def qnFormula(localName):
+    return ModelValue.qname(u"http://example.com/formula", localName)
+
+qnUSD = ModelValue.qname(XbrlConst.iso4217, u"USD")
+qnEUR = ModelValue.qname(XbrlConst.iso4217, u"EUR")
+qnJPY = ModelValue.qname(XbrlConst.iso4217, u"JPY")
+
+def test_factIndexesEqualScans(runArelle, dataFile, monkeypatch):
+    createdFacts = []
+    createFact = ModelXbrl.ModelXbrl.createFact
+    def checkedCreateFact(modelXbrl, *args, **kwargs):
+        indexes = factIndexes(modelXbrl) # built before the fact is created, and rebuilt or updated with it
+        newFact = createFact(modelXbrl, *args, **kwargs)
+        createdFacts.append((newFact, factIndexes(modelXbrl) == factScans(modelXbrl)))
+        return newFact
+    monkeypatch.setattr(ModelXbrl.ModelXbrl, u"createFact", checkedCreateFact)
+    modelXbrl = runArelle(u"--file", dataFile(u"formula", u"formula.xml"), u"--validate").modelManager.modelXbrl
+    outputInstance = modelXbrl.formulaOutputInstance
+    # formula output facts, of new contexts and units of the output instance
+    assert len(createdFacts) == 8
+    assert all(newFact.modelXbrl is outputInstance and indexesEqualScans for newFact, indexesEqualScans in createdFacts)
+    assert factIndexes(outputInstance) == factScans(outputInstance)
+    assert len(outputInstance.factsByBalance(u"none")) == 8
+    # loaded instance, and facts created in it of a new period, entity and unit
+    indexes = factIndexes(modelXbrl)
+    assert indexes == factScans(modelXbrl)
+    assert len(indexes[0][u"debit"]) == 18 and len(indexes[0][u"credit"]) == 9 and len(indexes[0][u"none"]) == 2
+    assert u"forever" not in indexes[1]
+    assert len(indexes[1][datetime.datetime(2026, 1, 1)]) == 24 # end of day instant
+    assert len(indexes[2][u"http://example.com/other", u"E1"]) == 3
+    assert len(indexes[3][(qnEUR,), ()]) == 3
+    del createdFacts[:]
+    newContext = modelXbrl.createContext(u"http://example.com/entity", u"E9", u"duration", 
+                                         datetime.date(2030, 1, 1), datetime.date(2030, 12, 31), 
+                                         qnFormula(u"F"), {}, [], [], id=u"d2030")
+    newUnit = modelXbrl.createUnit([qnJPY], [], id=u"JPY")
+    modelXbrl.createFact(qnFormula(u"F"), attributes=((u"contextRef", newContext.id), (u"unitRef", newUnit.id), 
+                                                      (u"decimals", u"0")), text=u"14")
+    modelXbrl.createFact(qnFormula(u"A"), attributes=((u"contextRef", u"c1"), (u"unitRef", newUnit.id), 
+                                                      (u"decimals", u"0")), text=u"15")
+    assert [indexesEqualScans for newFact, indexesEqualScans in createdFacts] == [True, True]
+    newF, newA = [newFact for newFact, indexesEqualScans in createdFacts]
+    indexes = factIndexes(modelXbrl)
+    assert newA in indexes[0][u"debit"] and newF in indexes[0][u"none"]
+    assert indexes[1][newContext.startDatetime, newContext.endDatetime] == set([newF])
+    assert indexes[2][u"http://example.com/entity", u"E9"] == set([newF])
+    assert indexes[3][(qnJPY,), ()] == set([newF, newA])
+
+def staticFilterCounts(modelXbrl):
+    return dict((varSet.id, (varSet.countSatisfied, varSet.countNotSatisfied)) 
+                for varSet in modelXbrl.modelVariableSets 
+                if varSet.id in staticFilterMatches)
+
+def factContextDims(fact):
+    return dict((dimQname, dimValue.memberQname) for dimQname, dimValue in fact.context.qnameDims.items() 
+                if dimValue.isExplicit)
+
+# the facts each static filter assertion of formula-frm.xml evaluates, as filtered fact by fact
+staticFilterMatches = {
+    u"debit": lambda fact: fact.concept.balance == u"debit",
+    u"notCredit": lambda fact: fact.concept.balance != u"credit",
+    u"specificIdentifier": lambda fact: fact.context.entityIdentifier == (u"http://example.com/entity", u"E2"),
+    u"specificScheme": lambda fact: fact.context.entityIdentifier[0] == u"http://example.com/other",
+    u"periodInstant": lambda fact: fact.context.instantDatetime == datetime.datetime(2026, 1, 1),
+    u"periodStart": lambda fact: fact.context.startDatetime == datetime.datetime(2025, 1, 1),
+    u"periodEnd": lambda fact: fact.context.isStartEndPeriod and fact.context.endDatetime == datetime.datetime(2025, 1, 1),
+    u"forever": lambda fact: not fact.context.isForeverPeriod,
+    u"usd": lambda fact: fact.unit.measures == ([qnUSD], []),
+    u"notEur": lambda fact: fact.unit.measures != ([qnEUR], []),
+    u"member": lambda fact: factContextDims(fact).get(qnFormula(u"D")) == qnFormula(u"M2")}
+
+def test_staticFiltersEqualFactByFact(runArelle, dataFile, monkeypatch):
+    modelXbrl = runArelle(u"--file", dataFile(u"formula", u"formula.xml"), u"--validate").modelManager.modelXbrl
+    indexed = staticFilterCounts(modelXbrl)
+    assert indexed == dict((id, (sum(1 for fact in modelXbrl.nonNilFactsInInstance if matches(fact)), 0))
+                           for id, matches in staticFilterMatches.items())
+    # filtering by evaluating the entity, period, unit and dimension filter expressions for each fact
+    monkeypatch.setattr(ModelFilter, u"hasStaticExpressions", lambda modelFilter, xpCtx, progs: False)
+    modelXbrl = runArelle(u"--file", dataFile(u"formula", u"formula.xml"), u"--validate").modelManager.modelXbrl
+    assert staticFilterCounts(modelXbrl) == indexed
@@ -0,0 +1,98 @@
+u'''
+Tests of the validation of RSS feed items and testcases by worker processes (Validate.validateByWorkers),
+whose results and log records must be set and logged in item order, and whose workers which fail or exceed
+the item timeout must be replaced, and of the validation of a small testcases index by workers, whose
+variation results and test report must be those of its sequential validation.
+'''
+import os, time, logging
+import pytest
+from arelle import Validate, ModelXbrl
+from arelle.Cntlr import Cntlr
+from arelle.ModelFormulaObject import FormulaOptions
+
+@pytest.fixture
+def modelXbrl():
+    cntlr = Cntlr(logFileName=u"logToBuffer", logFormat=u"[%(messageCode)s] %(message)s - %(file)s")
+    cntlr.modelManager.formulaOptions = FormulaOptions()
+    modelXbrl = ModelXbrl.create(cntlr.modelManager)
+    yield modelXbrl
+    modelXbrl.close()
+    logging.getLogger(u"arelle").removeHandler(cntlr.logHandler)
+
+class Val(object):
+    def __init__(self, modelXbrl):
+        self.modelXbrl = modelXbrl
+
+@pytest.mark.skipif(not hasattr(os, u"fork"), reason=u"workers are forked processes")
+def test_validateByWorkers(modelXbrl, monkeypatch):
+    createdWorkers = []
+    class ValidationWorker(Validate.ValidationWorker):
+        def __init__(self):
+            super(ValidationWorker, self).__init__()
+            createdWorkers.append(self)
+    monkeypatch.setattr(Validate, u"ValidationWorker", ValidationWorker)
+    items = [u"fast", u"sleep", u"fast", u"exit", u"fast"]
+    def itemResults(item):
+        # called in a worker process
+        if item == u"sleep":
+            time.sleep(30)
+        elif item == u"exit":
+            os._exit(1)
+        modelXbrl.error(u"test:itemError", u"error of item %(item)s", item=item)
+        return os.getpid()
+    setResults = []
+    def setItemResults(item, results, failure):
+        setResults.append((item, results, failure))
+        modelXbrl.info(u"info", u"set %(item)s", item=item)
+    startedAt = time.time()
+    Validate.validateByWorkers(Val(modelXbrl), items, 1, 2, itemResults, setItemResults)
+    assert time.time() - startedAt < 20 # the sleeping worker was terminated on timeout
+    assert [item for item, results, failure in setResults] == items
+    assert [failure for item, results, failure in setResults] == [
+        None, u"Validation exceeded 2 seconds", None, u"Validation worker process failed", None]
+    # the worker of the timed out item, and the worker which failed, were replaced
+    assert len(createdWorkers) == 3
+    pids = [results for item, results, failure in setResults if failure is None]
+    assert len(set(pids)) == 3 and os.getpid() not in pids
+    assert not any(worker.process.is_alive() for worker in createdWorkers)
+    # worker log records are logged and counted by the parent, before each item's results are set
+    messages = [line.partition(u" - ")[0] for line in modelXbrl.modelManager.cntlr.logHandler.getLines()]
+    assert messages == [u"[test:itemError] error of item fast", u"[info] set fast", u"[info] set sleep", 
+                        u"[test:itemError] error of item fast", u"[info] set fast", u"[info] set exit", 
+                        u"[test:itemError] error of item fast", u"[info] set fast"]
+    assert modelXbrl.errors == [u"test:itemError"] * 3
+    assert modelXbrl.logCount == {logging.ERROR: 3, logging.INFO: 5}
+
+def variationResults(modelXbrl):
+    return [(os.path.basename(testcase.uri), variation.id, variation.status, 
+             [unicode(code) for code in variation.actual])
+            for testcase in sorted(modelXbrl.modelDocument.referencesDocument.keys(), key=lambda doc: doc.uri)
+            for variation in testcase.testcaseVariations]
+
+@pytest.mark.skipif(not hasattr(os, u"fork"), reason=u"workers are forked processes")
+def test_testcaseWorkersEqualSequential(runArelle, dataFile, tmpdir, monkeypatch):
+    sequential = runArelle(u"--file", dataFile(u"testcases", u"index.xml"), u"--validate",
+                           u"--testReport", unicode(tmpdir.join(u"sequential.xml")))
+    sequentialResults = variationResults(sequential.modelManager.modelXbrl)
+    createdWorkers = []
+    class ValidationWorker(Validate.ValidationWorker):
+        def __init__(self):
+            super(ValidationWorker, self).__init__()
+            createdWorkers.append(self)
+    monkeypatch.setattr(Validate, u"ValidationWorker", ValidationWorker)
+    byWorkers = runArelle(u"--file", dataFile(u"testcases", u"index.xml"), u"--validate", u"--testcaseWorkers", u"2",
+                          u"--testReport", unicode(tmpdir.join(u"byWorkers.xml")))
+    assert len(createdWorkers) == 2
+    byWorkersResults = variationResults(byWorkers.modelManager.modelXbrl)
+    assert byWorkersResults == sequentialResults
+    assert len(byWorkersResults) == 5
+    assert set(status for testcase, id, status, actual in byWorkersResults) == set([u"pass", u"fail", u"not loadable"])
+    assert tmpdir.join(u"byWorkers.xml").read() == tmpdir.join(u"sequential.xml").read()
+    # errors logged by workers are counted and captured by the testcases index model
+    indexModelXbrl = byWorkers.modelManager.modelXbrl
+    workerErrors = indexModelXbrl.errors
+    for testcase, id, status, actual in byWorkersResults:
+        for code in actual:
+            assert code in workerErrors
+    assert (sum(count for level, count in indexModelXbrl.logCount.items() if level >= indexModelXbrl.errorCaptureLevel) >=
+            sum(len(actual) for testcase, id, status, actual in byWorkersResults))
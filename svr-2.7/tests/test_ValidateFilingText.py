@@ -0,0 +1,39 @@
+u'''
+Tests of the disclosure system check of file text (ValidateFilingText.checkfile), which must report disallowed
+characters, and give the parsed elements source lines, by the lines of the file read as text, whatever its line
+ends and XML declaration.
+'''
+import py, pytest
+
+@pytest.fixture
+def instanceLines(dataFile):
+    lines = py.path.local(dataFile(u"rels", u"rels.xml")).read_text(u"utf-8").splitlines()
+    lines[23] = lines[23].replace(u"Some text", u"Some t\xe9xt &foo;") # disallowed character and entity
+    return lines
+
+@pytest.fixture
+def relsDir(dataFile, tmpdir):
+    relsDir = tmpdir.join(u"rels")
+    py.path.local(dataFile(u"rels")).copy(relsDir)
+    return relsDir
+
+def runChecked(runArelle, relsDir, name, data):
+    relsDir.join(name).write_binary(data)
+    cntlr = runArelle(u"--file", unicode(relsDir.join(name)), u"--disclosureSystem", u"efm")
+    messages = sorted(line.rpartition(u" - ")[0].replace(name, u"{file}") for line in cntlr.logHandler.getLines()
+                      if u"EFM.5.02" in line)
+    return messages, [(fact.qname, fact.sourceline) for fact in cntlr.modelManager.modelXbrl.facts]
+
+@pytest.mark.parametrize(u"lineEnd", (u"\r\n", u"\r"))
+@pytest.mark.parametrize(u"multiLineDeclaration", (False, True))
+def test_lineNumbersOfLineEnds(runArelle, relsDir, instanceLines, lineEnd, multiLineDeclaration):
+    if multiLineDeclaration:
+        instanceLines[0:1] = [u'<?xml version="1.0"', u' encoding="utf-8"?>']
+    lfMessages, lfFactLines = runChecked(runArelle, relsDir, u"lf.xml",
+                                         (u"\n".join(instanceLines) + u"\n").encode(u"utf-8"))
+    line = 25 if multiLineDeclaration else 24
+    assert lfMessages == [u"[EFM.5.02.01.01] Disallowed character '\xe9' in file {{file}} at line {0} col 46".format(line),
+                          u"[EFM.5.02.02.06] Disallowed entity code &foo; in file {{file}} line {0} column 50".format(line)]
+    assert lfFactLines[-1][1] == line # r:E
+    assert runChecked(runArelle, relsDir, u"other.xml",
+                      (lineEnd.join(instanceLines) + lineEnd).encode(u"utf-8")) == (lfMessages, lfFactLines)
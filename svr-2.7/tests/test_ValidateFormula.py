@@ -0,0 +1,62 @@
+u'''
+Tests of the evaluation of independent assertions by worker processes (ValidateFormula.evaluateByWorkers,
+--formulaWorkers), whose assertion result counts and log records, logged by the parent process, must be those
+of their evaluation in process.
+
+The seq assertion of tests/data/formula/formula-frm.xml isn't traced, as its bound sequences of facts are in
+no particular order.
+'''
+import os, logging
+import pytest
+from arelle import ValidateFormula
+from test_FormulaEvaluator import factAspects
+
+runIDs = u"|".join((u"sum", u"nils", u"uncovered", u"covered", u"debit", u"notCredit", u"entity", u"specificIdentifier",
+                    u"specificScheme", u"periodInstant", u"periodStart", u"periodEnd", u"forever", u"usd", u"notEur",
+                    u"member", u"total"))
+
+def evaluationResults(runArelle, dataFile, monkeypatch, *args):
+    inProcess = [] # variable sets evaluated by this process
+    byWorkers = []
+    evaluateVariableSet = ValidateFormula.evaluateVariableSet
+    evaluateByWorkers = ValidateFormula.evaluateByWorkers
+    parentPid = os.getpid()
+    def recordEvaluateVariableSet(val, xpathContext, modelVariableSet):
+        if os.getpid() == parentPid:
+            inProcess.append(modelVariableSet.id)
+        evaluateVariableSet(val, xpathContext, modelVariableSet)
+    def recordEvaluateByWorkers(val, xpathContext, modelVariableSets, numWorkers):
+        byWorkers.extend(modelVariableSet.id for modelVariableSet in modelVariableSets)
+        evaluateByWorkers(val, xpathContext, modelVariableSets, numWorkers)
+    with monkeypatch.context() as m:
+        m.setattr(ValidateFormula, u"evaluateVariableSet", recordEvaluateVariableSet)
+        m.setattr(ValidateFormula, u"evaluateByWorkers", recordEvaluateByWorkers)
+        cntlr = runArelle(u"--file", dataFile(u"formula", u"formula.xml"), u"--validate", u"--formulaAsserResultCounts",
+                          u"--formulaVarSetExprResult", u"--formulaRunIDs", runIDs, *args)
+    modelXbrl = cntlr.modelManager.modelXbrl
+    counts = dict((varSet.id, (varSet.countSatisfied, varSet.countNotSatisfied)) 
+                  for varSet in modelXbrl.modelVariableSets if hasattr(varSet, u"countSatisfied"))
+    outputFacts = sorted(factAspects(fact) for fact in modelXbrl.formulaOutputInstance.facts)
+    # variable sets are evaluated in no particular order
+    messages = sorted(line for line in cntlr.logHandler.getLines() if not line.startswith((u"[info]", u"[] "))) # not timings
+    return (sorted(inProcess), sorted(byWorkers)), counts, outputFacts, messages, modelXbrl.logCount, sorted(modelXbrl.errors)
+
+@pytest.mark.skipif(not hasattr(os, u"fork"), reason=u"workers are forked processes")
+def test_formulaWorkersEqualInProcess(runArelle, dataFile, monkeypatch):
+    inProcess = evaluationResults(runArelle, dataFile, monkeypatch)
+    byWorkers = evaluationResults(runArelle, dataFile, monkeypatch, u"--formulaWorkers", u"2")
+    evaluated, counts, outputFacts, messages, logCount, errors = byWorkers
+    assert inProcess[0] == (sorted(runIDs.split(u"|")), [])
+    # the assertions were evaluated by workers, the formula in process
+    assert evaluated == ([u"total"], sorted(id for id in runIDs.split(u"|") if id != u"total"))
+    assert counts == inProcess[1]
+    assert outputFacts == inProcess[2]
+    assert messages == inProcess[3]
+    assert logCount == inProcess[4]
+    assert errors == inProcess[5]
+    assert counts[u"sum"] == (5, 3) and counts[u"forever"] == (28, 0)
+    assert len(outputFacts) == 8
+    # evaluation traces logged by the workers
+    assert sum(u" evaluations : " in line for line in messages) == 16
+    assert sum(line.startswith(u"[formula:trace] Value Assertion ") and u"\nEvaluated: " in line for line in messages) > 100
+    assert logCount[logging.INFO] > 100
@@ -0,0 +1,87 @@
+u'''
+Tests of the validation of calculation, essence-alias and requires-element relationships of a streamed
+instance (ValidateXbrlCalcs.StreamingValidateXbrlCalcs, by the streamingExtensions plugin), which must report
+the same inconsistencies as the validation of the loaded instance (ValidateXbrlCalcs.validate),
+and of the summation of bindings as scaled integers (ValidateXbrlCalcs.ScaledSums), which must give the
+same decimals as summing their terms as decimals.
+'''
+from collections import defaultdict
+import decimal
+import pytest
+from arelle import ValidateXbrlCalcs
+
+def inconsistencies(logLines):
+    return sorted(line.rpartition(u" - ")[0] # without the file and lines of the facts
+                  for line in logLines
+                  if line.startswith(u"[xbrl.5.2"))
+
+def test_streamedEqualsLoaded(runArelle, dataFile):
+    loaded = runArelle(u"--file", dataFile(u"calc", u"calc.xml"), u"--validate", u"--calcDecimals", 
+                       u"--plugins", u"streamingExtensions.py")
+    loadedLines = loaded.logHandler.getLines()
+    assert not any(u"streamingExtensions:streaming" in line for line in loadedLines)
+    streamed = runArelle(u"--file", dataFile(u"calc", u"calc-stream.xml"), u"--validate", u"--calcDecimals", 
+                         u"--plugins", u"streamingExtensions.py")
+    streamedLines = streamed.logHandler.getLines()
+    assert any(u"streamingExtensions:streaming" in line for line in streamedLines)
+    assert not any(u"itemContextRef" in line for line in streamedLines) # facts bound before their contexts were dropped
+    assert inconsistencies(streamedLines) == inconsistencies(loadedLines)
+    messages = u"\n".join(inconsistencies(loadedLines))
+    assert u"reported sum 10 computed sum 15 context c1" in messages # tuple tup1
+    assert u"reported sum 40 computed sum 41 context c2" in messages # tuple tup5
+    assert u"reported sum 90 computed sum 141 context c2" in messages # with the item of tup5
+    assert u"context c1 unit EUR" not in messages # duplicate items, nil sum, nested tuple duplicates
+    assert u"essenceAliasUnitsInconsistency" in messages and u"requiresElementInconsistency" in messages
+    assert len(inconsistencies(loadedLines)) == 5
+
+def test_streamedStateOfCalculationConcepts(runArelle, dataFile):
+    modelXbrl = runArelle(u"--file", dataFile(u"calc", u"calc.xml")).modelManager.modelXbrl
+    calcsValidator = ValidateXbrlCalcs.StreamingValidateXbrlCalcs(modelXbrl, inferDecimals=False)
+    calcsValidator.validateFacts(modelXbrl.facts)
+    boundConcepts = set(calcKey[0].name for calcKey in calcsValidator.calcKeyFactCounts)
+    assert boundConcepts == set([u"T", u"A", u"B", u"C"]) # no state for N, X, Y or R
+    assert set(key[0].name for key in calcsValidator.esAlFacts) == set([u"X", u"Y"])
+
+def decimalSums(terms):
+    sums = defaultdict(decimal.Decimal)
+    for bindKey, value, weight in terms:
+        sums[bindKey] += value * weight
+    return sums
+
+scaledSumsTerms = [(u"mixed", u"1.5", u"1"), (u"mixed", u"-20", u"-1"), (u"mixed", u"3.125", u"0.5"),
+                   (u"mixed", u"4E+3", u"1"),
+                   (u"zero", u"0", u"1"), (u"zero", u"0.000", u"1"), (u"zero", u"-0.00", u"-1"),
+                   (u"zeroFiner", u"12", u"1"), (u"zeroFiner", u"0.0000", u"1"),
+                   (u"cancelled", u"7.10", u"1"), (u"cancelled", u"7.1", u"-1"),
+                   (u"nan", u"1", u"1"), (u"nan", u"NaN", u"1"), (u"nan", u"2.5", u"1"),
+                   (u"inf", u"Infinity", u"1"), (u"inf", u"3", u"-1"),
+                   (u"nearMaxScaled", u"999999999999999999", u"1"), (u"nearMaxScaled", u"0.1", u"1"),
+                   (u"maxScaled", u"1000000000000000000", u"1"), (u"maxScaled", u"1", u"1"),
+                   (u"belowMaxSum", u"40000000000000000", u"1"), (u"belowMaxSum", u"-30000000000000000", u"1"),
+                   (u"aboveMaxSum", u"60000000000000000", u"1"), (u"aboveMaxSum", u"60000000000000000", u"1"),
+                   (u"shiftedAboveMaxSum", u"1E+20", u"1"), (u"shiftedAboveMaxSum", u"0.01", u"1"),
+                   (u"weightedNearMax", u"999999999.9", u"-999999999"), (u"weightedNearMax", u"1.01", u"1")]
+
+@pytest.mark.parametrize(u"withNumpy", [True, False])
+def test_scaledSumsEqualDecimalSums(withNumpy, monkeypatch):
+    if withNumpy and ValidateXbrlCalcs.numpy is None:
+        pytest.skip(u"numpy is not installed")
+    if not withNumpy:
+        monkeypatch.setattr(ValidateXbrlCalcs, u"numpy", None)
+    terms = [(bindKey, decimal.Decimal(value), decimal.Decimal(weight)) 
+             for bindKey, value, weight in scaledSumsTerms]
+    scaledSums = ValidateXbrlCalcs.ScaledSums()
+    for bindKey, value, weight in terms:
+        scaledSums.add(bindKey, value, ValidateXbrlCalcs.scaledDecimal(value), 
+                       weight, ValidateXbrlCalcs.scaledDecimal(weight))
+    sums = scaledSums.sums()
+    expected = decimalSums(terms)
+    assert set(sums) == set(expected)
+    for bindKey, expectedSum in expected.items():
+        assert sums[bindKey].as_tuple() == expectedSum.as_tuple(), bindKey # same values and exponents
+    # NaN and infinite terms, coefficients or sums which could overflow 64 bits are summed as decimals
+    assert set(scaledSums.bindKeys[i] for i in scaledSums.decimalBindings) == set(
+        [u"nan", u"inf", u"nearMaxScaled", u"maxScaled", u"aboveMaxSum", u"shiftedAboveMaxSum", u"weightedNearMax"])
+
+def test_scaledSumsWithoutTerms():
+    assert ValidateXbrlCalcs.ScaledSums().sums() == {}
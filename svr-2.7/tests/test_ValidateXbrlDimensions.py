@@ -0,0 +1,213 @@
+u'''
+Tests of dimensional validity of facts (ValidateXbrlDimensions), memoized by primary item and context dimensions
+(priItemContextValidity), which must be as determined by the hypercubes of the primary item (checkFactElrHcs).
+
+tests/data/dims/dims.xml has facts of each primary item in contexts of each combination of dimensions:
+
+- P: open scenario hypercube of D (default DDom, M3 not usable, M4 and M5 in a target role)
+- Q: inherits the hypercube of P as its domain-member
+- R: closed segment hypercube of E (no default) and typed T
+- N: as R, excluding E2 by a notAll hypercube
+- S: no hypercubes
+'''
+from collections import defaultdict
+import pytest
+from arelle import ValidateXbrlDimensions, XbrlConst
+from arelle.ModelValue import qname
+
+dimsNs = u"http://example.com/dims"
+
+# contexts of 2021 (the contexts of 2020 have the same dimensions as their 2021 namesakes)
+CONTEXT_VALIDITY = {
+    # context:    (P,     Q,     R,     N,     S)
+    u"c0":         (True,  True,  False, False, True),
+    u"cM1":        (True,  True,  False, False, True),
+    u"cM3":        (False, False, False, False, True),
+    u"cM5":        (True,  True,  False, False, True),
+    u"cSegM1":     (True,  True,  False, False, True),
+    u"cE1T":       (True,  True,  True,  True,  True),
+    u"cE2T":       (True,  True,  True,  False, True),
+    u"cE1":        (True,  True,  False, False, True),
+    u"cE1TNonDim": (True,  True,  False, False, True),
+    u"cE1TM1":     (True,  True,  True,  True,  True),
+    u"cE1TSegM1":  (True,  True,  False, False, True),
+    }
+PRIMARY_ITEMS = u"PQRNS"
+
+def expectedValidity(fact):
+    return CONTEXT_VALIDITY[fact.contextID.partition(u"_")[0]][PRIMARY_ITEMS.index(fact.qname.localName)]
+
+class Validation(object):
+    # as ValidateXbrl (or an XPathContext) for the dimensional validity functions
+    def __init__(self, modelXbrl):
+        self.modelXbrl = modelXbrl
+
+@pytest.fixture
+def modelXbrl(runArelle, dataFile):
+    return runArelle(u"--file", dataFile(u"dims", u"dims.xml")).modelManager.modelXbrl
+
+@pytest.fixture
+def val(modelXbrl):
+    val = Validation(modelXbrl)
+    ValidateXbrlDimensions.loadDimensionDefaults(val)
+    return val
+
+def test_factDimensionalValidity(modelXbrl, val):
+    assert len(modelXbrl.facts) == 75
+    for fact in modelXbrl.facts:
+        # memoized by primary item and context dimensions
+        isValid = ValidateXbrlDimensions.isFactDimensionallyValid(val, fact)
+        # by checkFactElrHcs of the hypercubes of each ELR of the primary item
+        isElrHcsValid = ValidateXbrlDimensions.isFactDimensionallyValid(val, fact, setPrototypeContextElements=True)
+        assert isValid == isElrHcsValid == expectedValidity(fact), fact.id
+
+def test_priItemContextValidityMemoized(modelXbrl, val):
+    for fact in modelXbrl.facts:
+        assert ValidateXbrlDimensions.priItemContextValidity(val, fact.concept, fact.context) == expectedValidity(fact)
+    # facts of the contexts of 2020 have the primary items and dimensions of facts of 2021
+    assert (val.dimValidityMisses, val.dimValidityHits) == (5 * 11, 5 * 4)
+    assert len(val.dimValidity) == 5 * 11
+    assert len(val.contextDimSignatures) == 15
+    assert (ValidateXbrlDimensions.contextDimSignature(val, modelXbrl.contexts[u"cE1T"]) ==
+            ValidateXbrlDimensions.contextDimSignature(val, modelXbrl.contexts[u"cE1T_2020"]))
+    assert (ValidateXbrlDimensions.contextDimSignature(val, modelXbrl.contexts[u"cE1T"]) !=
+            ValidateXbrlDimensions.contextDimSignature(val, modelXbrl.contexts[u"cE1TM1"]))
+
+def test_validationErrors(runArelle, dataFile):
+    modelXbrl = runArelle(u"--file", dataFile(u"dims", u"dims.xml"), u"--validate").modelManager.modelXbrl
+    assert set(modelXbrl.errors) == set([u"xbrldie:PrimaryItemDimensionallyInvalidError"])
+    assert len(modelXbrl.errors) == sum(not expectedValidity(fact) for fact in modelXbrl.facts)
+
+def test_dimensionDefaults(modelXbrl, val):
+    assert modelXbrl.qnameDimensionDefaults == {qname(dimsNs, u"D"): qname(dimsNs, u"DDom")}
+
+# DRS tables, compiled once per DTS, compared with navigation of the dimensional relationship sets
+
+def navigatedUsableMembers(val, dimConcept, domELR):
+    usableMembers = set()
+    unusableMembers = set()
+    ValidateXbrlDimensions.findUsableMembersInDomainELR(
+        val, val.modelXbrl.relationshipSet(XbrlConst.dimensionDomain, domELR).fromModelObject(dimConcept),
+        domELR, usableMembers, unusableMembers, defaultdict(set))
+    return frozenset(usableMembers - unusableMembers)
+
+def navigatedHypercubes(val, priItem):
+    # ((ELR, ((has-hypercube arc, isClosed, contextElement, isNegating, 
+    #          ((dimension, domain ELR, usable members or None if typed), ...)), ...)), ...)
+    modelXbrl = val.modelXbrl
+    elrHypercubes = []
+    for ELR, hcRels in sorted(ValidateXbrlDimensions.findPriItemElrHcRels(val, priItem).items()):
+        hypercubes = []
+        for hasHcRel in hcRels:
+            dimELR = (hasHcRel.targetRole or ELR)
+            dims = []
+            for hcDimRel in modelXbrl.relationshipSet(XbrlConst.hypercubeDimension, dimELR).fromModelObject(hasHcRel.toModelObject):
+                dimConcept = hcDimRel.toModelObject
+                domELR = (hcDimRel.targetRole or dimELR)
+                dims.append((dimConcept, domELR, 
+                             None if dimConcept.isTypedDimension else navigatedUsableMembers(val, dimConcept, domELR)))
+            hypercubes.append((hasHcRel.arcElement, hasHcRel.isClosed, hasHcRel.contextElement, 
+                               hasHcRel.arcrole == XbrlConst.notAll, tuple(dims)))
+        elrHypercubes.append((ELR, tuple(hypercubes)))
+    return tuple(elrHypercubes)
+
+def compiledHypercubes(val, priItem):
+    return tuple(sorted((ELR, tuple((drsHc.hasHcRel.arcElement, drsHc.isClosed, drsHc.contextElement, drsHc.isNegating,
+                                     tuple((drsDim.dimConcept, drsDim.domELR, drsDim.usableMembers) for drsDim in drsHc.dims))
+                                    for drsHc in drsHcs))
+                        for ELR, drsHcs in ValidateXbrlDimensions.drsTables(val.modelXbrl).priItemHypercubes(priItem)))
+
+def navigatedFactValidity(val, fact):
+    # validity of a fact by navigation of the relationships of the hypercubes of each ELR of its primary item
+    modelXbrl = val.modelXbrl
+    context = fact.context
+    hasElrHc = False
+    for ELR, hypercubes in navigatedHypercubes(val, fact.concept):
+        hasElrHc = True
+        elrValid = True
+        for hcArc, isClosed, contextElement, isNegating, dims in hypercubes:
+            modelDimValues = context.dimValues(contextElement)
+            hcValid = not (isClosed and context.nonDimValues(contextElement))
+            if hcValid:
+                for dimConcept, domELR, usableMembers in dims:
+                    if dimConcept in modelDimValues:
+                        memConcept = modelDimValues[dimConcept].member
+                    elif dimConcept in modelXbrl.dimensionDefaultConcepts:
+                        memConcept = modelXbrl.dimensionDefaultConcepts[dimConcept]
+                    else:
+                        hcValid = False
+                        continue
+                    if usableMembers is not None and memConcept not in usableMembers:
+                        hcValid = False
+            if isClosed and any(dimConcept not in set(dim[0] for dim in dims) for dimConcept in modelDimValues):
+                hcValid = False
+            if hcValid == isNegating:
+                elrValid = False
+        if elrValid:
+            return True
+    return not hasElrHc
+
+def test_drsTablesHypercubes(modelXbrl, val):
+    for qn in PRIMARY_ITEMS:
+        priItem = modelXbrl.qnameConcepts[qname(dimsNs, qn)]
+        assert compiledHypercubes(val, priItem) == navigatedHypercubes(val, priItem), qn
+    def concepts(*localNames):
+        return frozenset(modelXbrl.qnameConcepts[qname(dimsNs, localName)] for localName in localNames)
+    drsTables = ValidateXbrlDimensions.drsTables(modelXbrl)
+    assert drsTables.priItemHypercubes(modelXbrl.qnameConcepts[qname(dimsNs, u"S")]) == ()
+    (ELR, (drsHc,)), = drsTables.priItemHypercubes(modelXbrl.qnameConcepts[qname(dimsNs, u"Q")]) # inherited from P
+    assert ELR == u"http://example.com/role/dims1"
+    assert (drsHc.hcConcept.qname.localName, drsHc.isClosed, drsHc.contextElement, drsHc.isNegating) == (u"H1", False, u"scenario", False)
+    drsDim, = drsHc.dims
+    assert drsDim.usableMembers == concepts(u"DDom", u"M1", u"M2", u"M4", u"M5") # not M3, with M4 and M5 of target role
+    (ELR, (allHc, notAllHc)), = drsTables.priItemHypercubes(modelXbrl.qnameConcepts[qname(dimsNs, u"N")])
+    assert (allHc.isClosed, allHc.contextElement, allHc.isNegating) == (True, u"segment", False)
+    assert dict((hcDim.dimConcept.qname.localName, hcDim.usableMembers) for hcDim in allHc.dims) == {
+             u"E": concepts(u"EDom", u"E1", u"E2"), u"T": None}
+    assert (notAllHc.isNegating, notAllHc.dimELR) == (True, u"http://example.com/role/dims4")
+    assert [(hcDim.dimConcept.qname.localName, hcDim.domELR, hcDim.usableMembers) for hcDim in notAllHc.dims] == [
+             (u"E", u"http://example.com/role/dims4", concepts(u"E2"))]
+    # compiled once per DTS
+    assert ValidateXbrlDimensions.drsTables(modelXbrl) is drsTables
+
+def test_drsTablesDimensionUsableMembers(modelXbrl, val):
+    drsTables = ValidateXbrlDimensions.drsTables(modelXbrl)
+    D = modelXbrl.qnameConcepts[qname(dimsNs, u"D")]
+    for domELR in (u"http://example.com/role/dims1", u"http://example.com/role/dims2", u"http://example.com/role/dims3"):
+        usableMembers = navigatedUsableMembers(val, D, domELR)
+        assert drsTables.dimensionUsableMembers(D, domELR) == usableMembers
+        for memConcept in modelXbrl.qnameConcepts.values():
+            assert ValidateXbrlDimensions.dimensionMemberUsable(val, D, memConcept, domELR) == (memConcept in usableMembers)
+    assert drsTables.dimensionUsableMembers(D, u"http://example.com/role/dims2") == frozenset()
+
+def test_drsTablesFactValidity(modelXbrl, val):
+    for fact in modelXbrl.facts:
+        assert (ValidateXbrlDimensions.isFactDimensionallyValid(val, fact, setPrototypeContextElements=True) ==
+                navigatedFactValidity(val, fact) == expectedValidity(fact)), fact.id
+
+class DimVal(object):
+    # dimension value with a suggested context element, as of a formula output aspect
+    def __init__(self, memberQname, contextElement):
+        self.memberQname = memberQname
+        self.typedMember = None
+        self.contextElement = contextElement
+
+@pytest.mark.parametrize(u"priItem, dims, isValid, contextElements", (
+    (u"P", {u"D": u"M1"}, True, {u"D": u"scenario"}),
+    (u"P", {u"D": u"M3"}, False, {u"D": u"scenario"}),
+    (u"P", {u"D": DimVal(qname(dimsNs, u"M5"), u"segment")}, True, {u"D": u"scenario"}), # moved into open hypercube
+    (u"Q", {u"D": DimVal(qname(dimsNs, u"M2"), None)}, True, {u"D": u"scenario"}),
+    (u"R", {u"E": u"E1"}, False, {u"E": u"segment"}), # no typed dimension T
+    (u"N", {u"E": u"E2", u"D": u"M1"}, False, {u"E": u"segment", u"D": u"scenario"}),
+    (u"S", {u"D": u"M3"}, True, {u"D": u"scenario"}),
+    ))
+def test_factPrototypeValidity(modelXbrl, val, priItem, dims, isValid, contextElements):
+    from arelle.PrototypeInstanceObject import FactPrototype
+    from arelle.ModelFormulaObject import Aspect
+    aspectValues = {Aspect.CONCEPT: qname(dimsNs, priItem)}
+    for dim, mem in dims.items():
+        aspectValues[qname(dimsNs, dim)] = qname(dimsNs, mem) if isinstance(mem, unicode) else mem
+    factPrototype = FactPrototype(val, aspectValues)
+    assert ValidateXbrlDimensions.isFactDimensionallyValid(val, factPrototype, setPrototypeContextElements=True) == isValid
+    assert dict((dimQname.localName, dimValue.contextElement) 
+                for dimQname, dimValue in factPrototype.context.qnameDims.items()) == contextElements
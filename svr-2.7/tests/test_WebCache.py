@@ -0,0 +1,61 @@
+u'''
+Tests of the web cache prefetch queue (WebCache.prefetch), offline: the prefetch threads' retrieval is held
+until released by the test, and records the urls it is given instead of downloading them.
+'''
+import threading
+import pytest
+from arelle.CntlrCmdLine import CntlrCmdLine
+
+@pytest.fixture
+def webCache(tmpdir):
+    webCache = CntlrCmdLine().webCache
+    webCache.cacheDir = unicode(tmpdir)
+    webCache.prefetchThreads = 2
+    webCache.release = threading.Event()
+    webCache.prefetched = []
+    def prefetchFile(url):
+        webCache.release.wait()
+        webCache.prefetched.append(url)
+        webCache.setUrlCheckTime(url, u"2026-10-18T00:00:00 UTC")
+    webCache.prefetchFile = prefetchFile
+    yield webCache
+    webCache.release.set()
+
+def waitForPrefetches(webCache):
+    for event in list(webCache.prefetchingUrls.values()):
+        assert event.wait(10)
+
+def test_prefetchDedup(webCache):
+    urls = [u"http://example.com/a.xsd", u"http://example.com/b.xsd", u"http://example.com/a.xsd"]
+    webCache.prefetch(urls)
+    webCache.prefetch([u"http://example.com/b.xsd", u"http://example.com/c.xsd"])
+    assert set(webCache.prefetchingUrls) == set([u"http://example.com/a.xsd", u"http://example.com/b.xsd", u"http://example.com/c.xsd"])
+    webCache.release.set()
+    waitForPrefetches(webCache)
+    assert sorted(webCache.prefetched) == [u"http://example.com/a.xsd", u"http://example.com/b.xsd", u"http://example.com/c.xsd"]
+    assert not webCache.prefetchingUrls
+    assert webCache.cachedUrlCheckTimes[u"http://example.com/c.xsd"] == u"2026-10-18T00:00:00 UTC"
+    assert webCache.cachedUrlCheckTimesModified
+
+def test_prefetchOnlyHttpUrls(webCache):
+    webCache.prefetch([u"/tmp/a.xsd", u"file:///tmp/b.xsd", u"https://example.com/c.xsd"])
+    assert list(webCache.prefetchingUrls) == [u"https://example.com/c.xsd"]
+
+def test_prefetchQueueBound(webCache):
+    webCache.prefetchLimit = 5
+    urls = [u"http://example.com/{0}.xsd".format(i) for i in range(8)]
+    webCache.prefetch(urls)
+    assert set(webCache.prefetchingUrls) == set(urls[:5])
+    webCache.prefetch(urls) # still full, no more queued
+    assert len(webCache.prefetchingUrls) == 5
+    webCache.release.set()
+    waitForPrefetches(webCache)
+    assert sorted(webCache.prefetched) == sorted(urls[:5])
+    webCache.prefetch(urls[5:]) # queued as the prior prefetches have completed
+    waitForPrefetches(webCache)
+    assert sorted(webCache.prefetched) == sorted(urls)
+
+def test_noPrefetchOffline(webCache):
+    webCache.workOffline = True
+    webCache.prefetch([u"http://example.com/a.xsd"])
+    assert not webCache.prefetchingUrls and webCache.prefetchQueue is None
@@ -0,0 +1,62 @@
+u'''
+Tests of the compiled evaluation of XPath expression stacks (XPathContext.compileProg), which must give
+the same results, of the same types, and raise the same errors, as the interpreter (XPathContext.evaluate).
+'''
+import pytest
+from arelle.XPathContext import XPathException
+
+@pytest.fixture
+def modelXbrl(runArelle, dataFile):
+    return runArelle(u"--file", dataFile(u"rels", u"rels.xml"), u"--formulaNoParsedExprCache").modelManager.modelXbrl
+
+def typedResult(xpathEvaluate, modelXbrl, expression, interpretXPath):
+    try:
+        return [(type(v), list(v) if isinstance(v, xrange) else v) # ranges are not flattened
+                for v in xpathEvaluate(modelXbrl, expression, interpretXPath)]
+    except XPathException, err:
+        return err.code
+
+@pytest.mark.parametrize(u"expression", (
+    # arithmetic and unary operators of integer, decimal and double operands
+    u"1 + 2", u"7 - 10", u"3 * 4", u"7 div 2", u"7 idiv 2", u"7 mod 3", u"-7 idiv 2", u"-7 mod 3",
+    u"1.5 + 2", u"1.5 * 2.5", u"7.5 div 2", u"1e0 + 2", u"1e0 div 4", u"- 3", u"+ 3", u"-(1.5)",
+    u"() + 1", u"1 div 0", u"1 idiv 0", u"1 mod 0", u"1.0 div 0", u"(1,2) + 1", u"'a' + 1",
+    u"sum(//r:A) + //r:B", u"//r:A[1] * 2", u"-//r:C",
+    # value comparisons
+    u"1 eq 1", u"1 ne 1", u"1 lt 2", u"2 le 1", u"2 gt 1", u"1 ge 2", u"'a' lt 'b'", u"1.5 eq 1.5",
+    u"() eq 1", u"(1,2) eq 1", u"//r:B eq 200",
+    # general comparisons
+    u"1 = 1", u"(1,2) = 2", u"(1,2) != 1", u"(1,2) < (0,1)", u"(1,2) > (2,3)", u"() = 1", u"'a' = ('b','a')",
+    u"//r:A = 150", u"//r:A > 120", u"//r:A <= 99",
+    # logical operators
+    u"1 = 1 and 2 = 2", u"1 = 1 and 2 = 3", u"1 = 2 or 2 = 2", u"1 = 2 or 2 = 3", u"() or 1", u"'' and 1",
+    u"(//r:A, 1) and 1",
+    # ranges and sequences
+    u"1 to 5", u"5 to 1", u"(1 to 3, 10)", u"count(1 to 100)", u"(1, (2, 3), ())",
+    # node set operators and node comparisons
+    u"count(//r:A | //r:B)", u"count(//r:A union //r:A)", u"count((//r:A, //r:B) intersect //r:B)",
+    u"count((//r:A, //r:B) except //r:A)", u"(//r:A)[1] is (//r:A)[1]", u"(//r:A)[1] is (//r:A)[2]",
+    u"(//r:A)[1] << (//r:A)[2]", u"(//r:A)[2] >> (//r:A)[1]", u"1 | 2",
+    # conditional and quantified expressions
+    u"if (1 = 1) then 'y' else 'n'", u"if (()) then 'y' else 'n'",
+    u"for $i in (1, 2, 3) return $i * 2", u"for $a in //r:A return $a + 1",
+    u"some $i in (1, 2, 3) satisfies $i > 2", u"every $i in (1, 2, 3) satisfies $i > 2",
+    # types
+    u"1 instance of xs:integer", u"1.5 instance of xs:integer", u"(1,2) instance of xs:integer+",
+    u"'1' cast as xs:integer", u"'a' castable as xs:integer", u"'2.5' cast as xs:decimal",
+    u"1 treat as xs:integer",
+    ))
+def test_compiledEqualsInterpreted(modelXbrl, xpathEvaluate, expression):
+    interpreted = typedResult(xpathEvaluate, modelXbrl, expression, True)
+    compiled = typedResult(xpathEvaluate, modelXbrl, expression, False)
+    assert compiled == interpreted
+
+@pytest.mark.parametrize(u"expression, result", (
+    (u"7 idiv 2", [3]),
+    (u"1.5 * 2", [3]),
+    (u"(1,2) = 2", [True]),
+    (u"count((//r:A, //r:B) except //r:A)", [1]),
+    (u"for $i in (1, 2, 3) return $i * 2", [2, 4, 6]),
+    ))
+def test_compiledResult(modelXbrl, xpathEvaluate, expression, result):
+    assert xpathEvaluate(modelXbrl, expression) == result
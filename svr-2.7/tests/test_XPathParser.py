@@ -0,0 +1,43 @@
+u'''
+Tests of parsing XPath expressions with QNames (QNameDef), which are not interned as ModelValue.QName.
+'''
+import pickle
+import pytest
+from arelle import ModelValue
+from arelle.XPathParser import QNameDef
+
+fnNs = u"http://www.w3.org/2005/xpath-functions"
+
+@pytest.fixture
+def modelXbrl(runArelle, dataFile):
+    return runArelle(u"--file", dataFile(u"rels", u"rels.xml"), u"--formulaNoParsedExprCache").modelManager.modelXbrl
+
+@pytest.mark.parametrize(u"interpretXPath", (False, True))
+@pytest.mark.parametrize(u"expression, result", (
+    (u"fn:count((1,2))", [2]),
+    (u"count((1,2,3))", [3]),
+    (u"fn:concat('a', fn:string(1))", [u"a1"]),
+    (u"xs:integer('7') + 1", [8]),
+    (u"count(//r:A)", [2]),
+    (u"sum(//r:A[@contextRef = 'i2021'])", [150]),
+    ))
+def test_prefixedQNameExpression(modelXbrl, xpathEvaluate, expression, result, interpretXPath):
+    assert xpathEvaluate(modelXbrl, expression, interpretXPath) == result
+
+def test_qnameDefNotInterned():
+    qnDef1 = QNameDef(0, u"fn", fnNs, u"count")
+    qnDef2 = QNameDef(5, u"fn", fnNs, u"count", axis=u"attribute")
+    qn = ModelValue.QName(u"fn", fnNs, u"count")
+    assert qnDef1 is not qnDef2 and qnDef1 is not qn
+    assert qnDef1 == qn and hash(qnDef1) == hash(qn)
+    assert qnDef1 != qnDef2 # different occurrences
+    assert (qnDef1.loc, qnDef1.axis, qnDef1.isAttribute) == (0, None, False)
+    assert (qnDef2.loc, qnDef2.axis, qnDef2.isAttribute) == (5, u"attribute", True)
+    assert ModelValue.internedQNames.get((u"fn", fnNs, u"count")) is not qnDef1
+
+def test_qnameDefPickle():
+    qnDef = QNameDef(3, None, fnNs, u"count", axis=u"child")
+    qnDefLoaded = pickle.loads(pickle.dumps(qnDef, pickle.HIGHEST_PROTOCOL))
+    assert type(qnDefLoaded) is QNameDef
+    assert qnDefLoaded == qnDef and hash(qnDefLoaded) == hash(qnDef)
+    assert (qnDefLoaded.loc, qnDefLoaded.axis, qnDefLoaded.unprefixed) == (3, u"child", True)